@@ -0,0 +1,178 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Helper functions for batch processing of svg files outside of inkscape
+"""
+
+import multiprocessing
+import os
+import sys
+
+# The namespace of svg elements
+SVG_NAMESPACE = "http://www.w3.org/2000/svg"
+
+def collect_svg_files(arguments):
+    """ Returns the list of svg files to process
+
+    :param arguments: files or directories. For directories, all the svg files they contain (not
+        recursively) are returned, in alphabetical order
+    :type arguments: a list of strings
+    :return: the list of svg files
+    :rtype: a list of strings
+    """
+
+    files = []
+    for argument in arguments:
+        if os.path.isdir(argument):
+            files += [os.path.join(argument, f) for f in sorted(os.listdir(argument))
+                      if f.lower().endswith(".svg")]
+        else:
+            files.append(argument)
+
+    return files
+
+def top_level_elements(root, working_area_id):
+    """ Returns the elements at the top level of the document that can be processed
+
+    :param root: the root of the svg document
+    :type root: an svg element (lxml.etree.Element object)
+    :param working_area_id: the id of the working area element, which is skipped
+    :type working_area_id: string
+    :return: all paths and groups that are direct children of root, except the working area
+    :rtype: a list of svg elements
+    """
+
+    tags = ["{" + SVG_NAMESPACE + "}path", "{" + SVG_NAMESPACE + "}g"]
+    return [e for e in root if e.tag in tags and e.get("id") != working_area_id]
+
+def run_batch(function, items, jobs):
+    """ Calls function on all items, using a pool of processes
+
+    :param function: the function to call. It must be a module level function (so that it can be
+        sent to other processes) and it should not raise exceptions
+    :type function: a function with a single parameter
+    :param items: the items to process
+    :type items: a list
+    :param jobs: the number of processes to use. If 1 (or if there is a single item or this is
+        already a worker process, which cannot start other processes), items are processed in the
+        current process
+    :type jobs: int
+    :return: the results, in the same order as items
+    :rtype: a list
+    """
+
+    if jobs <= 1 or len(items) <= 1 or multiprocessing.current_process().daemon:
+        return [function(item) for item in items]
+
+    pool = multiprocessing.Pool(min(jobs, len(items)))
+    try:
+        # chunksize 1 because the time needed to process an item can be very different
+        results = pool.map(function, items, 1)
+    finally:
+        pool.close()
+        pool.join()
+
+    return results
+
+def format_table(header, rows):
+    """ Formats a table as text with aligned columns
+
+    :param header: the names of columns
+    :type header: a list of strings
+    :param rows: the rows of the table
+    :type rows: a list of lists of values (converted to strings with str)
+    :return: the formatted table, one line per row
+    :rtype: string
+    """
+
+    text_rows = [[str(value) for value in row] for row in [header] + rows]
+    widths = [max(len(row[i]) for row in text_rows) for i in range(len(header))]
+
+    lines = []
+    for row in text_rows:
+        lines.append("  ".join(value.ljust(width) for (value, width) in zip(row, widths)).rstrip())
+    lines.insert(1, "  ".join("-" * width for width in widths))
+
+    return "\n".join(lines) + "\n"
+
+def write_summary(filename, header, rows):
+    """ Writes a table to a tab separated values file
+
+    :param filename: the name of the file to write
+    :type filename: string
+    :param header: the names of columns
+    :type header: a list of strings
+    :param rows: the rows of the table
+    :type rows: a list of lists of values (converted to strings with str)
+    """
+
+    with open(filename, "w") as outfile:
+        for row in [header] + rows:
+            outfile.write("\t".join(str(value) for value in row) + "\n")
+
+def add_batch_options(parser, output_dir):
+    """ Adds the usage and the options controlling batch processing to the parser of a plugin
+
+    :param parser: the commandline parser of the plugin
+    :type parser: an optparse.OptionParser object
+    :param output_dir: the default directory where generated files are saved
+    :type output_dir: string
+    """
+
+    parser.set_usage("%prog [options] FILE_OR_DIRECTORY...")
+    parser.add_option("", "--output-dir", action="store", type="string", dest="output_dir",
+                      default=output_dir, help="The directory where generated files are saved")
+    parser.add_option("-j", "--jobs", action="store", type="int", dest="jobs", default=1,
+                      help="The number of files processed in parallel")
+    parser.add_option("", "--summary", action="store", type="string", dest="summary",
+                      default=None, help="Also writes the summary to this file (tab separated)")
+
+def parse_batch_arguments(parser, args=None):
+    """ Parses the commandline and creates the output directory if needed
+
+    The parser exits with an error if there is no svg file to process
+    :param parser: the commandline parser, with the options added by add_batch_options
+    :type parser: an optparse.OptionParser object
+    :param args: the arguments to parse or None to parse the arguments of the script
+    :type args: a list of strings or None
+    :return: the options and the svg files to process
+    :rtype: a couple (optparse.Values object, list of strings)
+    """
+
+    (options, arguments) = parser.parse_args(args)
+    files = collect_svg_files(arguments)
+    if not files:
+        parser.error("no svg file to process")
+
+    if not os.path.isdir(options.output_dir):
+        os.makedirs(options.output_dir)
+
+    return (options, files)
+
+def process_files(function, files, options, header):
+    """ Processes files in parallel and writes the summary table
+
+    The table is written to the standard output and, if requested by the --summary option, to a
+    tab separated values file
+    :param function: the function processing a file. It must be a module level function taking a
+        couple (filename, options) and returning the exit code and the row of the summary table
+    :type function: a function
+    :param files: the files to process
+    :type files: a list of strings
+    :param options: the commandline options, passed to function
+    :type options: an optparse.Values object
+    :param header: the names of the columns of the summary table
+    :type header: a list of strings
+    :return: the highest exit code of all files
+    :rtype: int
+    """
+
+    results = run_batch(function, [(f, options) for f in files], options.jobs)
+    rows = [result[1] for result in results]
+
+    sys.stdout.write(format_table(header, rows))
+    if options.summary:
+        write_summary(options.summary, header, rows)
+
+    return max(result[0] for result in results)
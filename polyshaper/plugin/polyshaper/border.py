@@ -5,7 +5,8 @@
 Border-related classes and functions
 """
 
-from inkex import etree # pylint: disable=import-error
+from polyshaper.helpers import upsert_child, remove_child # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathgeometry import PathGeometries # pylint: disable=import-error,no-name-in-module
 
 
 class Border(object):
@@ -16,67 +17,32 @@ class Border(object):
     part near to the x axis: in inkscape the upper part (y axis goes from top to bottom)
     """
 
-    def __init__(self, paths, margin):
+    def __init__(self, paths, margin, geometries=None):
         """ Constructor
 
         :param paths: the list of paths
         :type paths: a list of lists of couples of floats (mm)
         :param margin: the internal margin
         :type margin: float (mm)
+        :param geometries: the geometric properties of paths or None to compute them
+        :type geometries: PathGeometries or None
         """
 
-        def join_aabb(first, second):
-            """ Returns the aabb resulting from the union of the two aabbs
-
-            :param first: the first aabb
-            :type first: a 4-tuple of floats: (xmin, xmax, ymin, ymax)
-            :param second: the second aabb
-            :type second: a 4-tuple of floats: (xmin, xmax, ymin, ymax)
-            :return: the aabb resulting from the union of first and second
-            :rtype: a 4-tuple of floats: (xmin, xmax, ymin, ymax)
-            """
-
-            return (min(first[0], second[0]),
-                    max(first[1], second[1]),
-                    min(first[2], second[2]),
-                    max(first[3], second[3]))
-
-        def find_aabb_of_path(path):
-            """ Returns the aabb of a path
-
-            :param path: a path
-            :type path: a list of couples of floats (mm)
-            :return: the aabb of the path
-            :rtype: a 4-tuple of floats: (xmin, xmax, ymin, ymax)
-            """
-
-            (first_x, first_y) = path[0]
-            aabb = (first_x, first_x, first_y, first_y)
-
-            for (x, y) in path[1:]: # pylint: disable=invalid-name
-                aabb = join_aabb(aabb, (x, x, y, y))
-
-            return aabb
+        if geometries is None:
+            geometries = PathGeometries()
 
         self.x_min = 0
         self.x_max = 0
         self.y_min = 0
         self.y_max = 0
 
-        aabb = None
-
-        for path in paths:
-            if path:
-                if aabb:
-                    aabb = join_aabb(aabb, find_aabb_of_path(path))
-                else:
-                    aabb = find_aabb_of_path(path)
+        boxes = [geometries.get(path).box for path in paths if path]
 
-        if aabb:
-            self.x_min = aabb[0] - margin
-            self.x_max = aabb[1] + margin
-            self.y_min = aabb[2] - margin
-            self.y_max = aabb[3] + margin
+        if boxes:
+            self.x_min = min(b[0] for b in boxes) - margin
+            self.x_max = max(b[2] for b in boxes) + margin
+            self.y_min = min(b[1] for b in boxes) - margin
+            self.y_max = max(b[3] for b in boxes) + margin
 
     def width(self):
         """ Returns the width of the border
@@ -187,25 +153,30 @@ class BorderPainter(object):
     def paint(self, working_area):
         """ Draws the border in the working area
 
+        The border is the child of the working area with id working_area.child_id("border"): it is
+        updated if already present and removed if the border is not to be drawn
         :param working_area: the working area where the path is to be drawn
         :type working_area: an instance of the WirkingAreaGenerator
         """
 
         self.working_area = working_area
+        border_id = self.working_area.child_id("border")
 
-        if self.border_is_to_be_drawn():
+        if not self.border_is_to_be_drawn():
+            remove_child(self.working_area.get_element(), border_id)
+        else:
             border_x = self.working_area.get_factor() * self.border.left()
             border_y = self.working_area.get_factor() * self.border.bottom()
             border_width = self.working_area.get_factor() * self.border.width()
             border_height = self.working_area.get_factor() * self.border.height()
             line_width = self.working_area.get_factor() * 0.25
-            etree.SubElement(self.working_area.get_element(), "rect", {
+            upsert_child(self.working_area.get_element(), "rect", {
                 'x': str(border_x),
                 'y': str(border_y),
                 'width': str(border_width),
                 'height': str(border_height),
                 'style': ("stroke-width:{0};stroke-miterlimit:4;stroke-dasharray:0.25,0.25;"
-                          "stroke-dashoffset:0;fill:none").format(line_width)})
+                          "stroke-dashoffset:0;fill:none").format(line_width)}, border_id)
 
     def border_is_to_be_drawn(self):
         """ Returns true if border has to be drawn
@@ -0,0 +1,125 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper compressed g-code files
+
+G-code can be compressed while it is generated (see compressing_write_func) and compressed files can
+be read transparently with open_gcode. gzip is always available, xz requires the lzma module (python
+3 or the backports.lzma package on python 2). This module must only depend on the standard library
+and on modules that do the same
+"""
+
+import gzip
+import io
+import sys
+from polyshaper.errors import UnsupportedCompression # pylint: disable=import-error,no-name-in-module
+
+try:
+    import lzma # pylint: disable=import-error
+except ImportError:
+    try:
+        from backports import lzma # pylint: disable=import-error,no-name-in-module
+    except ImportError:
+        lzma = None # pylint: disable=invalid-name
+
+# The extension added to the filename for each supported compression
+COMPRESSION_EXTENSIONS = {
+    "none": "",
+    "gzip": ".gz",
+    "xz": ".xz"
+}
+
+# The magic numbers at the beginning of compressed files
+GZIP_MAGIC = b"\x1f\x8b"
+XZ_MAGIC = b"\xfd7zXZ\x00"
+
+
+def compression_extension(compression):
+    """ Returns the extension to add to the name of files with the given compression
+
+    :param compression: the compression (one of the keys of COMPRESSION_EXTENSIONS)
+    :type compression: string
+    :return: the extension (empty string for no compression)
+    :rtype: string
+    :raises: UnsupportedCompression if the compression is not known
+    """
+
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise UnsupportedCompression(compression)
+
+    return COMPRESSION_EXTENSIONS[compression]
+
+
+def compressing_write_func(write_func, compression):
+    """ Returns a function that writes compressed data
+
+    The returned function takes a file opened in binary mode, wraps it in a compressor and calls
+    write_func with the wrapper, so data is compressed while it is written. If compression is
+    "none", write_func is returned unchanged (so the file must be opened in text mode)
+    :param write_func: a function taking a file in input and that writes text data
+    :type write_func: a function with one input parameter (a file object)
+    :param compression: the compression (one of the keys of COMPRESSION_EXTENSIONS)
+    :type compression: string
+    :return: the function writing compressed data
+    :rtype: a function with one input parameter (a file object opened in binary mode)
+    :raises: UnsupportedCompression if the compression is not known or not available
+    """
+
+    compression_extension(compression)
+    if compression == "none":
+        return write_func
+    elif compression == "xz" and lzma is None:
+        raise UnsupportedCompression(compression)
+
+    def compressed_write(outfile):
+        """ Writes data compressing it
+        """
+
+        if compression == "gzip":
+            # The name of outfile is not stored in the header: it is the temporary file written by
+            # OutputFiles (or a cached copy of another job). The modification time is not stored
+            # either, so that the same job always produces the same file
+            compressor = gzip.GzipFile(filename="", fileobj=outfile, mode="wb", mtime=0)
+        else:
+            compressor = lzma.LZMAFile(outfile, "wb")
+
+        try:
+            if sys.version_info[0] >= 3:
+                text_writer = io.TextIOWrapper(compressor, encoding="ascii", newline="\n")
+                write_func(text_writer)
+                # Detach so that closing the wrapper does not close the compressor twice
+                text_writer.flush()
+                text_writer.detach()
+            else:
+                write_func(compressor)
+        finally:
+            # This writes the end of the compressed stream, outfile is not closed
+            compressor.close()
+
+    return compressed_write
+
+
+def open_gcode(filename):
+    """ Opens a g-code file for reading, decompressing it if needed
+
+    The compression is detected from the content of the file, not from its name
+    :param filename: the name of the file to open
+    :type filename: string
+    :return: the opened file, lines are returned as text
+    :rtype: a file object opened in text mode
+    :raises: UnsupportedCompression if the file is compressed with xz and lzma is not available
+    """
+
+    with open(filename, "rb") as infile:
+        magic = infile.read(len(XZ_MAGIC))
+
+    if magic.startswith(GZIP_MAGIC):
+        return io.TextIOWrapper(io.BufferedReader(gzip.GzipFile(filename, "rb")),
+                                encoding="ascii")
+    elif magic == XZ_MAGIC:
+        if lzma is None:
+            raise UnsupportedCompression("xz")
+        return io.TextIOWrapper(lzma.LZMAFile(filename, "rb"), encoding="ascii")
+
+    return io.open(filename, "r", encoding="ascii")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper containment tree of closed paths
+
+The parent of a path is the smallest path containing it, so outer contours are roots, holes are
+their children, islands inside holes are children of holes and so on. Paths are assumed not to cross
+each other. Candidate parents are found with a grid index on bounding boxes, so only the paths whose
+box contains the box of a path are tested with the (expensive) point-in-polygon test
+"""
+
+from polyshaper.helpers import point_in_polygon # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathgeometry import PathGeometries # pylint: disable=import-error,no-name-in-module
+from polyshaper.spatialindex import GridIndex, box_contains, grid_cell_size # pylint: disable=import-error,no-name-in-module
+
+
+class ContainmentTree(object):
+    """ The tree of paths contained one inside the other
+
+    Paths are identified by their index in the list passed to the constructor. Paths with less than
+    three points can be contained in other paths but cannot contain anything
+    """
+
+    def __init__(self, paths, geometries=None):
+        """ Constructor
+
+        The tree is built here
+        :param paths: the closed paths
+        :type paths: a list of paths. Each path is a list of points (couples of floats)
+        :param geometries: the geometric properties of paths or None to compute them
+        :type geometries: PathGeometries or None
+        """
+
+        self.paths = paths
+        self.geometries = geometries if geometries is not None else PathGeometries()
+        self.parents = [None] * len(paths)
+        self.children_lists = [[] for dummy_path in paths]
+        self.depths = [0] * len(paths)
+        self.build()
+
+    def build(self):
+        """ Computes the parent of each path
+        """
+
+        geometries = [self.geometries.get(p) for p in self.paths]
+        boxes = [g.box for g in geometries]
+        areas = [abs(g.area) for g in geometries]
+
+        # Only paths that can contain other paths are indexed
+        index = GridIndex(grid_cell_size([b for b in boxes if b is not None]))
+        for (path_index, path) in enumerate(self.paths):
+            if len(path) > 2 and areas[path_index] > 0:
+                index.insert(path_index, boxes[path_index])
+
+        # Paths are compared by area and then by index, so that two equal paths are not the parent
+        # of each other
+        key = lambda i: (areas[i], i)
+        for (path_index, path) in enumerate(self.paths):
+            if not path:
+                continue
+
+            parent = None
+            for candidate in index.query_point(path[0]):
+                if key(candidate) <= key(path_index) or \
+                        not box_contains(boxes[candidate], boxes[path_index]):
+                    continue
+                if parent is not None and key(candidate) >= key(parent):
+                    continue
+                if point_in_polygon(path[0], self.paths[candidate]):
+                    parent = candidate
+
+            self.parents[path_index] = parent
+
+        for (path_index, parent) in enumerate(self.parents):
+            if parent is not None:
+                self.children_lists[parent].append(path_index)
+
+        for path_index in self.top_down_order():
+            parent = self.parents[path_index]
+            self.depths[path_index] = 0 if parent is None else self.depths[parent] + 1
+
+    def parent(self, index):
+        """ Returns the parent of a path
+
+        :param index: the index of the path
+        :type index: int
+        :return: the index of the smallest path containing the path or None if the path is not
+            contained in any other path
+        :rtype: int or None
+        """
+
+        return self.parents[index]
+
+    def children(self, index):
+        """ Returns the paths directly contained in a path
+
+        :param index: the index of the path
+        :type index: int
+        :return: the indices of the paths whose parent is the path, in increasing order
+        :rtype: a list of ints
+        """
+
+        return self.children_lists[index]
+
+    def depth(self, index):
+        """ Returns the number of paths containing a path
+
+        :param index: the index of the path
+        :type index: int
+        :return: the number of ancestors of the path (0 for outer contours, 1 for holes, ...)
+        :rtype: int
+        """
+
+        return self.depths[index]
+
+    def roots(self):
+        """ Returns the paths not contained in any other path
+
+        :return: the indices of the paths without parent, in increasing order
+        :rtype: a list of ints
+        """
+
+        return [i for (i, parent) in enumerate(self.parents) if parent is None]
+
+    def top_down_order(self):
+        """ Returns all paths with each path before the paths it contains
+
+        :return: the indices of all paths
+        :rtype: a list of ints
+        """
+
+        order = self.roots()
+        position = 0
+        while position < len(order):
+            order += self.children_lists[order[position]]
+            position += 1
+
+        return order
+
+    def holes_first_order(self):
+        """ Returns all paths with each path after the paths it contains
+
+        This is the order in which paths should be cut: holes are cut before the outline enclosing
+        them, when the piece is still held by the surrounding material
+        :return: the indices of all paths
+        :rtype: a list of ints
+        """
+
+        return self.top_down_order()[::-1]
@@ -0,0 +1,143 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper functionalities shared by the inkscape plugins
+
+The plugins derive from EffectMixin and inkex.Effect: the mixin adds the options not shown in the
+user interface, profiling, the instrumentation of pipeline stages, the drawing of the working area
+and the cache of generated jobs. Modules needed only when generating the g-code are imported lazily,
+to keep the startup fast
+"""
+
+import os.path
+from polyshaper.instrumentation import Instrumentation, instrumentation_enabled # pylint: disable=import-error,no-name-in-module
+from polyshaper.workingarea import WorkingAreaGenerator # pylint: disable=import-error,no-name-in-module
+
+# The id of the working area element in the svg
+WORKING_AREA_ID = "eu.polyshaper.inkscape.workarea"
+
+class EffectMixin(object):
+    """ The functionalities shared by the plugins
+
+    Classes using this must also derive from inkex.Effect, must set the gcode_file_path (the
+    directory of output files), instrumentation and generic_filename (both None at first)
+    attributes and must define the run_effect and job_name methods
+    """
+
+    def define_hidden_options(self, instrumentation_file):
+        """ Defines the commandline options that are not shown in the user interface
+
+        :param instrumentation_file: the description of the file where instrumentation is saved
+        :type instrumentation_file: string
+        """
+
+        self.OptionParser.add_option("", "--job-cache-size", action="store", type="int",
+                                     dest="job_cache_size", default=100,
+                                     help=("Maximum size in MB of the cache of generated jobs, "
+                                           "reused when the same job is generated again (0 "
+                                           "disables the cache)"))
+        self.OptionParser.add_option("", "--instrument", action="store", type="inkbool",
+                                     dest="instrument", default=False,
+                                     help=("Records time and memory used by each stage in " +
+                                           instrumentation_file))
+
+        self.OptionParser.add_option("", "--profile", action="store", type="inkbool",
+                                     dest="profile", default=False,
+                                     help=("Runs under cProfile, saving the profile in a .pstats "
+                                           "file next to the g-code"))
+        self.OptionParser.add_option("", "--profile-collapsed", action="store", type="inkbool",
+                                     dest="profile_collapsed", default=False,
+                                     help=("With --profile, also saves collapsed stacks (for flame "
+                                           "graphs) in a .collapsed file"))
+
+    def effect(self):
+        """ Main function
+
+        If requested, runs under cProfile
+        """
+
+        if self.options.profile:
+            from polyshaper.profiling import run_profiled # pylint: disable=import-error,no-name-in-module
+            run_profiled(self.run_effect, self.profile_basename, self.options.profile_collapsed)
+        else:
+            self.run_effect()
+
+    def run_effect(self):
+        """ Draws the working area and generates the g-code for the selected paths
+        """
+
+        raise NotImplementedError("Method 'run_effect' not implemented!")
+
+    def job_name(self):
+        """ Returns the base name of generated files chosen by the user
+
+        :return: the base name of generated files
+        :rtype: string
+        """
+
+        raise NotImplementedError("Method 'job_name' not implemented!")
+
+    def profile_basename(self):
+        """ Returns the name of profile files
+
+        :return: the name of the generated files (with the directory, without extension). If no file
+            was generated, a new name is returned
+        :rtype: string
+        """
+
+        if self.generic_filename is None:
+            from polyshaper.helpers import base_filename # pylint: disable=import-error,no-name-in-module
+            if not os.path.isdir(self.gcode_file_path):
+                os.makedirs(self.gcode_file_path, 0755)
+            self.generic_filename = os.path.join(self.gcode_file_path,
+                                                 base_filename(self.job_name(),
+                                                               self.gcode_file_path))
+
+        return self.generic_filename
+
+    def get_instrumentation(self):
+        """ Returns the object measuring pipeline stages
+
+        :return: the object measuring pipeline stages, disabled unless requested by the --instrument
+            option or the POLYSHAPER_INSTRUMENT environment variable
+        :rtype: an instance of Instrumentation
+        """
+
+        if self.instrumentation is None:
+            self.instrumentation = Instrumentation(instrumentation_enabled(self.options.instrument))
+
+        return self.instrumentation
+
+    def draw_working_area(self):
+        """ Draws the working area in the document
+
+        :return: the object that generated the working area
+        :rtype: an instance of WorkingAreaGenerator
+        """
+
+        # A function to convert to user units. This must be used to write units in the svg
+        to_uu = lambda value: self.unittouu(str(value) + "mm")
+
+        with self.get_instrumentation().stage("workingarea"):
+            working_area_generator = WorkingAreaGenerator(to_uu, WORKING_AREA_ID)
+            working_area_generator.set_size(self.options.dim_x, self.options.dim_y)
+            working_area_generator.upsert(self.document.getroot())
+
+        return working_area_generator
+
+    def get_job_cache(self):
+        """ Returns the cache of generated jobs
+
+        :return: the cache in the directory of output files or None if disabled by the
+            --job-cache-size option
+        :rtype: an instance of JobCache or None
+        """
+
+        from polyshaper.jobcache import JobCache, JOB_CACHE_DIRECTORY # pylint: disable=import-error,no-name-in-module
+
+        if self.options.job_cache_size <= 0:
+            return None
+
+        return JobCache(os.path.join(self.gcode_file_path, JOB_CACHE_DIRECTORY),
+                        self.options.job_cache_size * 1024 * 1024)
@@ -5,6 +5,25 @@
 Polyshaper exceptions
 """
 
+try:
+    import __builtin__ as builtins # pylint: disable=import-error
+except ImportError:
+    import builtins # pylint: disable=import-error
+
+
+def translate(message):
+    """ Translates a message
+
+    The translation function "_" is installed by inkex.localize(). Outside of inkscape (e.g. in
+    tools reading the generated files) it does not exist and the message is returned unchanged
+    :param message: the message to translate
+    :type message: string
+    :return: the translated message
+    :rtype: string
+    """
+
+    return getattr(builtins, "_", lambda m: m)(message)
+
 
 class PolyshaperError(Exception):
     """ The base class of all exceptions in the polyshaper plugin
@@ -34,7 +53,7 @@ class PolyshaperError(Exception):
         """ Converts to string
         """
 
-        return _("Unknown error, error code: ") + str(self.error_code)
+        return translate("Unknown error, error code: ") + str(self.error_code)
 
 
 class PolyshaperIOError(PolyshaperError):
@@ -58,7 +77,7 @@ class PolyshaperIOError(PolyshaperError):
         """ Converts to string
         """
 
-        return _("Error while operating on file ") + self.filename + ", " + self.message
+        return translate("Error while operating on file ") + self.filename + ", " + self.message
 
 
 class UnrecognizedSVGElement(PolyshaperError):
@@ -79,7 +98,7 @@ class UnrecognizedSVGElement(PolyshaperError):
         """ Converts to string
         """
 
-        return _("Unknown SVG element: ") + self.element
+        return translate("Unknown SVG element: ") + self.element
 
 
 class InvalidCuttingPath(PolyshaperError):
@@ -100,7 +119,7 @@ class InvalidCuttingPath(PolyshaperError):
         """ Converts to string
         """
 
-        return _("Invalid cutting path, reason: ") + self.reason
+        return translate("Invalid cutting path, reason: ") + self.reason
 
 
 class InvalidWorkpieceDimensions(PolyshaperError):
@@ -124,5 +143,47 @@ class InvalidWorkpieceDimensions(PolyshaperError):
         """ Converts to string
         """
 
-        return (_("Piece too big: maximum allowed dimensions for the selected machine is ") +
-                "{:.1f}X{:.1f}".format(self.machine_width, self.machine_height))
+        return (translate("Piece too big: maximum allowed dimensions for the selected machine "
+                          "is ") + "{:.1f}X{:.1f}".format(self.machine_width, self.machine_height))
+
+
+class UnsupportedCompression(PolyshaperError):
+    """ The exception generated when a compression method is not known or not available
+    """
+
+    def __init__(self, compression):
+        """ Constructor
+
+        :param compression: the name of the compression method
+        :type compression: string
+        """
+        PolyshaperError.__init__(self, 5)
+
+        self.compression = compression
+
+    def to_string(self):
+        """ Converts to string
+        """
+
+        return translate("Unsupported compression: ") + self.compression
+
+
+class UnsupportedJoinStrategy(PolyshaperError):
+    """ The exception generated when the strategy to join paths is not known
+    """
+
+    def __init__(self, strategy):
+        """ Constructor
+
+        :param strategy: the name of the strategy
+        :type strategy: string
+        """
+        PolyshaperError.__init__(self, 6)
+
+        self.strategy = strategy
+
+    def to_string(self):
+        """ Converts to string
+        """
+
+        return translate("Unsupported strategy to join paths: ") + self.strategy
@@ -57,17 +57,23 @@ class EngravingGCodeGenerator(object):
         self.small_distance = small_distance
         self.small_angle = small_angle
         self.gcode_str = None
+        self.write = None
 
-    def generate(self):
+    def generate(self, outfile=None):
         """ Generates the g-code
+
+        :param outfile: if not None, the g-code is written to this file while it is generated
+            instead of being kept in memory (gcode() then returns None)
+        :type outfile: a file-like object or None
         """
 
+        self.gcode_str = None
+
         if not self.tool_paths:
-            self.gcode_str = None
             return
 
-        # Initializing the gcode string
-        self.gcode_str = ""
+        lines = []
+        self.write = outfile.write if outfile is not None else lines.append
 
         self.append_to_gcode("M3")
         self.append_to_gcode("G01 F300")
@@ -78,6 +84,9 @@ class EngravingGCodeGenerator(object):
         self.append_to_gcode("G00", z=0)
         self.append_to_gcode("M5")
 
+        if outfile is None:
+            self.gcode_str = "".join(lines)
+
     def generate_single_path(self, path):
         """ Generates the g-code for a single path
 
@@ -141,16 +150,16 @@ class EngravingGCodeGenerator(object):
         :type e: float
         """
 
-        self.gcode_str += command
+        line = command
         if x is not None:
-            self.gcode_str += " X{:5.3f}".format(x)
+            line += " X{:5.3f}".format(x)
         if y is not None:
-            self.gcode_str += " Y{:5.3f}".format(y)
+            line += " Y{:5.3f}".format(y)
         if z is not None:
-            self.gcode_str += " Z{:5.3f}".format(z)
+            line += " Z{:5.3f}".format(z)
         if e is not None:
-            self.gcode_str += " E{:5.3f}".format(self.to_extrusion(e))
-        self.gcode_str += "\n"
+            line += " E{:5.3f}".format(self.to_extrusion(e))
+        self.write(line + "\n")
 
     def gcode(self):
         """ Returns the generated g-code
@@ -181,20 +190,32 @@ class CuttingGCodeGenerator(object):
         self.tool_path = tool_path
         self.speed = speed
         self.gcode_str = None
+        self.write = None
 
-    def generate(self):
+    def generate(self, outfile=None):
         """ Generates the g-code
+
+        :param outfile: if not None, the g-code is written to this file while it is generated
+            instead of being kept in memory (gcode() then returns None)
+        :type outfile: a file-like object or None
         """
 
+        self.gcode_str = None
+
         if not self.tool_path:
-            self.gcode_str = None
             return
 
-        self.gcode_str = "M3\n"
-        self.gcode_str += "G01 F{:5.3f}\n".format(self.speed)
+        lines = []
+        self.write = outfile.write if outfile is not None else lines.append
+
+        self.write("M3\n")
+        self.write("G01 F{:5.3f}\n".format(self.speed))
         for point in self.tool_path:
             self.append_to_gcode(point)
-        self.gcode_str += "M5\n"
+        self.write("M5\n")
+
+        if outfile is None:
+            self.gcode_str = "".join(lines)
 
     def append_to_gcode(self, point):
         """ Appends a move instruction to gcode
@@ -203,7 +224,7 @@ class CuttingGCodeGenerator(object):
         :type point: a couple of floats
         """
 
-        self.gcode_str += "G01 X{:5.3f} Y{:5.3f}\n".format(point[0], point[1])
+        self.write("G01 X{:5.3f} Y{:5.3f}\n".format(point[0], point[1]))
 
     def gcode(self):
         """ Returns the generated g-code
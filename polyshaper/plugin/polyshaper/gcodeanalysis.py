@@ -0,0 +1,211 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper g-code analysis
+
+This module must only depend on the standard library and on modules that do the same: it is used by
+scripts that analyze g-code files outside of inkscape
+"""
+
+from polyshaper.timeestimation import ConstantSpeedTimeEstimator # pylint: disable=import-error,no-name-in-module
+
+# The speed used for rapid movements (G00) if not specified (mm/min)
+DEFAULT_RAPID_SPEED = 3000.0
+
+# The axes whose position is tracked. X, Y and Z are linear axes, E is the tool rotation (see
+# EngravingGCodeGenerator)
+AXES = "XYZE"
+
+
+def strip_comment(line):
+    """ Removes comments from a line of g-code
+
+    Both comments starting with ; and comments between parenthesis are removed
+    :param line: the line of g-code
+    :type line: string
+    :return: the line without comments
+    :rtype: string
+    """
+
+    line = line.split(";", 1)[0]
+    while "(" in line:
+        start = line.index("(")
+        end = line.find(")", start)
+        if end == -1:
+            return line[:start]
+        line = line[:start] + " " + line[end + 1:]
+
+    return line
+
+
+class GCodeAnalyzer(object):
+    """ Computes statistics about a g-code file
+
+    The g-code is processed one line at a time, so that memory usage does not depend on the size of
+    the file. G00 and G01 movements along X, Y, Z and E are considered, as well as F (feed rate)
+    changes, G90 and G91 (absolute and relative positioning). The tool is supposed to start in
+    (0, 0, 0, 0). Lengths are computed on the X, Y and Z axes, movements along E alone (tool
+    rotations) have a length equal to the E displacement, as firmwares do. The working time is
+    estimated using the same time estimators of PathInfo
+    """
+
+    def __init__(self, estimator=None, rapid_speed=DEFAULT_RAPID_SPEED):
+        """ Constructor
+
+        :param estimator: the object estimating the working time (see timeestimation). If None a
+            ConstantSpeedTimeEstimator is used
+        :type estimator: an instance of a time estimator or None
+        :param rapid_speed: the speed of rapid movements (G00)
+        :type rapid_speed: float (mm/min)
+        """
+
+        self.estimator = estimator if estimator is not None else ConstantSpeedTimeEstimator()
+        self.rapid_speed = rapid_speed
+        self.feed_speed = 0.0
+        self.motion = None
+        self.relative = False
+        self.position = dict((axis, 0.0) for axis in AXES)
+        self.rapid_length = 0.0
+        self.feed_length = 0.0
+        self.num_moves = 0
+        self.num_lines = 0
+        self.bounding_box = None
+
+    def analyze_file(self, gcode_file):
+        """ Analyzes all the lines of a file
+
+        :param gcode_file: the file to analyze
+        :type gcode_file: an iterable of strings (e.g. a file object)
+        """
+
+        for line in gcode_file:
+            self.analyze_line(line)
+
+    def analyze_line(self, line):
+        """ Analyzes a single line of g-code
+
+        :param line: the line of g-code
+        :type line: string
+        """
+
+        self.num_lines += 1
+
+        words = strip_comment(line).upper().split()
+        target = {}
+        for word in words:
+            letter = word[0]
+            try:
+                value = float(word[1:])
+            except ValueError:
+                continue
+
+            if letter == "G":
+                if value in (0.0, 1.0):
+                    self.motion = int(value)
+                elif value == 90.0:
+                    self.relative = False
+                elif value == 91.0:
+                    self.relative = True
+            elif letter == "F":
+                self.feed_speed = value
+            elif letter in AXES:
+                target[letter] = value
+
+        if target and self.motion is not None:
+            self.move_to(target)
+
+    def move_to(self, target):
+        """ Performs a movement
+
+        :param target: the target coordinates, only for axes that move
+        :type target: a dict from axis name to value (mm)
+        """
+
+        if self.bounding_box is None:
+            # The starting position is part of the path
+            self.update_bounding_box()
+
+        displacement = {}
+        for (axis, value) in target.items():
+            new_value = self.position[axis] + value if self.relative else value
+            displacement[axis] = new_value - self.position[axis]
+            self.position[axis] = new_value
+
+        linear = tuple(displacement.get(axis, 0.0) for axis in "XYZ")
+        move_length = sum(d * d for d in linear) ** 0.5
+        if move_length == 0.0:
+            linear = (displacement.get("E", 0.0),)
+            move_length = abs(linear[0])
+        if move_length == 0.0:
+            return
+
+        self.num_moves += 1
+        if self.motion == 0:
+            self.rapid_length += move_length
+            speed = self.rapid_speed
+        else:
+            self.feed_length += move_length
+            speed = self.feed_speed
+        self.estimator.add_move(linear, speed / 60.0)
+
+        self.update_bounding_box()
+
+    def update_bounding_box(self):
+        """ Extends the bounding box to include the current position
+        """
+
+        (x, y, z) = (self.position["X"], self.position["Y"], self.position["Z"]) # pylint: disable=invalid-name
+        if self.bounding_box is None:
+            self.bounding_box = [x, x, y, y, z, z]
+        else:
+            box = self.bounding_box
+            box[0] = min(box[0], x)
+            box[1] = max(box[1], x)
+            box[2] = min(box[2], y)
+            box[3] = max(box[3], y)
+            box[4] = min(box[4], z)
+            box[5] = max(box[5], z)
+
+    def path_length(self):
+        """ Returns the total length of movements
+
+        :return: the total length of movements (rapid and feed)
+        :rtype: float (mm)
+        """
+
+        return self.rapid_length + self.feed_length
+
+    def estimated_time(self):
+        """ Returns the estimated working time
+
+        :return: the estimated working time
+        :rtype: float (s)
+        """
+
+        return self.estimator.total_time()
+
+    def statistics(self):
+        """ Returns all statistics as a dict
+
+        :return: the statistics of the analyzed g-code
+        :rtype: a dict with string keys
+        """
+
+        box = self.bounding_box if self.bounding_box is not None else [0.0] * 6
+        return {
+            "lines": self.num_lines,
+            "moves": self.num_moves,
+            "pathLength": self.path_length(),
+            "rapidLength": self.rapid_length,
+            "feedLength": self.feed_length,
+            "boundingBox": {
+                "xMin": box[0],
+                "xMax": box[1],
+                "yMin": box[2],
+                "yMax": box[3],
+                "zMin": box[4],
+                "zMax": box[5]
+            },
+            "duration": self.estimated_time()
+        }
@@ -5,18 +5,34 @@
 Helper functions and classes
 """
 
+import errno
 from itertools import count, izip # pylint: disable=no-name-in-module
 import math
 import os
 import re
+import time
 from errors import InvalidCuttingPath, PolyshaperIOError # pylint: disable=import-error,no-name-in-module
-import inkex # pylint: disable=import-error
+
+# The extensions of the files generated for each sequence number (see base_filename)
+SEQUENCE_EXTENSIONS = [".gcode", ".gcode.gz", ".gcode.xz", ".psj", ".svg", ".pstp", ".pstats"]
+
+# The size of the buffer used when writing output files (bytes)
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# The maximum time to wait for the lock on a sequence index file (seconds)
+SEQUENCE_LOCK_TIMEOUT = 2.0
+
+# A lock file older than this is considered left by a crashed process and is removed (seconds)
+SEQUENCE_LOCK_STALE_AGE = 30.0
 
 def base_filename(basename, path):
     """ Returns the full path and filename of a file to write
 
     This function appends to basename three digits to make sure files are not
-    overwritten. No extension is added.
+    overwritten. No extension is added. The next sequence number for each basename is kept in a
+    small hidden index file in path, so that the directory does not need to be listed. The directory
+    is only scanned if the index is missing or stale (i.e. files with the indexed sequence number
+    already exist)
     :param basename: the base name of the file to generate
     :type basename: string
     :param path: the path where to save the file
@@ -25,9 +41,37 @@ def base_filename(basename, path):
     :rtype: string
     """
 
+    index_filename = os.path.join(path, "." + basename + ".seq")
+    lock_filename = index_filename + ".lock"
+
+    locked = acquire_lock_file(lock_filename)
+    try:
+        sequence_number = read_sequence_index(index_filename)
+        if sequence_number is None or sequence_number_used(basename, path, sequence_number):
+            sequence_number = scan_sequence_number(basename, path)
+
+        if locked:
+            write_sequence_index(index_filename, sequence_number + 1)
+    finally:
+        if locked:
+            release_lock_file(lock_filename)
+
+    return basename + "-{:03}".format(sequence_number)
+
+def scan_sequence_number(basename, path):
+    """ Returns the next sequence number for basename looking at the files in path
+
+    :param basename: the base name of the file to generate
+    :type basename: string
+    :param path: the path where to save the file
+    :type path: string
+    :return: the next sequence number
+    :rtype: int
+    """
+
     # Filtering files in target dir
     all_files = os.listdir(path)
-    reg_expr = re.escape(basename) + "-(\\d{3}).(gcode|psj|svg)"
+    reg_expr = re.escape(basename) + "-(\\d{3}).(gcode|psj|svg|pstp|pstats)"
     filtered = [f for f in all_files if re.match(reg_expr, f)]
     filtered.sort()
 
@@ -37,29 +81,293 @@ def base_filename(basename, path):
         match = re.match(reg_expr, filtered[-1])
         sequence_number = int(match.group(1)) + 1
 
-    return basename + "-{:03}".format(sequence_number)
+    return sequence_number
+
+def sequence_number_used(basename, path, sequence_number):
+    """ Returns true if files with the given sequence number already exist
+
+    :param basename: the base name of the file to generate
+    :type basename: string
+    :param path: the path where to save the file
+    :type path: string
+    :param sequence_number: the sequence number to check
+    :type sequence_number: int
+    :return: true if at least one file with the sequence number exists
+    :rtype: boolean
+    """
+
+    name = os.path.join(path, basename + "-{:03}".format(sequence_number))
+    return any(os.path.exists(name + ext) for ext in SEQUENCE_EXTENSIONS)
+
+def read_sequence_index(index_filename):
+    """ Reads the next sequence number from an index file
+
+    :param index_filename: the name of the index file
+    :type index_filename: string
+    :return: the sequence number or None if the file does not exist or is not valid
+    :rtype: int or None
+    """
 
-def write_file(filename, write_func):
+    try:
+        with open(index_filename, "r") as index_file:
+            sequence_number = int(index_file.read().strip())
+    except (IOError, OSError, ValueError):
+        return None
+
+    return sequence_number if sequence_number >= 0 else None
+
+def write_sequence_index(index_filename, sequence_number):
+    """ Atomically writes the next sequence number to an index file
+
+    The index is only an optimization, so errors are ignored
+    :param index_filename: the name of the index file
+    :type index_filename: string
+    :param sequence_number: the sequence number to write
+    :type sequence_number: int
+    """
+
+    temp_filename = index_filename + ".tmp"
+    try:
+        with open(temp_filename, "w") as index_file:
+            index_file.write(str(sequence_number) + "\n")
+        replace_file(temp_filename, index_filename)
+    except (IOError, OSError):
+        pass
+
+def replace_file(source, destination):
+    """ Renames source to destination, replacing destination if it exists
+
+    On POSIX systems this is atomic. On Windows os.rename fails if destination exists, so
+    destination is removed first
+    :param source: the file to rename
+    :type source: string
+    :param destination: the new name of the file
+    :type destination: string
+    """
+
+    if os.name == "nt" and os.path.exists(destination):
+        os.remove(destination)
+    os.rename(source, destination)
+
+def acquire_lock_file(lock_filename):
+    """ Creates a lock file, waiting if another process holds it
+
+    Lock files older than SEQUENCE_LOCK_STALE_AGE are removed
+    :param lock_filename: the name of the lock file
+    :type lock_filename: string
+    :return: true if the lock was acquired, false in case of timeout or if the lock file cannot be
+        created
+    :rtype: boolean
+    """
+
+    deadline = time.time() + SEQUENCE_LOCK_TIMEOUT
+    while True:
+        try:
+            os.close(os.open(lock_filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                return False
+
+        try:
+            if time.time() - os.path.getmtime(lock_filename) > SEQUENCE_LOCK_STALE_AGE:
+                os.remove(lock_filename)
+                continue
+        except OSError:
+            # The lock was released in the meantime
+            continue
+
+        if time.time() > deadline:
+            return False
+        time.sleep(0.01)
+
+def release_lock_file(lock_filename):
+    """ Removes a lock file created by acquire_lock_file
+
+    :param lock_filename: the name of the lock file
+    :type lock_filename: string
+    """
+
+    try:
+        os.remove(lock_filename)
+    except OSError:
+        pass
+
+def write_file(filename, write_func, binary=False, buffer_size=None, fsync=False): # pylint: disable=too-many-arguments
     """ Writes the gcode to file
 
-    In case of errors, throws an exception of typePolyshaperIOError
+    The file is written atomically: data is first written to a temporary file that is then renamed
+    (see OutputFiles). In case of errors, throws an exception of typePolyshaperIOError
     :param filename: the full path to the file in which gcode is written
     :type filename: string
     :param write_func: a function taking a file in input and that writes data
     :type write_func: a function with one input parameter (a file object)
+    :param binary: if true the file is opened in binary mode
+    :type binary: boolean
+    :param buffer_size: the size of the write buffer. If None OUTPUT_BUFFER_SIZE is used
+    :type buffer_size: int (bytes)
+    :param fsync: if true data is flushed to disk before renaming the file
+    :type fsync: boolean
     """
 
-    try:
-        outfile = open(filename, "w")
+    output_files = OutputFiles(buffer_size, fsync)
+    output_files.add(filename, write_func, binary)
+    output_files.commit()
+
+class OutputFiles(object):
+    """ Writes a group of output files atomically
+
+    Each file is written to a temporary file in the same directory of the final file, using a large
+    buffer. Final files are only created (by renaming the temporary files) when commit is called,
+    so that a crash never leaves a truncated file with the final name. If writing any file of the
+    group fails, all temporary files are removed and no final file is created. If fsync is true,
+    data is flushed to disk before renaming, so that final files are complete even in case of power
+    failures
+    """
+
+    def __init__(self, buffer_size=None, fsync=False):
+        """ Constructor
+
+        :param buffer_size: the size of the write buffer. If None OUTPUT_BUFFER_SIZE is used
+        :type buffer_size: int (bytes)
+        :param fsync: if true data is flushed to disk before renaming files
+        :type fsync: boolean
+        """
+
+        self.buffer_size = buffer_size if buffer_size is not None else OUTPUT_BUFFER_SIZE
+        self.fsync = fsync
+        # The list of couples (temporary filename, final filename)
+        self.files = []
+
+    def add(self, filename, write_func, binary=False):
+        """ Writes a file of the group
+
+        Data is written to a temporary file, the final file is created by commit. In case of
+        errors all the files of the group are discarded and an exception of type PolyshaperIOError
+        is thrown
+        :param filename: the full path to the file to write
+        :type filename: string
+        :param write_func: a function taking a file in input and that writes data
+        :type write_func: a function with one input parameter (a file object)
+        :param binary: if true the file is opened in binary mode
+        :type binary: boolean
+        """
+
+        (directory, name) = os.path.split(filename)
+        temp_filename = os.path.join(directory, "." + name + ".tmp")
+
         try:
-            write_func(outfile)
+            outfile = open(temp_filename, "wb" if binary else "w", self.buffer_size)
         except IOError:
+            self.abort()
+            raise PolyshaperIOError(filename, _("Error when trying to open file"))
+
+        self.files.append((temp_filename, filename))
+
+        try:
+            try:
+                write_func(outfile)
+                outfile.flush()
+                if self.fsync:
+                    os.fsync(outfile.fileno())
+            finally:
+                outfile.close()
+        except (IOError, OSError):
+            self.abort()
             raise PolyshaperIOError(filename,
                                     _("Error when trying to write file, it might be corrupted"))
-        finally:
-            outfile.close()
-    except IOError:
-        raise PolyshaperIOError(filename, _("Error when trying to open file"))
+        except BaseException:
+            # Any other error of write_func (e.g. of the g-code generator or of the compressor)
+            # also discards the group
+            self.abort()
+            raise
+
+    def commit(self):
+        """ Creates all the final files of the group
+
+        Files are renamed in the order in which they were added. Existing files are first renamed
+        to backup files. If renaming fails, the files already created are removed and the backups
+        restored, so that either all files of the group are created or none. A crash while renaming
+        can still leave only part of the group (and backup files with .bak extension)
+        """
+
+        # The final files already replaced, with the name of their backup (None if the file did not
+        # exist)
+        replaced = []
+        try:
+            for (temp_filename, filename) in self.files:
+                backup_filename = None
+                if os.path.exists(filename):
+                    backup_filename = os.path.splitext(temp_filename)[0] + ".bak"
+                    replace_file(filename, backup_filename)
+                replaced.append((filename, backup_filename))
+                replace_file(temp_filename, filename)
+        except OSError:
+            self.rollback(replaced)
+            self.abort()
+            raise PolyshaperIOError(filename, _("Error when trying to write file"))
+
+        for (filename, backup_filename) in replaced:
+            if backup_filename is not None:
+                try:
+                    os.remove(backup_filename)
+                except OSError:
+                    pass
+
+        if self.fsync:
+            sync_directories(set(os.path.dirname(f) for (t, f) in self.files))
+
+        self.files = []
+
+    @staticmethod
+    def rollback(replaced):
+        """ Removes the final files created by commit and restores the files they replaced
+
+        Errors are ignored
+        :param replaced: the final files and the name of their backup (None if the file did not
+            exist)
+        :type replaced: a list of couples (string, string or None)
+        """
+
+        for (filename, backup_filename) in reversed(replaced):
+            try:
+                if backup_filename is None:
+                    os.remove(filename)
+                else:
+                    replace_file(backup_filename, filename)
+            except OSError:
+                pass
+
+    def abort(self):
+        """ Removes all the temporary files of the group
+        """
+
+        for (temp_filename, filename) in self.files: # pylint: disable=unused-variable
+            try:
+                os.remove(temp_filename)
+            except OSError:
+                pass
+
+        self.files = []
+
+def sync_directories(directories):
+    """ Flushes to disk the entries of the given directories
+
+    This is needed on POSIX systems to make renames persistent. Errors are ignored (e.g. on
+    Windows, where directories cannot be opened)
+    :param directories: the directories to sync
+    :type directories: an iterable of strings
+    """
+
+    for directory in directories:
+        try:
+            dir_fd = os.open(directory or ".", os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
 
 def squared_length(vector):
     """ Computes the squared length of a 2D vector
@@ -113,7 +421,7 @@ def distance(point1, point2):
     vector = [point1[0] - point2[0], point1[1] - point2[1]]
     return length(vector)
 
-def verify_path_closed(path, close_distance):
+def verify_path_closed(path, close_distance, geometry=None):
     """ Verifies that the given 2D path is closed
 
     If the path is not closed, an exception is thrown
@@ -121,9 +429,17 @@ def verify_path_closed(path, close_distance):
     :type path: a list of points (couples of floats)
     :param close_distance: the max allowed distance between the initial and final point
     :type close_distance: float
+    :param geometry: the geometric properties of the path (see pathgeometry.PathGeometry) or None
+        to compute the distance between the initial and final point
+    :type geometry: PathGeometry or None
     """
 
-    if path and (len(path) > 1) and (distance(path[0], path[-1]) > close_distance):
+    if not path or len(path) <= 1:
+        return
+
+    closing_distance = geometry.closing_distance if geometry is not None else \
+        distance(path[0], path[-1])
+    if closing_distance > close_distance:
         raise InvalidCuttingPath(_("path is not closed"))
 
 def point_path_squared_distance(point, path):
@@ -178,6 +494,158 @@ def rotate_closed_path(path, new_start):
     return new_path
 
 
+def signed_area(path):
+    """ Computes the signed area of a closed path
+
+    The area is positive if the path is counterclockwise in a coordinate system with the y axis
+    pointing up, negative otherwise
+    :param path: the closed path (the first and last point should be the same, if not the path is
+        closed with a segment from the last to the first point)
+    :type path: a list of points (couples of floats)
+    :return: the signed area
+    :rtype: float
+    """
+
+    if len(path) < 3:
+        return 0.0
+
+    # Using coordinates relative to the first point improves precision for far away paths
+    (x_0, y_0) = path[0]
+    area = 0.0
+    prev_x = 0.0
+    prev_y = 0.0
+    for (point_x, point_y) in path[1:]:
+        (point_x, point_y) = (point_x - x_0, point_y - y_0)
+        area += prev_x * point_y - point_x * prev_y
+        (prev_x, prev_y) = (point_x, point_y)
+
+    return area / 2.0
+
+def point_in_polygon(point, path):
+    """ Returns true if the point is inside the closed path
+
+    This uses the even-odd rule, so the result for points on the boundary is not defined
+    :param point: the point to test
+    :type point: a couple of floats
+    :param path: the closed path (the first and last point should be the same, if not the path is
+        closed with a segment from the last to the first point)
+    :type path: a list of points (couples of floats)
+    :return: true if the point is inside the path
+    :rtype: boolean
+    """
+
+    (point_x, point_y) = point
+    inside = False
+    (prev_x, prev_y) = path[-1]
+    for (cur_x, cur_y) in path:
+        if (cur_y > point_y) != (prev_y > point_y):
+            crossing_x = cur_x + (point_y - cur_y) * (prev_x - cur_x) / (prev_y - cur_y)
+            if point_x < crossing_x:
+                inside = not inside
+        (prev_x, prev_y) = (cur_x, cur_y)
+
+    return inside
+
+def winding_number(point, path):
+    """ Returns how many times a closed path winds around a point
+
+    The result for points on the boundary is not defined
+    :param point: the point to test
+    :type point: a couple of floats
+    :param path: the closed path (the first and last point should be the same, if not the path is
+        closed with a segment from the last to the first point)
+    :type path: a list of points (couples of floats)
+    :return: the number of counterclockwise turns minus the number of clockwise turns of the path
+        around the point (with the y axis pointing up). This is 0 for points outside the path
+    :rtype: int
+    """
+
+    (point_x, point_y) = point
+    winding = 0
+    (prev_x, prev_y) = path[-1]
+    for (cur_x, cur_y) in path:
+        # Positive if the point is on the left of the segment from prev to cur
+        side = (cur_x - prev_x) * (point_y - prev_y) - (point_x - prev_x) * (cur_y - prev_y)
+        if prev_y <= point_y < cur_y and side > 0:
+            winding += 1
+        elif cur_y <= point_y < prev_y and side < 0:
+            winding -= 1
+        (prev_x, prev_y) = (cur_x, cur_y)
+
+    return winding
+
+def point_segment_squared_distance(point, start, end):
+    """ Computes the squared distance between a point and a segment
+
+    :param point: the point
+    :type point: a couple of floats
+    :param start: the start of the segment
+    :type start: a couple of floats
+    :param end: the end of the segment
+    :type end: a couple of floats
+    :return: the squared distance between the point and the nearest point of the segment
+    :rtype: float
+    """
+
+    return point_segment_projection(point, start, end)[0]
+
+def point_segment_projection(point, start, end):
+    """ Computes the point of a segment nearest to a given point
+
+    :param point: the point
+    :type point: a couple of floats
+    :param start: the start of the segment
+    :type start: a couple of floats
+    :param end: the end of the segment
+    :type end: a couple of floats
+    :return: the squared distance between the point and the nearest point of the segment and the
+        position of the nearest point along the segment (0 at start, 1 at end)
+    :rtype: a couple of floats
+    """
+
+    direction = (end[0] - start[0], end[1] - start[1])
+    squared_segment_length = squared_length(direction)
+    if squared_segment_length == 0:
+        return (squared_distance(point, start), 0.0)
+
+    param = ((point[0] - start[0]) * direction[0] +
+             (point[1] - start[1]) * direction[1]) / squared_segment_length
+    param = min(max(param, 0.0), 1.0)
+
+    return (squared_distance(point, (start[0] + param * direction[0],
+                                     start[1] + param * direction[1])), param)
+
+def segments_intersection(start1, end1, start2, end2):
+    """ Computes the intersection of two segments
+
+    :param start1: the start of the first segment
+    :type start1: a couple of floats
+    :param end1: the end of the first segment
+    :type end1: a couple of floats
+    :param start2: the start of the second segment
+    :type start2: a couple of floats
+    :param end2: the end of the second segment
+    :type end2: a couple of floats
+    :return: the position of the intersection along the two segments (0 at start, 1 at end) or
+        None if segments do not intersect or are parallel
+    :rtype: a couple of floats or None
+    """
+
+    dir1 = (end1[0] - start1[0], end1[1] - start1[1])
+    dir2 = (end2[0] - start2[0], end2[1] - start2[1])
+    denominator = dir1[0] * dir2[1] - dir1[1] * dir2[0]
+    if denominator == 0:
+        return None
+
+    offset = (start2[0] - start1[0], start2[1] - start1[1])
+    param1 = (offset[0] * dir2[1] - offset[1] * dir2[0]) / denominator
+    param2 = (offset[0] * dir1[1] - offset[1] * dir1[0]) / denominator
+    if param1 < 0.0 or param1 > 1.0 or param2 < 0.0 or param2 > 1.0:
+        return None
+
+    return (param1, param2)
+
+
 def invert_transform(mat):
     """ Returns the inverse of the provided 2D 2x3 transformation matrix
 
@@ -207,24 +675,75 @@ def invert_transform(mat):
     return result
 
 
-def generate_path_svg(painter):
+def upsert_child(parent, tag, attributes, element_id=None):
+    """ Adds a child element or updates the existing child with the same id
+
+    Only the attributes with a different value are changed, so that the document is not modified if
+    the element did not change
+    :param parent: the parent element
+    :type parent: an xml element (e.g. an lxml.etree.Element object)
+    :param tag: the tag of the element
+    :type tag: string
+    :param attributes: the attributes of the element
+    :type attributes: a dict from string to string
+    :param element_id: the id of the element or None to always add a new element
+    :type element_id: string or None
+    :return: the added or updated element
+    :rtype: an xml element
+    """
+
+    if element_id is not None:
+        attributes = dict(attributes, id=element_id)
+        for child in parent:
+            if child.get("id") != element_id:
+                continue
+            if child.tag != tag:
+                parent.remove(child)
+                break
+            for (name, value) in attributes.items():
+                if child.get(name) != value:
+                    child.set(name, value)
+            return child
+
+    child = parent.makeelement(tag, attributes)
+    parent.append(child)
+
+    return child
+
+
+def remove_child(parent, element_id):
+    """ Removes the child element with the given id, if present
+
+    :param parent: the parent element
+    :type parent: an xml element (e.g. an lxml.etree.Element object)
+    :param element_id: the id of the element to remove
+    :type element_id: string
     """
-    Creates ans svg xml document with the given path
 
+    for child in parent:
+        if child.get("id") == element_id:
+            parent.remove(child)
+            return
+
+
+def write_path_svg(painter, output_file):
+    """ Writes an svg document with the path of the tool
+
+    The document is written directly to the file using the path data of the painter, without
+    building an xml tree
     :param painter: the path painter
     :type painter: an instance of ToolPathPainter
-    :return: an SVG document with the path
-    :rtype: an xml document
+    :param output_file: the file where the document is written
+    :type output_file: a file object opened for writing
     """
 
-    base_doc = inkex.etree.XML('''\
+    output_file.write('''\
 <?xml version="1.0" standalone="no"?>
 <!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">
 <svg version="1.1" xmlns="http://www.w3.org/2000/svg">
-</svg>''')
-
-    doc = inkex.etree.ElementTree(base_doc)
-
-    painter.paint(doc.getroot(), 1.0, "0,0,0")
-
-    return doc
+''')
+    if painter.path:
+        output_file.write('<path d="')
+        output_file.write(painter.path_data(1.0))
+        output_file.write('" style="' + painter.style("0,0,0") + '"/>\n')
+    output_file.write("</svg>\n")
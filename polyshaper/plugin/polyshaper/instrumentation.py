@@ -0,0 +1,150 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper pipeline instrumentation
+
+Instrumentation is opt-in: it is enabled by the hidden --instrument option of the plugins or by
+setting the POLYSHAPER_INSTRUMENT environment variable to a value different from 0. When enabled,
+the wall time, the CPU time, the increase of the peak resident memory and some item counts are
+recorded for each stage of the pipeline. This module must only depend on the standard library
+"""
+
+from contextlib import contextmanager
+import os
+import sys
+from timeit import default_timer
+
+try:
+    import resource # pylint: disable=import-error
+except ImportError:
+    # Not available on Windows, memory is not measured
+    resource = None # pylint: disable=invalid-name
+
+# The environment variable enabling instrumentation
+INSTRUMENT_ENVIRONMENT_VARIABLE = "POLYSHAPER_INSTRUMENT"
+
+
+def instrumentation_enabled(option=False):
+    """ Returns true if instrumentation is enabled
+
+    :param option: the value of the --instrument option
+    :type option: bool
+    :return: true if the option or the POLYSHAPER_INSTRUMENT environment variable is set
+    :rtype: bool
+    """
+
+    return bool(option) or os.environ.get(INSTRUMENT_ENVIRONMENT_VARIABLE, "0") not in ["", "0"]
+
+
+def cpu_time():
+    """ Returns the CPU time (user and system) used by the process
+
+    :return: the CPU time in seconds
+    :rtype: float
+    """
+
+    times = os.times()
+    return times[0] + times[1]
+
+
+def peak_rss():
+    """ Returns the peak resident memory of the process
+
+    :return: the peak resident memory in KiB or None if it cannot be measured
+    :rtype: int
+    """
+
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # On Mac OS X the value is in bytes, elsewhere it is in KiB
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
+
+
+class Instrumentation(object):
+    """ The class recording measurements of pipeline stages
+
+    Use the stage() context manager around each stage. When instrumentation is disabled stage()
+    does nothing, so it can be left in the code
+    """
+
+    def __init__(self, enabled):
+        """ Constructor
+
+        :param enabled: whether measurements are recorded or not
+        :type enabled: bool
+        """
+
+        self.enabled = enabled
+        self.recorded_stages = []
+
+    def is_enabled(self):
+        """ Returns true if measurements are recorded
+
+        :return: true if measurements are recorded
+        :rtype: bool
+        """
+
+        return self.enabled
+
+    @contextmanager
+    def stage(self, name):
+        """ A context manager measuring a stage of the pipeline
+
+        The context manager returns a dictionary where item counts of the stage can be stored
+        (e.g. counts["points"] = 42). Stages are also recorded if an exception is raised
+        :param name: the name of the stage
+        :type name: string
+        """
+
+        counts = {}
+        if not self.enabled:
+            yield counts
+            return
+
+        start_rss = peak_rss()
+        start_cpu = cpu_time()
+        start_wall = default_timer()
+        try:
+            yield counts
+        finally:
+            wall_time = default_timer() - start_wall
+            end_cpu = cpu_time()
+            end_rss = peak_rss()
+            self.recorded_stages.append({
+                "name": name,
+                "wallTime": wall_time,
+                "cpuTime": end_cpu - start_cpu,
+                "peakRssDelta": None if start_rss is None else end_rss - start_rss,
+                "counts": counts
+            })
+
+    def stages(self):
+        """ Returns the measurements of all stages, in the order they were executed
+
+        :return: a dictionary for each stage with the name ("name"), the wall time ("wallTime",
+            seconds), the CPU time ("cpuTime", seconds), the increase of the peak resident memory
+            ("peakRssDelta", KiB, None if it cannot be measured) and the item counts ("counts", a
+            dictionary)
+        :rtype: a list of dictionaries
+        """
+
+        return self.recorded_stages
+
+    def report(self):
+        """ Returns all measurements, suitable to be serialized as json
+
+        :return: the measurements of stages ("stages", see stages()), the total wall and CPU time
+            ("wallTime" and "cpuTime", seconds) and the peak resident memory ("peakRss", KiB, None
+            if it cannot be measured)
+        :rtype: a dictionary
+        """
+
+        return {
+            "stages": self.recorded_stages,
+            "wallTime": sum(s["wallTime"] for s in self.recorded_stages),
+            "cpuTime": sum(s["cpuTime"] for s in self.recorded_stages),
+            "peakRss": peak_rss()
+        }
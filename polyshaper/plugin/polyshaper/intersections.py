@@ -0,0 +1,251 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper self-intersections of closed paths
+
+Intersections are found with a sweep line moving along the x axis: segments are processed in order
+of their leftmost x and each one is only tested against the segments that are still crossed by the
+sweep line, so the cost grows with the number of segments overlapping in x instead of with the
+square of the number of segments (see overlapping_segments). Single segments (e.g. the bridges
+between paths) are tested against a grid index of segments, see SegmentIndex
+"""
+
+import heapq
+from itertools import chain
+from polyshaper.helpers import segments_intersection # pylint: disable=import-error,no-name-in-module
+from polyshaper.spatialindex import GridIndex, bounding_box, grid_cell_size # pylint: disable=import-error,no-name-in-module
+
+# Intersections nearer than this to the end of segments (as a fraction of the segment length) are
+# ignored: they are intersections between consecutive segments or vertices touching other segments
+END_TOLERANCE = 1e-9
+
+# The maximum number of segments SegmentIndex.crosses keeps to test first
+MAX_BLOCKERS = 8
+
+
+def overlapping_segments(segments):
+    """ Finds the couples of segments whose bounding boxes overlap
+
+    :param segments: the segments
+    :type segments: a list of couples of points (couples of floats)
+    :return: the couples (i, j) of indices of segments with overlapping bounding boxes, with i < j
+    :rtype: a generator of couples of ints
+    """
+
+    x_ranges = [(min(start[0], end[0]), max(start[0], end[0])) for (start, end) in segments]
+    y_ranges = [(min(start[1], end[1]), max(start[1], end[1])) for (start, end) in segments]
+
+    # The segments crossed by the sweep line, with a heap to remove them when the line moves past
+    # their right end
+    active = set()
+    active_ends = []
+    for index in sorted(range(len(segments)), key=lambda i: x_ranges[i][0]):
+        (min_x, max_x) = x_ranges[index]
+        while active_ends and active_ends[0][0] < min_x:
+            active.discard(heapq.heappop(active_ends)[1])
+
+        (min_y, max_y) = y_ranges[index]
+        for other in active:
+            (other_min_y, other_max_y) = y_ranges[other]
+            if other_max_y < min_y or other_min_y > max_y:
+                continue
+
+            yield (min(index, other), max(index, other))
+
+        active.add(index)
+        heapq.heappush(active_ends, (max_x, index))
+
+
+def path_self_intersections(path):
+    """ Finds the intersections between segments of a closed path
+
+    Segment i goes from path[i] to path[i + 1]. Consecutive segments (including the last and the
+    first one) are not tested
+    :param path: the closed path (the first and last point must be the same)
+    :type path: a list of points (couples of floats)
+    :return: the intersections as tuples (i, param_i, j, param_j, point) where i < j are the indices
+        of segments, param_i and param_j the positions of the intersection along segments (0 at the
+        start, 1 at the end) and point the intersection point
+    :rtype: a list of tuples (int, float, int, float, couple of floats)
+    """
+
+    num_segments = len(path) - 1
+    if num_segments < 3:
+        return []
+
+    def consecutive(index1, index2):
+        """ Returns true if the two segments share a vertex in the path
+        """
+
+        difference = abs(index1 - index2)
+        return difference == 1 or difference == num_segments - 1
+
+    intersections = []
+    segments = [(path[i], path[i + 1]) for i in range(num_segments)]
+    for (first, second) in overlapping_segments(segments):
+        if consecutive(first, second):
+            continue
+
+        params = segments_intersection(path[first], path[first + 1], path[second],
+                                       path[second + 1])
+        if params is None or not (END_TOLERANCE < params[0] < 1.0 - END_TOLERANCE and
+                                  END_TOLERANCE < params[1] < 1.0 - END_TOLERANCE):
+            continue
+
+        point = (path[first][0] + params[0] * (path[first + 1][0] - path[first][0]),
+                 path[first][1] + params[0] * (path[first + 1][1] - path[first][1]))
+        intersections.append((first, params[0], second, params[1], point))
+
+    return intersections
+
+
+def intersection_nodes(path, intersections):
+    """ Returns the points of a closed path with its self-intersections inserted
+
+    :param path: the closed path (the first and last point must be the same)
+    :type path: a list of points (couples of floats)
+    :param intersections: the self-intersections of path as returned by path_self_intersections
+    :type intersections: a list of tuples
+    :return: the vertices of the path (without the last one) and the intersections, in order along
+        the path. Each intersection appears twice, once for each segment
+    :rtype: a list of couples (index of the intersection or None for vertices, point)
+    """
+
+    # The intersections on each segment, sorted by their position along the segment
+    on_segment = {}
+    for (intersection_id, (first, param1, second, param2, point)) in enumerate(intersections):
+        on_segment.setdefault(first, []).append((param1, intersection_id, point))
+        on_segment.setdefault(second, []).append((param2, intersection_id, point))
+
+    nodes = []
+    for index in range(len(path) - 1):
+        nodes.append((None, path[index]))
+        for (dummy_param, intersection_id, point) in sorted(on_segment.get(index, [])):
+            nodes.append((intersection_id, point))
+
+    return nodes
+
+
+def split_at_self_intersections(path, intersections=None):
+    """ Splits a closed path in loops that do not cross each other
+
+    Every time the path crosses itself a loop is closed, so the returned loops have no
+    self-intersections (in case of simple crossings)
+    :param path: the closed path (the first and last point must be the same)
+    :type path: a list of points (couples of floats)
+    :param intersections: the self-intersections of path as returned by path_self_intersections.
+        If None they are computed
+    :type intersections: a list of tuples or None
+    :return: the loops, each one is a closed path
+    :rtype: a list of lists of points (couples of floats)
+    """
+
+    if intersections is None:
+        intersections = path_self_intersections(path)
+    if not intersections:
+        return [path]
+
+    nodes = intersection_nodes(path, intersections)
+
+    loops = []
+    stack = []
+    # The position in stack of intersections that have been reached once
+    positions = {}
+    for (intersection_id, point) in nodes:
+        if intersection_id is not None and intersection_id in positions:
+            # The path comes back to an intersection: the nodes after it form a closed loop
+            start = positions[intersection_id]
+            loops.append([p for (dummy_id, p) in stack[start:]] + [point])
+            for (removed_id, dummy_point) in stack[(start + 1):]:
+                positions.pop(removed_id, None)
+            del stack[(start + 1):]
+        else:
+            if intersection_id is not None:
+                positions[intersection_id] = len(stack)
+            stack.append((intersection_id, point))
+
+    if stack:
+        loops.append([p for (dummy_id, p) in stack] + [stack[0][1]])
+
+    return loops
+
+
+class SegmentIndex(object):
+    """ A grid index of segments to test whether a segment crosses any of them
+
+    Segments are indexed by their bounding box, so a test only looks at the segments in the cells
+    overlapped by the tested segment, starting from the ones near its start
+    """
+
+    def __init__(self, paths):
+        """ Constructor
+
+        :param paths: the paths whose segments are indexed. The size of cells is chosen from these
+            segments, segments added later should have a similar length
+        :type paths: a list of paths. Each path is a list of points (couples of floats)
+        """
+
+        boxes = [bounding_box(path[i:(i + 2)]) for path in paths for i in range(len(path) - 1)]
+        self.index = GridIndex(grid_cell_size(boxes))
+        self.segments = []
+        for path in paths:
+            for i in range(len(path) - 1):
+                self.add_segment(path[i], path[i + 1])
+
+    def add_segment(self, start, end):
+        """ Adds a segment to the index
+
+        :param start: the start of the segment
+        :type start: a couple of floats
+        :param end: the end of the segment
+        :type end: a couple of floats
+        """
+
+        self.index.insert(len(self.segments), bounding_box([start, end]))
+        self.segments.append((start, end))
+
+    def crosses(self, start, end, blockers=None):
+        """ Returns true if a segment touches an indexed segment anywhere but at its ends
+
+        Segments parallel to the tested one are ignored. When testing many segments starting from
+        the same region (e.g. bridges from the points of a path), the segments found crossing
+        previous ones are likely to cross the next ones too, so they are tested first
+        :param start: the start of the segment
+        :type start: a couple of floats
+        :param end: the end of the segment
+        :type end: a couple of floats
+        :param blockers: the indices of the segments to test first or None. The segment found
+            crossing is moved or added at the beginning of the list (which is kept shorter than
+            MAX_BLOCKERS)
+        :type blockers: a list of ints or None
+        :return: true if an indexed segment touches the segment farther than END_TOLERANCE (as a
+            fraction of the segment length) from its ends
+        :rtype: bool
+        """
+
+        candidates = self.index.query_segment(start, end)
+        if blockers is not None:
+            candidates = chain(list(blockers), candidates)
+
+        for item in candidates:
+            (other_start, other_end) = self.segments[item]
+            params = segments_intersection(start, end, other_start, other_end)
+            if params is not None and END_TOLERANCE < params[0] < 1.0 - END_TOLERANCE:
+                if blockers is not None:
+                    if item in blockers:
+                        blockers.remove(item)
+                    blockers.insert(0, item)
+                    del blockers[MAX_BLOCKERS:]
+                return True
+
+        return False
+
+    def __len__(self):
+        """ Returns the number of indexed segments
+
+        :return: the number of indexed segments
+        :rtype: int
+        """
+
+        return len(self.segments)
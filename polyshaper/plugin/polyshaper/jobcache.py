@@ -0,0 +1,255 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper cache of generated jobs
+
+Running the same job twice (e.g. after re-opening a file or to regenerate a lost g-code) produces
+the same files. Jobs are identified by a hash of the extracted geometry and of the parameters that
+change the result (see job_key), so that a cached job is found regardless of the name of the
+document or of the shape. Each entry is a directory with the cached files and an entry.json file
+with additional data, written last. Entries are evicted in least recently used order when the total
+size of the cache is above the limit
+"""
+
+from array import array
+import hashlib
+import json
+import os
+import shutil
+import sys
+from polyshaper.errors import PolyshaperIOError # pylint: disable=import-error,no-name-in-module
+from polyshaper.helpers import OutputFiles # pylint: disable=import-error,no-name-in-module
+
+# The name of the cache directory, created inside the directory where output files are written
+JOB_CACHE_DIRECTORY = ".polyshaper-jobcache"
+
+# The version of the cache, part of all keys. Change this when the content of entries or the
+# generated files change, so that old entries are not used
+JOB_CACHE_VERSION = 2
+
+# The name of the file with the data of an entry. It is written after all other files of the entry,
+# so entries without it are incomplete
+ENTRY_FILENAME = "entry.json"
+
+# The size of the buffer used when copying files (bytes)
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def job_key(paths, parameters):
+    """ Returns the key of a job in the cache
+
+    :param paths: the paths extracted from the document
+    :type paths: a list of paths. Each path is a list of points (tuples of floats)
+    :param parameters: all the parameters changing the generated files (e.g. the options of the
+        plugin and its name). Values must have a repr that does not change between runs
+    :type parameters: a dict from strings to values
+    :return: the key of the job (an hexadecimal SHA-1 digest)
+    :rtype: string
+    """
+
+    digest = hashlib.sha1()
+    digest.update("version={0}\n".format(JOB_CACHE_VERSION))
+    for name in sorted(parameters):
+        digest.update("{0}={1!r}\n".format(name, parameters[name]))
+
+    for path in paths:
+        # The number of points and coordinates separate paths. Coordinates are hashed with full
+        # precision as little-endian doubles
+        digest.update("path {0} {1}\n".format(len(path), len(path[0]) if path else 0))
+        coordinates = array("d", (c for point in path for c in point))
+        if sys.byteorder != "little":
+            coordinates.byteswap()
+        digest.update(coordinates.tostring())
+
+    return digest.hexdigest()
+
+
+def file_copier(filename):
+    """ Returns a function copying a file, to use with OutputFiles and JobCache.store
+
+    :param filename: the file to copy
+    :type filename: string
+    :return: a function writing the content of the file to the file passed as parameter. It must be
+        opened in binary mode
+    :rtype: a function with one input parameter (a file object)
+    """
+
+    def copy_file(outfile):
+        """ Copies the file into outfile
+        """
+
+        with open(filename, "rb") as infile:
+            shutil.copyfileobj(infile, outfile, COPY_BUFFER_SIZE)
+
+    return copy_file
+
+
+class JobCacheEntry(object):
+    """ A job found in the cache
+    """
+
+    def __init__(self, directory, data):
+        """ Constructor
+
+        :param directory: the directory of the entry
+        :type directory: string
+        :param data: the data stored with the entry
+        :type data: a dict with string keys
+        """
+
+        self.directory = directory
+        self.data = data
+
+    def filename(self, name):
+        """ Returns the full path of a cached file
+
+        :param name: the name of the file, as passed to JobCache.store
+        :type name: string
+        :return: the full path of the file
+        :rtype: string
+        """
+
+        return os.path.join(self.directory, name)
+
+    def copier(self, name):
+        """ Returns a function copying a cached file (see file_copier)
+
+        :param name: the name of the file, as passed to JobCache.store
+        :type name: string
+        :return: a function writing the content of the cached file to the file passed as parameter
+        :rtype: a function with one input parameter (a file object)
+        """
+
+        return file_copier(self.filename(name))
+
+
+class JobCache(object):
+    """ A size-bounded cache of generated jobs
+
+    Errors when reading or writing the cache are ignored: the cache only makes jobs faster, a
+    failure simply means that the job is generated again
+    """
+
+    def __init__(self, directory, max_size):
+        """ Constructor
+
+        :param directory: the directory of the cache, created when the first entry is stored
+        :type directory: string
+        :param max_size: the maximum size of all entries. If storing an entry makes the cache
+            bigger, the least recently used entries are removed
+        :type max_size: int (bytes)
+        """
+
+        self.directory = directory
+        self.max_size = max_size
+
+    def lookup(self, key):
+        """ Returns the entry with the given key
+
+        The entry becomes the most recently used one
+        :param key: the key of the job (see job_key)
+        :type key: string
+        :return: the entry or None if the job is not in the cache
+        :rtype: JobCacheEntry or None
+        """
+
+        entry_directory = os.path.join(self.directory, key)
+        entry_filename = os.path.join(entry_directory, ENTRY_FILENAME)
+        try:
+            with open(entry_filename, "r") as entry_file:
+                entry = json.load(entry_file)
+            if not all(os.path.isfile(os.path.join(entry_directory, n)) for n in entry["files"]):
+                return None
+            os.utime(entry_filename, None)
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+        return JobCacheEntry(entry_directory, entry["data"])
+
+    def store(self, key, data, files):
+        """ Adds an entry to the cache, replacing the one with the same key
+
+        The least recently used entries are then removed if the cache is too big
+        :param key: the key of the job (see job_key)
+        :type key: string
+        :param data: data to store with the entry. It must be serializable to json
+        :type data: a dict with string keys
+        :param files: the files of the entry, written in binary mode
+        :type files: a dict from the name of the file to a function taking a file in input and
+            that writes data (see file_copier)
+        :return: true if the entry was stored
+        :rtype: bool
+        """
+
+        entry_directory = os.path.join(self.directory, key)
+        entry = {"data": data, "files": sorted(files)}
+
+        try:
+            if not os.path.isdir(entry_directory):
+                os.makedirs(entry_directory)
+            output_files = OutputFiles()
+            for name in sorted(files):
+                output_files.add(os.path.join(entry_directory, name), files[name], binary=True)
+            output_files.add(os.path.join(entry_directory, ENTRY_FILENAME),
+                             lambda f: json.dump(entry, f))
+            output_files.commit()
+        except (OSError, PolyshaperIOError):
+            shutil.rmtree(entry_directory, ignore_errors=True)
+            return False
+
+        self.evict(key)
+
+        return True
+
+    def discard(self, key):
+        """ Removes an entry from the cache, e.g. because its files are corrupted
+
+        :param key: the key of the job (see job_key)
+        :type key: string
+        """
+
+        shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+
+    def entries(self):
+        """ Returns the entries in the cache, from the least to the most recently used
+
+        :return: the key, the time of last use and the size of each entry
+        :rtype: a list of tuples (string, float, int)
+        """
+
+        try:
+            keys = os.listdir(self.directory)
+        except OSError:
+            return []
+
+        entries = []
+        for key in keys:
+            entry_directory = os.path.join(self.directory, key)
+            try:
+                last_use = os.path.getmtime(os.path.join(entry_directory, ENTRY_FILENAME))
+                size = sum(os.path.getsize(os.path.join(entry_directory, n))
+                           for n in os.listdir(entry_directory))
+            except OSError:
+                # Incomplete entries (e.g. being written) are ignored
+                continue
+            entries.append((key, last_use, size))
+
+        return sorted(entries, key=lambda e: e[1])
+
+    def evict(self, keep_key=None):
+        """ Removes the least recently used entries until the cache is not bigger than max_size
+
+        :param keep_key: the key of an entry never removed (e.g. the one just stored) or None
+        :type keep_key: string or None
+        """
+
+        entries = self.entries()
+        total_size = sum(e[2] for e in entries)
+        for (key, last_use, size) in entries: # pylint: disable=unused-variable
+            if total_size <= self.max_size:
+                break
+            if key == keep_key:
+                continue
+            self.discard(key)
+            total_size -= size
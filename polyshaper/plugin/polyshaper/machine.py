@@ -64,6 +64,22 @@ class Machine(object):
         """
         raise NotImplementedError("Method 'working_area_height' not implemented!")
 
+    def acceleration(self):
+        """ Returns the maximum acceleration of the tool
+
+        This is abstract
+        """
+        raise NotImplementedError("Method 'acceleration' not implemented!")
+
+    def junction_deviation(self):
+        """ Returns the junction deviation used to compute the speed at corners
+
+        The junction deviation is the maximum distance between the corner of a path and the arc of
+        circle the tool virtually follows when passing through the corner without stopping. Higher
+        values mean faster movements at corners. This is abstract
+        """
+        raise NotImplementedError("Method 'junction_deviation' not implemented!")
+
     def piece_dimensions_allowed(self, width, height):
         """ Returns true if the piece fits in the machine
 
@@ -110,6 +126,23 @@ class MakerWelt(Machine):
         """
         return 800
 
+    def acceleration(self):
+        """ Returns the maximum acceleration of the tool
+
+        :return: the maximum acceleration of the tool
+        :rtype: float (mm/s^2)
+        """
+        return 100
+
+    def junction_deviation(self):
+        """ Returns the junction deviation used to compute the speed at corners
+
+        :return: the junction deviation
+        :rtype: float (mm)
+        """
+        return 0.02
+
+
 class P400(Machine):
     """ The class modelling the P400
     """
@@ -143,6 +176,22 @@ class P400(Machine):
         """
         return 400
 
+    def acceleration(self):
+        """ Returns the maximum acceleration of the tool
+
+        :return: the maximum acceleration of the tool
+        :rtype: float (mm/s^2)
+        """
+        return 200
+
+    def junction_deviation(self):
+        """ Returns the junction deviation used to compute the speed at corners
+
+        :return: the junction deviation
+        :rtype: float (mm)
+        """
+        return 0.02
+
 
 class PolyShaperAzul(Machine):
     """ The class modelling the PolyShaper Azul
@@ -177,6 +226,22 @@ class PolyShaperAzul(Machine):
         """
         return 500
 
+    def acceleration(self):
+        """ Returns the maximum acceleration of the tool
+
+        :return: the maximum acceleration of the tool
+        :rtype: float (mm/s^2)
+        """
+        return 150
+
+    def junction_deviation(self):
+        """ Returns the junction deviation used to compute the speed at corners
+
+        :return: the junction deviation
+        :rtype: float (mm)
+        """
+        return 0.02
+
 
 class PolyShaperAzulPlus(Machine):
     """ The class modelling the PolyShaper Azul+
@@ -211,6 +276,22 @@ class PolyShaperAzulPlus(Machine):
         """
         return 600
 
+    def acceleration(self):
+        """ Returns the maximum acceleration of the tool
+
+        :return: the maximum acceleration of the tool
+        :rtype: float (mm/s^2)
+        """
+        return 150
+
+    def junction_deviation(self):
+        """ Returns the junction deviation used to compute the speed at corners
+
+        :return: the junction deviation
+        :rtype: float (mm)
+        """
+        return 0.02
+
 
 class PolyShaperGraent(Machine):
     """ The class modelling the PolyShaper Graent
@@ -244,6 +325,22 @@ class PolyShaperGraent(Machine):
         """
         return 1100
 
+    def acceleration(self):
+        """ Returns the maximum acceleration of the tool
+
+        :return: the maximum acceleration of the tool
+        :rtype: float (mm/s^2)
+        """
+        return 100
+
+    def junction_deviation(self):
+        """ Returns the junction deviation used to compute the speed at corners
+
+        :return: the junction deviation
+        :rtype: float (mm)
+        """
+        return 0.02
+
 
 class PolyShaperOranje(Machine):
     """ The class modelling the PolyShaper Oranje
@@ -276,3 +373,19 @@ class PolyShaperOranje(Machine):
         :rtype: float (mm)
         """
         return 500
+
+    def acceleration(self):
+        """ Returns the maximum acceleration of the tool
+
+        :return: the maximum acceleration of the tool
+        :rtype: float (mm/s^2)
+        """
+        return 200
+
+    def junction_deviation(self):
+        """ Returns the junction deviation used to compute the speed at corners
+
+        :return: the junction deviation
+        :rtype: float (mm)
+        """
+        return 0.02
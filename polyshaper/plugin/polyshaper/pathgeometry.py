@@ -0,0 +1,141 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper geometric properties of paths
+
+Many stages of the pipeline need the same facts about paths (bounding box, area, whether they are
+closed...). They are computed once with a single scan of the points and shared by all stages through
+PathGeometries
+"""
+
+import math
+
+
+class PathGeometry(object): # pylint: disable=too-few-public-methods
+    """ The geometric properties of a path
+
+    The properties are the attributes of this object:
+        - box: the axis-aligned bounding box as a tuple (min_x, min_y, max_x, max_y) or None for
+          empty paths;
+        - length: the length of the path (mm);
+        - area: the signed area of the path closed with a segment from the last to the first point,
+          see helpers.signed_area (square mm);
+        - closing_distance: the distance between the first and the last point (mm, 0 for empty
+          paths);
+        - num_points: the number of points of the path.
+    """
+
+    def __init__(self, path):
+        """ Constructor
+
+        The properties are computed here
+        :param path: the path
+        :type path: a list of points (couples of floats)
+        """
+
+        self.num_points = len(path)
+        self.box = None
+        self.length = 0.0
+        self.area = 0.0
+        self.closing_distance = 0.0
+        if not path:
+            return
+
+        # Using coordinates relative to the first point improves precision for far away paths (as
+        # in helpers.signed_area)
+        (x_0, y_0) = path[0]
+        (min_x, min_y, max_x, max_y) = (x_0, y_0, x_0, y_0)
+        area = 0.0
+        path_length = 0.0
+        (prev_x, prev_y) = (0.0, 0.0)
+        for (point_x, point_y) in path[1:]:
+            if point_x < min_x:
+                min_x = point_x
+            elif point_x > max_x:
+                max_x = point_x
+            if point_y < min_y:
+                min_y = point_y
+            elif point_y > max_y:
+                max_y = point_y
+            (point_x, point_y) = (point_x - x_0, point_y - y_0)
+            path_length += math.sqrt((point_x - prev_x) ** 2 + (point_y - prev_y) ** 2)
+            area += prev_x * point_y - point_x * prev_y
+            (prev_x, prev_y) = (point_x, point_y)
+
+        self.box = (min_x, min_y, max_x, max_y)
+        self.length = path_length
+        self.area = area / 2.0 if len(path) >= 3 else 0.0
+        self.closing_distance = math.sqrt(prev_x ** 2 + prev_y ** 2)
+
+    def is_closed(self, close_distance):
+        """ Returns true if the first and last point of the path are near enough
+
+        :param close_distance: the max distance between the initial and final point of closed
+            paths
+        :type close_distance: float
+        :return: true if the path is closed
+        :rtype: bool
+        """
+
+        return self.closing_distance <= close_distance
+
+    def orientation(self):
+        """ Returns the orientation of the path
+
+        :return: 1 if the path is counterclockwise (with the y axis pointing up), -1 if it is
+            clockwise, 0 if it has no area
+        :rtype: int
+        """
+
+        if self.area > 0:
+            return 1
+        elif self.area < 0:
+            return -1
+
+        return 0
+
+
+class PathGeometries(object):
+    """ The geometric properties of paths, computed the first time they are requested
+
+    Paths are identified by the list object, not by value, and must not be modified once their
+    properties are computed. The paths are referenced by this object, so that their identity is not
+    reused by other lists
+    """
+
+    def __init__(self, paths=None):
+        """ Constructor
+
+        :param paths: the paths whose properties are computed immediately or None
+        :type paths: a list of paths. Each path is a list of points (couples of floats)
+        """
+
+        self.geometries = {}
+        for path in paths or []:
+            self.get(path)
+
+    def get(self, path):
+        """ Returns the geometric properties of a path
+
+        :param path: the path
+        :type path: a list of points (couples of floats)
+        :return: the properties of the path
+        :rtype: PathGeometry
+        """
+
+        entry = self.geometries.get(id(path))
+        if entry is None:
+            entry = (path, PathGeometry(path))
+            self.geometries[id(path)] = entry
+
+        return entry[1]
+
+    def __len__(self):
+        """ Returns the number of paths whose properties have been computed
+
+        :return: the number of paths whose properties have been computed
+        :rtype: int
+        """
+
+        return len(self.geometries)
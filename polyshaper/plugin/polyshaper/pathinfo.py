@@ -7,12 +7,16 @@ Polyshaper path statistics
 
 from datetime import datetime
 import math
-from polyshaper.helpers import distance # pylint: disable=import-error,no-name-in-module
+from polyshaper.compression import compression_extension # pylint: disable=import-error,no-name-in-module
+from polyshaper.machine import machine_factory # pylint: disable=import-error,no-name-in-module
+from polyshaper.timeestimation import time_estimator_for_machine # pylint: disable=import-error,no-name-in-module
 
 class PathInfo(object):
     """ The class to generate various path statisics
 
-    It checks whether the path is inside the workpiece or not and estimates the working time
+    It checks whether the path is inside the workpiece or not and estimates the working time. The
+    working time takes into account the acceleration of the machine if the machine type is known,
+    otherwise the tool is supposed to always move at the requested speed
     """
 
     def __init__(self, path, options, base_filename):
@@ -30,9 +34,84 @@ class PathInfo(object):
         self.options = options
         self.base_filename = base_filename
 
-        self.path_inside_workpiece = None
+        # All statistics are computed together by _compute_statistics the first time they are needed
+        self.statistics = None
         self.working_time = None # in seconds, float number
 
+    def _compute_statistics(self): # pylint: disable=too-many-locals,too-many-branches
+        """ Computes all statistics about the path with a single traversal of the path
+        """
+
+        if self.statistics is not None:
+            return
+
+        self.statistics = {
+            "pathLength": 0.0,
+            "boundingBox": None,
+            "pointsOutsideWorkpiece": 0,
+            "firstPointOutsideWorkpiece": None,
+            "minSegmentLength": None,
+            "maxSegmentLength": None,
+            "numPoints": len(self.path)
+        }
+        self.working_time = 0
+
+        if not self.path:
+            return
+
+        estimator = None
+        speed = self.options.speed / 60.0
+        if speed != 0:
+            estimator = time_estimator_for_machine(machine_factory(self.options.machine_type))
+
+        dim_x = self.options.dim_x
+        dim_y = self.options.dim_y
+        (x_min, y_min) = self.path[0]
+        (x_max, y_max) = self.path[0]
+        path_length = 0.0
+        min_segment = float('inf')
+        max_segment = 0.0
+        outside = 0
+        first_outside = None
+        prev_point = None
+        for (idx, point) in enumerate(self.path):
+            (point_x, point_y) = point
+            if point_y > dim_y or point_y < 0 or point_x > dim_x or point_x < 0:
+                outside += 1
+                if first_outside is None:
+                    first_outside = idx
+
+            if point_x < x_min:
+                x_min = point_x
+            elif point_x > x_max:
+                x_max = point_x
+            if point_y < y_min:
+                y_min = point_y
+            elif point_y > y_max:
+                y_max = point_y
+
+            if prev_point is not None:
+                displacement = (point_x - prev_point[0], point_y - prev_point[1])
+                segment = math.hypot(displacement[0], displacement[1])
+                path_length += segment
+                min_segment = min(min_segment, segment)
+                max_segment = max(max_segment, segment)
+                if estimator:
+                    estimator.add_move(displacement, speed)
+
+            prev_point = point
+
+        self.statistics["pathLength"] = path_length
+        self.statistics["boundingBox"] = {"xMin": x_min, "xMax": x_max, "yMin": y_min,
+                                          "yMax": y_max}
+        self.statistics["pointsOutsideWorkpiece"] = outside
+        self.statistics["firstPointOutsideWorkpiece"] = first_outside
+        if len(self.path) > 1:
+            self.statistics["minSegmentLength"] = min_segment
+            self.statistics["maxSegmentLength"] = max_segment
+        if estimator:
+            self.working_time = estimator.total_time()
+
     def is_path_inside_workpiece(self):
         """ Returns true if the path is inside the workpiece
 
@@ -40,15 +119,26 @@ class PathInfo(object):
         :rtype: boolean
         """
 
-        if self.path_inside_workpiece is None:
-            self.path_inside_workpiece = True
+        self._compute_statistics()
+
+        return self.statistics["pointsOutsideWorkpiece"] == 0
+
+    def path_statistics(self):
+        """ Returns statistics about the path
+
+        :return: the length of the path ("pathLength", mm), its axis-aligned bounding box
+            ("boundingBox", a dict with keys "xMin", "xMax", "yMin" and "yMax" or None for empty
+            paths), the number of points outside the workpiece ("pointsOutsideWorkpiece"), the
+            index of the first point outside the workpiece ("firstPointOutsideWorkpiece", None if
+            all points are inside), the length of the shortest and longest segments
+            ("minSegmentLength" and "maxSegmentLength", mm, None for paths with less than two
+            points) and the number of points ("numPoints")
+        :rtype: a dict with string keys
+        """
 
-            for (point_x, point_y) in self.path:
-                if point_y > self.options.dim_y or point_y < 0 or\
-                   point_x > self.options.dim_x or point_x < 0:
-                    self.path_inside_workpiece = False
+        self._compute_statistics()
 
-        return self.path_inside_workpiece
+        return self.statistics
 
     def working_time_min(self):
         """ Returns the estimated working time in integer minutes
@@ -66,7 +156,7 @@ class PathInfo(object):
         :rtype: string
         """
 
-        return self.base_filename + ".gcode"
+        return self.base_filename + ".gcode" + compression_extension(self.options.compression)
 
     def svg_filename(self):
         """ Returns the svg filename
@@ -77,6 +167,15 @@ class PathInfo(object):
 
         return self.base_filename + ".svg"
 
+    def toolpath_filename(self):
+        """ Returns the binary tool path filename
+
+        :return: the binary tool path filename
+        :rtype: string
+        """
+
+        return self.base_filename + ".pstp"
+
     def metainfo_filename(self):
         """ Returns the metainfo filename
 
@@ -87,18 +186,7 @@ class PathInfo(object):
         return self.base_filename + ".psj"
 
     def _working_time_sec(self):
-        if self.working_time is None:
-            self.working_time = 0
-
-            if self.options.speed != 0:
-                length = 0
-                if self.path:
-                    prev_point = self.path[0]
-                    for point in self.path[1:]:
-                        length += distance(prev_point, point)
-                        prev_point = point
-
-                self.working_time = length / self.options.speed * 60.0
+        self._compute_statistics()
 
         return self.working_time
 
@@ -109,12 +197,13 @@ class PathInfo(object):
         :rtype: a dict with string keys
         """
 
-        return {
+        metainfo = {
             "version": 1,
             "name": self.options.shapename,
             "generatedBy": "2DPlugin",
             "gcodeFilename": self.gcode_filename(),
             "svgFilename": self.svg_filename(),
+            "toolpathFilename": self.toolpath_filename(),
             "duration": int(math.ceil(self._working_time_sec())),
             "creationTime": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f"),
             "pointsInsideWorkpiece": self.is_path_inside_workpiece(),
@@ -125,6 +214,10 @@ class PathInfo(object):
             "square": self.options.square,
             "margin": self.options.margin,
             "machineType": self.options.machine_type,
+            "compression": self.options.compression,
             "drawToolpath": self.options.draw_toolpath,
             "autoClosePath": self.options.auto_close_path
         }
+        metainfo.update(self.path_statistics())
+
+        return metainfo
@@ -11,6 +11,7 @@ import cubicsuperpath # pylint: disable=import-error
 import simplepath # pylint: disable=import-error
 import simpletransform # pylint: disable=import-error
 from errors import UnrecognizedSVGElement  # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathgeometry import PathGeometries # pylint: disable=import-error,no-name-in-module
 
 class FlattenBezier(object):
     """ Transforms and SVG path with beziers and arcs in a path with only straight segments
@@ -87,6 +88,7 @@ class PathsExtractor(object):
         self.elements = [e for e in elements if e.get("id") != working_area_id]
 
         self.extracted_paths = []
+        self.extracted_geometries = PathGeometries()
         self.transform_stack = []
         self.to_mm = to_mm
         self.flatten = flatten
@@ -134,6 +136,9 @@ class PathsExtractor(object):
             # Remove all transformations
             self.transform_stack = []
 
+        # Paths are not modified anymore, their geometric properties can be computed
+        self.extracted_geometries = PathGeometries(self.extracted_paths)
+
     def extract_from_list(self, elements):
         """ Extracs paths from a list of elements
 
@@ -255,3 +260,14 @@ class PathsExtractor(object):
         """
 
         return self.extracted_paths
+
+    def geometries(self):
+        """ Returns the geometric properties of extracted paths
+
+        Properties of other paths are computed when requested, so the returned object can be used
+        for the paths derived from extracted ones
+        :return: the geometric properties of paths
+        :rtype: PathGeometries
+        """
+
+        return self.extracted_geometries
@@ -0,0 +1,511 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper offset of closed paths (kerf compensation)
+
+The hot wire removes material on both sides of its path, so to obtain pieces of the drawn size the
+tool must move half the kerf away from the outline: outside outer contours and inside holes
+"""
+
+from polyshaper.containment import ContainmentTree # pylint: disable=import-error,no-name-in-module
+from polyshaper.helpers import distance, signed_area, point_segment_squared_distance, winding_number # pylint: disable=import-error,no-name-in-module
+from polyshaper.helpers import segments_intersection # pylint: disable=import-error,no-name-in-module
+from polyshaper.intersections import intersection_nodes, path_self_intersections # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathgeometry import PathGeometries # pylint: disable=import-error,no-name-in-module
+from polyshaper.spatialindex import GridIndex, bounding_box, grid_cell_size # pylint: disable=import-error,no-name-in-module
+
+# When the convex corner of an offset path would be farther than this from the original vertex
+# (relative to the offset distance), the corner is cut at the offset distance from the vertex
+# (clipped miter join) instead of being extended (miter join)
+MITER_LIMIT = 2.0
+
+# Loops of the offset path with an area smaller than this are discarded (square millimeters)
+MIN_LOOP_AREA = 1e-6
+
+# The relative tolerance used to check the distance of offset paths from the original ones
+DISTANCE_TOLERANCE = 1e-6
+
+# The distance from a piece of an offset path of the point used to check what is on its outer side
+# (millimeters)
+OUTER_POINT_DISTANCE = 1e-6
+
+# Two directions are considered parallel if the sine of the angle between them is less than this
+PARALLEL_TOLERANCE = 1e-9
+
+
+def remove_duplicated_points(path):
+    """ Returns the points of a closed path without consecutive duplicates and the final point
+
+    :param path: the closed path
+    :type path: a list of points (couples of floats)
+    :return: the vertices of the path, the closing point is not repeated
+    :rtype: a list of points (couples of floats)
+    """
+
+    points = []
+    for point in path:
+        if not points or point != points[-1]:
+            points.append(point)
+    while len(points) > 1 and points[-1] == points[0]:
+        points.pop()
+
+    return points
+
+
+def offset_segments(points, offset):
+    """ Offsets each segment of a polygon
+
+    :param points: the vertices of the polygon, without repeating the first one at the end
+    :type points: a list of points (couples of floats)
+    :param offset: the distance of segments from the original ones, positive to move segments on
+        their right side (with the y axis pointing up)
+    :type offset: float
+    :return: for each segment starting at a vertex, its direction, the offset start and end and its
+        length
+    :rtype: a list of tuples (direction, start, end, length). The direction, start and end are
+        couples of floats
+    """
+
+    segments = []
+    for (index, start) in enumerate(points):
+        end = points[(index + 1) % len(points)]
+        seg_length = distance(start, end)
+        direction = ((end[0] - start[0]) / seg_length, (end[1] - start[1]) / seg_length)
+        # The normal on the right side of the segment
+        normal = (direction[1] * offset, -direction[0] * offset)
+        segments.append((direction, (start[0] + normal[0], start[1] + normal[1]),
+                         (end[0] + normal[0], end[1] + normal[1]), seg_length))
+
+    return segments
+
+
+def parallel_join(prev_segment, segment, offset):
+    """ Joins two offset segments that are parallel
+
+    :param prev_segment: the segment ending at the vertex, as returned by offset_segments
+    :type prev_segment: a tuple (direction, start, end, length)
+    :param segment: the segment starting at the vertex, as returned by offset_segments
+    :type segment: a tuple (direction, start, end, length)
+    :param offset: the offset distance
+    :type offset: float
+    :return: the points joining the segments
+    :rtype: a list of points (couples of floats)
+    """
+
+    (prev_direction, prev_end) = (prev_segment[0], prev_segment[2])
+    (direction, start) = (segment[0], segment[1])
+    if prev_direction[0] * direction[0] + prev_direction[1] * direction[1] > 0:
+        # Collinear segments, the offset vertex is shared
+        return [start]
+
+    # The path goes back on itself: the tip is squared off at the offset distance
+    return [(prev_end[0] + prev_direction[0] * abs(offset),
+             prev_end[1] + prev_direction[1] * abs(offset)),
+            (start[0] + prev_direction[0] * abs(offset),
+             start[1] + prev_direction[1] * abs(offset))]
+
+
+def concave_join(prev_segment, segment, vertex, miter, param):
+    """ Joins two offset segments at a concave corner
+
+    The offset segments overlap. If they cross, the miter is the corner, otherwise they are joined
+    through the vertex, so that the part of the path going back is split from the rest where other
+    segments cross it and removed in offset_closed_path
+    :param prev_segment: the segment ending at the vertex, as returned by offset_segments
+    :type prev_segment: a tuple (direction, start, end, length)
+    :param segment: the segment starting at the vertex, as returned by offset_segments
+    :type segment: a tuple (direction, start, end, length)
+    :param vertex: the original vertex
+    :type vertex: a couple of floats
+    :param miter: the intersection of the lines containing the offset segments
+    :type miter: a couple of floats
+    :param param: the position of miter along the previous segment from its end (negative)
+    :type param: float
+    :return: the points joining the segments
+    :rtype: a list of points (couples of floats)
+    """
+
+    (prev_end, prev_length) = (prev_segment[2], prev_segment[3])
+    (direction, start, length) = (segment[0], segment[1], segment[3])
+    next_param = (miter[0] - start[0]) * direction[0] + (miter[1] - start[1]) * direction[1]
+    if -param <= prev_length and 0.0 <= next_param <= length:
+        return [miter]
+
+    return [prev_end, vertex, start]
+
+
+def clipped_miter_join(prev_segment, segment, vertex, miter, offset):
+    """ Joins two offset segments at a sharp convex corner
+
+    The offset segments are extended up to the line perpendicular to the bisector at the offset
+    distance from the vertex, so the whole corner is at least at the offset distance from the vertex
+    :param prev_segment: the segment ending at the vertex, as returned by offset_segments
+    :type prev_segment: a tuple (direction, start, end, length)
+    :param segment: the segment starting at the vertex, as returned by offset_segments
+    :type segment: a tuple (direction, start, end, length)
+    :param vertex: the original vertex
+    :type vertex: a couple of floats
+    :param miter: the intersection of the lines containing the offset segments
+    :type miter: a couple of floats
+    :param offset: the offset distance
+    :type offset: float
+    :return: the points joining the segments
+    :rtype: a list of points (couples of floats)
+    """
+
+    (prev_direction, prev_end) = (prev_segment[0], prev_segment[2])
+    (direction, start) = (segment[0], segment[1])
+    miter_distance = distance(miter, vertex)
+    bisector = ((miter[0] - vertex[0]) / miter_distance, (miter[1] - vertex[1]) / miter_distance)
+    prev_param = (abs(offset) - (prev_end[0] - vertex[0]) * bisector[0] -
+                  (prev_end[1] - vertex[1]) * bisector[1]) / \
+        (prev_direction[0] * bisector[0] + prev_direction[1] * bisector[1])
+    next_param = (abs(offset) - (start[0] - vertex[0]) * bisector[0] -
+                  (start[1] - vertex[1]) * bisector[1]) / \
+        (direction[0] * bisector[0] + direction[1] * bisector[1])
+
+    return [(prev_end[0] + prev_param * prev_direction[0],
+             prev_end[1] + prev_param * prev_direction[1]),
+            (start[0] + next_param * direction[0], start[1] + next_param * direction[1])]
+
+
+def offset_lines_intersection(prev_segment, segment):
+    """ Returns the intersection of the lines containing two consecutive offset segments
+
+    :param prev_segment: the segment ending at the vertex, as returned by offset_segments
+    :type prev_segment: a tuple (direction, start, end, length)
+    :param segment: the segment starting at the vertex, as returned by offset_segments
+    :type segment: a tuple (direction, start, end, length)
+    :return: the position of the intersection along the previous segment from its end and the
+        intersection or None if the segments are parallel
+    :rtype: a couple (float, couple of floats) or None
+    """
+
+    (prev_direction, prev_end) = (prev_segment[0], prev_segment[2])
+    (direction, start) = (segment[0], segment[1])
+    cross = prev_direction[0] * direction[1] - prev_direction[1] * direction[0]
+    if abs(cross) < PARALLEL_TOLERANCE:
+        return None
+
+    param = ((start[0] - prev_end[0]) * direction[1] -
+             (start[1] - prev_end[1]) * direction[0]) / cross
+    return (param, (prev_end[0] + param * prev_direction[0],
+                    prev_end[1] + param * prev_direction[1]))
+
+
+def raw_offset(points, offset):
+    """ Offsets each segment of a polygon and joins them
+
+    The result can have self-intersections, see offset_closed_path
+    :param points: the vertices of the polygon, without repeating the first one at the end
+    :type points: a list of points (couples of floats)
+    :param offset: the distance of segments from the original ones, positive to move segments on
+        their right side (with the y axis pointing up)
+    :type offset: float
+    :return: the vertices of the offset polygon, without repeating the first one at the end
+    :rtype: a list of points (couples of floats)
+    """
+
+    segments = offset_segments(points, offset)
+    max_miter_squared = (MITER_LIMIT * offset) ** 2
+    result = []
+    for (index, vertex) in enumerate(points):
+        # The vertex joins the previous segment with this one
+        (prev_segment, segment) = (segments[index - 1], segments[index])
+        intersection = offset_lines_intersection(prev_segment, segment)
+        if intersection is None:
+            result += parallel_join(prev_segment, segment, offset)
+            continue
+
+        (param, miter) = intersection
+        if param < 0.0:
+            result += concave_join(prev_segment, segment, vertex, miter, param)
+        elif (miter[0] - vertex[0]) ** 2 + (miter[1] - vertex[1]) ** 2 <= max_miter_squared:
+            result.append(miter)
+        else:
+            result += clipped_miter_join(prev_segment, segment, vertex, miter, offset)
+
+    return result
+
+
+def segments_squared_distance(start1, end1, start2, end2):
+    """ Computes the squared distance between two segments
+
+    :param start1: the start of the first segment
+    :type start1: a couple of floats
+    :param end1: the end of the first segment
+    :type end1: a couple of floats
+    :param start2: the start of the second segment
+    :type start2: a couple of floats
+    :param end2: the end of the second segment
+    :type end2: a couple of floats
+    :return: the squared distance between the nearest points of the segments (0 if they intersect)
+    :rtype: float
+    """
+
+    if segments_intersection(start1, end1, start2, end2) is not None:
+        return 0.0
+
+    return min(point_segment_squared_distance(start1, start2, end2),
+               point_segment_squared_distance(end1, start2, end2),
+               point_segment_squared_distance(start2, start1, end1),
+               point_segment_squared_distance(end2, start1, end1))
+
+
+class PathClearance(object): # pylint: disable=too-few-public-methods
+    """ Checks that segments are not nearer than a given distance to a closed path
+
+    The segments of the path are stored in a grid index, so that each check only looks at the
+    segments near the tested one
+    """
+
+    def __init__(self, points, min_distance):
+        """ Constructor
+
+        :param points: the vertices of the closed path, without repeating the first one at the end
+        :type points: a list of points (couples of floats)
+        :param min_distance: the minimum distance of segments from the path
+        :type min_distance: float
+        """
+
+        self.points = points
+        self.min_distance = min_distance
+        self.min_squared_distance = min_distance * min_distance
+        boxes = [bounding_box([points[i - 1], points[i]]) for i in range(len(points))]
+        self.index = GridIndex(max(grid_cell_size(boxes), min_distance))
+        for (index, box) in enumerate(boxes):
+            self.index.insert(index, box)
+
+    def is_clear(self, start, end):
+        """ Returns true if no point of a segment is nearer than min_distance to the path
+
+        :param start: the start of the segment
+        :type start: a couple of floats
+        :param end: the end of the segment
+        :type end: a couple of floats
+        :return: true if the segment is at least min_distance away from the path
+        :rtype: bool
+        """
+
+        box = bounding_box([start, end])
+        query_box = (box[0] - self.min_distance, box[1] - self.min_distance,
+                     box[2] + self.min_distance, box[3] + self.min_distance)
+        return all(segments_squared_distance(start, end, self.points[i - 1], self.points[i]) >=
+                   self.min_squared_distance for i in self.index.query(query_box))
+
+
+def outer_point(piece, orientation):
+    """ Returns a point just outside a piece of a closed path
+
+    :param piece: the points of the piece
+    :type piece: a list of points (couples of floats)
+    :param orientation: 1.0 if the path is counterclockwise, -1.0 if it is clockwise
+    :type orientation: float
+    :return: a point near the middle of the piece, on the side opposite to the area enclosed by the
+        path
+    :rtype: a couple of floats
+    """
+
+    index = (len(piece) - 1) // 2
+    (start, end) = (piece[index], piece[index + 1])
+    # The right side of counterclockwise paths is the outer one
+    shift = orientation * OUTER_POINT_DISTANCE / distance(start, end)
+    return ((start[0] + end[0]) / 2.0 + (end[1] - start[1]) * shift,
+            (start[1] + end[1]) / 2.0 - (end[0] - start[0]) * shift)
+
+
+def split_at_intersection_points(path, intersections):
+    """ Splits a closed path at all its self-intersections
+
+    :param path: the closed path (the first and last point must be the same)
+    :type path: a list of points (couples of floats)
+    :param intersections: the self-intersections of path as returned by path_self_intersections.
+        It must not be empty
+    :type intersections: a list of tuples
+    :return: the pieces of the path, in order along the path. Each piece starts and ends at an
+        intersection
+    :rtype: a list of tuples (start intersection id, end intersection id, list of points)
+    """
+
+    # The path as a sequence of nodes, starting at an intersection
+    nodes = intersection_nodes(path, intersections)
+    first_intersection = next(i for (i, node) in enumerate(nodes) if node[0] is not None)
+    nodes = nodes[first_intersection:] + nodes[:first_intersection] + [nodes[first_intersection]]
+
+    pieces = []
+    piece = [nodes[0][1]]
+    piece_start = nodes[0][0]
+    for (intersection_id, point) in nodes[1:]:
+        piece.append(point)
+        if intersection_id is not None:
+            pieces.append((piece_start, intersection_id, piece))
+            piece = [point]
+            piece_start = intersection_id
+
+    return pieces
+
+
+def join_pieces(pieces):
+    """ Joins pieces of a path at their ends to form closed loops
+
+    Pieces that cannot be part of a closed loop are discarded
+    :param pieces: the pieces to join, as returned by split_at_intersection_points
+    :type pieces: a list of tuples (start intersection id, end intersection id, list of points)
+    :return: the closed loops
+    :rtype: a list of lists of points (couples of floats)
+    """
+
+    outgoing = {}
+    for (index, piece) in enumerate(pieces):
+        outgoing.setdefault(piece[0], []).append(index)
+
+    loops = []
+    used = set()
+    for (index, (loop_start, current_end, piece_points)) in enumerate(pieces):
+        if index in used:
+            continue
+
+        used.add(index)
+        loop = list(piece_points)
+        while current_end != loop_start:
+            following = [i for i in outgoing.get(current_end, []) if i not in used]
+            if not following:
+                loop = None
+                break
+            used.add(following[0])
+            loop += pieces[following[0]][2][1:]
+            current_end = pieces[following[0]][1]
+
+        if loop is not None:
+            loops.append(loop)
+
+    return loops
+
+
+def offset_closed_path(path, offset):
+    """ Offsets a closed path
+
+    The segments of the path are moved by offset and joined; then the path is split at all the
+    points where it crosses itself. The pieces nearer than offset to the original path (generated at
+    concave corners, where the path becomes too thin or where the curvature of concave parts is
+    greater than 1 / offset) and the ones inside parts where the offset path overlaps itself are
+    removed, and the remaining ones are joined again. Finally the loops whose orientation is
+    reversed with respect to the original path are removed. The direction of the path is preserved
+    :param path: the closed path (the first and last point must be the same)
+    :type path: a list of points (couples of floats)
+    :param offset: the offset, positive to enlarge the area enclosed by the path, negative to
+        shrink it
+    :type offset: float
+    :return: the offset closed paths. This is empty if the path disappears (e.g. a hole smaller than
+        the offset) and can have more than one path if the path is split (e.g. a thin part of a
+        hole)
+    :rtype: a list of paths (lists of points, couples of floats)
+    """
+
+    points = remove_duplicated_points(path)
+    area = signed_area(points)
+    if len(points) < 3 or area == 0.0 or offset == 0.0:
+        return [path]
+
+    # Moving segments to the right enlarges counterclockwise paths
+    orientation = 1.0 if area > 0 else -1.0
+    offset_points = raw_offset(points, offset * orientation)
+    offset_points.append(offset_points[0])
+
+    # All points of a valid piece are at least at the offset distance from the path (the pieces
+    # along the offset segments are exactly at that distance)
+    clearance = PathClearance(points, abs(offset) * (1.0 - DISTANCE_TOLERANCE))
+    intersections = path_self_intersections(offset_points)
+    if intersections:
+        pieces = split_at_intersection_points(offset_points, intersections)
+    else:
+        pieces = [(None, None, offset_points)]
+    valid_pieces = [p for p in pieces
+                    if all(clearance.is_clear(p[2][i - 1], p[2][i]) for i in range(1, len(p[2])))]
+    if intersections:
+        # Where the offset path overlaps itself, pieces inside the overlapping part can be far from
+        # the path too: only the pieces with no part of the offset path on their outer side are
+        # kept
+        valid_pieces = [p for p in valid_pieces
+                        if winding_number(outer_point(p[2], orientation), offset_points) == 0]
+
+    loops = []
+    for loop in join_pieces(valid_pieces):
+        loop_area = signed_area(loop)
+        if loop_area * orientation > 0 and abs(loop_area) > MIN_LOOP_AREA:
+            loops.append(loop)
+
+    return loops
+
+
+class PathsOffsetter(object):
+    """ Offsets closed paths to compensate the width of the cut
+
+    Outer contours are enlarged and holes (paths inside an odd number of other paths) are shrunk,
+    so that the material left has the size of the drawing. Paths that are not closed are returned
+    unchanged
+    """
+
+    def __init__(self, input_paths, offset, close_distance, geometries=None):
+        """ Constructor
+
+        :param input_paths: the paths to offset
+        :type input_paths: a list of paths. Each path is a list of points (couples of floats)
+        :param offset: the distance of the tool from the drawn paths (half the kerf)
+        :type offset: float
+        :param close_distance: the max distance between the initial and final point of closed
+            paths
+        :type close_distance: float
+        :param geometries: the geometric properties of input paths or None to compute them
+        :type geometries: PathGeometries or None
+        """
+
+        self.input_paths = input_paths
+        self.offset = offset
+        self.close_distance = close_distance
+        self.geometries = geometries if geometries is not None else PathGeometries()
+        self.containment_tree = None
+        self.output_paths = []
+
+    def offset_paths(self):
+        """ Offsets all paths
+
+        After this call paths can be retrieved with the paths() method
+        """
+
+        self.output_paths = []
+        self.containment_tree = ContainmentTree(self.input_paths, self.geometries)
+        for (index, path) in enumerate(self.input_paths):
+            if len(path) < 3 or not self.geometries.get(path).is_closed(self.close_distance):
+                self.output_paths.append(path)
+                continue
+
+            closed_path = path if path[0] == path[-1] else path + [path[0]]
+            if self.nesting_level(index) % 2 == 0:
+                self.output_paths += offset_closed_path(closed_path, self.offset)
+            else:
+                self.output_paths += offset_closed_path(closed_path, -self.offset)
+
+    def nesting_level(self, index):
+        """ Returns the number of input paths containing the path with the given index
+
+        :param index: the index of the path
+        :type index: int
+        :return: the number of paths containing the path
+        :rtype: int
+        """
+
+        if self.containment_tree is None:
+            self.containment_tree = ContainmentTree(self.input_paths, self.geometries)
+
+        return self.containment_tree.depth(index)
+
+    def paths(self):
+        """ Returns the offset paths
+
+        :return: the offset paths
+        :rtype: a list of paths. Each path is a list of points (couples of floats)
+        """
+
+        return self.output_paths
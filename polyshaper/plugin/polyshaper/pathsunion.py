@@ -6,39 +6,279 @@ Polyshaper union of closed paths to generate a single closed path
 """
 
 from itertools import count, izip # pylint: disable=no-name-in-module
+import multiprocessing
+from operator import itemgetter
+from polyshaper.batch import run_batch # pylint: disable=import-error,no-name-in-module
+from polyshaper.containment import ContainmentTree # pylint: disable=import-error,no-name-in-module
+from polyshaper.errors import UnsupportedJoinStrategy # pylint: disable=import-error,no-name-in-module
 from polyshaper.helpers import verify_path_closed, point_path_squared_distance, rotate_closed_path # pylint: disable=import-error,no-name-in-module
+from polyshaper.helpers import squared_distance, distance, point_segment_projection # pylint: disable=import-error,no-name-in-module
+from polyshaper.intersections import SegmentIndex # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathgeometry import PathGeometries # pylint: disable=import-error,no-name-in-module
+from polyshaper.spanningbridges import MAX_DETOUR, minimum_spanning_bridges, path_vertices # pylint: disable=import-error,no-name-in-module
+from polyshaper.spanningbridges import path_segments, segment_end, segment_point # pylint: disable=import-error,no-name-in-module
+from polyshaper.spatialindex import kd_partition # pylint: disable=import-error,no-name-in-module
 
-def compute_paths_distance(path1, path2):
+# The strategies to choose the bridges connecting paths: "greedy" adds the nearest path to the
+# union at each step, "mst" uses the minimum spanning tree of paths (the shortest set of bridges)
+JOIN_STRATEGIES = ["greedy", "mst"]
+
+# ParallelPathsJoiner does not split in clusters smaller than this (number of paths not contained in
+# other paths)
+MIN_CLUSTER_SIZE = 50
+
+# ParallelPathsJoiner creates this number of clusters for each worker process, so that workers are
+# kept busy even if clusters take different times
+CLUSTERS_PER_WORKER = 4
+
+# Bridge endpoints nearer than this to the end of a segment (as a fraction of the segment length)
+# are moved to the vertex, instead of adding a new point
+ENDPOINT_TOLERANCE = 1e-9
+
+def compute_paths_distance(path1, path2, indices1=None, indices2=None, accept_bridge=None):
     """ Returns the distance between two paths and the nearest points
 
+    If accept_bridge is not None, all couples of points are sorted by distance and tested in order,
+    so it should only be used when the nearest points cannot be connected
     :param path1: the first path
     :type path1: a list of points (couples of floats)
     :param path2: the second path
     :type path2: a list of points (couples of floats)
-    :return: the distance and the index of the nearest points of the paths
-    :rtype: a triple (distance, index_point_path1, index_point_path2)
+    :param indices1: the indices of the points of path1 to consider or None to consider all points
+    :type indices1: a list of ints or None
+    :param indices2: the indices of the points of path2 to consider or None to consider all points
+    :type indices2: a list of ints or None
+    :param accept_bridge: a function returning false if two points cannot be connected or None to
+        accept all couples of points
+    :type accept_bridge: a function taking two points and returning a bool or None
+    :return: the distance and the index of the nearest points of the paths or None if no couple of
+        points is accepted
+    :rtype: a triple (distance, index_point_path1, index_point_path2) or None
     """
 
+    if accept_bridge is not None:
+        indices1 = range(len(path1)) if indices1 is None else indices1
+        indices2 = range(len(path2)) if indices2 is None else indices2
+        couples = sorted((squared_distance(path1[idx1], path2[idx2]), idx1, idx2)
+                         for idx1 in indices1 for idx2 in indices2)
+        return next((c for c in couples if accept_bridge(path1[c[1]], path2[c[2]])), None)
+
+    if indices1 is not None or indices2 is not None:
+        indices1 = range(len(path1)) if indices1 is None else indices1
+        indices2 = range(len(path2)) if indices2 is None else indices2
+        return min((squared_distance(path1[idx1], path2[idx2]), idx1, idx2)
+                   for idx1 in indices1 for idx2 in indices2)
+
     index_path1 = 0
     (paths_distance, index_path2) = point_path_squared_distance(path1[index_path1], path2)
 
     for (idx1, point) in izip(count(1), path1[1:]):
-        (distance, idx2) = point_path_squared_distance(point, path2)
-        if distance < paths_distance:
-            paths_distance = distance
+        (point_distance, idx2) = point_path_squared_distance(point, path2)
+        if point_distance < paths_distance:
+            paths_distance = point_distance
             index_path1 = idx1
             index_path2 = idx2
 
     return (paths_distance, index_path1, index_path2)
 
-class PathsJoiner(object):
+def compute_paths_segment_distance(path1, path2, indices1=None, indices2=None, accept_bridge=None): # pylint: disable=too-many-locals
+    """ Returns the distance between two paths and the nearest points, also inside segments
+
+    The nearest points of two paths that do not cross are a vertex of one path and a point on a
+    segment of the other one, so the distance between each vertex and each segment is computed. If
+    accept_bridge is not None, all couples are sorted by distance and tested in order
+    :param path1: the first path
+    :type path1: a list of points (couples of floats)
+    :param path2: the second path
+    :type path2: a list of points (couples of floats)
+    :param indices1: the indices of the points of path1 to consider or None to consider all points.
+        Only segments between points to consider are used
+    :type indices1: a list of ints or None
+    :param indices2: the indices of the points of path2 to consider or None to consider all points
+    :type indices2: a list of ints or None
+    :param accept_bridge: a function returning false if two points cannot be connected or None to
+        accept all couples of points
+    :type accept_bridge: a function taking two points and returning a bool or None
+    :return: the distance and the nearest points of the paths, as a segment index and the position
+        along the segment (0 at start, 1 at end) or None if no point can be considered
+    :rtype: a triple (distance, (index_segment_path1, param), (index_segment_path2, param))
+    """
+
+    couples = []
+    for (first, second, first_indices, second_indices, swap) in \
+            [(path1, path2, indices1, indices2, False), (path2, path1, indices2, indices1, True)]:
+        vertices = range(len(first)) if first_indices is None else first_indices
+        segments = path_segments(second, second_indices)
+        for vertex in vertices:
+            point = first[vertex]
+            for segment in segments:
+                (squared_dist, param) = point_segment_projection(point, second[segment],
+                                                                 segment_end(second, segment))
+                if swap:
+                    couple = (squared_dist, (segment, param), (vertex, 0.0))
+                else:
+                    couple = (squared_dist, (vertex, 0.0), (segment, param))
+                couples.append(couple)
+
+    if accept_bridge is None:
+        return min(couples, key=itemgetter(0)) if couples else None
+
+    couples.sort()
+    return next((c for c in couples if accept_bridge(segment_point(path1, c[1]),
+                                                     segment_point(path2, c[2]))), None)
+
+def insert_bridge_points(paths, bridges, owners=None): # pylint: disable=too-many-locals
+    """ Adds to paths the endpoints of bridges that are inside segments
+
+    :param paths: the paths
+    :type paths: a list of paths. Each path is a list of points (couples of floats)
+    :param bridges: the bridges, with endpoints as segment index and position along the segment
+    :type bridges: a list of tuples (index path1, (index segment path1, param), index path2,
+        (index segment path2, param))
+    :param owners: for each path, data associated with each point (e.g. the index of the input path
+        of each point) or None. Added points get the data of the start of their segment
+    :type owners: a list of lists or None
+    :return: the paths with added points, the data associated with points (None if owners is None)
+        and the bridges with endpoints as indices of points
+    :rtype: a triple (list of paths, list of lists or None, list of tuples (index path1, index point
+        path1, index path2, index point path2))
+    """
+
+    # The positions inside segments, for each path
+    positions = {}
+    for (path1, endpoint1, path2, endpoint2) in bridges:
+        for (path_index, (segment, param)) in [(path1, endpoint1), (path2, endpoint2)]:
+            if ENDPOINT_TOLERANCE < param < 1.0 - ENDPOINT_TOLERANCE:
+                positions.setdefault(path_index, set()).add((segment, param))
+
+    new_paths = list(paths)
+    new_owners = None if owners is None else list(owners)
+    # For each modified path, the new index of old points and the index of added points
+    new_indices = {}
+    for (path_index, path_positions) in positions.items():
+        path = paths[path_index]
+        to_add = sorted(path_positions)
+        old_to_new = []
+        added = {}
+        new_path = []
+        new_path_owners = []
+        position = 0
+        for (point_index, point) in enumerate(path):
+            old_to_new.append(len(new_path))
+            new_path.append(point)
+            if owners is not None:
+                new_path_owners.append(owners[path_index][point_index])
+            while position < len(to_add) and to_add[position][0] == point_index:
+                added[to_add[position]] = len(new_path)
+                new_path.append(segment_point(path, to_add[position]))
+                if owners is not None:
+                    new_path_owners.append(owners[path_index][point_index])
+                position += 1
+        new_paths[path_index] = new_path
+        if owners is not None:
+            new_owners[path_index] = new_path_owners
+        new_indices[path_index] = (old_to_new, added)
+
+    def bridge_point_index(path_index, endpoint):
+        """ Returns the index of the point of a bridge endpoint in the new path
+        """
+
+        (segment, param) = endpoint
+        if param >= 1.0 - ENDPOINT_TOLERANCE and segment + 1 < len(paths[path_index]):
+            segment += 1
+        elif param > ENDPOINT_TOLERANCE:
+            return new_indices[path_index][1][endpoint]
+
+        return new_indices[path_index][0][segment] if path_index in new_indices else segment
+
+    vertex_bridges = [(path1, bridge_point_index(path1, endpoint1), path2,
+                       bridge_point_index(path2, endpoint2))
+                      for (path1, endpoint1, path2, endpoint2) in bridges]
+
+    return (new_paths, new_owners, vertex_bridges)
+
+def splice_paths(paths, bridges, root=0): # pylint: disable=too-many-locals
+    """ Generates a single closed path from paths connected by bridges
+
+    Starting from the root path, each path connected by a bridge is inserted in the path where the
+    bridge starts, as in PathsJoiner.join_two_paths. Bridges must form a tree
+    :param paths: the closed paths. Any list with the same length as paths (e.g. data associated
+        with each point) can be spliced
+    :type paths: a list of paths. Each path is a list of points (couples of floats)
+    :param bridges: the bridges between paths
+    :type bridges: a list of tuples (index path1, index point path1, index path2, index point path2)
+    :param root: the index of the path where the spliced path starts
+    :type root: int
+    :return: the closed path containing all points of all connected paths
+    :rtype: a list of points (couples of floats)
+    """
+
+    connections = {}
+    for (path1, point1, path2, point2) in bridges:
+        connections.setdefault(path1, []).append((point1, path2, point2))
+        connections.setdefault(path2, []).append((point2, path1, point1))
+
+    def rotated_indices(path_index, start):
+        """ Returns the indices of the points of the path rotated to begin at start (as in
+        rotate_closed_path)
+        """
+
+        length = len(paths[path_index])
+        if start == 0 or start >= length - 1:
+            return range(length)
+        return range(start, length) + range(1, start + 1)
+
+    # Each element of the stack is a list with the index of a path, the indices of its points in the
+    # order they are visited, the position of the next point to visit, the paths to insert at the
+    # current point and the path from which this path was reached
+    result = []
+    stack = [[root, rotated_indices(root, 0), 0, [], None]]
+    while stack:
+        frame = stack[-1]
+        (path_index, indices, position, to_insert, previous) = frame
+        if to_insert:
+            (path_to_insert, start) = to_insert.pop()
+            stack.append([path_to_insert, rotated_indices(path_to_insert, start), 0, [],
+                          path_index])
+        elif position < len(indices):
+            point_index = indices[position]
+            result.append(paths[path_index][point_index])
+            # Paths are inserted at the first occurrence of a point (the last point of a closed
+            # path is the same as the first one)
+            if position < len(indices) - 1 or len(indices) == 1:
+                if point_index == len(paths[path_index]) - 1:
+                    point_index = 0
+                frame[3] = [(other_path, other_point) for (point, other_path, other_point)
+                            in reversed(connections.get(path_index, []))
+                            if point == point_index and other_path != previous]
+            frame[2] += 1
+        else:
+            stack.pop()
+            if stack:
+                # Coming back through the bridge
+                (parent_index, parent_indices, parent_position) = stack[-1][:3]
+                result.append(paths[parent_index][parent_indices[parent_position - 1]])
+
+    return result
+
+class PathsJoiner(object): # pylint: disable=too-many-instance-attributes
     """ Takes a list of paths and creates a single path
 
     All input paths must be closed. This class generates a single closed path that connects all
-    points of all paths
+    points of all paths. If nested is true, paths are joined following their containment tree: each
+    path is only connected to its parent, its children or its siblings, so that the wire does not
+    cross a shape to reach a path outside it and holes are cut before the outline enclosing them
+    (they are inserted in the outline, which is closed only at the end). The bridges connecting
+    paths are chosen according to strategy (see JOIN_STRATEGIES). If segment_endpoints is true,
+    bridges can end inside segments (a point is added there), so that shapes with parallel sides
+    are connected across the gap between the sides instead of between their corners. If
+    avoid_crossings is true, bridges that would cut through paths are replaced by the nearest
+    bridge that does not cross any path (crossing bridges are only used when there is no
+    alternative). Bridges can cross each other, as they are outside the pieces
     """
 
-    def __init__(self, input_paths, close_distance):
+    def __init__(self, input_paths, close_distance, nested=False, strategy="greedy", # pylint: disable=too-many-arguments
+                 segment_endpoints=False, avoid_crossings=False, geometries=None):
         """ Constructor
 
         Input paths must be closed (i.e. their initial and final point must be closer than
@@ -48,33 +288,145 @@ class PathsJoiner(object):
         :type input_paths: a list of paths. Each path is a list of points (couples of floats)
         :param close_distance: the max allowed distance between the initial and final point
         :type close_distance: float
+        :param nested: whether to join paths following their containment tree or not
+        :type nested: bool
+        :param strategy: the strategy to choose bridges, one of JOIN_STRATEGIES
+        :type strategy: string
+        :param segment_endpoints: whether bridges can end inside segments or only at vertices
+        :type segment_endpoints: bool
+        :param avoid_crossings: whether to avoid bridges crossing paths
+        :type avoid_crossings: bool
+        :param geometries: the geometric properties of input paths or None to compute them
+        :type geometries: PathGeometries or None
         """
 
+        if strategy not in JOIN_STRATEGIES:
+            raise UnsupportedJoinStrategy(strategy)
+
+        self.geometries = geometries if geometries is not None else PathGeometries()
+
         # Verifying that all paths are closed
         for path in input_paths:
-            verify_path_closed(path, close_distance)
+            verify_path_closed(path, close_distance, self.geometries.get(path))
 
         self.input_paths = input_paths
+        self.nested = nested
+        self.strategy = strategy
+        self.segment_endpoints = segment_endpoints
+        self.avoid_crossings = avoid_crossings
+        # The segments of paths that bridges should not cross
+        self.crossings = None
+        self.total_bridges_length = 0.0
         self.remaining_paths = []
         self.path = []
+        # When joining nested paths, the index of the input path of each point of self.path and of
+        # the remaining paths, and the input paths whose points can be used to connect paths
+        self.owners = None
+        self.remaining_owners = []
+        self.members = set()
 
     def unite(self):
         """ Unites all paths to generate a single closed path
         """
 
+        self.total_bridges_length = 0.0
+        self.crossings = SegmentIndex(self.input_paths) if self.avoid_crossings else None
         if not self.input_paths:
             return
+        elif not self.nested:
+            self.unite_group(self.input_paths)
+        else:
+            tree = ContainmentTree(self.input_paths, self.geometries)
+
+            # Each path is joined with its children (already joined with their own children).
+            # Only the points of the path and of its children are used to connect them, so bridges
+            # never cross the material between a child and its own children
+            joined_paths = {}
+            for index in tree.holes_first_order():
+                path = self.input_paths[index]
+                group = [(path, [index] * len(path))] + [joined_paths.pop(c)
+                                                         for c in tree.children(index)]
+                joined_paths[index] = self.unite_group([p for (p, o) in group],
+                                                       [o for (p, o) in group],
+                                                       [index] + tree.children(index))
+
+            roots = tree.roots()
+            self.unite_group([joined_paths[r][0] for r in roots],
+                             [joined_paths[r][1] for r in roots], roots)
+
+    def unite_group(self, paths, owners=None, members=None):
+        """ Unites paths with the selected strategy, starting from the first one
+
+        When avoiding crossings and called without unite(), bridges are checked against paths
+        :param paths: the paths to join (must not be empty)
+        :type paths: a list of paths. Each path is a list of points (couples of floats)
+        :param owners: for each path, the index of the input path of each point or None to use all
+            points to connect paths
+        :type owners: a list of lists of ints or None
+        :param members: the indices of the input paths whose points can be used to connect paths
+            (only used if owners is not None)
+        :type members: a list of ints
+        :return: the closed path containing all points of all paths and the index of the input path
+            of each point (None if owners is None). These are also stored as the current path
+        :rtype: a couple (list of points (couples of floats), list of ints or None)
+        """
+
+        if self.avoid_crossings and self.crossings is None:
+            self.crossings = SegmentIndex(paths)
+
+        if self.strategy == "mst":
+            return self.unite_group_mst(paths, owners, members)
+
+        self.path = paths[0]
+        self.remaining_paths = paths[1:]
+        if owners is None:
+            self.owners = None
         else:
-            self.path = self.input_paths[0]
-            self.remaining_paths = self.input_paths[1:]
+            self.owners = owners[0]
+            self.remaining_owners = owners[1:]
+            self.members = set(members)
 
+        nearest_path_info = self.extract_nearest_path()
+        while nearest_path_info:
+            (path, idx1, idx2, path_owners) = nearest_path_info
+            if self.segment_endpoints:
+                # Adding the endpoints of the bridge to the paths
+                ([self.path, path], owners_list, bridges) = insert_bridge_points(
+                    [self.path, path], [(0, idx1, 1, idx2)],
+                    None if self.owners is None else [self.owners, path_owners])
+                (dummy_path, idx1, dummy_path, idx2) = bridges[0]
+                if owners_list is not None:
+                    [self.owners, path_owners] = owners_list
+            self.total_bridges_length += distance(self.path[idx1], path[idx2])
+            self.join_two_paths(path, idx1, idx2, path_owners)
             nearest_path_info = self.extract_nearest_path()
-            while nearest_path_info:
-                (path, idx1, idx2) = nearest_path_info
-                self.join_two_paths(path, idx1, idx2)
-                nearest_path_info = self.extract_nearest_path()
 
-    def join_two_paths(self, path_to_add, index_path, index_path_to_add):
+        return (self.path, self.owners)
+
+    def unite_group_mst(self, paths, owners=None, members=None):
+        """ Unites paths using the minimum spanning tree of paths
+
+        Parameters and return value are the same as unite_group()
+        """
+
+        candidates = None
+        if owners is not None:
+            members = set(members)
+            candidates = [[i for i in path_vertices(p) if o[i] in members]
+                          for (p, o) in izip(paths, owners)]
+
+        bridges = minimum_spanning_bridges(paths, candidates, self.segment_endpoints,
+                                           self.crossings)
+        (paths, owners, bridges) = insert_bridge_points(paths, bridges, owners)
+        for (path1, point1, path2, point2) in bridges:
+            self.total_bridges_length += distance(paths[path1][point1], paths[path2][point2])
+
+        self.path = splice_paths(paths, bridges)
+        self.owners = None if owners is None else splice_paths(owners, bridges)
+
+        return (self.path, self.owners)
+
+    def join_two_paths(self, path_to_add, index_path, index_path_to_add, owners_to_add=None):
         """ Joins path_to_add to the current path
 
         :param index_path: the index of the point of path to use in the union
@@ -83,40 +435,310 @@ class PathsJoiner(object):
         :type index_path_to_add: index (int)
         :param path_to_add: the path to add to self.path
         :type path_to_add: a list of 2D points (couples of floats)
+        :param owners_to_add: the index of the input path of each point of path_to_add (only used
+            when joining nested paths)
+        :type owners_to_add: a list of ints or None
         """
 
         rotated_path = rotate_closed_path(path_to_add, index_path_to_add)
         self.path = self.path[:(index_path + 1)] + rotated_path + self.path[index_path:]
+        if self.owners is not None:
+            rotated_owners = rotate_closed_path(owners_to_add, index_path_to_add)
+            self.owners = self.owners[:(index_path + 1)] + rotated_owners + \
+                self.owners[index_path:]
+
+    def joinable_indices(self, owners):
+        """ Returns the indices of the points that can be used to connect paths
+
+        :param owners: the index of the input path of each point of a path or None
+        :type owners: a list of ints or None
+        :return: the indices of points belonging to the paths being joined or None if all points can
+            be used
+        :rtype: a list of ints or None
+        """
 
-    def extract_nearest_path(self):
+        if owners is None:
+            return None
+
+        return [i for (i, owner) in enumerate(owners) if owner in self.members]
+
+    def extract_nearest_path(self): # pylint: disable=too-many-locals
         """ Extracts from self.remaining_paths the path nearest to self.path and returns it
 
-        :return: the path closest to self.path and the index of the nearest points (first of the
-            point of self.path and then of the other path) or None if no more paths are available
-        :rtype: a triple (list of points (couples of floats), index_path1, index_path2) where both
-            index_path1 and index_path2 are indices (ints) or None
+        When avoiding crossings, the path reached by the shortest bridge that does not cross
+        anything is extracted (see nearest_non_crossing_bridge)
+        :return: the path closest to self.path, the nearest points (first of the point of
+            self.path and then of the other path) and the index of the input path of each point of
+            the path (None if not joining nested paths) or None if no more paths are available.
+            Nearest points are indices of points or, if bridges can end inside segments, the index
+            of a segment and the position along it (see compute_paths_segment_distance)
+        :rtype: a tuple (list of points (couples of floats), index_path1, index_path2, list of ints
+            or None)
         """
 
         if not self.remaining_paths:
             return None
 
-        path_index = 0
-        (path_distance, index_path, index_other_path) = compute_paths_distance(
-            self.path,
-            self.remaining_paths[0])
+        indices = self.joinable_indices(self.owners)
+        remaining_indices = [None] * len(self.remaining_paths) if self.owners is None else \
+            [self.joinable_indices(o) for o in self.remaining_owners]
+
+        paths_distance = compute_paths_segment_distance if self.segment_endpoints else \
+            compute_paths_distance
 
-        for (path_idx, path) in izip(count(1), self.remaining_paths[1:]):
-            (dist, idx1, idx2) = compute_paths_distance(self.path, path)
-            if dist < path_distance:
-                path_distance = dist
-                index_path = idx1
-                index_other_path = idx2
-                path_index = path_idx
+        # The distance and the nearest points of each remaining path
+        distances = []
+        for (path_idx, path) in enumerate(self.remaining_paths):
+            (dist, idx1, idx2) = paths_distance(self.path, path, indices,
+                                                remaining_indices[path_idx])
+            distances.append((dist, path_idx, idx1, idx2))
+
+        if self.crossings is None:
+            nearest = min(distances, key=lambda d: d[:2])
+        else:
+            nearest = self.nearest_non_crossing_bridge(distances, indices, remaining_indices)
+        (dummy_distance, path_index, index_path, index_other_path) = nearest
 
         # Removing nearest path
         path_to_return = self.remaining_paths.pop(path_index)
+        owners_to_return = None if self.owners is None else self.remaining_owners.pop(path_index)
+
+        return (path_to_return, index_path, index_other_path, owners_to_return)
+
+    def nearest_non_crossing_bridge(self, distances, indices, remaining_indices): # pylint: disable=too-many-locals
+        """ Returns the shortest bridge to a remaining path not crossing paths
+
+        Paths are considered in order of distance and the nearest points that can be connected
+        without crossing anything are only searched for paths nearer than the best bridge found so
+        far (or MAX_DETOUR times the distance of the nearest path), so usually only the nearest path
+        is checked
+        :param distances: the distance, the index and the nearest points of each remaining path
+        :type distances: a list of tuples (float, int, index_path1, index_path2)
+        :param indices: the indices of the points of self.path that can be used to connect paths
+            (see joinable_indices)
+        :type indices: a list of ints or None
+        :param remaining_indices: the indices of the points of each remaining path that can be used
+        :type remaining_indices: a list of lists of ints or None
+        :return: the bridge as an element of distances or, if all bridges shorter than MAX_DETOUR
+            times the distance of the nearest path cross something, the element of distances for
+            the nearest path
+        :rtype: a tuple (float, int, index_path1, index_path2)
+        """
+
+        point = segment_point if self.segment_endpoints else lambda path, index: path[index]
+        paths_distance = compute_paths_segment_distance if self.segment_endpoints else \
+            compute_paths_distance
+        accept_bridge = lambda point1, point2: not self.crossings.crosses(point1, point2)
+
+        distances = sorted(distances, key=lambda d: d[:2])
+        limit = distances[0][0] * MAX_DETOUR * MAX_DETOUR
+        best = None
+        for (dist, path_index, idx1, idx2) in distances:
+            if dist >= limit:
+                break
+            path = self.remaining_paths[path_index]
+            if accept_bridge(point(self.path, idx1), point(path, idx2)):
+                bridge = (dist, idx1, idx2)
+            else:
+                bridge = paths_distance(self.path, path, indices, remaining_indices[path_index],
+                                        accept_bridge)
+            if bridge is not None and bridge[0] < limit:
+                best = (bridge[0], path_index, bridge[1], bridge[2])
+                limit = bridge[0]
+
+        return distances[0] if best is None else best
+
+    def bridges_length(self):
+        """ Returns the total length of the bridges connecting paths
+
+        Each bridge is cut twice, so the wire travels twice this length outside the paths
+        :return: the sum of the lengths of bridges
+        :rtype: float
+        """
+
+        return self.total_bridges_length
+
+    def union_owners(self):
+        """ Returns the input path of each point of the union path
+
+        :return: the index of the input path of each point of the union path or None if paths are
+            not joined following their containment tree
+        :rtype: a list of ints or None
+        """
+
+        return self.owners
+
+    def union_path(self):
+        """ Returns the path connecting all input paths
+
+        :return: the closed path containg all points of all paths
+        :rtype: a list of points (couples of floats)
+        """
+
+        return self.path
+
+
+def unite_cluster(arguments):
+    """ Unites the paths of a cluster, this is called in worker processes by ParallelPathsJoiner
+
+    :param arguments: the paths to join and the other parameters of the constructor of PathsJoiner
+    :type arguments: a tuple (paths, close_distance, nested, strategy, segment_endpoints,
+        avoid_crossings), optionally followed by the geometric properties of paths
+    :return: the union path, the index in paths of the input path of each point (None if not nested)
+        and the length of bridges
+    :rtype: a triple (list of points (couples of floats), list of ints or None, float)
+    """
+
+    joiner = PathsJoiner(*arguments)
+    joiner.unite()
+
+    return (joiner.union_path(), joiner.union_owners(), joiner.bridges_length())
+
+
+class ParallelPathsJoiner(object): # pylint: disable=too-many-instance-attributes
+    """ Takes a list of paths and creates a single path, using more processes
+
+    Paths are split in spatially compact clusters (with a k-d partition of the centers of their
+    bounding boxes), each cluster is joined by PathsJoiner in a worker process and then the paths
+    of clusters are joined together. When joining nested paths, each path is in the same cluster as
+    the outermost path containing it and clusters are connected using only points of outermost
+    paths. With a single worker or few paths, a single cluster is used and the result is the same
+    as PathsJoiner. When avoiding crossings, bridges inside a cluster are only checked against the
+    paths of the cluster
+    """
+
+    def __init__(self, input_paths, close_distance, nested=False, strategy="greedy", # pylint: disable=too-many-arguments
+                 segment_endpoints=False, workers=1, avoid_crossings=False, geometries=None):
+        """ Constructor
+
+        Parameters are the same as PathsJoiner, plus the number of worker processes. Geometric
+        properties are only used to build clusters, workers compute the ones they need
+        :param workers: the number of processes to use, 0 to use one process for each CPU
+        :type workers: int
+        """
+
+        if strategy not in JOIN_STRATEGIES:
+            raise UnsupportedJoinStrategy(strategy)
+
+        self.geometries = geometries if geometries is not None else PathGeometries()
+
+        # Verifying that all paths are closed here, workers must not raise exceptions
+        for path in input_paths:
+            verify_path_closed(path, close_distance, self.geometries.get(path))
+
+        self.input_paths = input_paths
+        self.close_distance = close_distance
+        self.nested = nested
+        self.strategy = strategy
+        self.segment_endpoints = segment_endpoints
+        self.avoid_crossings = avoid_crossings
+        self.workers = workers if workers > 0 else multiprocessing.cpu_count()
+        self.path = []
+        self.containment_tree = None
+        self.num_clusters = 0
+        self.total_bridges_length = 0.0
+        self.total_cluster_bridges_length = 0.0
+
+    def clusters(self):
+        """ Splits input paths in clusters
+
+        :return: the clusters, as lists of indices of input paths in increasing order. The first
+            cluster contains the first path
+        :rtype: a list of lists of ints
+        """
+
+        if not self.input_paths:
+            return []
+
+        # The units that cannot be split: each path or, when nested, an outermost path with the
+        # paths it contains
+        if self.nested:
+            if self.containment_tree is None:
+                self.containment_tree = ContainmentTree(self.input_paths, self.geometries)
+            units = [[r] for r in self.containment_tree.roots()]
+            for unit in units:
+                for index in unit:
+                    unit += self.containment_tree.children(index)
+        else:
+            units = [[i] for i in range(len(self.input_paths))]
+
+        max_size = max(MIN_CLUSTER_SIZE,
+                       -(-len(units) // (self.workers * CLUSTERS_PER_WORKER)))
+        if self.workers <= 1 or len(units) <= max_size:
+            return [range(len(self.input_paths))]
+
+        centers = []
+        for unit in units:
+            (min_x, min_y, max_x, max_y) = self.geometries.get(self.input_paths[unit[0]]).box
+            centers.append(((min_x + max_x) / 2.0, (min_y + max_y) / 2.0))
+
+        clusters = [sorted(i for u in group for i in units[u])
+                    for group in kd_partition(centers, max_size)]
+        clusters.sort(key=lambda c: c[0])
+
+        return clusters
+
+    def unite(self):
+        """ Unites all paths to generate a single closed path
+        """
+
+        clusters = self.clusters()
+        self.num_clusters = len(clusters)
+        self.total_cluster_bridges_length = 0.0
+        arguments = [([self.input_paths[i] for i in cluster], self.close_distance, self.nested,
+                      self.strategy, self.segment_endpoints, self.avoid_crossings)
+                     for cluster in clusters]
+        if len(arguments) == 1:
+            # A single cluster is joined in this process, reusing the geometric properties of paths
+            results = [unite_cluster(arguments[0] + (self.geometries,))]
+        else:
+            results = run_batch(unite_cluster, arguments, self.workers)
+        self.total_bridges_length = sum(r[2] for r in results)
+
+        if len(results) <= 1:
+            self.path = results[0][0] if results else []
+            return
+
+        # Joining clusters. When nested, only the points of outermost paths can be used
+        paths = [r[0] for r in results]
+        joiner = PathsJoiner([], self.close_distance, strategy=self.strategy,
+                             segment_endpoints=self.segment_endpoints,
+                             avoid_crossings=self.avoid_crossings)
+        if self.nested:
+            owners = [[cluster[i] for i in r[1]] for (cluster, r) in izip(clusters, results)]
+            joiner.unite_group(paths, owners, self.containment_tree.roots())
+        else:
+            joiner.unite_group(paths)
+        self.path = joiner.union_path()
+        self.total_cluster_bridges_length = joiner.bridges_length()
+        self.total_bridges_length += self.total_cluster_bridges_length
+
+    def number_of_clusters(self):
+        """ Returns the number of clusters used by the last call to unite()
+
+        :return: the number of clusters
+        :rtype: int
+        """
+
+        return self.num_clusters
+
+    def bridges_length(self):
+        """ Returns the total length of the bridges connecting paths
+
+        :return: the sum of the lengths of all bridges, inside and between clusters
+        :rtype: float
+        """
+
+        return self.total_bridges_length
+
+    def cluster_bridges_length(self):
+        """ Returns the total length of the bridges connecting clusters
+
+        :return: the sum of the lengths of bridges between clusters
+        :rtype: float
+        """
 
-        return (path_to_return, index_path, index_other_path)
+        return self.total_cluster_bridges_length
 
     def union_path(self):
         """ Returns the path connecting all input paths
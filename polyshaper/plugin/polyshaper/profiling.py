@@ -0,0 +1,132 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper profiling support
+
+The plugins can run under cProfile (hidden --profile option). The profile is saved in a .pstats
+file (which can be read with the pstats module or tools like snakeviz) and, optionally, as collapsed
+stacks (a .collapsed text file with one "caller;callee;... microseconds" line per stack, the input
+of flamegraph.pl, speedscope and similar tools). This module must only depend on the standard
+library
+"""
+
+import cProfile
+import os.path
+import pstats
+
+# Calls contributing less than this to a stack are not expanded in collapsed stacks (microseconds)
+MIN_COLLAPSED_TIME = 1.0
+
+# The maximum depth of collapsed stacks
+MAX_COLLAPSED_DEPTH = 100
+
+
+def run_profiled(function, output_basename, collapsed=False):
+    """ Calls function under cProfile and saves the profile
+
+    The profile is saved even if function raises an exception
+    :param function: the function to call
+    :type function: a function without parameters
+    :param output_basename: a function returning the name of the files to write (with the
+        directory, without extension). It is called after function returns, so it can use the name
+        of files generated by function
+    :type output_basename: a function without parameters returning a string
+    :param collapsed: if true also writes collapsed stacks
+    :type collapsed: bool
+    :return: the value returned by function
+    """
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function)
+    finally:
+        basename = output_basename()
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(basename + ".pstats")
+        if collapsed:
+            with open(basename + ".collapsed", "w") as outfile:
+                write_collapsed_stacks(stats, outfile)
+
+
+def function_label(function):
+    """ Returns the label of a function in collapsed stacks
+
+    :param function: the function, as a key of pstats statistics
+    :type function: a tuple (filename, line, name)
+    :return: the label, without spaces or semicolons
+    :rtype: string
+    """
+
+    (filename, line, name) = function
+    if filename == "~":
+        # Built-in functions
+        label = name
+    else:
+        label = "{}:{}({})".format(os.path.basename(filename), line, name)
+
+    return label.replace(";", ":").replace(" ", "_")
+
+
+def collapsed_stacks(stats):
+    """ Reconstructs approximate call stacks from profiling statistics
+
+    cProfile only records caller-callee pairs, so the time of a function called from different
+    places is split among stacks in proportion to the time spent when called by each caller.
+    Recursive calls are not expanded
+    :param stats: the profiling statistics
+    :type stats: an instance of pstats.Stats
+    :return: the self time (microseconds) of each stack
+    :rtype: a dictionary with stacks (tuples of labels, outermost first) as keys
+    """
+
+    # For each function, the functions it calls with the cumulative time spent in each callee when
+    # called by it
+    callees = {}
+    roots = []
+    for (function, function_stats) in stats.stats.items():
+        callers = function_stats[4]
+        # The call disabling the profiler is not interesting
+        if not callers and "_lsprof.Profiler" not in function[2]:
+            roots.append(function)
+        for (caller, caller_stats) in callers.items():
+            callees.setdefault(caller, []).append((function, caller_stats[3]))
+
+    stacks = {}
+    # Each item is (function, stack of the caller, time of function spent in this stack in seconds)
+    to_visit = [(root, (), stats.stats[root][3]) for root in roots]
+    while to_visit:
+        (function, caller_stack, stack_time) = to_visit.pop()
+        total_time = stats.stats[function][3]
+        fraction = stack_time / total_time if total_time > 0 else 0.0
+        stack = caller_stack + (function_label(function),)
+
+        self_time = stats.stats[function][2] * fraction * 1e6
+        if self_time > 0:
+            stacks[stack] = stacks.get(stack, 0.0) + self_time
+
+        if len(stack) >= MAX_COLLAPSED_DEPTH:
+            continue
+        for (callee, callee_time) in callees.get(function, []):
+            callee_label = function_label(callee)
+            callee_time *= fraction
+            if callee_label not in stack and callee_time * 1e6 >= MIN_COLLAPSED_TIME:
+                to_visit.append((callee, stack, callee_time))
+
+    return stacks
+
+
+def write_collapsed_stacks(stats, outfile):
+    """ Writes collapsed stacks to a file, one stack per line
+
+    :param stats: the profiling statistics
+    :type stats: an instance of pstats.Stats
+    :param outfile: the file where stacks are written
+    :type outfile: a file object opened in text mode
+    """
+
+    stacks = collapsed_stacks(stats)
+    for stack in sorted(stacks.keys()):
+        microseconds = int(round(stacks[stack]))
+        if microseconds > 0:
+            outfile.write(";".join(stack) + " " + str(microseconds) + "\n")
@@ -0,0 +1,576 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper union of overlapping closed paths
+
+When shapes of the drawing overlap, cutting all their outlines would make the wire pass through the
+material of the other shapes. The union only keeps the boundary of the region covered by shapes:
+paths are split where they touch or cross each other (the couples of segments to test are found with
+the sweep line of intersections.py) and each piece is kept if the region on one of its sides is
+filled and the one on the other side is empty. As in the rest of the pipeline, paths strictly inside
+an odd number of other paths are holes: the filled region is where the winding number of paths,
+counted positive for outer contours and negative for holes, is greater than zero. Paths touching or
+crossing their container are united with it instead of being considered holes
+"""
+
+import math
+from polyshaper.containment import ContainmentTree # pylint: disable=import-error,no-name-in-module
+from polyshaper.helpers import point_segment_projection, segments_intersection, signed_area # pylint: disable=import-error,no-name-in-module
+from polyshaper.helpers import squared_distance, winding_number # pylint: disable=import-error,no-name-in-module
+from polyshaper.intersections import overlapping_segments # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathgeometry import PathGeometries # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathsoffset import remove_duplicated_points # pylint: disable=import-error,no-name-in-module
+from polyshaper.spatialindex import GridIndex, box_contains, grid_cell_size # pylint: disable=import-error,no-name-in-module
+
+# Points nearer than this are considered the same point (millimeters)
+POINT_TOLERANCE = 1e-7
+
+# The number of decimal digits kept in the coordinates of points of split paths, so that points
+# computed in different ways on different paths compare equal
+SNAP_DIGITS = 9
+
+# The distance from a piece of path of the points used to check which of its sides is filled
+# (millimeters). This must be well above POINT_TOLERANCE and the rounding of snap, otherwise the
+# points can end up on the same side of the original path
+SIDE_DISTANCE = 1e-5
+
+# Loops of the union with an area smaller than this are discarded (square millimeters)
+MIN_LOOP_AREA = 1e-6
+
+
+def snap(point):
+    """ Rounds the coordinates of a point to SNAP_DIGITS decimal digits
+
+    :param point: the point
+    :type point: a couple of floats
+    :return: the rounded point
+    :rtype: a couple of floats
+    """
+
+    return (round(point[0], SNAP_DIGITS), round(point[1], SNAP_DIGITS))
+
+
+def turn_angle(previous, current, following):
+    """ Returns the angle of the turn at current when going from previous to following
+
+    :param previous: the point before current
+    :type previous: a couple of floats
+    :param current: the point where the path turns
+    :type current: a couple of floats
+    :param following: the point after current
+    :type following: a couple of floats
+    :return: the angle, positive for left turns and negative for right turns (with the y axis
+        pointing up)
+    :rtype: float between -pi and pi
+    """
+
+    (in_x, in_y) = (current[0] - previous[0], current[1] - previous[1])
+    (out_x, out_y) = (following[0] - current[0], following[1] - current[1])
+
+    return math.atan2(in_x * out_y - in_y * out_x, in_x * out_x + in_y * out_y)
+
+
+class ShapesUnion(object): # pylint: disable=too-many-instance-attributes
+    """ Unites overlapping closed paths
+
+    Paths that do not touch any other path are returned unchanged (the same objects) unless they are
+    completely covered by other shapes, in which case they are removed. Paths that are not closed
+    or that have no area are returned unchanged. The other paths are replaced by the closed loops
+    bounding their union: outer contours are counterclockwise and holes clockwise. Paths are
+    returned in the order of the first input path they come from
+    """
+
+    def __init__(self, input_paths, close_distance, geometries=None):
+        """ Constructor
+
+        :param input_paths: the paths to unite
+        :type input_paths: a list of paths. Each path is a list of points (couples of floats)
+        :param close_distance: the max distance between the initial and final point of closed
+            paths
+        :type close_distance: float
+        :param geometries: the geometric properties of input paths or None to compute them
+        :type geometries: PathGeometries or None
+        """
+
+        self.input_paths = input_paths
+        self.close_distance = close_distance
+        self.geometries = geometries if geometries is not None else PathGeometries()
+        # The vertices of the closed paths with an area (None for the others), without repeating
+        # the first one at the end
+        self.polygons = []
+        # The sign of the winding number of each polygon inside the filled region
+        self.factors = []
+        # The grid index of the bounding boxes of polygons
+        self.index = None
+        # For each polygon, the points where it is split as a dict from segment index to a list of
+        # couples (position along the segment, point). Vertices are at position 0
+        self.breaks = []
+        # The couples of polygons touching or crossing each other
+        self.contacts = set()
+        # Points considered equal to other points (the key is replaced by the value)
+        self.aliases = {}
+        # The directed segments of the boundary of the union and the polygon they come from
+        self.edges = {}
+        self.output_paths = []
+        self.num_united = 0
+        self.num_unclosed = 0
+
+    def unite_shapes(self):
+        """ Unites all paths
+
+        After this call paths can be retrieved with the paths() method
+        """
+
+        self.polygons = []
+        for path in self.input_paths:
+            points = None
+            geometry = self.geometries.get(path)
+            if len(path) >= 3 and geometry.is_closed(self.close_distance) and geometry.area != 0.0:
+                points = remove_duplicated_points(path)
+                if len(points) < 3:
+                    points = None
+            self.polygons.append(points)
+
+        self.breaks = [{} for dummy_polygon in self.polygons]
+        self.contacts = set()
+        self.aliases = {}
+        self.edges = {}
+        self.find_contacts()
+        self.compute_factors()
+
+        boxes = [self.geometries.get(path).box if points is not None else None
+                 for (path, points) in zip(self.input_paths, self.polygons)]
+        self.index = GridIndex(grid_cell_size([b for b in boxes if b is not None]))
+        for (polygon_index, box) in enumerate(boxes):
+            if box is not None:
+                self.index.insert(polygon_index, box)
+
+        # Couples (index of the first input path, path) sorted at the end
+        output = []
+        self.num_united = 0
+        for (polygon_index, points) in enumerate(self.polygons):
+            if points is None:
+                output.append((polygon_index, self.input_paths[polygon_index]))
+            elif not self.breaks[polygon_index]:
+                if self.boundary_side(points + [points[0]]) != 0:
+                    output.append((polygon_index, self.input_paths[polygon_index]))
+                else:
+                    self.num_united += 1
+            else:
+                self.num_united += 1
+                self.add_boundary_edges(polygon_index)
+
+        (loops, unclosed_polygons) = self.trace_loops()
+        output += self.restore_unclosed(loops, unclosed_polygons)
+        output.sort(key=lambda item: item[0])
+        self.output_paths = [path for (dummy_index, path) in output]
+
+    def find_contacts(self):
+        """ Finds the points where polygons touch or cross each other (or themselves)
+        """
+
+        segments = []
+        segment_ids = []
+        for (polygon_index, points) in enumerate(self.polygons):
+            if points is None:
+                continue
+            for (index, point) in enumerate(points):
+                segments.append((points[index - 1], point))
+                segment_ids.append((polygon_index, (index - 1) % len(points)))
+
+        for (first, second) in overlapping_segments(segments):
+            (polygon1, segment1) = segment_ids[first]
+            (polygon2, segment2) = segment_ids[second]
+            if polygon1 == polygon2:
+                num_points = len(self.polygons[polygon1])
+                if (segment1 - segment2) % num_points in (1, num_points - 1):
+                    # Consecutive segments only share a vertex
+                    continue
+            self.add_contacts(polygon1, segment1, polygon2, segment2)
+
+    def add_contacts(self, polygon1, segment1, polygon2, segment2): # pylint: disable=too-many-locals
+        """ Adds the points where two segments touch or cross each other
+
+        :param polygon1: the index of the polygon of the first segment
+        :type polygon1: int
+        :param segment1: the index of the first segment in its polygon
+        :type segment1: int
+        :param polygon2: the index of the polygon of the second segment
+        :type polygon2: int
+        :param segment2: the index of the second segment in its polygon
+        :type segment2: int
+        """
+
+        (start1, end1) = self.segment(polygon1, segment1)
+        (start2, end2) = self.segment(polygon2, segment2)
+
+        # The vertices lying on the other segment
+        touching = False
+        for (point, polygon, vertex, other_polygon, other_segment, other_start, other_end) in [
+                (start1, polygon1, segment1, polygon2, segment2, start2, end2),
+                (end1, polygon1, segment1 + 1, polygon2, segment2, start2, end2),
+                (start2, polygon2, segment2, polygon1, segment1, start1, end1),
+                (end2, polygon2, segment2 + 1, polygon1, segment1, start1, end1)]:
+            (point_squared_distance, param) = point_segment_projection(point, other_start,
+                                                                       other_end)
+            if point_squared_distance <= POINT_TOLERANCE ** 2:
+                touching = True
+                num_points = len(self.polygons[polygon])
+                self.breaks[polygon].setdefault(vertex % num_points, []).append((0.0, point))
+                self.add_break(other_polygon, other_segment, param, point)
+
+        if not touching:
+            params = segments_intersection(start1, end1, start2, end2)
+            if params is None:
+                return
+            point = snap((start1[0] + params[0] * (end1[0] - start1[0]),
+                          start1[1] + params[0] * (end1[1] - start1[1])))
+            self.add_break(polygon1, segment1, params[0], point)
+            self.add_break(polygon2, segment2, params[1], point)
+
+        if polygon1 != polygon2:
+            self.contacts.add((min(polygon1, polygon2), max(polygon1, polygon2)))
+
+    def add_break(self, polygon, segment, param, point):
+        """ Adds a point where a polygon is split
+
+        If the point is at one end of the segment, the polygon is split at that vertex and the
+        point is considered equal to it
+        :param polygon: the index of the polygon
+        :type polygon: int
+        :param segment: the index of the segment in the polygon
+        :type segment: int
+        :param param: the position of the point along the segment (0 at the start, 1 at the end)
+        :type param: float
+        :param point: the point
+        :type point: a couple of floats
+        """
+
+        (start, end) = self.segment(polygon, segment)
+        if squared_distance(point, start) <= POINT_TOLERANCE ** 2:
+            self.alias(point, start)
+            self.breaks[polygon].setdefault(segment, []).append((0.0, start))
+        elif squared_distance(point, end) <= POINT_TOLERANCE ** 2:
+            self.alias(point, end)
+            next_segment = (segment + 1) % len(self.polygons[polygon])
+            self.breaks[polygon].setdefault(next_segment, []).append((0.0, end))
+        else:
+            self.breaks[polygon].setdefault(segment, []).append((param, point))
+
+    def segment(self, polygon, segment):
+        """ Returns the start and end of a segment of a polygon
+
+        :param polygon: the index of the polygon
+        :type polygon: int
+        :param segment: the index of the segment in the polygon
+        :type segment: int
+        :return: the start and end of the segment
+        :rtype: a couple of points (couples of floats)
+        """
+
+        points = self.polygons[polygon]
+        return (points[segment], points[(segment + 1) % len(points)])
+
+    def alias(self, point, other):
+        """ Makes two points equal
+
+        :param point: the first point
+        :type point: a couple of floats
+        :param other: the second point
+        :type other: a couple of floats
+        """
+
+        point = self.resolve(point)
+        other = self.resolve(other)
+        if point != other:
+            self.aliases[point] = other
+
+    def resolve(self, point):
+        """ Returns the point that replaces a point in the union
+
+        :param point: the point
+        :type point: a couple of floats
+        :return: the point replacing it
+        :rtype: a couple of floats
+        """
+
+        while point in self.aliases:
+            point = self.aliases[point]
+
+        return point
+
+    def compute_factors(self):
+        """ Computes the sign of the winding number of polygons inside the filled region
+
+        The sign is positive for outer contours and negative for holes, whatever the orientation of
+        paths
+        """
+
+        tree = ContainmentTree([path if points is not None else []
+                                for (path, points) in zip(self.input_paths, self.polygons)],
+                               self.geometries)
+        hole = [False] * len(self.polygons)
+        for polygon_index in tree.top_down_order():
+            parent = tree.parent(polygon_index)
+            if parent is None:
+                continue
+            if (min(parent, polygon_index), max(parent, polygon_index)) in self.contacts:
+                hole[polygon_index] = hole[parent]
+            else:
+                hole[polygon_index] = not hole[parent]
+
+        self.factors = []
+        for (polygon_index, points) in enumerate(self.polygons):
+            if points is None:
+                self.factors.append(0)
+            else:
+                geometry = self.geometries.get(self.input_paths[polygon_index])
+                counterclockwise = geometry.orientation() > 0
+                self.factors.append(1 if counterclockwise != hole[polygon_index] else -1)
+
+    def filled(self, point):
+        """ Returns true if a point is in the region covered by shapes
+
+        :param point: the point
+        :type point: a couple of floats
+        :return: true if the point is in the region covered by shapes
+        :rtype: bool
+        """
+
+        total = 0
+        for polygon_index in self.index.query_point(point):
+            if box_contains(self.index.get_box(polygon_index), point + point):
+                total += self.factors[polygon_index] * \
+                    winding_number(point, self.polygons[polygon_index])
+
+        return total > 0
+
+    def boundary_side(self, points):
+        """ Returns which side of a piece of path is filled if the piece is on the union boundary
+
+        The piece must not touch other paths but at its ends. The test is performed near the middle
+        of its longest segment
+        :param points: the points of the piece of path
+        :type points: a list of points (couples of floats)
+        :return: 1 if only the region on the left of the piece is filled, -1 if only the region on
+            the right is filled, 0 if the piece is not on the boundary of the union
+        :rtype: int
+        """
+
+        (start, end) = max(((points[i - 1], points[i]) for i in range(1, len(points))),
+                           key=lambda segment: squared_distance(segment[0], segment[1]))
+        middle = ((start[0] + end[0]) / 2.0, (start[1] + end[1]) / 2.0)
+        # The normal pointing to the left of the segment
+        scale = SIDE_DISTANCE / math.sqrt(squared_distance(start, end))
+        normal = ((start[1] - end[1]) * scale, (end[0] - start[0]) * scale)
+        left = self.filled((middle[0] + normal[0], middle[1] + normal[1]))
+        right = self.filled((middle[0] - normal[0], middle[1] - normal[1]))
+        if left == right:
+            return 0
+
+        return 1 if left else -1
+
+    def split_points(self, polygon_index):
+        """ Returns the points of a polygon including the points where it is split
+
+        :param polygon_index: the index of the polygon
+        :type polygon_index: int
+        :return: the points, each one with a flag telling whether the polygon is split there. The
+            first point is not repeated at the end
+        :rtype: a list of couples (point, bool)
+        """
+
+        nodes = []
+        breaks = self.breaks[polygon_index]
+        for (index, vertex) in enumerate(self.polygons[polygon_index]):
+            nodes.append([snap(self.resolve(vertex)), False])
+            for (param, point) in sorted(breaks.get(index, [])):
+                point = snap(self.resolve(point))
+                if param == 0.0 or point == nodes[-1][0]:
+                    nodes[-1][1] = True
+                else:
+                    nodes.append([point, True])
+
+        # Removing points that became equal
+        unique = []
+        for node in nodes:
+            if unique and unique[-1][0] == node[0]:
+                unique[-1][1] = unique[-1][1] or node[1]
+            else:
+                unique.append(node)
+        while len(unique) > 1 and unique[-1][0] == unique[0][0]:
+            unique[0][1] = unique[0][1] or unique[-1][1]
+            unique.pop()
+
+        return [(point, split) for (point, split) in unique]
+
+    def add_boundary_edges(self, polygon_index):
+        """ Splits a polygon and adds the pieces on the union boundary to the edges
+
+        :param polygon_index: the index of the polygon
+        :type polygon_index: int
+        """
+
+        nodes = self.split_points(polygon_index)
+        if len(nodes) < 3:
+            return
+
+        # Starting from a split point, the pieces go from a split point to the next one
+        first = next((i for (i, (dummy_point, split)) in enumerate(nodes) if split), 0)
+        nodes = nodes[first:] + nodes[:first]
+        piece = [nodes[0][0]]
+        for (point, split) in nodes[1:] + [(nodes[0][0], True)]:
+            piece.append(point)
+            if split:
+                side = self.boundary_side(piece)
+                if side != 0:
+                    if side < 0:
+                        piece.reverse()
+                    for index in range(1, len(piece)):
+                        self.add_edge(piece[index - 1], piece[index], polygon_index)
+                piece = [point]
+
+    def add_edge(self, start, end, polygon_index):
+        """ Adds a directed segment of the union boundary
+
+        Equal segments are added once, opposite segments cancel each other
+        :param start: the start of the segment
+        :type start: a couple of floats
+        :param end: the end of the segment
+        :type end: a couple of floats
+        :param polygon_index: the index of the polygon the segment comes from
+        :type polygon_index: int
+        """
+
+        if (end, start) in self.edges:
+            del self.edges[(end, start)]
+        elif (start, end) not in self.edges:
+            self.edges[(start, end)] = polygon_index
+
+    def trace_loops(self):
+        """ Joins the segments of the union boundary in closed loops
+
+        Where more segments leave the same point, the one turning most to the left is taken, so that
+        loops go around a single connected region
+        :return: the loops as couples (index of the first polygon the loop comes from, closed path)
+            and the polygons of segments that could not be joined in a closed loop (only caused by
+            numerical errors)
+        :rtype: a couple (list of couples (int, list of points), set of ints)
+        """
+
+        outgoing = {}
+        for (start, end) in self.edges:
+            outgoing.setdefault(start, []).append(end)
+
+        loops = []
+        unclosed_polygons = set()
+        for ((start, end), polygon_index) in sorted(self.edges.items(),
+                                                    key=lambda item: (item[1], item[0])):
+            if end not in outgoing.get(start, ()):
+                continue
+
+            outgoing[start].remove(end)
+            loop = [start]
+            polygons = set([polygon_index])
+            (previous, current) = (start, end)
+            while current != start:
+                candidates = outgoing.get(current)
+                if not candidates:
+                    loop = None
+                    break
+                angles = [turn_angle(previous, current, point) for point in candidates]
+                following = candidates.pop(angles.index(max(angles)))
+                polygons.add(self.edges[(current, following)])
+                loop.append(current)
+                (previous, current) = (current, following)
+
+            if loop is None:
+                unclosed_polygons.update(polygons)
+            else:
+                loop.append(start)
+                if abs(signed_area(loop)) > MIN_LOOP_AREA:
+                    loops.append((min(polygons), loop))
+
+        return (loops, unclosed_polygons)
+
+    def restore_unclosed(self, loops, unclosed_polygons):
+        """ Replaces the loops of groups of touching shapes whose boundary cannot be closed
+
+        The paths of these shapes are returned unchanged instead of losing material
+        :param loops: the loops as returned by trace_loops
+        :type loops: a list of couples (int, list of points)
+        :param unclosed_polygons: the polygons whose boundary cannot be closed, as returned by
+            trace_loops
+        :type unclosed_polygons: a set of ints
+        :return: the loops and the paths returned unchanged, as couples (index of the first input
+            path, path)
+        :rtype: a list of couples (int, list of points)
+        """
+
+        self.num_unclosed = 0
+        if not unclosed_polygons:
+            return loops
+
+        components = self.contact_components()
+        unclosed = set(components[p] for p in unclosed_polygons)
+        output = [loop for loop in loops if components[loop[0]] not in unclosed]
+        for (polygon_index, points) in enumerate(self.polygons):
+            if points is not None and self.breaks[polygon_index] and \
+               components[polygon_index] in unclosed:
+                output.append((polygon_index, self.input_paths[polygon_index]))
+                self.num_united -= 1
+                self.num_unclosed += 1
+
+        return output
+
+    def contact_components(self):
+        """ Groups polygons touching each other, directly or through other polygons
+
+        :return: for each polygon, the index of a polygon identifying its group
+        :rtype: a list of ints
+        """
+
+        components = list(range(len(self.polygons)))
+
+        def find(polygon_index):
+            """ Returns the polygon identifying the group of a polygon
+            """
+
+            while components[polygon_index] != polygon_index:
+                components[polygon_index] = components[components[polygon_index]]
+                polygon_index = components[polygon_index]
+            return polygon_index
+
+        for (polygon1, polygon2) in self.contacts:
+            components[find(polygon1)] = find(polygon2)
+
+        return [find(polygon_index) for polygon_index in range(len(self.polygons))]
+
+    def unclosed_paths(self):
+        """ Returns the number of input paths returned unchanged because the union boundary around
+        them could not be closed
+
+        :return: the number of input paths returned unchanged because of numerical errors
+        :rtype: int
+        """
+
+        return self.num_unclosed
+
+    def united_paths(self):
+        """ Returns the number of input paths that were united with other paths or removed
+
+        :return: the number of input paths that were united with other paths or removed
+        :rtype: int
+        """
+
+        return self.num_united
+
+    def paths(self):
+        """ Returns the united paths
+
+        :return: the united paths
+        :rtype: a list of paths. Each path is a list of points (couples of floats)
+        """
+
+        return self.output_paths
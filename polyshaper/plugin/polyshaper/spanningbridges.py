@@ -0,0 +1,438 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper bridges connecting closed paths with the shortest total length
+
+The bridges form the minimum spanning tree of paths, computed with the Boruvka algorithm using a
+grid index of vertices or segments (see SpanningBridges). Bridges can be prevented from crossing
+other paths, in which case slightly longer bridges are searched (see MAX_CROSSING_SEARCHES)
+"""
+
+from polyshaper.helpers import point_segment_projection # pylint: disable=import-error,no-name-in-module
+from polyshaper.spatialindex import GridIndex, bounding_box, grid_cell_size # pylint: disable=import-error,no-name-in-module
+
+# When the shortest bridge from a group of paths crosses other paths, bridges that do not cross
+# anything are searched up to MAX_DETOUR times the length of the shortest bridge (if none is found,
+# the crossing bridge is used) and, once one is found, from at most MAX_CROSSING_SEARCHES points
+# (so the bridge can be a bit longer than the shortest one)
+MAX_CROSSING_SEARCHES = 16
+MAX_DETOUR = 10.0
+
+def path_segments(path, indices=None):
+    """ Returns the indices of the segments of a path that can be used as bridge endpoints
+
+    Segment i goes from path[i] to path[i + 1]. A path made up of a single point has a single
+    segment of null length
+    :param path: the closed path
+    :type path: a list of points (couples of floats)
+    :param indices: the indices of the points that can be used as bridge endpoints or None if all
+        points can be used. Segments are used if both their ends can be used
+    :type indices: a list of ints or None
+    :return: the indices of segments
+    :rtype: a list of ints
+    """
+
+    if len(path) < 2:
+        return range(len(path))
+    if indices is None:
+        return range(len(path) - 1)
+
+    allowed = set(indices)
+    last = len(path) - 1
+    return [i for i in range(last) if i in allowed and
+            (i + 1 in allowed or (i + 1 == last and 0 in allowed))]
+
+def segment_end(path, index):
+    """ Returns the end of a segment of a path
+
+    :param path: the path
+    :type path: a list of points (couples of floats)
+    :param index: the index of the segment
+    :type index: int
+    :return: the end of the segment (the start for the last point of the path)
+    :rtype: a couple of floats
+    """
+
+    return path[index + 1] if index + 1 < len(path) else path[index]
+
+def segment_point(path, endpoint):
+    """ Returns a point on a segment of a path
+
+    :param path: the path
+    :type path: a list of points (couples of floats)
+    :param endpoint: the index of the segment and the position along it (0 at start, 1 at end)
+    :type endpoint: a couple (int, float)
+    :return: the point
+    :rtype: a couple of floats
+    """
+
+    (index, param) = endpoint
+    if param == 0.0:
+        return path[index]
+
+    (start, end) = (path[index], segment_end(path, index))
+    return (start[0] + param * (end[0] - start[0]), start[1] + param * (end[1] - start[1]))
+
+def path_vertices(path):
+    """ Returns the indices of the distinct vertices of a closed path
+
+    :param path: the closed path
+    :type path: a list of points (couples of floats)
+    :return: the indices of all points but the last one (which is equal to the first one) or [0]
+        for paths made up of a single point
+    :rtype: a list of ints
+    """
+
+    return range(len(path) - 1) if len(path) > 1 else range(len(path))
+
+def other_group_filters(groups, cell_groups, group):
+    """ Returns the functions accepting the items and the grid cells of groups other than group
+
+    :param groups: the group of each path
+    :type groups: a list of ints
+    :param cell_groups: the group of the items of cells containing items of a single group
+    :type cell_groups: a dict from cells to ints
+    :param group: the group to reject
+    :type group: int
+    :return: the functions to pass to GridIndex.nearest as accept and accept_cell
+    :rtype: a couple of functions
+    """
+
+    def accept(item):
+        """ Returns true if the item belongs to a path of another group
+        """
+
+        return groups[item[0]] != group
+
+    def accept_cell(cell):
+        """ Returns false if all items of the cell belong to the group
+        """
+
+        return cell_groups.get(cell) != group
+
+    return (accept, accept_cell)
+
+def minimum_spanning_bridges(paths, candidates=None, segments=False, crossings=None):
+    """ Returns the shortest set of bridges connecting all paths
+
+    See SpanningBridges
+    :param paths: the closed paths
+    :type paths: a list of paths. Each path is a list of points (couples of floats)
+    :param candidates: for each path, the indices of the vertices that can be used as bridge
+        endpoints (segments are used if both their ends can be used). If None all vertices can be
+        used
+    :type candidates: a list of lists of ints or None
+    :param segments: whether bridges can end inside segments or not
+    :type segments: bool
+    :param crossings: the segments that bridges should not cross or None to accept all bridges
+    :type crossings: SegmentIndex or None
+    :return: the bridges. There is one bridge less than paths. Endpoints are the index of a segment
+        and the position along the segment (0 at start, 1 at end), the position is 0 if segments is
+        false
+    :rtype: a list of tuples (index path1, (index segment path1, param), index path2,
+        (index segment path2, param))
+    """
+
+    return SpanningBridges(paths, candidates, segments, crossings).bridges()
+
+class SpanningBridges(object):
+    """ Computes the shortest set of bridges connecting all paths
+
+    This computes the minimum spanning tree of paths (the distance between two paths is the distance
+    between their nearest vertices) with the Boruvka algorithm: at each round the shortest bridge
+    from each group of connected paths to another group is added, so there are at most log2(number
+    of paths) rounds. The nearest vertex of another group is found with a grid index, so each round
+    costs about as much as a nearest neighbour search for each vertex. If segments is true, bridges
+    go from a vertex to the nearest point of the segments of other paths (found with a grid index
+    of segments); the shortest bridge of a group is then searched from its vertices and from the
+    vertices of other groups, so the result can be slightly longer than the minimum spanning tree.
+    If crossings is not None, bridges crossing its segments are skipped and the next nearest point
+    is used (see MAX_CROSSING_SEARCHES)
+    """
+
+    def __init__(self, paths, candidates=None, segments=False, crossings=None):
+        """ Constructor
+
+        :param paths: the closed paths
+        :type paths: a list of paths. Each path is a list of points (couples of floats)
+        :param candidates: for each path, the indices of the vertices that can be used as bridge
+            endpoints (segments are used if both their ends can be used). If None all vertices can
+            be used
+        :type candidates: a list of lists of ints or None
+        :param segments: whether bridges can end inside segments or not
+        :type segments: bool
+        :param crossings: the segments that bridges should not cross or None to accept all bridges
+        :type crossings: SegmentIndex or None
+        """
+
+        self.paths = paths
+        self.candidates = [path_vertices(p) for p in paths] if candidates is None else candidates
+        self.segments = segments
+        self.crossings = crossings
+        self.item_squared_distance = self.segment_squared_distance if segments else None
+
+        if segments:
+            items = [((p, i), bounding_box([paths[p][i], segment_end(paths[p], i)]))
+                     for (p, path_candidates) in enumerate(self.candidates)
+                     for i in path_segments(paths[p], path_candidates)]
+        else:
+            items = [((p, i), (paths[p][i][0], paths[p][i][1], paths[p][i][0], paths[p][i][1]))
+                     for (p, path_candidates) in enumerate(self.candidates)
+                     for i in path_candidates]
+        self.index = GridIndex(grid_cell_size([box for (dummy_item, box) in items]))
+        for (item, box) in items:
+            self.index.insert(item, box)
+
+        # Union-find structure to keep track of connected paths
+        self.parents = range(len(paths))
+
+    def bridges(self): # pylint: disable=too-many-locals
+        """ Returns the bridges
+
+        :return: the bridges, see minimum_spanning_bridges
+        :rtype: a list of tuples (index path1, (index segment path1, param), index path2,
+            (index segment path2, param))
+        """
+
+        bridges = []
+        while len(bridges) < len(self.paths) - 1:
+            groups = [self.find(p) for p in range(len(self.paths))]
+            # The group of the items of cells containing items of a single group, so that these
+            # cells can be skipped quickly when searching from the same group
+            cell_groups = {}
+            for (cell, cell_items) in self.index.cells_items():
+                cell_group = set(groups[item[0]] for item in cell_items)
+                if len(cell_group) == 1:
+                    cell_groups[cell] = cell_group.pop()
+
+            shortest = self.shortest_bridges(groups, cell_groups)
+            if self.crossings is not None:
+                shortest = self.non_crossing_bridges(shortest, groups, cell_groups)
+
+            if not shortest:
+                # Some paths have no candidate vertices, they cannot be connected
+                break
+
+            for (dummy_dist, path1, endpoint1, path2, endpoint2) in sorted(shortest.values()):
+                (group1, group2) = (self.find(path1), self.find(path2))
+                if group1 != group2:
+                    self.parents[group2] = group1
+                    bridges.append((path1, endpoint1, path2, endpoint2))
+
+        return bridges
+
+    def find(self, path_index):
+        """ Returns the representative of the group of the path
+
+        :param path_index: the index of the path
+        :type path_index: int
+        :return: the index of the path representing the group
+        :rtype: int
+        """
+
+        while self.parents[path_index] != path_index:
+            self.parents[path_index] = self.parents[self.parents[path_index]]
+            path_index = self.parents[path_index]
+        return path_index
+
+    def shortest_bridges(self, groups, cell_groups):
+        """ Returns the shortest bridge from each group to another one
+
+        :param groups: the group of each path
+        :type groups: a list of ints
+        :param cell_groups: the group of the items of cells containing items of a single group
+        :type cell_groups: a dict from cells to ints
+        :return: the shortest bridge of each group, with its squared length
+        :rtype: a dict from ints to tuples (squared length, index path1, (index segment path1,
+            param), index path2, (index segment path2, param))
+        """
+
+        shortest = {}
+        for (path_index, path_candidates) in enumerate(self.candidates):
+            group = groups[path_index]
+            (accept, accept_cell) = other_group_filters(groups, cell_groups, group)
+            for point_index in path_candidates:
+                point = self.paths[path_index][point_index]
+                limit = shortest[group][0] if group in shortest else None
+                nearest = self.index.nearest(point, accept, limit, self.item_squared_distance,
+                                             accept_cell)
+                if nearest is not None:
+                    self.store_bridge(shortest, groups,
+                                      self.make_bridge(path_index, point_index, nearest))
+
+        return shortest
+
+    def non_crossing_bridges(self, shortest, groups, cell_groups): # pylint: disable=too-many-locals
+        """ Replaces the shortest bridges crossing segments in crossings
+
+        The shortest bridge of most groups does not cross anything. For the other groups, the
+        distance of the nearest item from each point (which cannot be greater than the distance of
+        the nearest item that can be reached without crossings) is computed, so that the expensive
+        search is only performed from the points that can give the shortest bridge
+        :param shortest: the shortest bridge of each group, see shortest_bridges
+        :type shortest: a dict from ints to tuples
+        :param groups: the group of each path
+        :type groups: a list of ints
+        :param cell_groups: the group of the items of cells containing items of a single group
+        :type cell_groups: a dict from cells to ints
+        :return: the shortest bridge of each group not crossing anything or, if none is found, the
+            crossing bridge
+        :rtype: a dict from ints to tuples
+        """
+
+        blocked = dict((g, b) for (g, b) in shortest.items() if self.bridge_crosses(b))
+        valid_bridges = set(b for (g, b) in shortest.items() if g not in blocked)
+        shortest = {}
+        for bridge in valid_bridges:
+            self.store_bridge(shortest, groups, bridge)
+
+        for (group, points) in self.nearest_distances(blocked, groups, cell_groups).items():
+            (accept, accept_cell) = other_group_filters(groups, cell_groups, group)
+            max_squared_distance = blocked[group][0] * MAX_DETOUR * MAX_DETOUR
+            # The segments blocking bridges from the points of the group
+            blockers = []
+            for (searches, (bound, path_index, point_index)) in enumerate(sorted(points)):
+                limit = shortest[group][0] if group in shortest else max_squared_distance
+                if bound >= limit or (group in shortest and searches >= MAX_CROSSING_SEARCHES):
+                    break
+                point = self.paths[path_index][point_index]
+                nearest = self.index.nearest(point, accept, limit, self.item_squared_distance,
+                                             accept_cell, self.crossing_verifier(point, blockers))
+                if nearest is not None:
+                    self.store_bridge(shortest, groups,
+                                      self.make_bridge(path_index, point_index, nearest))
+
+            if group not in shortest:
+                # No alternative, using the crossing bridge (only for this group, other groups can
+                # have bridges not crossing anything)
+                shortest[group] = blocked[group]
+
+        return shortest
+
+    def nearest_distances(self, blocked, groups, cell_groups):
+        """ Returns the distance of the nearest item of another group from the points of groups
+
+        :param blocked: the groups whose points are considered
+        :type blocked: a dict from ints to tuples
+        :param groups: the group of each path
+        :type groups: a list of ints
+        :param cell_groups: the group of the items of cells containing items of a single group
+        :type cell_groups: a dict from cells to ints
+        :return: for each group, the squared distance of the nearest item, the index of the path and
+            the index of the point, for all points
+        :rtype: a dict from ints to lists of tuples (float, int, int)
+        """
+
+        bounds = {}
+        for (path_index, path_candidates) in enumerate(self.candidates):
+            group = groups[path_index]
+            if group not in blocked:
+                continue
+            (accept, accept_cell) = other_group_filters(groups, cell_groups, group)
+            for point_index in path_candidates:
+                nearest = self.index.nearest(self.paths[path_index][point_index], accept, None,
+                                             self.item_squared_distance, accept_cell)
+                if nearest is not None:
+                    bounds.setdefault(group, []).append((nearest[0], path_index, point_index))
+
+        return bounds
+
+    def crossing_verifier(self, point, blockers):
+        """ Returns the function rejecting the items that cannot be reached from point without
+        crossing segments in crossings
+
+        :param point: the start of bridges
+        :type point: a couple of floats
+        :param blockers: the segments to test first, see SegmentIndex.crosses
+        :type blockers: a list of ints
+        :return: the function to pass to GridIndex.nearest as verify
+        :rtype: a function taking an item and returning a bool
+        """
+
+        def verify(item):
+            """ Returns true if the bridge from point to item does not cross anything
+            """
+
+            return not self.crossings.crosses(point, self.bridge_end(point, item)[1], blockers)
+
+        return verify
+
+    def segment_squared_distance(self, point, item):
+        """ Returns the squared distance of a point from a segment in the index
+
+        :param point: the point
+        :type point: a couple of floats
+        :param item: the index of the path and of the segment
+        :type item: a couple of ints
+        :return: the squared distance
+        :rtype: float
+        """
+
+        path = self.paths[item[0]]
+        return point_segment_projection(point, path[item[1]], segment_end(path, item[1]))[0]
+
+    def bridge_end(self, point, item):
+        """ Returns the position along the segment and the point where a bridge from point to item
+        ends
+
+        :param point: the start of the bridge
+        :type point: a couple of floats
+        :param item: the index of the path and of the vertex or segment
+        :type item: a couple of ints
+        :return: the position along the segment (0 if bridges only end at vertices) and the end
+        :rtype: a couple (float, couple of floats)
+        """
+
+        (path, start) = (self.paths[item[0]], self.paths[item[0]][item[1]])
+        if not self.segments:
+            return (0.0, start)
+        param = point_segment_projection(point, start, segment_end(path, item[1]))[1]
+        return (param, segment_point(path, (item[1], param)))
+
+    def make_bridge(self, path_index, point_index, nearest):
+        """ Returns the bridge from a point to the nearest item, with its squared length
+
+        :param path_index: the index of the path of the point
+        :type path_index: int
+        :param point_index: the index of the point
+        :type point_index: int
+        :param nearest: the squared distance and the nearest item, as returned by GridIndex.nearest
+        :type nearest: a couple (float, couple of ints)
+        :return: the bridge with its squared length
+        :rtype: a tuple (squared length, index path1, (index segment path1, param), index path2,
+            (index segment path2, param))
+        """
+
+        (squared_dist, (other_path, other_point)) = nearest
+        param = self.bridge_end(self.paths[path_index][point_index], (other_path, other_point))[0]
+        return (squared_dist, path_index, (point_index, 0.0), other_path, (other_point, param))
+
+    @staticmethod
+    def store_bridge(shortest, groups, bridge):
+        """ Stores a bridge as the shortest of the two groups it connects, if it is shorter than
+        their current one
+
+        :param shortest: the shortest bridge of each group
+        :type shortest: a dict from ints to tuples
+        :param groups: the group of each path
+        :type groups: a list of ints
+        :param bridge: the bridge with its squared length, see make_bridge
+        :type bridge: a tuple
+        """
+
+        for group in [groups[bridge[1]], groups[bridge[3]]]:
+            if group not in shortest or bridge < shortest[group]:
+                shortest[group] = bridge
+
+    def bridge_crosses(self, bridge):
+        """ Returns true if the bridge crosses a segment in crossings
+
+        :param bridge: the bridge with its squared length, see make_bridge
+        :type bridge: a tuple
+        :return: true if the bridge crosses a segment
+        :rtype: bool
+        """
+
+        return self.crossings.crosses(segment_point(self.paths[bridge[1]], bridge[2]),
+                                      segment_point(self.paths[bridge[3]], bridge[4]))
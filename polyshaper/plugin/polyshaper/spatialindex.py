@@ -0,0 +1,436 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper spatial index
+
+A uniform grid of square cells. Each item is stored in all the cells overlapped by its axis-aligned
+bounding box, so that the items near a position are found by looking only at the cells around it
+instead of testing all items
+"""
+
+import math
+
+# The cell size used when all indexed boxes are degenerate (millimeters)
+DEFAULT_CELL_SIZE = 1.0
+
+
+def bounding_box(points):
+    """ Returns the axis-aligned bounding box of a set of points
+
+    :param points: the points (must not be empty)
+    :type points: a list of points (couples of floats)
+    :return: the bounding box
+    :rtype: a tuple (min_x, min_y, max_x, max_y)
+    """
+
+    x_values = [p[0] for p in points]
+    y_values = [p[1] for p in points]
+
+    return (min(x_values), min(y_values), max(x_values), max(y_values))
+
+
+def box_contains(outer, inner):
+    """ Returns true if a bounding box contains another one
+
+    :param outer: the outer box
+    :type outer: a tuple (min_x, min_y, max_x, max_y)
+    :param inner: the inner box
+    :type inner: a tuple (min_x, min_y, max_x, max_y)
+    :return: true if inner is inside outer (boxes sharing a border are considered contained)
+    :rtype: bool
+    """
+
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and \
+        outer[3] >= inner[3]
+
+
+def boxes_overlap(box1, box2):
+    """ Returns true if two bounding boxes overlap
+
+    :param box1: the first box
+    :type box1: a tuple (min_x, min_y, max_x, max_y)
+    :param box2: the second box
+    :type box2: a tuple (min_x, min_y, max_x, max_y)
+    :return: true if the boxes have at least a point in common
+    :rtype: bool
+    """
+
+    return box1[0] <= box2[2] and box2[0] <= box1[2] and box1[1] <= box2[3] and \
+        box2[1] <= box1[3]
+
+
+def box_squared_distance(point, box):
+    """ Returns the squared distance between a point and a bounding box
+
+    :param point: the point
+    :type point: a couple of floats
+    :param box: the box
+    :type box: a tuple (min_x, min_y, max_x, max_y)
+    :return: the squared distance between the point and the nearest point of the box (0 if the
+        point is inside the box)
+    :rtype: float
+    """
+
+    delta_x = max(box[0] - point[0], 0.0, point[0] - box[2])
+    delta_y = max(box[1] - point[1], 0.0, point[1] - box[3])
+
+    return delta_x * delta_x + delta_y * delta_y
+
+
+def grid_cell_size(boxes):
+    """ Returns a cell size suitable to index the given boxes
+
+    The size is chosen so that the region containing all boxes is divided in about as many cells as
+    boxes, but cells are never smaller than the average box (to avoid storing large items in too
+    many cells)
+    :param boxes: the boxes that will be indexed
+    :type boxes: a list of tuples (min_x, min_y, max_x, max_y)
+    :return: the size of cells
+    :rtype: float
+    """
+
+    if not boxes:
+        return DEFAULT_CELL_SIZE
+
+    region = (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes),
+              max(b[3] for b in boxes))
+    region_size = max(region[2] - region[0], region[3] - region[1])
+    average_size = sum(max(b[2] - b[0], b[3] - b[1]) for b in boxes) / len(boxes)
+    cell_size = max(region_size / math.sqrt(len(boxes)), average_size)
+
+    return cell_size if cell_size > 0 else DEFAULT_CELL_SIZE
+
+
+def kd_partition(points, max_size):
+    """ Splits a set of points in spatially compact groups
+
+    The set is recursively split in two halves at the median coordinate along the axis with the
+    largest extent, until groups have at most max_size points
+    :param points: the points
+    :type points: a list of points (couples of floats)
+    :param max_size: the maximum number of points of a group (at least 1)
+    :type max_size: int
+    :return: the groups, as lists of indices of points in increasing order
+    :rtype: a list of lists of ints
+    """
+
+    groups = []
+    to_split = [range(len(points))] if points else []
+    while to_split:
+        indices = to_split.pop()
+        if len(indices) <= max_size:
+            groups.append(sorted(indices))
+            continue
+
+        (min_x, min_y, max_x, max_y) = bounding_box([points[i] for i in indices])
+        axis = 0 if max_x - min_x >= max_y - min_y else 1
+        indices = sorted(indices, key=lambda i: (points[i][axis], i))
+        middle = len(indices) // 2
+        to_split.append(indices[middle:])
+        to_split.append(indices[:middle])
+
+    return groups
+
+
+class GridIndex(object):
+    """ A uniform grid indexing items by their bounding box
+
+    Items can be any hashable object. Queries return the items stored in the cells overlapped by
+    the query box, so they can include items whose box does not overlap the query box: callers must
+    perform the exact test on returned items
+    """
+
+    def __init__(self, cell_size):
+        """ Constructor
+
+        :param cell_size: the size of the side of cells
+        :type cell_size: float
+        """
+
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        self.boxes = {}
+        # The minimum and maximum coordinates of the cells that have been used
+        self.cells_range = None
+
+    def get_cell_size(self):
+        """ Returns the size of the side of cells
+
+        :return: the size of the side of cells
+        :rtype: float
+        """
+
+        return self.cell_size
+
+    def cell(self, point):
+        """ Returns the coordinates of the cell containing a point
+
+        :param point: the point
+        :type point: a couple of floats
+        :return: the coordinates of the cell
+        :rtype: a couple of ints
+        """
+
+        return (int(math.floor(point[0] / self.cell_size)),
+                int(math.floor(point[1] / self.cell_size)))
+
+    def box_cells(self, box):
+        """ Returns the coordinates of the cells overlapped by a box
+
+        :param box: the box
+        :type box: a tuple (min_x, min_y, max_x, max_y)
+        :return: the coordinates of the cells
+        :rtype: a generator of couples of ints
+        """
+
+        (min_x, min_y) = self.cell((box[0], box[1]))
+        (max_x, max_y) = self.cell((box[2], box[3]))
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                yield (cell_x, cell_y)
+
+    def segment_cells(self, start, end):
+        """ Returns the coordinates of the cells overlapped by a segment
+
+        :param start: the start of the segment
+        :type start: a couple of floats
+        :param end: the end of the segment
+        :type end: a couple of floats
+        :return: the coordinates of the cells, in order from the start to the end of the segment
+        :rtype: a generator of couples of ints
+        """
+
+        (start_cell, end_cell) = (self.cell(start), self.cell(end))
+        step_x = 1 if end_cell[0] >= start_cell[0] else -1
+        (min_x, max_x) = (min(start[0], end[0]), max(start[0], end[0]))
+        for cell_x in range(start_cell[0], end_cell[0] + step_x, step_x):
+            # The y where the segment enters and exits the column of cells
+            if start_cell[0] == end_cell[0]:
+                (entry_y, exit_y) = (start[1], end[1])
+            else:
+                slope = (end[1] - start[1]) / (end[0] - start[0])
+                (entry_x, exit_x) = (cell_x * self.cell_size, (cell_x + 1) * self.cell_size)
+                if step_x < 0:
+                    (entry_x, exit_x) = (exit_x, entry_x)
+                entry_y = start[1] + (min(max(entry_x, min_x), max_x) - start[0]) * slope
+                exit_y = start[1] + (min(max(exit_x, min_x), max_x) - start[0]) * slope
+            entry_cell_y = int(math.floor(entry_y / self.cell_size))
+            exit_cell_y = int(math.floor(exit_y / self.cell_size))
+            step_y = 1 if exit_cell_y >= entry_cell_y else -1
+            for cell_y in range(entry_cell_y, exit_cell_y + step_y, step_y):
+                yield (cell_x, cell_y)
+
+    def insert(self, item, box):
+        """ Adds an item to the index
+
+        :param item: the item to add
+        :type item: any hashable object
+        :param box: the bounding box of the item
+        :type box: a tuple (min_x, min_y, max_x, max_y)
+        """
+
+        self.boxes[item] = box
+        for cell in self.box_cells(box):
+            self.cells.setdefault(cell, set()).add(item)
+
+        (min_cell, max_cell) = (self.cell((box[0], box[1])), self.cell((box[2], box[3])))
+        if self.cells_range is None:
+            self.cells_range = (min_cell[0], min_cell[1], max_cell[0], max_cell[1])
+        else:
+            self.cells_range = (min(self.cells_range[0], min_cell[0]),
+                                min(self.cells_range[1], min_cell[1]),
+                                max(self.cells_range[2], max_cell[0]),
+                                max(self.cells_range[3], max_cell[1]))
+
+    def insert_point(self, item, point):
+        """ Adds an item consisting of a single point to the index
+
+        :param item: the item to add
+        :type item: any hashable object
+        :param point: the position of the item
+        :type point: a couple of floats
+        """
+
+        self.insert(item, (point[0], point[1], point[0], point[1]))
+
+    def remove(self, item):
+        """ Removes an item from the index
+
+        Nothing happens if the item is not in the index
+        :param item: the item to remove
+        :type item: any hashable object
+        """
+
+        box = self.boxes.pop(item, None)
+        if box is None:
+            return
+
+        for cell in self.box_cells(box):
+            items = self.cells[cell]
+            items.discard(item)
+            if not items:
+                del self.cells[cell]
+
+    def get_box(self, item):
+        """ Returns the bounding box of an item
+
+        :param item: the item
+        :type item: any hashable object
+        :return: the bounding box of the item
+        :rtype: a tuple (min_x, min_y, max_x, max_y)
+        """
+
+        return self.boxes[item]
+
+    def query(self, box):
+        """ Returns the items stored in the cells overlapped by a box
+
+        :param box: the box
+        :type box: a tuple (min_x, min_y, max_x, max_y)
+        :return: the items that can overlap the box
+        :rtype: a set
+        """
+
+        result = set()
+        for cell in self.box_cells(box):
+            result.update(self.cells.get(cell, ()))
+
+        return result
+
+    def query_segment(self, start, end):
+        """ Returns the items stored in the cells overlapped by a segment
+
+        Items are returned while cells are visited, so callers can stop as soon as they find what
+        they are looking for
+        :param start: the start of the segment
+        :type start: a couple of floats
+        :param end: the end of the segment
+        :type end: a couple of floats
+        :return: the items that can overlap the segment, each one once, in order of the cells from
+            the start to the end of the segment
+        :rtype: a generator of items
+        """
+
+        visited = set()
+        for cell in self.segment_cells(start, end):
+            for item in self.cells.get(cell, ()):
+                if item not in visited:
+                    visited.add(item)
+                    yield item
+
+    def query_point(self, point):
+        """ Returns the items stored in the cell containing a point
+
+        :param point: the point
+        :type point: a couple of floats
+        :return: the items whose box can contain the point
+        :rtype: a set
+        """
+
+        return set(self.cells.get(self.cell(point), ()))
+
+    def ring_cells(self, center, ring):
+        """ Returns the cells at a given distance (in cells) from a cell
+
+        :param center: the coordinates of the central cell
+        :type center: a couple of ints
+        :param ring: the distance from the central cell (0 returns the central cell)
+        :type ring: int
+        :return: the coordinates of the cells whose maximum coordinate difference from the central
+            one is ring
+        :rtype: a generator of couples of ints
+        """
+
+        if ring == 0:
+            yield center
+            return
+
+        (center_x, center_y) = center
+        for cell_x in range(center_x - ring, center_x + ring + 1):
+            yield (cell_x, center_y - ring)
+            yield (cell_x, center_y + ring)
+        for cell_y in range(center_y - ring + 1, center_y + ring):
+            yield (center_x - ring, cell_y)
+            yield (center_x + ring, cell_y)
+
+    def nearest(self, point, accept=None, max_squared_distance=None, item_squared_distance=None, # pylint: disable=too-many-arguments,too-many-locals
+                accept_cell=None, verify=None):
+        """ Returns the item nearest to a point
+
+        Cells are visited in rings of increasing distance from the point, stopping when the ring is
+        farther than the nearest item found
+        :param point: the point
+        :type point: a couple of floats
+        :param accept: a function returning false for items that must be ignored or None to
+            consider all items
+        :type accept: a function taking an item and returning a bool or None
+        :param max_squared_distance: items whose squared distance from point is greater than or
+            equal to this are ignored. If None all items are considered
+        :type max_squared_distance: float or None
+        :param item_squared_distance: a function returning the squared distance of an item from the
+            point or None to use the distance from the bounding box of the item. The distance must
+            not be less than the distance from the bounding box
+        :type item_squared_distance: a function taking the point and an item and returning a float
+            or None
+        :param accept_cell: a function returning false for cells whose items must all be ignored
+            (faster than rejecting items one by one) or None to consider all cells
+        :type accept_cell: a function taking the coordinates of a cell and returning a bool or None
+        :param verify: a function returning false for items that must be ignored, only called for
+            items nearer than the nearest item found so far (for tests too expensive to perform on
+            all items) or None to consider all items
+        :type verify: a function taking an item and returning a bool or None
+        :return: the squared distance and the nearest item or None if no item is found. If more
+            items have the same distance, the smallest one is returned
+        :rtype: a couple (float, item) or None
+        """
+
+        if self.cells_range is None:
+            return None
+
+        center = self.cell(point)
+        max_ring = max(center[0] - self.cells_range[0], center[1] - self.cells_range[1],
+                       self.cells_range[2] - center[0], self.cells_range[3] - center[1])
+        best = None
+        for ring in range(max(max_ring, 0) + 1):
+            # The minimum distance of the point from the cells in the ring
+            ring_distance = max(ring - 1, 0) * self.cell_size
+            limit = best[0] if best is not None else max_squared_distance
+            if limit is not None and ring_distance * ring_distance > limit:
+                break
+
+            for cell in self.ring_cells(center, ring):
+                if cell not in self.cells or (accept_cell is not None and not accept_cell(cell)):
+                    continue
+                for item in self.cells[cell]:
+                    if accept is not None and not accept(item):
+                        continue
+                    if item_squared_distance is None:
+                        item_distance = box_squared_distance(point, self.boxes[item])
+                    else:
+                        item_distance = item_squared_distance(point, item)
+                    if max_squared_distance is not None and item_distance >= max_squared_distance:
+                        continue
+                    if (best is None or (item_distance, item) < best) and \
+                            (verify is None or verify(item)):
+                        best = (item_distance, item)
+
+        return best
+
+    def cells_items(self):
+        """ Returns the items of each non-empty cell
+
+        :return: the coordinates of cells and the items they contain
+        :rtype: a list of couples (couple of ints, set of items)
+        """
+
+        return self.cells.items()
+
+    def __len__(self):
+        """ Returns the number of items in the index
+
+        :return: the number of items in the index
+        :rtype: int
+        """
+
+        return len(self.boxes)
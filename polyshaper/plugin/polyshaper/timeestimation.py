@@ -0,0 +1,254 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper working time estimation
+
+This module must only depend on the standard library: it is also used by scripts that analyze
+g-code files outside of inkscape
+"""
+
+from collections import deque
+import math
+
+# The number of movements the trapezoidal estimator keeps before deciding the speed of the oldest
+# one. This mimics the planner buffer of the firmware of the machine
+DEFAULT_LOOKAHEAD = 16
+
+
+def time_estimator_for_machine(machine):
+    """ Returns the time estimator to use for the given machine
+
+    :param machine: the machine or None if not known
+    :type machine: an instance of Machine or None
+    :return: a TrapezoidalTimeEstimator for the machine or a ConstantSpeedTimeEstimator if the
+        machine is None
+    :rtype: an instance of TrapezoidalTimeEstimator or ConstantSpeedTimeEstimator
+    """
+
+    if machine is None:
+        return ConstantSpeedTimeEstimator()
+
+    return TrapezoidalTimeEstimator(machine.acceleration(), machine.junction_deviation())
+
+
+def trapezoid_time(length, entry_speed, nominal_speed, exit_speed, acceleration):
+    """ Returns the time needed to perform a movement with a trapezoidal speed profile
+
+    The tool accelerates from entry_speed towards nominal_speed, cruises and then decelerates to
+    exit_speed. If the movement is too short to reach nominal_speed, the profile is triangular. The
+    entry and exit speeds must be reachable within the movement length
+    :param length: the length of the movement
+    :type length: float (mm)
+    :param entry_speed: the speed at the beginning of the movement
+    :type entry_speed: float (mm/s)
+    :param nominal_speed: the maximum speed of the movement
+    :type nominal_speed: float (mm/s)
+    :param exit_speed: the speed at the end of the movement
+    :type exit_speed: float (mm/s)
+    :param acceleration: the acceleration of the tool
+    :type acceleration: float (mm/s^2)
+    :return: the time needed to perform the movement
+    :rtype: float (s)
+    """
+
+    peak_speed_squared = acceleration * length + (entry_speed**2 + exit_speed**2) / 2.0
+    if peak_speed_squared > nominal_speed**2:
+        acceleration_distance = (nominal_speed**2 - entry_speed**2) / (2.0 * acceleration)
+        deceleration_distance = (nominal_speed**2 - exit_speed**2) / (2.0 * acceleration)
+        cruise_distance = length - acceleration_distance - deceleration_distance
+        return ((nominal_speed - entry_speed) / acceleration +
+                (nominal_speed - exit_speed) / acceleration +
+                cruise_distance / nominal_speed)
+
+    peak_speed = math.sqrt(peak_speed_squared)
+    return (peak_speed - entry_speed) / acceleration + (peak_speed - exit_speed) / acceleration
+
+
+class ConstantSpeedTimeEstimator(object):
+    """ Estimates the working time assuming the tool always moves at the requested speed
+
+    Movements are added one at a time with add_move, then the total time can be obtained with
+    total_time. Acceleration and slowdowns at corners are not considered
+    """
+
+    def __init__(self):
+        """ Constructor
+        """
+
+        self.time = 0.0
+
+    def add_move(self, displacement, speed):
+        """ Adds a movement
+
+        :param displacement: the displacement of the tool along each axis
+        :type displacement: a tuple of floats (mm)
+        :param speed: the speed of the movement. If 0 the movement is ignored
+        :type speed: float (mm/s)
+        """
+
+        if speed > 0:
+            self.time += math.sqrt(sum(d * d for d in displacement)) / speed
+
+    def estimate(self, path, speed):
+        """ Adds all the movements of a path and returns the total time
+
+        :param path: the path followed by the tool
+        :type path: a list of points (tuples of floats, mm)
+        :param speed: the speed of the movement
+        :type speed: float (mm/s)
+        :return: the total time
+        :rtype: float (s)
+        """
+
+        for (prev_point, point) in zip(path, path[1:]):
+            self.add_move(tuple(c - p for (c, p) in zip(point, prev_point)), speed)
+
+        return self.total_time()
+
+    def total_time(self):
+        """ Returns the time needed to perform all movements added so far
+
+        :return: the time needed to perform all movements
+        :rtype: float (s)
+        """
+
+        return self.time
+
+
+class TrapezoidalTimeEstimator(object):
+    """ Estimates the working time using the same motion model of grbl-like firmwares
+
+    Each movement has a trapezoidal speed profile limited by the acceleration of the machine. The
+    speed at which the tool can pass through a corner is computed using the junction deviation
+    model, so that sharp corners and inversions are slow and almost-straight junctions are not.
+    Like the machine firmware, this only keeps a small buffer of movements (the lookahead): the
+    speed of the oldest movement is decided when the buffer is full, assuming the tool has to stop
+    at the end of the last buffered movement. This keeps memory constant and the computation linear
+    in the number of movements. Movements are added with add_move, total_time flushes the buffer
+    """
+
+    def __init__(self, acceleration, junction_deviation, lookahead=DEFAULT_LOOKAHEAD):
+        """ Constructor
+
+        :param acceleration: the acceleration of the tool
+        :type acceleration: float (mm/s^2)
+        :param junction_deviation: the junction deviation of the machine
+        :type junction_deviation: float (mm)
+        :param lookahead: the number of movements kept before deciding their speed
+        :type lookahead: int (>= 1)
+        """
+
+        self.acceleration = acceleration
+        self.junction_deviation = junction_deviation
+        self.lookahead = lookahead
+        self.time = 0.0
+        # The buffered movements, each one is a list [length, nominal speed, max entry speed]
+        self.buffer = deque()
+        # The speed at the beginning of the first movement in the buffer
+        self.entry_speed = 0.0
+        # The direction (a versor) of the last added movement or None at the beginning
+        self.prev_direction = None
+        self.prev_speed = 0.0
+
+    def add_move(self, displacement, speed):
+        """ Adds a movement
+
+        :param displacement: the displacement of the tool along each axis
+        :type displacement: a tuple of floats (mm)
+        :param speed: the requested speed of the movement. If 0 the movement is ignored
+        :type speed: float (mm/s)
+        """
+
+        move_length = math.sqrt(sum(d * d for d in displacement))
+        if move_length == 0.0 or speed <= 0:
+            return
+
+        direction = tuple(d / move_length for d in displacement)
+        max_entry_speed = 0.0
+        if self.prev_direction is not None and len(direction) == len(self.prev_direction):
+            max_entry_speed = self.junction_speed(self.prev_direction, direction,
+                                                  min(speed, self.prev_speed))
+
+        self.buffer.append([move_length, speed, max_entry_speed])
+        self.prev_direction = direction
+        self.prev_speed = speed
+
+        if len(self.buffer) > self.lookahead:
+            self.execute_first_move()
+
+    def junction_speed(self, prev_direction, direction, max_speed):
+        """ Returns the maximum speed at the junction between two movements
+
+        :param prev_direction: the direction of the first movement
+        :type prev_direction: a versor (tuple of floats)
+        :param direction: the direction of the second movement
+        :type direction: a versor (tuple of floats)
+        :param max_speed: the maximum speed allowed by the two movements
+        :type max_speed: float (mm/s)
+        :return: the maximum speed at the junction
+        :rtype: float (mm/s)
+        """
+
+        cos_theta = -sum(p * d for (p, d) in zip(prev_direction, direction))
+        if cos_theta > 0.999999:
+            # Inversion of direction, the tool has to stop
+            return 0.0
+        elif cos_theta < -0.999999:
+            # Straight line
+            return max_speed
+
+        sin_half_theta = math.sqrt(0.5 * (1.0 - cos_theta))
+        speed_squared = (self.acceleration * self.junction_deviation * sin_half_theta /
+                         (1.0 - sin_half_theta))
+
+        return min(max_speed, math.sqrt(speed_squared))
+
+    def execute_first_move(self):
+        """ Decides the speed profile of the first movement in the buffer and removes it
+        """
+
+        # Going backward to find the speed at which we can enter each movement and still be able to
+        # stop at the end of the last one. We only need the value for the second movement
+        next_entry_speed = 0.0
+        max_reachable_speed = 0.0
+        for move in reversed(self.buffer):
+            max_reachable_speed = next_entry_speed
+            next_entry_speed = min(move[2], math.sqrt(next_entry_speed**2 +
+                                                      2.0 * self.acceleration * move[0]))
+
+        (move_length, nominal_speed, _) = self.buffer.popleft()
+        exit_speed = min(max_reachable_speed, nominal_speed,
+                         math.sqrt(self.entry_speed**2 + 2.0 * self.acceleration * move_length))
+        self.time += trapezoid_time(move_length, self.entry_speed, nominal_speed, exit_speed,
+                                    self.acceleration)
+        self.entry_speed = exit_speed
+
+    def estimate(self, path, speed):
+        """ Adds all the movements of a path and returns the total time
+
+        :param path: the path followed by the tool
+        :type path: a list of points (tuples of floats, mm)
+        :param speed: the speed of the movement
+        :type speed: float (mm/s)
+        :return: the total time
+        :rtype: float (s)
+        """
+
+        for (prev_point, point) in zip(path, path[1:]):
+            self.add_move(tuple(c - p for (c, p) in zip(point, prev_point)), speed)
+
+        return self.total_time()
+
+    def total_time(self):
+        """ Returns the time needed to perform all movements added so far
+
+        The tool is supposed to stop at the end of the last movement
+        :return: the time needed to perform all movements
+        :rtype: float (s)
+        """
+
+        while self.buffer:
+            self.execute_first_move()
+
+        return self.time
@@ -0,0 +1,175 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper binary tool path files
+
+A tool path file contains a fixed size header followed by the coordinates of all points as an array
+of little-endian floats (x0, y0, x1, y1, ...). The header is (all values little-endian):
+    magic number: 4 bytes, "PSTP"
+    version: unsigned char, currently 1
+    bytes per value: unsigned char, 4 (float32) or 8 (float64)
+    dimensions: unsigned short, the number of coordinates of each point
+    number of points: unsigned long long
+Coordinates start right after the header, so the file can be memory mapped and used directly. This
+module must only depend on the standard library
+"""
+
+from array import array
+import mmap
+import struct
+import sys
+from polyshaper.errors import PolyshaperIOError, translate # pylint: disable=import-error,no-name-in-module
+
+# The magic number at the beginning of tool path files
+MAGIC = b"PSTP"
+
+# The version of the file format
+VERSION = 1
+
+# The structure of the header
+HEADER = struct.Struct("<4sBBHQ")
+
+# The array typecodes for the supported bytes per value
+TYPECODES = {4: "f", 8: "d"}
+
+
+def write_tool_path(outfile, path, double_precision=False):
+    """ Writes a tool path to a binary file
+
+    :param outfile: the file where the path is written. It must be opened in binary mode
+    :type outfile: a file object
+    :param path: the path to write. All points must have the same number of coordinates
+    :type path: a list of points (tuples of floats, mm)
+    :param double_precision: if true coordinates are written as float64, otherwise as float32
+    :type double_precision: boolean
+    """
+
+    bytes_per_value = 8 if double_precision else 4
+    dimensions = len(path[0]) if path else 2
+
+    outfile.write(HEADER.pack(MAGIC, VERSION, bytes_per_value, dimensions, len(path)))
+
+    coordinates = array(TYPECODES[bytes_per_value], (c for point in path for c in point))
+    if sys.byteorder != "little":
+        coordinates.byteswap()
+    outfile.write(coordinates.tobytes() if hasattr(coordinates, "tobytes") else
+                  coordinates.tostring())
+
+
+class ToolPathFile(object):
+    """ A tool path file opened for reading
+
+    The file is memory mapped, so opening is fast regardless of the size of the file and single
+    points can be accessed without reading the whole file. Call close when done (or use the object
+    in a with statement)
+    """
+
+    def __init__(self, filename):
+        """ Constructor
+
+        :param filename: the name of the file to open
+        :type filename: string
+        :raises: PolyshaperIOError if the file cannot be read or is not a valid tool path file
+        """
+
+        self.filename = filename
+        self.mapped = None
+
+        try:
+            with open(filename, "rb") as infile:
+                self.mapped = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, OSError, ValueError):
+            raise PolyshaperIOError(filename, translate("Error when trying to open file"))
+
+        if len(self.mapped) < HEADER.size:
+            self.close()
+            raise PolyshaperIOError(filename, translate("Not a tool path file"))
+
+        (magic, version, self.bytes_per_value, self.dims, self.points) = \
+            HEADER.unpack_from(self.mapped, 0)
+        expected_size = HEADER.size + self.bytes_per_value * self.dims * self.points
+        if magic != MAGIC or version != VERSION or self.bytes_per_value not in TYPECODES or \
+           len(self.mapped) < expected_size:
+            self.close()
+            raise PolyshaperIOError(filename, translate("Not a tool path file"))
+
+        self.point_struct = struct.Struct("<" + TYPECODES[self.bytes_per_value] * self.dims)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """ Closes the file
+        """
+
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+
+    def num_points(self):
+        """ Returns the number of points in the path
+
+        :return: the number of points in the path
+        :rtype: int
+        """
+
+        return self.points
+
+    def dimensions(self):
+        """ Returns the number of coordinates of each point
+
+        :return: the number of coordinates of each point
+        :rtype: int
+        """
+
+        return self.dims
+
+    def point(self, index):
+        """ Returns a single point
+
+        :param index: the index of the point
+        :type index: int
+        :return: the point
+        :rtype: a tuple of floats (mm)
+        """
+
+        if index < 0 or index >= self.points:
+            raise IndexError("point index out of range")
+
+        return self.point_struct.unpack_from(self.mapped,
+                                             HEADER.size + index * self.point_struct.size)
+
+    def coordinates(self):
+        """ Returns all the coordinates in a flat array
+
+        :return: all coordinates (x0, y0, x1, y1, ...)
+        :rtype: an array.array of floats
+        """
+
+        end = HEADER.size + self.point_struct.size * self.points
+        coordinates = array(TYPECODES[self.bytes_per_value])
+        data = self.mapped[HEADER.size:end]
+        if hasattr(coordinates, "frombytes"):
+            coordinates.frombytes(data)
+        else:
+            coordinates.fromstring(data)
+        if sys.byteorder != "little":
+            coordinates.byteswap()
+
+        return coordinates
+
+    def path(self):
+        """ Returns the path as a list of points
+
+        :return: the path
+        :rtype: a list of points (tuples of floats, mm)
+        """
+
+        coordinates = self.coordinates()
+
+        return [tuple(coordinates[i:(i + self.dims)])
+                for i in range(0, len(coordinates), self.dims)]
@@ -5,12 +5,100 @@
 Polyshaper tool path drawing
 """
 
+import math
 import inkex # pylint: disable=import-error
+from polyshaper.helpers import upsert_child, remove_child # pylint: disable=import-error,no-name-in-module
+
+def narrow_sector(sector, delta, point_distance, tolerance):
+    """ Narrows the sector of allowed directions to the ones passing near a point
+
+    :param sector: the sector (see decimate_path) or None if no sector was computed yet
+    :type sector: a tuple (reference direction, low limit, high limit) or None. Angles are in
+        radians, the limits are relative to the reference direction
+    :param delta: the position of the point relative to the anchor
+    :type delta: a couple of floats
+    :param point_distance: the distance of the point from the anchor, greater than tolerance
+    :type point_distance: float
+    :param tolerance: the max distance of the point from the allowed directions
+    :type tolerance: float
+    :return: the narrowed sector or None if the direction of the point is outside the sector
+    :rtype: a tuple (reference direction, low limit, high limit) or None
+    """
+
+    direction = math.atan2(delta[1], delta[0])
+    half_width = math.asin(tolerance / point_distance)
+    if sector is None:
+        return (direction, -half_width, half_width)
+
+    (reference, low, high) = sector
+    relative = (direction - reference + math.pi) % (2.0 * math.pi) - math.pi
+    if not low <= relative <= high:
+        return None
+
+    return (reference, max(low, relative - half_width), min(high, relative + half_width))
+
+def decimate_path(path, tolerance):
+    """ Removes the points of a path that do not change its drawing at the given tolerance
+
+    Points are skipped while the segment from the last kept point to the current one passes nearer
+    than tolerance to all the skipped points (an angular sector around the last kept point, narrowed
+    at each skipped point, contains the allowed directions). Skipped points are also required to be
+    nearer to the last kept point than the current one, so that the path going back on itself (e.g.
+    along the bridges between paths) is preserved. The first and last points are always kept
+    :param path: the path
+    :type path: a list of points (couples of floats)
+    :param tolerance: the max distance of removed points from the decimated path. If 0 or negative
+        the path is returned unchanged
+    :type tolerance: float
+    :return: the decimated path
+    :rtype: a list of points (couples of floats)
+    """
+
+    if tolerance <= 0.0 or len(path) < 3:
+        return path
+
+    result = [path[0]]
+    # The sector is described by the direction of its first point and the limits of the allowed
+    # directions relative to it. It is None while all points are nearer than tolerance to the anchor
+    anchor = path[0]
+    sector = None
+    max_distance = 0.0
+    last = path[0]
+    index = 1
+    while index < len(path):
+        point = path[index]
+        (delta_x, delta_y) = (point[0] - anchor[0], point[1] - anchor[1])
+        point_distance = math.sqrt(delta_x * delta_x + delta_y * delta_y)
+        keep_last = False
+        if point_distance <= tolerance and max_distance <= tolerance:
+            pass
+        elif point_distance < max_distance:
+            keep_last = True
+        else:
+            sector = narrow_sector(sector, (delta_x, delta_y), point_distance, tolerance)
+            keep_last = sector is None
+
+        if keep_last:
+            # The previous point becomes the anchor and the current one is checked again
+            result.append(last)
+            anchor = last
+            sector = None
+            max_distance = 0.0
+            continue
+
+        max_distance = max(max_distance, point_distance)
+        last = point
+        index += 1
+
+    result.append(path[-1])
+
+    return result
 
 class ToolPathPainter(object):
     """ Draws the path of the tool
 
-    The path is drawn in the svg element provided in the paint function
+    The path is drawn in the svg element provided in the paint function. The svg path data is
+    generated once for each scale factor and tolerance and reused (e.g. by helpers.write_path_svg)
     """
 
     def __init__(self, path):
@@ -21,9 +109,11 @@ class ToolPathPainter(object):
         """
 
         self.path = path
-        self.factor = None
+        self.num_painted_points = 0
+        # The svg path data and the number of points, for each couple (factor, tolerance)
+        self.path_data_cache = {}
 
-    def paint(self, parent_element, factor, rgb_color):
+    def paint(self, parent_element, factor, rgb_color, tolerance=0.0, element_id=None): # pylint: disable=too-many-arguments
         """ Generates the path inside the provided svg element
 
         :param parent_element: the parent element of the path
@@ -32,35 +122,81 @@ class ToolPathPainter(object):
         :type factor: float
         :param rgb_color: the color of the path
         :type rgb_color: a string with format "R,G,B" where all elements are between 0 and 255
+        :param tolerance: the points of the path that do not move the drawing by more than this are
+            not drawn (see decimate_path). If 0 all points are drawn
+        :type tolerance: float (mm)
+        :param element_id: the id of the path element. If not None the child with this id is updated
+            instead of adding a new one (and removed if the path is empty)
+        :type element_id: string or None
         """
 
-        self.factor = factor
-        if self.path:
+        if not self.path:
+            if element_id is not None:
+                remove_child(parent_element, element_id)
+        elif element_id is not None:
+            upsert_child(parent_element, "path", {
+                'd': self.path_data(factor, tolerance),
+                'style': self.style(rgb_color)
+            }, element_id)
+        else:
             inkex.etree.SubElement(parent_element, "path", {
-                'd': self.transform_path(),
-                'style': "stroke:rgb(" + rgb_color + ");fill:none"
+                'd': self.path_data(factor, tolerance),
+                'style': self.style(rgb_color)
             })
 
-    def transform_path(self):
-        """ Transforms the path into an SVG path string
+    def path_data(self, factor, tolerance=0.0):
+        """ Returns the path as the data of an svg path (the "d" attribute)
 
-        self.path must have at least one element
-        :return: an SVG path
+        self.path must have at least one element. The result is cached, so the path is transformed
+        only once for each scale factor and tolerance
+        :param factor: the scaling factor for coordinates
+        :type factor: float
+        :param tolerance: the tolerance used to decimate the path (see decimate_path)
+        :type tolerance: float (mm)
+        :return: the svg path data
         :rtype: string
         """
 
-        def convert_point(point):
-            """ Converts a 2D point to working area coordinates and then to string
-            """
+        key = (factor, tolerance)
+        if key not in self.path_data_cache:
+            def convert_point(point):
+                """ Converts a 2D point to working area coordinates and then to string
+                """
+
+                svg_x = point[0] * factor
+                svg_y = point[1] * factor
+
+                return "{0},{1}".format(svg_x, svg_y)
+
+            points = decimate_path(self.path, tolerance)
+
+            # First point is (0, 0): it is not in the path but the tool is supposed to start from
+            # there
+            data = " ".join(["M", convert_point((0.0, 0.0)), "L"] +
+                            [convert_point(p) for p in points])
+            self.path_data_cache[key] = (data, len(points))
 
-            svg_x = point[0] * self.factor
-            svg_y = point[1] * self.factor
+        (data, self.num_painted_points) = self.path_data_cache[key]
 
-            return "{0},{1}".format(svg_x, svg_y)
+        return data
 
-        # First point is (0, 0): it is not in the path but the tool is supposed to start from there
-        str_path = "M {0} L".format(convert_point((0.0, 0.0)))
-        for point in self.path:
-            str_path += " {0}".format(convert_point(point))
+    @staticmethod
+    def style(rgb_color):
+        """ Returns the style of the drawn path
+
+        :param rgb_color: the color of the path
+        :type rgb_color: a string with format "R,G,B" where all elements are between 0 and 255
+        :return: the value of the style attribute of the svg path
+        :rtype: string
+        """
+
+        return "stroke:rgb(" + rgb_color + ");fill:none"
+
+    def painted_points(self):
+        """ Returns the number of points of the path drawn by the last call to paint or path_data
+
+        :return: the number of points drawn
+        :rtype: int
+        """
 
-        return str_path
+        return self.num_painted_points
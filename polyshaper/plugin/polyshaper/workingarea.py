@@ -128,7 +128,10 @@ class WorkingAreaGenerator(object):
     def upsert(self, document_root):
         """ Adds the working area in the given layer
 
-        If the layer already contains a working area, updates that one
+        If the layer already contains a working area with the same position, size and style, that
+        one is kept together with the elements drawn inside it (e.g. the tool path), which are then
+        updated in place by the painters (see helpers.upsert_child). Otherwise the old working area
+        is replaced by the new one
         :param document_root: the document root, to which the working area is added
         :type document_root: svg element (an lxml.etree.Element object)
         """
@@ -137,12 +140,55 @@ class WorkingAreaGenerator(object):
             transform = simpletransform.parseTransform(document_root.get("transform"))
             self.draw(transform)
 
-        # If the group already exists, removes it before adding again
-        old_working_area_elements = document_root.xpath("*[@id = \"" + self.working_area_id + "\"]")
-        for old in old_working_area_elements:
-            old.getparent().remove(old)
+        old_working_areas = [c for c in document_root if c.get("id") == self.working_area_id]
+        if not old_working_areas:
+            document_root.append(self.area)
+            return
+
+        # Only the first working area is kept or replaced, duplicates are removed
+        for duplicate in old_working_areas[1:]:
+            document_root.remove(duplicate)
+        old_area = old_working_areas[0]
+        if old_area is self.area:
+            return
+
+        if self.is_same_area(old_area):
+            # Elements without id after the rectangle, the cross and the text were drawn by older
+            # versions and cannot be updated
+            for child in old_area[len(self.area):]:
+                if child.get("id") is None:
+                    old_area.remove(child)
+            self.area = old_area
+        else:
+            document_root.replace(old_area, self.area)
+
+    def is_same_area(self, element):
+        """ Returns true if the element is a working area equal to the one drawn by this object
+
+        The elements added inside the working area after the rectangle, the cross and the text are
+        not compared
+        :param element: the element to compare
+        :type element: svg element (an lxml.etree.Element object)
+        :return: true if the element has the same attributes and children as the working area
+        :rtype: bool
+        """
+
+        if len(element) < len(self.area):
+            return False
+
+        return all(a.tag == b.tag and dict(a.attrib) == dict(b.attrib) and a.text == b.text
+                   for (a, b) in zip([element] + list(element), [self.area] + list(self.area)))
+
+    def child_id(self, name):
+        """ Returns the id of an element drawn inside the working area
+
+        :param name: the name of the element (e.g. "toolpath")
+        :type name: string
+        :return: the id of the element, unique in the document
+        :rtype: string
+        """
 
-        document_root.append(self.area)
+        return self.working_area_id + "-" + name
 
     def get_element(self):
         """ Returns the element containing the working area
@@ -0,0 +1,84 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Batch g-code generation for the cutting machine (2 axes), without inkscape's user interface
+
+All paths and groups at the top level of each svg file (i.e. layers, except the working area) are
+cut. The command accepts all the options of the inkscape plugin plus the ones to control batch
+processing. Inkscape extensions (inkex.py and the modules it needs) must be in the python path
+"""
+
+import copy
+import os.path
+import time
+
+from polyshaper2dplugin import Polyshaper2D, WORKING_AREA_ID # pylint: disable=import-error
+from polyshaper.batch import add_batch_options, parse_batch_arguments, process_files # pylint: disable=import-error,no-name-in-module
+from polyshaper.batch import top_level_elements # pylint: disable=import-error,no-name-in-module
+from polyshaper.errors import PolyshaperError # pylint: disable=import-error,no-name-in-module
+
+# The exit code used for errors that are not PolyshaperErrors
+UNEXPECTED_ERROR_EXIT_CODE = 255
+
+# The columns of the summary table
+SUMMARY_HEADER = ["file", "points", "length (mm)", "working time (min)", "elapsed (s)", "result"]
+
+
+def process_file(arguments):
+    """ Generates g-code for a single file
+
+    This never raises exceptions, errors are reported in the returned row
+    :param arguments: the file to process and the options
+    :type arguments: a couple (filename, options)
+    :return: the exit code and the row of the summary table for the file
+    :rtype: a couple (int, list)
+    """
+
+    (filename, options) = arguments
+    start = time.time()
+
+    try:
+        plugin = Polyshaper2D()
+        plugin.options = copy.copy(options)
+        if options.shapename is None:
+            plugin.options.shapename = os.path.splitext(os.path.basename(filename))[0]
+        plugin.gcode_file_path = options.output_dir
+        plugin.parse(filename)
+
+        plugin.check_workpiece_dimensions()
+        working_area_generator = plugin.draw_working_area()
+        elements = top_level_elements(plugin.document.getroot(), WORKING_AREA_ID)
+        info = plugin.generate_gcode(elements, working_area_generator)
+
+        statistics = info.path_statistics()
+        result = info.gcode_filename()
+        if not info.is_path_inside_workpiece():
+            result += " (WARNING: some points are outside the workpiece)"
+
+        return (0, [filename, statistics["numPoints"], "{:.1f}".format(statistics["pathLength"]),
+                    info.working_time_min(), "{:.2f}".format(time.time() - start), result])
+    except PolyshaperError as error:
+        return (error.exit_code(), [filename, "-", "-", "-", "{:.2f}".format(time.time() - start),
+                                    "ERROR: " + error.to_string()])
+    except Exception as error: # pylint: disable=broad-except
+        return (UNEXPECTED_ERROR_EXIT_CODE, [filename, "-", "-", "-",
+                                             "{:.2f}".format(time.time() - start),
+                                             "ERROR: " + str(error)])
+
+
+def main():
+    """ The main function of the script
+    """
+
+    parser = Polyshaper2D().OptionParser
+    parser.set_defaults(shapename=None)
+    add_batch_options(parser, os.path.join(os.path.expanduser("~"), "PolyShaper"))
+
+    (options, files) = parse_batch_arguments(parser)
+
+    exit(process_files(process_file, files, options, SUMMARY_HEADER))
+
+
+if __name__ == '__main__':
+    main()
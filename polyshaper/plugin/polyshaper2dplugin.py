@@ -5,39 +5,36 @@
 Polyshaper plugin for cutting machine (2 axes)
 """
 
-import json
 import os.path
 
 import inkex # pylint: disable=import-error
-from polyshaper.errors import InvalidWorkpieceDimensions, PolyshaperError # pylint: disable=import-error,no-name-in-module
-from polyshaper.gcode import CuttingGCodeGenerator # pylint: disable=import-error,no-name-in-module
+from polyshaper.effectmixin import EffectMixin, WORKING_AREA_ID # pylint: disable=import-error,no-name-in-module
+from polyshaper.errors import InvalidWorkpieceDimensions, PolyshaperError, PolyshaperIOError # pylint: disable=import-error,no-name-in-module
 from polyshaper.machine import machine_factory # pylint: disable=import-error,no-name-in-module
-from polyshaper.pathsextraction import FlattenBezier, PathsExtractor # pylint: disable=import-error,no-name-in-module
-from polyshaper.pathinfo import PathInfo # pylint: disable=import-error,no-name-in-module
-from polyshaper.pathsunion import PathsJoiner # pylint: disable=import-error,no-name-in-module
-from polyshaper.toolpathpainter import ToolPathPainter # pylint: disable=import-error,no-name-in-module
-from polyshaper.toolpaths import CuttingToolPathsGenerator # pylint: disable=import-error,no-name-in-module
-from polyshaper.workingarea import WorkingAreaGenerator # pylint: disable=import-error,no-name-in-module
-from polyshaper.helpers import base_filename, write_file, generate_path_svg # pylint: disable=import-error,no-name-in-module
-from polyshaper.border import Border, BorderPainter # pylint: disable=import-error,no-name-in-module
+
+# The modules needed to generate the g-code are imported in Polyshaper2D.generate_gcode, so that
+# drawing only the working area (i.e. when nothing is selected) is fast
 
 ####################################################################################################
 # List of hardwired parameters
 ####################################################################################################
 
-# The id of the working area element in the svg
-WORKING_AREA_ID = "eu.polyshaper.inkscape.workarea"
-
 # If two points are less than this value apart, they are considered conincident. This is measured in
 # millimeters (used to check if a path is closed)
 CLOSE_DISTANCE = 0.5
 
+# The options changing the generated files, part of the key of jobs in the job cache. The others
+# only change the document, the name of files or how the job is run
+JOB_OPTIONS = ["dim_x", "dim_y", "speed", "flatness", "square", "margin", "machine_type",
+               "auto_close_path", "union_shapes", "kerf", "holes_first", "join_strategy",
+               "segment_bridges", "avoid_crossings", "join_workers", "compression"]
+
 ####################################################################################################
 
 inkex.localize()
 
 
-class Polyshaper2D(inkex.Effect):
+class Polyshaper2D(EffectMixin, inkex.Effect):
     """ The main class of the plugin
     """
 
@@ -51,10 +48,14 @@ class Polyshaper2D(inkex.Effect):
         # More initializations
         # This is the height of the document in millimeters
         self.doc_height = 0
-        # The path where the output file is written, created if not existing
+        # The path where the output file is written, created when the g-code is generated if not
+        # existing
         self.gcode_file_path = os.path.join(os.path.expanduser("~"), "PolyShaper")
-        if not os.path.isdir(self.gcode_file_path):
-            os.mkdir(self.gcode_file_path, 0755)
+        # The object measuring pipeline stages, created when options are known
+        self.instrumentation = None
+        # The name of generated files with the directory and without extension, set when the first
+        # file is generated
+        self.generic_filename = None
 
         self.define_command_line_options()
 
@@ -86,21 +87,95 @@ class Polyshaper2D(inkex.Effect):
         self.OptionParser.add_option("-p", "--draw-toolpath", action="store", type="inkbool",
                                      dest="draw_toolpath", default=True,
                                      help="Draws the path of the tool")
+        self.OptionParser.add_option("", "--preview-tolerance", action="store", type="float",
+                                     dest="preview_tolerance", default=0.02,
+                                     help=("Points of the drawn tool path moving it less than this "
+                                           "(in mm) are not drawn, 0 to draw all points. The svg "
+                                           "file always has all points"))
         self.OptionParser.add_option("-a", "--auto-close-path", action="store", type="inkbool",
                                      dest="auto_close_path", default=True,
                                      help=("Automatically close open paths by joining start with "
                                            "end"))
+        self.OptionParser.add_option("", "--union-shapes", action="store", type="inkbool",
+                                     dest="union_shapes", default=True,
+                                     help=("Unite overlapping shapes, cutting only the outline of "
+                                           "the region they cover"))
+        self.OptionParser.add_option("-k", "--kerf", action="store", type="float", dest="kerf",
+                                     default=0.0, help=("Width of the cut in mm, the tool path is "
+                                                        "moved by half of it outside the shapes"))
+        self.OptionParser.add_option("", "--holes-first", action="store", type="inkbool",
+                                     dest="holes_first", default=True,
+                                     help=("Join paths following the shapes containing them, "
+                                           "cutting holes before the enclosing outline"))
+        self.OptionParser.add_option("", "--join-strategy", action="store", type="string",
+                                     dest="join_strategy", default="mst",
+                                     help=("How bridges between paths are chosen: mst (shortest "
+                                           "bridges, fast) or greedy (nearest path at each step)"))
+        self.OptionParser.add_option("", "--segment-bridges", action="store", type="inkbool",
+                                     dest="segment_bridges", default=True,
+                                     help=("Allow bridges between paths to end in the middle of "
+                                           "segments, not only at vertices"))
+        self.OptionParser.add_option("", "--avoid-crossings", action="store", type="inkbool",
+                                     dest="avoid_crossings", default=True,
+                                     help=("Replace bridges cutting through other paths with the "
+                                           "nearest bridges not crossing anything"))
+        self.OptionParser.add_option("", "--join-workers", action="store", type="int",
+                                     dest="join_workers", default=1,
+                                     help=("Number of processes used to join paths (0 to use all "
+                                           "CPUs), many paths are split in clusters joined in "
+                                           "parallel"))
+        self.OptionParser.add_option("", "--compression", action="store", type="string",
+                                     dest="compression", default="none",
+                                     help=("Compression of the g-code file: none, gzip or xz"))
+
+        # These are not shown in the user interface
+        self.define_hidden_options("the .psj file")
 
         # This is here so we can have tabs - but we do not use it for the moment.
         # Remember to use a legitimate default
         self.OptionParser.add_option("", "--active-tab", action="store", type="string",
                                      dest="active_tab", default='setup', help="Active tab.")
 
-    def effect(self):
-        """ Main function
+    def run_effect(self):
+        """ Draws the working area and generates the g-code for the selected paths
+        """
+
+        # First of all checking piece dimensions fit the machine
+        self.check_workpiece_dimensions()
+
+        # Draw the working area
+        working_area_generator = self.draw_working_area()
+
+        if not self.options.ids:
+            # print info and exit
+            inkex.debug(_(("No path was seletect, only the working area was generated. Now draw a "
+                           "path inside the working area and select it to generate the g-code")))
+        else:
+            info = self.generate_gcode(self.selected.values(), working_area_generator)
+
+            message = (_("The generate g-code has been saved to ") + info.gcode_filename() +
+                       _(". Estimated working time: ") + str(info.working_time_min()) +
+                       _(" minutes"))
+            if not info.is_path_inside_workpiece():
+                message += _(". WARNING: some points are outside the workpiece")
+
+            inkex.debug(message)
+
+    def job_name(self):
+        """ Returns the base name of generated files chosen by the user
+
+        :return: the name of the shape
+        :rtype: string
+        """
+
+        return self.options.shapename
+
+    def check_workpiece_dimensions(self):
+        """ Checks that the workpiece fits the machine
+
+        :raises: InvalidWorkpieceDimensions if the workpiece is too big
         """
 
-        # First of all generating the machine instance and checking piece dimensions fit
         machine = machine_factory(self.options.machine_type)
         if machine:
             valid_dimensions = machine.piece_dimensions_allowed(self.options.dim_x,
@@ -109,81 +184,237 @@ class Polyshaper2D(inkex.Effect):
                 raise InvalidWorkpieceDimensions(machine.working_area_width(),
                                                  machine.working_area_height())
 
+    def generate_gcode(self, elements, working_area_generator): # pylint: disable=too-many-locals,too-many-statements,too-many-branches
+        """ Generates the g-code and the other output files for the given elements
+
+        If the same job (same geometry and options) was already generated, the files are copied from
+        the job cache
+        :param elements: the elements to cut
+        :type elements: a list of svg elements (lxml.etree.Element objects)
+        :param working_area_generator: the working area where the border and the tool path are drawn
+        :type working_area_generator: an instance of WorkingAreaGenerator
+        :return: information about the generated tool path
+        :rtype: an instance of PathInfo
+        """
+
+        import json
+        from polyshaper.border import Border, BorderPainter # pylint: disable=import-error,no-name-in-module
+        from polyshaper.compression import compressing_write_func # pylint: disable=import-error,no-name-in-module
+        from polyshaper.gcode import CuttingGCodeGenerator # pylint: disable=import-error,no-name-in-module
+        from polyshaper.helpers import base_filename, OutputFiles, remove_child, write_path_svg # pylint: disable=import-error,no-name-in-module
+        from polyshaper.jobcache import file_copier, job_key # pylint: disable=import-error,no-name-in-module
+        from polyshaper.pathsextraction import FlattenBezier, PathsExtractor # pylint: disable=import-error,no-name-in-module
+        from polyshaper.pathinfo import PathInfo # pylint: disable=import-error,no-name-in-module
+        from polyshaper.toolpathpainter import ToolPathPainter # pylint: disable=import-error,no-name-in-module
+        from polyshaper.toolpathfile import ToolPathFile, write_tool_path # pylint: disable=import-error,no-name-in-module
+
         # A function to convert to millimiters
         to_mm = lambda value: self.uutounit(value, 'mm')
-        # A function to convert to user units. This must be used to write units in the svg
-        to_uu = lambda value: self.unittouu(str(value) + "mm")
+        instrumentation = self.get_instrumentation()
 
-        # Draw the working area
-        working_area_generator = WorkingAreaGenerator(to_uu, WORKING_AREA_ID)
-        working_area_generator.set_size(self.options.dim_x, self.options.dim_y)
-        working_area_generator.upsert(self.document.getroot())
-
-        if not self.options.ids:
-            # print info and exit
-            inkex.debug(_(("No path was seletect, only the working area was generated. Now draw a "
-                           "path inside the working area and select it to generate the g-code")))
-        else:
-            # Extracting paths in machine coordinates
-            paths_extractor = PathsExtractor(self.selected.values(), to_mm, WORKING_AREA_ID,
+        # Extracting paths in machine coordinates
+        with instrumentation.stage("extract") as counts:
+            paths_extractor = PathsExtractor(elements, to_mm, WORKING_AREA_ID,
                                              FlattenBezier(self.options.flatness),
                                              self.options.auto_close_path)
             paths_extractor.extract()
+            counts["paths"] = len(paths_extractor.paths())
+            counts["points"] = sum(len(p) for p in paths_extractor.paths())
+
+        # Looking for the same job in the cache
+        job_cache = self.get_job_cache()
+        cache_entry = None
+        if job_cache:
+            with instrumentation.stage("cache") as counts:
+                parameters = dict((name, getattr(self.options, name)) for name in JOB_OPTIONS)
+                parameters["job"] = "2D"
+                key = job_key(paths_extractor.paths(), parameters)
+                cache_entry = job_cache.lookup(key)
+                counts["hit"] = cache_entry is not None
+
+        # Reading the tool path from the cache. If the entry is corrupted (e.g. a truncated file) it
+        # is removed and the job is generated again
+        if cache_entry is not None:
+            try:
+                with ToolPathFile(cache_entry.filename("path")) as path_file:
+                    tool_path = path_file.path()
+                border = None
+                if cache_entry.data["border"] is not None:
+                    (x_min, y_min, x_max, y_max) = cache_entry.data["border"]
+                    border = Border([[(x_min, y_min), (x_max, y_max)]], 0)
+                join_metainfo = cache_entry.data["metainfo"]
+            except (PolyshaperIOError, KeyError, ValueError, TypeError):
+                job_cache.discard(key)
+                cache_entry = None
+
+        if cache_entry is None:
+            (tool_path, border, join_metainfo) = \
+                self.generate_tool_path(paths_extractor.paths(), paths_extractor.geometries())
+
+        # Drawing the border if present, otherwise removing the one drawn by a previous run
+        if border is not None:
+            with instrumentation.stage("border"):
+                BorderPainter(border).paint(working_area_generator)
+        else:
+            remove_child(working_area_generator.get_element(),
+                         working_area_generator.child_id("border"))
 
-            # The border to use. This is None if no border is requested. If border is present, also
-            # draws it
-            border = None
-            if self.options.square:
-                border = Border(paths_extractor.paths(), self.options.margin)
-                painter = BorderPainter(border)
-                painter.paint(working_area_generator)
-
-            # Joining paths. This will also check that all paths are closed
-            paths_joiner = PathsJoiner(paths_extractor.paths(), CLOSE_DISTANCE)
-            paths_joiner.unite()
-
-            # Generate tool positions
-            tool_path_generator = CuttingToolPathsGenerator(paths_joiner.union_path(),
-                                                            CLOSE_DISTANCE, border)
-            tool_path_generator.generate()
-
-            # The object drawing the tool path
-            painter = ToolPathPainter(tool_path_generator.path())
+        # The object drawing the tool path
+        painter = ToolPathPainter(tool_path)
 
-            # Draw tool path on original svg if requested
-            if self.options.draw_toolpath:
+        # Draw tool path on original svg if requested. The path drawn by a previous run is updated
+        # (or removed if not requested)
+        toolpath_id = working_area_generator.child_id("toolpath")
+        if self.options.draw_toolpath:
+            with instrumentation.stage("paint") as counts:
                 painter.paint(working_area_generator.get_element(),
-                              working_area_generator.get_factor(), "255,0,0")
-
-            # Generating g-code
-            gcode_generator = CuttingGCodeGenerator(tool_path_generator.path(), self.options.speed)
-            gcode_generator.generate()
-
-            # Computing information about path
-            generic_filename = base_filename(self.options.shapename, self.gcode_file_path)
-            info = PathInfo(tool_path_generator.path(), self.options, generic_filename)
+                              working_area_generator.get_factor(), "255,0,0",
+                              self.options.preview_tolerance, toolpath_id)
+                counts["points"] = painter.painted_points()
+        else:
+            remove_child(working_area_generator.get_element(), toolpath_id)
 
-            # Writing gcode to file
-            write_file(os.path.join(self.gcode_file_path, info.gcode_filename()),
-                       lambda f: f.write(gcode_generator.gcode()))
+        # Computing information about path
+        if not os.path.isdir(self.gcode_file_path):
+            os.makedirs(self.gcode_file_path, 0755)
+        generic_filename = base_filename(self.options.shapename, self.gcode_file_path)
+        self.generic_filename = os.path.join(self.gcode_file_path, generic_filename)
+        with instrumentation.stage("pathinfo"):
+            info = PathInfo(tool_path, self.options, generic_filename)
+            info.path_statistics()
+
+        # All output files are written together: either all of them are created or none
+        output_files = OutputFiles()
+        gcode_filename = os.path.join(self.gcode_file_path, info.gcode_filename())
+        svg_filename = os.path.join(self.gcode_file_path, info.svg_filename())
+        toolpath_filename = os.path.join(self.gcode_file_path, info.toolpath_filename())
+
+        if cache_entry is None:
+            # Generating g-code directly into the file
+            with instrumentation.stage("gcode"):
+                gcode_generator = CuttingGCodeGenerator(tool_path, self.options.speed)
+                output_files.add(gcode_filename,
+                                 compressing_write_func(gcode_generator.generate,
+                                                        self.options.compression),
+                                 binary=(self.options.compression != "none"))
 
             # Writing svg to file
-            doc = generate_path_svg(painter)
-            write_file(os.path.join(self.gcode_file_path, info.svg_filename()),
-                       lambda f: doc.write(f))
+            with instrumentation.stage("svg"):
+                output_files.add(svg_filename, lambda f: write_path_svg(painter, f))
 
-            # Writing metainfo to file
-            write_file(os.path.join(self.gcode_file_path, info.metainfo_filename()),
-                       lambda f: f.write(json.dumps(info.metainfo(), indent=2)))
+            # Writing the binary tool path to file
+            with instrumentation.stage("toolpathfile"):
+                output_files.add(toolpath_filename, lambda f: write_tool_path(f, tool_path),
+                                 binary=True)
+        else:
+            # Copying files from the cache
+            with instrumentation.stage("copy"):
+                output_files.add(gcode_filename, cache_entry.copier("gcode"), binary=True)
+                output_files.add(svg_filename, cache_entry.copier("svg"), binary=True)
+                output_files.add(toolpath_filename, cache_entry.copier("toolpath"), binary=True)
+
+        # Writing metainfo to file. Measurements are added if requested (the .psj file is the last
+        # one written, so all stages but this one are included)
+        metainfo = info.metainfo()
+        metainfo.update(join_metainfo)
+        if instrumentation.is_enabled():
+            metainfo["instrumentation"] = instrumentation.report()
+        output_files.add(os.path.join(self.gcode_file_path, info.metainfo_filename()),
+                         lambda f: f.write(json.dumps(metainfo, indent=2)))
+
+        output_files.commit()
+
+        # Storing the job in the cache. The exact tool path is stored to draw it and to compute
+        # information about it when the job is reused
+        if job_cache and cache_entry is None:
+            with instrumentation.stage("cachestore"):
+                border_box = None
+                if border is not None:
+                    border_box = [border.left(), border.bottom(), border.right(), border.top()]
+                job_cache.store(key, {"border": border_box, "metainfo": join_metainfo}, {
+                    "gcode": file_copier(gcode_filename),
+                    "svg": file_copier(svg_filename),
+                    "toolpath": file_copier(toolpath_filename),
+                    "path": lambda f: write_tool_path(f, tool_path, double_precision=True)
+                })
+
+        return info
+
+    def generate_tool_path(self, paths, geometries): # pylint: disable=too-many-locals
+        """ Generates the path of the tool for the given paths
+
+        :param paths: the paths to cut, in machine coordinates
+        :type paths: a list of paths. Each path is a list of points (couples of floats, mm)
+        :param geometries: the geometric properties of paths
+        :type geometries: PathGeometries
+        :return: the tool path, the border (None if not requested) and information about how paths
+            were joined, to add to the metainfo
+        :rtype: a tuple (list of couples of floats, Border or None, dict with string keys)
+        """
 
-            message = (_("The generate g-code has been saved to ") + info.gcode_filename() +
-                       _(". Estimated working time: ") + str(info.working_time_min()) +
-                       _(" minutes"))
-            if not info.is_path_inside_workpiece():
-                message += _(". WARNING: some points are outside the workpiece")
+        from polyshaper.border import Border # pylint: disable=import-error,no-name-in-module
+        from polyshaper.pathsoffset import PathsOffsetter # pylint: disable=import-error,no-name-in-module
+        from polyshaper.pathsunion import ParallelPathsJoiner # pylint: disable=import-error,no-name-in-module
+        from polyshaper.shapesunion import ShapesUnion # pylint: disable=import-error,no-name-in-module
+        from polyshaper.toolpaths import CuttingToolPathsGenerator # pylint: disable=import-error,no-name-in-module
+
+        instrumentation = self.get_instrumentation()
+
+        # Uniting overlapping shapes, so that the wire does not cut through other shapes
+        if self.options.union_shapes:
+            with instrumentation.stage("merge") as counts:
+                shapes_union = ShapesUnion(paths, CLOSE_DISTANCE, geometries)
+                shapes_union.unite_shapes()
+                paths = shapes_union.paths()
+                counts["paths"] = len(paths)
+                counts["points"] = sum(len(p) for p in paths)
+                counts["united"] = shapes_union.united_paths()
+                counts["unclosed"] = shapes_union.unclosed_paths()
+            if shapes_union.unclosed_paths():
+                inkex.errormsg(_("Warning: some overlapping shapes could not be united, their "
+                                 "outlines are cut unchanged"))
+
+        # Compensating the kerf: outer contours are enlarged and holes are shrunk
+        if self.options.kerf > 0:
+            with instrumentation.stage("offset") as counts:
+                paths_offsetter = PathsOffsetter(paths, self.options.kerf / 2.0, CLOSE_DISTANCE,
+                                                 geometries)
+                paths_offsetter.offset_paths()
+                paths = paths_offsetter.paths()
+                counts["paths"] = len(paths)
+                counts["points"] = sum(len(p) for p in paths)
+
+        # The border to use. This is None if no border is requested
+        border = None
+        if self.options.square:
+            border = Border(paths, self.options.margin, geometries)
+
+        # Joining paths. This will also check that all paths are closed
+        with instrumentation.stage("unite") as counts:
+            paths_joiner = ParallelPathsJoiner(paths, CLOSE_DISTANCE, self.options.holes_first,
+                                               self.options.join_strategy,
+                                               self.options.segment_bridges,
+                                               self.options.join_workers,
+                                               self.options.avoid_crossings, geometries)
+            paths_joiner.unite()
+            counts["points"] = len(paths_joiner.union_path())
+            counts["bridgesLength"] = paths_joiner.bridges_length()
+            counts["clusters"] = paths_joiner.number_of_clusters()
 
-            inkex.debug(message)
+        # Generate tool positions
+        with instrumentation.stage("toolpath") as counts:
+            tool_path_generator = CuttingToolPathsGenerator(paths_joiner.union_path(),
+                                                            CLOSE_DISTANCE, border)
+            tool_path_generator.generate()
+            counts["points"] = len(tool_path_generator.path())
+
+        join_metainfo = {
+            "joinStrategy": self.options.join_strategy,
+            "bridgesLength": paths_joiner.bridges_length(),
+            "clusterBridgesLength": paths_joiner.cluster_bridges_length()
+        }
 
+        return (tool_path_generator.path(), border, join_metainfo)
 
 if __name__ == '__main__':
     try:
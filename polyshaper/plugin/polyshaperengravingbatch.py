@@ -0,0 +1,125 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Batch g-code generation for the engraving machine (4 axes), without inkscape's user interface
+
+All paths and groups at the top level of each svg file (i.e. layers, except the working area) are
+engraved. The command accepts all the options of the inkscape plugin, the parameters that are
+hardwired in the plugin and the options to control batch processing. Inkscape extensions (inkex.py
+and the modules it needs) must be in the python path
+"""
+
+import copy
+import math
+import os.path
+import time
+
+from polyshaperengravingplugin import (PolyshaperEngraving, WORKING_AREA_ID, MM_PER_DEGREE, # pylint: disable=import-error
+                                       MIN_DISTANCE, SAFE_Z, SMALL_DISTANCE, SMALL_ANGLE,
+                                       DISCRETIZATION_STEP, FLATNESS)
+from polyshaper.batch import add_batch_options, parse_batch_arguments, process_files # pylint: disable=import-error,no-name-in-module
+from polyshaper.batch import top_level_elements # pylint: disable=import-error,no-name-in-module
+from polyshaper.errors import PolyshaperError # pylint: disable=import-error,no-name-in-module
+
+# The exit code used for errors that are not PolyshaperErrors
+UNEXPECTED_ERROR_EXIT_CODE = 255
+
+# The columns of the summary table
+SUMMARY_HEADER = ["file", "paths", "points", "elapsed (s)", "result"]
+
+
+def pipeline_parameters(options):
+    """ Returns the parameters of the engraving pipeline from commandline options
+
+    :param options: the commandline options
+    :type options: an optparse.Values object
+    :return: the keyword arguments for generate_engraving_gcode
+    :rtype: a dictionary
+    """
+
+    return {
+        "flatness": options.flatness,
+        "min_distance": options.min_distance,
+        "discretization_step": options.discretization_step,
+        "mm_per_degree": options.mm_per_degree,
+        "safe_z": options.safe_z,
+        "small_distance": options.small_distance,
+        "small_angle": math.radians(options.small_angle)
+    }
+
+
+def process_file(arguments):
+    """ Generates g-code for a single file
+
+    This never raises exceptions, errors are reported in the returned row
+    :param arguments: the file to process and the options
+    :type arguments: a couple (filename, options)
+    :return: the exit code and the row of the summary table for the file
+    :rtype: a couple (int, list)
+    """
+
+    (filename, options) = arguments
+    start = time.time()
+
+    try:
+        plugin = PolyshaperEngraving()
+        plugin.options = copy.copy(options)
+        if options.filename is None:
+            plugin.options.filename = os.path.splitext(os.path.basename(filename))[0]
+        plugin.gcode_file_path = options.output_dir
+        plugin.parse(filename)
+
+        plugin.draw_working_area()
+        elements = top_level_elements(plugin.document.getroot(), WORKING_AREA_ID)
+        (gcode_filename, tool_paths) = plugin.generate_gcode(elements,
+                                                             **pipeline_parameters(options))
+
+        return (0, [filename, len(tool_paths), sum(len(p) for p in tool_paths),
+                    "{:.2f}".format(time.time() - start), gcode_filename])
+    except PolyshaperError as error:
+        return (error.exit_code(), [filename, "-", "-", "{:.2f}".format(time.time() - start),
+                                    "ERROR: " + error.to_string()])
+    except Exception as error: # pylint: disable=broad-except
+        return (UNEXPECTED_ERROR_EXIT_CODE, [filename, "-", "-",
+                                             "{:.2f}".format(time.time() - start),
+                                             "ERROR: " + str(error)])
+
+
+def main():
+    """ The main function of the script
+    """
+
+    parser = PolyshaperEngraving().OptionParser
+    parser.set_defaults(filename=None)
+    parser.add_option("", "--flatness", action="store", type="float", dest="flatness",
+                      default=FLATNESS,
+                      help="The maximum length of segments of discretized curves in mm")
+    parser.add_option("", "--min-distance", action="store", type="float", dest="min_distance",
+                      default=MIN_DISTANCE,
+                      help="The distance in mm below which points are considered coincident")
+    parser.add_option("", "--discretization-step", action="store", type="float",
+                      dest="discretization_step", default=DISCRETIZATION_STEP,
+                      help="The maximum length of segments of the tool path in mm")
+    parser.add_option("", "--mm-per-degree", action="store", type="float", dest="mm_per_degree",
+                      default=MM_PER_DEGREE,
+                      help="The millimeters of the E axis for each degree of tool rotation")
+    parser.add_option("", "--safe-z", action="store", type="float", dest="safe_z",
+                      default=SAFE_Z, help="The value of Z when not working, in mm")
+    parser.add_option("", "--small-distance", action="store", type="float",
+                      dest="small_distance", default=SMALL_DISTANCE,
+                      help=("The distance in mm below which linear and tool movements are "
+                            "performed together"))
+    parser.add_option("", "--small-angle", action="store", type="float", dest="small_angle",
+                      default=math.degrees(SMALL_ANGLE),
+                      help=("The rotation in degrees below which linear and tool movements are "
+                            "performed together"))
+    add_batch_options(parser, os.path.expanduser("~"))
+
+    (options, files) = parse_batch_arguments(parser)
+
+    exit(process_files(process_file, files, options, SUMMARY_HEADER))
+
+
+if __name__ == '__main__':
+    main()
@@ -9,12 +9,12 @@ import math
 import os.path
 
 import inkex # pylint: disable=import-error
-from polyshaper.errors import PolyshaperError # pylint: disable=import-error,no-name-in-module
-from polyshaper.gcode import EngravingGCodeGenerator # pylint: disable=import-error,no-name-in-module
-from polyshaper.pathsextraction import FlattenBezier, PathsExtractor # pylint: disable=import-error,no-name-in-module
-from polyshaper.toolpaths import EngravingToolPathsGenerator # pylint: disable=import-error,no-name-in-module
-from polyshaper.workingarea import WorkingAreaGenerator # pylint: disable=import-error,no-name-in-module
-from polyshaper.helpers import base_filename, write_file # pylint: disable=import-error,no-name-in-module
+from polyshaper.effectmixin import EffectMixin, WORKING_AREA_ID # pylint: disable=import-error,no-name-in-module
+from polyshaper.errors import PolyshaperError, PolyshaperIOError # pylint: disable=import-error,no-name-in-module
+from polyshaper.instrumentation import Instrumentation # pylint: disable=import-error,no-name-in-module
+
+# The modules needed to generate the g-code are imported in generate_engraving_gcode, so that
+# drawing only the working area (i.e. when nothing is selected) is fast
 
 ####################################################################################################
 # List of hardwired parameters
@@ -25,9 +25,6 @@ from polyshaper.helpers import base_filename, write_file # pylint: disable=impor
 # command to send to the printer)
 MM_PER_DEGREE = 18.0
 
-# The id of the working area element in the svg
-WORKING_AREA_ID = "eu.polyshaper.inkscape.workarea"
-
 # If two points are less than this value apart, they are considere conincident. This is measured in
 # millimeters
 MIN_DISTANCE = 0.01
@@ -55,7 +52,159 @@ FLATNESS = 1.0
 inkex.localize()
 
 
-class PolyshaperEngraving(inkex.Effect):
+def read_cached_tool_paths(cache_entry):
+    """ Reads the tool paths of a job from the cache
+
+    Tool paths are stored one after the other, with their lengths
+    :param cache_entry: the entry of the job in the cache
+    :type cache_entry: an instance of JobCacheEntry
+    :return: the tool paths
+    :rtype: a list of lists of tuples (x, y, z, angle)
+    :raises: PolyshaperIOError, KeyError, ValueError or TypeError if the entry is corrupted
+    """
+
+    from polyshaper.toolpathfile import ToolPathFile # pylint: disable=import-error,no-name-in-module
+
+    with ToolPathFile(cache_entry.filename("toolpaths")) as path_file:
+        all_points = path_file.path()
+    path_lengths = cache_entry.data["pathLengths"]
+    if sum(path_lengths) != len(all_points):
+        raise ValueError("the cached tool paths do not match their lengths")
+
+    tool_paths = []
+    start = 0
+    for path_length in path_lengths:
+        tool_paths.append(all_points[start:(start + path_length)])
+        start += path_length
+
+    return tool_paths
+
+
+def generate_engraving_gcode(elements, to_mm, generic_filename, depth_z, compression="none", # pylint: disable=too-many-arguments,too-many-locals
+                             flatness=FLATNESS, min_distance=MIN_DISTANCE,
+                             discretization_step=DISCRETIZATION_STEP, mm_per_degree=MM_PER_DEGREE,
+                             safe_z=SAFE_Z, small_distance=SMALL_DISTANCE, small_angle=SMALL_ANGLE,
+                             instrumentation=None, job_cache=None):
+    """ Generates the g-code file engraving the given elements
+
+    The default values of parameters are the hardwired ones used by the plugin
+    :param elements: the elements to engrave
+    :type elements: a list of svg elements (lxml.etree.Element objects)
+    :param to_mm: the function to convert svg user units to millimeters
+    :type to_mm: a function taking a float and returning a float
+    :param generic_filename: the name of the output file (with the directory), without extension
+    :type generic_filename: string
+    :param depth_z: the engraving depth in millimeters
+    :type depth_z: float
+    :param compression: the compression of the g-code file (see polyshaper.compression)
+    :type compression: string
+    :param flatness: the maximum length of a segment in discretized beziers and arcs
+    :type flatness: float
+    :param min_distance: the distance below which points are considered coincident (millimeters)
+    :type min_distance: float
+    :param discretization_step: the maximum length of segments of tool paths (millimeters)
+    :type discretization_step: float
+    :param mm_per_degree: the millimeters of the E axis for each degree of tool rotation
+    :type mm_per_degree: float
+    :param safe_z: the value of Z when not working (millimeters)
+    :type safe_z: float
+    :param small_distance: the distance below which linear and tool movement are performed
+        together (millimeters)
+    :type small_distance: float
+    :param small_angle: the angular displacement below which linear and tool movement are
+        performed together (radiants)
+    :type small_angle: float
+    :param instrumentation: the object measuring pipeline stages. If enabled, measurements are
+        written to a file with the same name as the g-code file and .instrumentation.json
+        extension
+    :type instrumentation: an instance of Instrumentation or None
+    :param job_cache: the cache of generated jobs. If the same job was already generated, the
+        g-code file is copied from the cache
+    :type job_cache: an instance of JobCache or None
+    :return: the name of the generated file and the tool paths
+    :rtype: a couple (string, list of lists of tuples (x, y, z, angle))
+    """
+
+    from polyshaper.compression import compressing_write_func, compression_extension # pylint: disable=import-error,no-name-in-module
+    from polyshaper.gcode import EngravingGCodeGenerator # pylint: disable=import-error,no-name-in-module
+    from polyshaper.helpers import write_file # pylint: disable=import-error,no-name-in-module
+    from polyshaper.jobcache import file_copier, job_key # pylint: disable=import-error,no-name-in-module
+    from polyshaper.pathsextraction import FlattenBezier, PathsExtractor # pylint: disable=import-error,no-name-in-module
+    from polyshaper.toolpathfile import write_tool_path # pylint: disable=import-error,no-name-in-module
+    from polyshaper.toolpaths import EngravingToolPathsGenerator # pylint: disable=import-error,no-name-in-module
+
+    if instrumentation is None:
+        instrumentation = Instrumentation(False)
+
+    # Extracting paths in machine coordinates
+    with instrumentation.stage("extract") as counts:
+        paths_extractor = PathsExtractor(elements, to_mm, WORKING_AREA_ID, FlattenBezier(flatness))
+        paths_extractor.extract()
+        counts["paths"] = len(paths_extractor.paths())
+        counts["points"] = sum(len(p) for p in paths_extractor.paths())
+
+    filename = generic_filename + ".gcode" + compression_extension(compression)
+
+    # Looking for the same job in the cache
+    cache_entry = None
+    if job_cache:
+        with instrumentation.stage("cache") as counts:
+            key = job_key(paths_extractor.paths(), {
+                "job": "engraving", "depth_z": depth_z, "compression": compression,
+                "flatness": flatness, "min_distance": min_distance,
+                "discretization_step": discretization_step, "mm_per_degree": mm_per_degree,
+                "safe_z": safe_z, "small_distance": small_distance, "small_angle": small_angle})
+            cache_entry = job_cache.lookup(key)
+            counts["hit"] = cache_entry is not None
+
+    # Reading the tool paths from the cache. If the entry is corrupted (e.g. a truncated file) it is
+    # removed and the job is generated again
+    if cache_entry is not None:
+        try:
+            tool_paths = read_cached_tool_paths(cache_entry)
+        except (PolyshaperIOError, KeyError, ValueError, TypeError):
+            job_cache.discard(key)
+            cache_entry = None
+
+    if cache_entry is None:
+        # Generate tool positions and orientations
+        with instrumentation.stage("toolpath") as counts:
+            tool_path_generator = EngravingToolPathsGenerator(paths_extractor.paths(), depth_z,
+                                                              min_distance, discretization_step)
+            tool_path_generator.generate()
+            tool_paths = tool_path_generator.paths()
+            counts["points"] = sum(len(p) for p in tool_paths)
+
+        # Generating g-code directly into the file
+        with instrumentation.stage("gcode"):
+            gcode_generator = EngravingGCodeGenerator(tool_paths, mm_per_degree, safe_z,
+                                                      small_distance, small_angle)
+            write_file(filename, compressing_write_func(gcode_generator.generate, compression),
+                       binary=(compression != "none"))
+
+        # Storing the job in the cache
+        if job_cache:
+            with instrumentation.stage("cachestore"):
+                all_points = [point for path in tool_paths for point in path]
+                job_cache.store(key, {"pathLengths": [len(p) for p in tool_paths]}, {
+                    "gcode": file_copier(filename),
+                    "toolpaths": lambda f: write_tool_path(f, all_points, double_precision=True)
+                })
+    else:
+        # Copying the g-code from the cache
+        with instrumentation.stage("copy"):
+            write_file(filename, cache_entry.copier("gcode"), binary=True)
+
+    if instrumentation.is_enabled():
+        import json
+        report = instrumentation.report()
+        write_file(generic_filename + ".instrumentation.json",
+                   lambda f: f.write(json.dumps(report, indent=2)))
+
+    return (filename, tool_paths)
+
+
+class PolyshaperEngraving(EffectMixin, inkex.Effect):
     """ The main class of the plugin
     """
 
@@ -71,6 +220,11 @@ class PolyshaperEngraving(inkex.Effect):
         self.doc_height = 0
         # The path where the output file is written
         self.gcode_file_path = os.path.expanduser("~/")
+        # The object measuring pipeline stages, created when options are known
+        self.instrumentation = None
+        # The name of generated files with the directory and without extension, set when the first
+        # file is generated
+        self.generic_filename = None
 
         self.define_command_line_options()
 
@@ -88,25 +242,24 @@ class PolyshaperEngraving(inkex.Effect):
                                      default=200.0, help="Plane Y dimension in mm")
         self.OptionParser.add_option("-z", "--depth-z", action="store", type="float",
                                      dest="depth_z", default=10.0, help="Engraving depth in mm")
+        self.OptionParser.add_option("", "--compression", action="store", type="string",
+                                     dest="compression", default="none",
+                                     help=("Compression of the g-code file: none, gzip or xz"))
+
+        # These are not shown in the user interface
+        self.define_hidden_options("a .instrumentation.json file")
 
         # This is here so we can have tabs - but we do not use it for the moment.
         # Remember to use a legitimate default
         self.OptionParser.add_option("", "--active-tab", action="store", type="string",
                                      dest="active_tab", default='setup', help="Active tab.")
 
-    def effect(self):
-        """ Main function
+    def run_effect(self):
+        """ Draws the working area and generates the g-code for the selected paths
         """
 
-        # A function to convert to millimiters
-        to_mm = lambda value: self.uutounit(value, 'mm')
-        # A function to convert to user units. This must be used to write units in the svg
-        to_uu = lambda value: self.unittouu(str(value) + "mm")
-
         # Draw the working area
-        working_area_generator = WorkingAreaGenerator(to_uu, WORKING_AREA_ID)
-        working_area_generator.set_size(self.options.dim_x, self.options.dim_y)
-        working_area_generator.upsert(self.document.getroot())
+        self.draw_working_area()
 
         if not self.options.ids:
             # print info and exit
@@ -114,27 +267,43 @@ class PolyshaperEngraving(inkex.Effect):
             inkex.debug(_(("No path was seletect, only the working area was generated. Now draw a "
                            "path inside the working area and select it to generate the g-code")))
         else:
-            # Extracting paths in machine coordinates
-            paths_extractor = PathsExtractor(self.selected.values(), to_mm, WORKING_AREA_ID,
-                                             FlattenBezier(FLATNESS))
-            paths_extractor.extract()
-
-            # Generate tool positions and orientations
-            tool_path_generator = EngravingToolPathsGenerator(paths_extractor.paths(),
-                                                              self.options.depth_z, MIN_DISTANCE,
-                                                              DISCRETIZATION_STEP)
-            tool_path_generator.generate()
+            filename = self.generate_gcode(self.selected.values())[0]
 
-            # Generating g-code
-            gcode_generator = EngravingGCodeGenerator(tool_path_generator.paths(), MM_PER_DEGREE,
-                                                      SAFE_Z, SMALL_DISTANCE, SMALL_ANGLE)
-            gcode_generator.generate()
+            inkex.debug(_("The generate g-code has been save to ") + filename)
 
-            # Writing to file
-            filename = base_filename(self.options.filename, self.gcode_file_path) + ".gcode"
-            write_file(filename, lambda f: f.write(gcode_generator.gcode()))
+    def job_name(self):
+        """ Returns the base name of generated files chosen by the user
 
-            inkex.debug(_("The generate g-code has been save to ") + filename)
+        :return: the base name of the g-code file
+        :rtype: string
+        """
+
+        return self.options.filename
+
+    def generate_gcode(self, elements, **parameters):
+        """ Generates the g-code file for the given elements
+
+        :param elements: the elements to engrave
+        :type elements: a list of svg elements (lxml.etree.Element objects)
+        :param parameters: parameters overriding the hardwired ones (see generate_engraving_gcode)
+        :return: the name of the generated file and the tool paths
+        :rtype: a couple (string, list of lists of tuples (x, y, z, angle))
+        """
+
+        from polyshaper.helpers import base_filename # pylint: disable=import-error,no-name-in-module
+
+        # A function to convert to millimiters
+        to_mm = lambda value: self.uutounit(value, 'mm')
+
+        generic_filename = os.path.join(self.gcode_file_path,
+                                        base_filename(self.options.filename, self.gcode_file_path))
+        self.generic_filename = generic_filename
+
+        parameters.setdefault("instrumentation", self.get_instrumentation())
+        parameters.setdefault("job_cache", self.get_job_cache())
+
+        return generate_engraving_gcode(elements, to_mm, generic_filename, self.options.depth_z,
+                                        self.options.compression, **parameters)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- encoding:utf-8 -*-
+
+"""
+A script to compute length, bounding box and estimated working time of g-code files
+
+Files are read one line at a time, so this also works with very large files. Files compressed with
+gzip or xz are decompressed transparently
+"""
+
+import argparse
+import json
+import os.path
+import sys
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plugin"))
+
+from polyshaper.compression import open_gcode # pylint: disable=import-error,no-name-in-module,wrong-import-position
+from polyshaper.gcodeanalysis import GCodeAnalyzer, DEFAULT_RAPID_SPEED # pylint: disable=import-error,no-name-in-module,wrong-import-position
+from polyshaper.machine import machine_factory # pylint: disable=import-error,no-name-in-module,wrong-import-position
+from polyshaper.timeestimation import time_estimator_for_machine # pylint: disable=import-error,no-name-in-module,wrong-import-position
+
+def create_cmdline_parser():
+    """ Creates and returns the commanline parser
+    """
+
+    parser = argparse.ArgumentParser(description="Analyzes G-Code files")
+
+    parser.add_argument("filenames", metavar="FILENAME", action="store", type=str, nargs="+",
+                        help="The G-Code files to analyze")
+    parser.add_argument("-t", "--type", action="store", type=str, default=None,
+                        dest="machine_type",
+                        help=("The machine type (e.g. P400). If not given the tool is supposed to "
+                              "always move at the requested speed"))
+    parser.add_argument("-r", "--rapid-speed", action="store", type=float,
+                        default=DEFAULT_RAPID_SPEED, help="The speed of G00 movements in mm/min")
+    parser.add_argument("-j", "--json", action="store_true",
+                        help="Prints statistics as json, one object per file")
+
+    return parser
+
+
+def analyze(filename, machine, rapid_speed):
+    """ Analyzes a single file and returns statistics
+    """
+
+    analyzer = GCodeAnalyzer(time_estimator_for_machine(machine), rapid_speed)
+    with open_gcode(filename) as gcode_file:
+        analyzer.analyze_file(gcode_file)
+
+    return analyzer.statistics()
+
+
+def main():
+    """ The main function of the script
+    """
+    args = create_cmdline_parser().parse_args()
+
+    machine = None
+    if args.machine_type is not None:
+        machine = machine_factory(args.machine_type)
+        if machine is None:
+            sys.exit("Unknown machine type: " + args.machine_type)
+
+    if not args.json:
+        print("{:<40} {:>12} {:>12} {:>12} {:>21} {:>10}".format(
+            "file", "length (mm)", "rapid (mm)", "feed (mm)", "size (mm)", "time (min)"))
+
+    for filename in args.filenames:
+        stats = analyze(filename, machine, args.rapid_speed)
+        if args.json:
+            stats["filename"] = filename
+            print(json.dumps(stats))
+        else:
+            box = stats["boundingBox"]
+            size = "{:.1f}X{:.1f}".format(box["xMax"] - box["xMin"], box["yMax"] - box["yMin"])
+            print("{:<40} {:>12.1f} {:>12.1f} {:>12.1f} {:>21} {:>10.1f}".format(
+                filename, stats["pathLength"], stats["rapidLength"], stats["feedLength"], size,
+                stats["duration"] / 60.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+A script to measure the time needed by each stage of the cutting pipeline on synthetic documents
+
+Documents are generated with a fixed random seed, so results of different runs can be compared.
+For each workload and size the script prints the fastest time of each stage and, if requested,
+writes all results to a json file. Inkscape extensions (inkex.py and the modules it needs) must be
+in the python path
+"""
+
+import argparse
+import json
+import math
+import os
+import os.path
+import platform
+import random
+import sys
+import time
+from timeit import default_timer
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plugin"))
+
+import inkex # pylint: disable=import-error,wrong-import-position
+from polyshaper2dplugin import CLOSE_DISTANCE, WORKING_AREA_ID # pylint: disable=import-error,wrong-import-position
+from polyshaper.gcode import CuttingGCodeGenerator # pylint: disable=import-error,no-name-in-module,wrong-import-position
+from polyshaper.pathinfo import PathInfo # pylint: disable=import-error,no-name-in-module,wrong-import-position
+from polyshaper.pathsextraction import FlattenBezier, PathsExtractor # pylint: disable=import-error,no-name-in-module,wrong-import-position
+from polyshaper.pathsunion import JOIN_STRATEGIES, ParallelPathsJoiner # pylint: disable=import-error,no-name-in-module,wrong-import-position
+from polyshaper.shapesunion import ShapesUnion # pylint: disable=import-error,no-name-in-module,wrong-import-position
+from polyshaper.toolpaths import CuttingToolPathsGenerator # pylint: disable=import-error,no-name-in-module,wrong-import-position
+
+# The size of the area where shapes are generated, in millimeters
+AREA_SIZE = 1000.0
+
+# The stages of the pipeline, in order
+STAGES = ["extract", "merge", "unite", "toolpath", "gcode", "pathinfo"]
+
+
+class BenchmarkOptions(object): # pylint: disable=too-few-public-methods
+    """ The options of the plugin used for benchmarks
+    """
+
+    def __init__(self):
+        """ Constructor
+        """
+
+        self.dim_x = AREA_SIZE
+        self.dim_y = AREA_SIZE
+        self.speed = 500.0
+        self.flatness = 0.1
+        self.union_shapes = True
+        self.machine_type = "P400"
+        self.compression = "none"
+        self.holes_first = True
+        self.join_strategy = "mst"
+        self.segment_bridges = True
+        self.avoid_crossings = True
+        self.join_workers = 1
+
+
+def svg_path(parent, points, closed=True):
+    """ Adds to parent an svg path made of straight segments through the given points
+    """
+
+    commands = ["M {:.3f},{:.3f}".format(*points[0])]
+    commands += ["L {:.3f},{:.3f}".format(*p) for p in points[1:]]
+    if closed:
+        commands.append("Z")
+
+    return inkex.etree.SubElement(parent, inkex.addNS("path", "svg"), {"d": " ".join(commands)})
+
+
+def random_polygon(rng, center, radius, num_vertices):
+    """ Returns the vertices of a random star-shaped polygon (which is never self-intersecting)
+    """
+
+    angles = sorted(rng.uniform(0, 2 * math.pi) for i in range(num_vertices))
+    return [(center[0] + radius * r * math.cos(a), center[1] + radius * r * math.sin(a))
+            for (a, r) in [(a, rng.uniform(0.3, 1.0)) for a in angles]]
+
+
+def generate_random_polygons(root, size, rng):
+    """ Generates size random closed polygons scattered in the area
+    """
+
+    for i in range(size): # pylint: disable=unused-variable
+        radius = rng.uniform(2.0, 20.0)
+        center = (rng.uniform(radius, AREA_SIZE - radius), rng.uniform(radius, AREA_SIZE - radius))
+        svg_path(root, random_polygon(rng, center, radius, rng.randint(3, 30)))
+
+    return list(root)
+
+
+def generate_glyphs(root, size, rng):
+    """ Generates size glyph-like outlines (an outer contour and a hole, made of bezier curves)
+
+    Glyphs are placed on lines like text
+    """
+
+    def ring(center, radius_x, radius_y):
+        """ Returns a closed path made of four cubic bezier curves approximating an ellipse
+        """
+
+        # The distance of control points from the start of each quarter of ellipse
+        kappa = 0.5523
+        (c_x, c_y) = center
+        (k_x, k_y) = (kappa * radius_x, kappa * radius_y)
+        (left, right, top, bottom) = (c_x - radius_x, c_x + radius_x, c_y - radius_y,
+                                      c_y + radius_y)
+        curves = [
+            [(c_x + k_x, top), (right, c_y - k_y), (right, c_y)],
+            [(right, c_y + k_y), (c_x + k_x, bottom), (c_x, bottom)],
+            [(c_x - k_x, bottom), (left, c_y + k_y), (left, c_y)],
+            [(left, c_y - k_y), (c_x - k_x, top), (c_x, top)]
+        ]
+
+        return "M {:.3f},{:.3f} ".format(c_x, top) + " ".join(
+            "C " + " ".join("{:.3f},{:.3f}".format(*p) for p in curve) for curve in curves) + " Z"
+
+    pitch = 6.0
+    glyphs_per_line = int(AREA_SIZE / pitch) - 1
+    for i in range(size):
+        center = (pitch * (i % glyphs_per_line + 1), pitch * (i // glyphs_per_line + 1))
+        width = rng.uniform(1.5, 2.5)
+        height = rng.uniform(2.0, 2.8)
+        inkex.etree.SubElement(root, inkex.addNS("path", "svg"),
+                               {"d": (ring(center, width, height) + " " +
+                                      ring(center, width * 0.5, height * 0.6))})
+
+    return list(root)
+
+
+def generate_nested_groups(root, size, rng):
+    """ Generates size groups, each one nested inside the previous one
+
+    Each group has a small translation and contains a polygon, so transformations of all ancestors
+    must be applied to each path
+    """
+
+    parent = root
+    for i in range(size): # pylint: disable=unused-variable
+        parent = inkex.etree.SubElement(parent, inkex.addNS("g", "svg"),
+                                        {"transform": "translate({:.3f},{:.3f})".format(
+                                            rng.uniform(0, 0.5), rng.uniform(0, 0.5))})
+        svg_path(parent, random_polygon(rng, (10.0, 10.0), 5.0, 8))
+
+    return list(root)
+
+
+def generate_huge_bezier(root, size, rng):
+    """ Generates a single closed path made of size cubic bezier curves
+    """
+
+    radius = AREA_SIZE * 0.4
+    center = AREA_SIZE / 2.0
+    step = 2 * math.pi / size
+
+    def point(angle, wobble):
+        """ Returns a point on the (wobbling) circle
+        """
+
+        return "{:.3f},{:.3f}".format(center + (radius + wobble) * math.cos(angle),
+                                      center + (radius + wobble) * math.sin(angle))
+
+    commands = ["M " + point(0, 0)]
+    for i in range(size):
+        angle = i * step
+        commands.append("C {} {} {}".format(point(angle + step / 3.0, rng.uniform(-10, 10)),
+                                            point(angle + 2 * step / 3.0, rng.uniform(-10, 10)),
+                                            point(angle + step, 0)))
+    commands.append("Z")
+    inkex.etree.SubElement(root, inkex.addNS("path", "svg"), {"d": " ".join(commands)})
+
+    return list(root)
+
+
+# The available workloads
+WORKLOADS = {
+    "polygons": generate_random_polygons,
+    "glyphs": generate_glyphs,
+    "nested": generate_nested_groups,
+    "bezier": generate_huge_bezier
+}
+
+
+def run_pipeline(elements, options):
+    """ Runs the cutting pipeline once and returns the time of each stage and some counts
+    """
+
+    times = {}
+
+    def timed(stage, function):
+        """ Calls function, storing the elapsed time for the stage
+        """
+
+        start = default_timer()
+        result = function()
+        times[stage] = default_timer() - start
+
+        return result
+
+    paths_extractor = PathsExtractor(elements, lambda x: x, WORKING_AREA_ID,
+                                     FlattenBezier(options.flatness))
+    timed("extract", paths_extractor.extract)
+
+    paths = paths_extractor.paths()
+    geometries = paths_extractor.geometries()
+    times["merge"] = 0.0
+    if options.union_shapes:
+        shapes_union = ShapesUnion(paths, CLOSE_DISTANCE, geometries)
+        timed("merge", shapes_union.unite_shapes)
+        paths = shapes_union.paths()
+
+    paths_joiner = ParallelPathsJoiner(paths, CLOSE_DISTANCE,
+                                       options.holes_first, options.join_strategy,
+                                       options.segment_bridges, options.join_workers,
+                                       options.avoid_crossings, geometries)
+    timed("unite", paths_joiner.unite)
+
+    tool_path_generator = CuttingToolPathsGenerator(paths_joiner.union_path(), CLOSE_DISTANCE)
+    timed("toolpath", tool_path_generator.generate)
+
+    gcode_generator = CuttingGCodeGenerator(tool_path_generator.path(), options.speed)
+    with open(os.devnull, "w") as null_file:
+        timed("gcode", lambda: gcode_generator.generate(null_file))
+
+    info = PathInfo(tool_path_generator.path(), options, "benchmark")
+    timed("pathinfo", info.path_statistics)
+
+    counts = {
+        "paths": len(paths_extractor.paths()),
+        "inputPoints": sum(len(p) for p in paths_extractor.paths()),
+        "toolPathPoints": len(tool_path_generator.path()),
+        "bridgesLength": paths_joiner.bridges_length(),
+        "clusterBridgesLength": paths_joiner.cluster_bridges_length()
+    }
+
+    return (times, counts)
+
+
+def benchmark(workload, size, repeat, seed, join_strategy, join_workers): # pylint: disable=too-many-arguments
+    """ Runs the pipeline repeat times on a generated document and returns the results
+
+    The time of each stage is the minimum over all runs
+    """
+
+    root = inkex.etree.Element(inkex.addNS("svg", "svg"))
+    elements = WORKLOADS[workload](root, size, random.Random(seed))
+    options = BenchmarkOptions()
+    options.join_strategy = join_strategy
+    options.join_workers = join_workers
+
+    best = None
+    counts = None
+    for i in range(repeat): # pylint: disable=unused-variable
+        (times, counts) = run_pipeline(elements, options)
+        best = times if best is None else {s: min(best[s], times[s]) for s in STAGES}
+
+    best["total"] = sum(best[s] for s in STAGES)
+
+    return {"workload": workload, "size": size, "joinStrategy": join_strategy,
+            "joinWorkers": join_workers, "stages": best, "counts": counts}
+
+
+def create_cmdline_parser():
+    """ Creates and returns the commanline parser
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmarks the cutting pipeline")
+
+    parser.add_argument("-w", "--workload", action="append", choices=sorted(WORKLOADS.keys()),
+                        dest="workloads", help="The workload to run (can be repeated, default all)")
+    parser.add_argument("-s", "--sizes", action="store", type=str, default="10,100,1000",
+                        help="Comma separated sizes of generated documents")
+    parser.add_argument("-r", "--repeat", action="store", type=int, default=3,
+                        help="The number of runs for each workload and size")
+    parser.add_argument("--seed", action="store", type=int, default=42,
+                        help="The seed of the random number generator")
+    parser.add_argument("-j", "--join-strategy", action="store", choices=JOIN_STRATEGIES,
+                        default="mst", help="The strategy used to join paths")
+    parser.add_argument("--join-workers", action="store", type=int, default=1,
+                        help="The number of processes used to join paths (0 for all CPUs)")
+    parser.add_argument("-o", "--output", action="store", type=str, default=None,
+                        help="The json file where results are written")
+
+    return parser
+
+
+def main():
+    """ The main function of the script
+    """
+    args = create_cmdline_parser().parse_args()
+    # Paths in nested groups are extracted recursively
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))
+    workloads = args.workloads or sorted(WORKLOADS.keys())
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    print("{:<10} {:>7} {:>9}".format("workload", "size", "points") +
+          "".join("{:>11}".format(s + " (s)") for s in STAGES + ["total"]))
+
+    results = []
+    for workload in workloads:
+        for size in sizes:
+            result = benchmark(workload, size, args.repeat, args.seed, args.join_strategy,
+                               args.join_workers)
+            results.append(result)
+            print("{:<10} {:>7} {:>9}".format(workload, size, result["counts"]["inputPoints"]) +
+                  "".join("{:>11.4f}".format(result["stages"][s]) for s in STAGES + ["total"]))
+
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+                "seed": args.seed,
+                "results": results
+            }, outfile, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,13 +4,20 @@
 """
 A script to plot the content of a 2D gcode file
 
-This requires python3 and matplotlib
+This requires python3 and matplotlib. Files compressed with gzip or xz are decompressed
+transparently
 """
 
 import argparse
+import os.path
+import sys
 import matplotlib.pyplot as pyplot
 import matplotlib.animation as animation
 
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plugin"))
+
+from polyshaper.compression import open_gcode # pylint: disable=import-error,no-name-in-module,wrong-import-position
+
 def create_cmdline_parser():
     """ Creates and returns the commanline parser
     """
@@ -41,7 +48,7 @@ def main():
     """
     args = create_cmdline_parser().parse_args()
 
-    gcode_file = open(args.filename, "r")
+    gcode_file = open_gcode(args.filename)
 
     x = [0.0] # pylint: disable=invalid-name
     y = [0.0] # pylint: disable=invalid-name
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- encoding:utf-8 -*-
+
+"""
+A script to measure the startup time of the inkscape plugins
+
+Each plugin module is imported and its main class is instantiated in a fresh interpreter (so that
+nothing is cached), several times. The script reports the fastest and the median time and checks
+that the modules needed only to generate the g-code have not been loaded, because they are needed
+only when something is selected. The exit code is not 0 if one of these modules is loaded or if the
+median time is above the given limit
+"""
+
+import argparse
+import json
+import os.path
+import subprocess
+import sys
+
+# The directory with the plugins
+PLUGIN_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plugin")
+
+# The directory with inkscape extensions (needed to import modules required by the plugins)
+INKSCAPE_EXTENSION_DIRECTORY = "/usr/share/inkscape/extensions"
+
+# The plugin modules with their main class
+PLUGINS = [
+    ("polyshaper2dplugin", "Polyshaper2D"),
+    ("polyshaperengravingplugin", "PolyshaperEngraving")
+]
+
+# Modules that must not be loaded at startup
+LAZY_MODULES = [
+    "json",
+    "cspsubdiv",
+    "polyshaper.border",
+    "polyshaper.compression",
+    "polyshaper.containment",
+    "polyshaper.gcode",
+    "polyshaper.intersections",
+    "polyshaper.jobcache",
+    "polyshaper.pathgeometry",
+    "polyshaper.pathinfo",
+    "polyshaper.pathsextraction",
+    "polyshaper.pathsoffset",
+    "polyshaper.pathsunion",
+    "polyshaper.profiling",
+    "polyshaper.shapesunion",
+    "polyshaper.spanningbridges",
+    "polyshaper.spatialindex",
+    "polyshaper.toolpathfile",
+    "polyshaper.toolpathpainter",
+    "polyshaper.toolpaths"
+]
+
+# The code run in the child interpreter. It prints the time and the list of loaded modules as json
+# (json is imported after measuring so that it does not count as loaded)
+MEASURE_CODE = """
+import sys
+import time
+start = time.time()
+import {module}
+{module}.{cls}()
+elapsed = time.time() - start
+loaded = [m for m in {lazy_modules!r} if m in sys.modules]
+import json
+print(json.dumps({{"time": elapsed, "loaded": loaded}}))
+"""
+
+def create_cmdline_parser():
+    """ Creates and returns the commanline parser
+    """
+
+    parser = argparse.ArgumentParser(description="Measures the startup time of the plugins")
+
+    parser.add_argument("-p", "--python", action="store", type=str, default="python2",
+                        help="The python interpreter used by inkscape")
+    parser.add_argument("-e", "--extensions", action="store", type=str,
+                        default=INKSCAPE_EXTENSION_DIRECTORY,
+                        help="The directory with inkscape extensions")
+    parser.add_argument("-r", "--repeat", action="store", type=int, default=10,
+                        help="The number of measurements for each plugin")
+    parser.add_argument("-m", "--max-time", action="store", type=float, default=None,
+                        help="The maximum accepted median time in seconds")
+
+    return parser
+
+
+def measure(python, extensions, module, cls):
+    """ Imports a plugin in a new interpreter and returns the time and the lazy modules loaded
+    """
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([PLUGIN_DIRECTORY, extensions] +
+                                        [p for p in [env.get("PYTHONPATH")] if p])
+    code = MEASURE_CODE.format(module=module, cls=cls, lazy_modules=LAZY_MODULES)
+    output = subprocess.check_output([python, "-c", code], env=env, cwd=PLUGIN_DIRECTORY)
+
+    result = json.loads(output.decode("ascii").strip().splitlines()[-1])
+    return (result["time"], result["loaded"])
+
+
+def main():
+    """ The main function of the script
+    """
+    args = create_cmdline_parser().parse_args()
+
+    failed = False
+    print("{:<30} {:>10} {:>10}".format("plugin", "min (ms)", "median (ms)"))
+    for (module, cls) in PLUGINS:
+        times = []
+        loaded = set()
+        for _ in range(args.repeat):
+            (elapsed, loaded_modules) = measure(args.python, args.extensions, module, cls)
+            times.append(elapsed)
+            loaded.update(loaded_modules)
+
+        times.sort()
+        median = times[len(times) // 2]
+        print("{:<30} {:>10.1f} {:>10.1f}".format(module, times[0] * 1000.0, median * 1000.0))
+
+        if loaded:
+            print("    modules loaded at startup: " + ", ".join(sorted(loaded)))
+            failed = True
+        if args.max_time is not None and median > args.max_time:
+            print("    median time above {} seconds".format(args.max_time))
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
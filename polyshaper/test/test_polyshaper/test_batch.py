@@ -0,0 +1,117 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Batch processing helper functions tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import optparse
+import os
+import shutil
+import tempfile
+import unittest
+from xml.etree import ElementTree
+from polyshaper.batch import collect_svg_files, top_level_elements, run_batch # pylint: disable=import-error,no-name-in-module
+from polyshaper.batch import format_table, write_summary # pylint: disable=import-error,no-name-in-module
+from polyshaper.batch import add_batch_options, parse_batch_arguments # pylint: disable=import-error,no-name-in-module
+
+def square(value):
+    """ The function used to test run_batch (it must be at module level)
+    """
+
+    return value * value
+
+class BatchTest(unittest.TestCase):
+    """ Tests for the batch processing helper functions
+    """
+
+    def test_collect_svg_files(self):
+        """ Tests that svg files in directories are collected in alphabetical order
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            for name in ["b.svg", "a.SVG", "c.gcode"]:
+                open(os.path.join(directory, name), "w").close()
+
+            files = collect_svg_files(["x.svg", directory])
+
+            self.assertEqual(files, ["x.svg", os.path.join(directory, "a.SVG"),
+                                     os.path.join(directory, "b.svg")])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_top_level_elements(self):
+        """ Tests that only top level paths and groups except the working area are returned
+        """
+
+        root = ElementTree.Element("{http://www.w3.org/2000/svg}svg")
+        path = ElementTree.SubElement(root, "{http://www.w3.org/2000/svg}path")
+        ElementTree.SubElement(root, "{http://www.w3.org/2000/svg}defs")
+        group = ElementTree.SubElement(root, "{http://www.w3.org/2000/svg}g")
+        ElementTree.SubElement(group, "{http://www.w3.org/2000/svg}path")
+        ElementTree.SubElement(root, "{http://www.w3.org/2000/svg}g", {"id": "wId"})
+
+        self.assertEqual(top_level_elements(root, "wId"), [path, group])
+
+    def test_run_batch_in_process(self):
+        """ Tests run_batch with a single job
+        """
+
+        self.assertEqual(run_batch(square, [1, 2, 3], 1), [1, 4, 9])
+
+    def test_run_batch_with_pool(self):
+        """ Tests that run_batch with multiple jobs keeps the order of items
+        """
+
+        self.assertEqual(run_batch(square, list(range(10)), 3), [i * i for i in range(10)])
+
+    def test_format_table(self):
+        """ Tests that columns of the table are aligned
+        """
+
+        table = format_table(["file", "points"], [["a.svg", 10], ["long.svg", 2]])
+
+        self.assertEqual(table, ("file      points\n"
+                                 "--------  ------\n"
+                                 "a.svg     10\n"
+                                 "long.svg  2\n"))
+
+    def test_write_summary(self):
+        """ Tests that the summary is written as tab separated values
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "summary.tsv")
+
+            write_summary(filename, ["file", "points"], [["a.svg", 10]])
+
+            with open(filename, "r") as infile:
+                self.assertEqual(infile.read(), "file\tpoints\na.svg\t10\n")
+        finally:
+            shutil.rmtree(directory)
+
+    def test_parse_batch_arguments(self): # pylint: disable=invalid-name
+        """ Tests that the batch options are parsed and the output directory is created
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            output_dir = os.path.join(directory, "out")
+            parser = optparse.OptionParser()
+            add_batch_options(parser, output_dir)
+
+            (options, files) = parse_batch_arguments(parser, ["-j", "3", "a.svg", "b.svg"])
+
+            self.assertEqual(files, ["a.svg", "b.svg"])
+            self.assertEqual(options.jobs, 3)
+            self.assertEqual(options.summary, None)
+            self.assertTrue(os.path.isdir(output_dir))
+        finally:
+            shutil.rmtree(directory)
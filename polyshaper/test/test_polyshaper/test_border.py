@@ -179,3 +179,25 @@ class BorderPainterTest(unittest.TestCase):
                                                               "stroke-dasharray:0.25,0.25;"
                                                               "stroke-dashoffset:0;"
                                                               "fill:none"))
+
+    def test_update_border(self):
+        """ Tests that the border drawn in a previous run is updated or removed
+        """
+
+        generator = WorkingAreaGenerator(self.to_uu, "wId")
+        generator.set_size(400, 300)
+
+        root = etree.Element("root")
+        generator.upsert(root)
+        num_initial_root_children = len(root[0])
+
+        BorderPainter(Border([[(40, 20), (160, 200)]], 0)).paint(generator)
+        BorderPainter(Border([[(40, 20), (200, 200)]], 0)).paint(generator)
+
+        self.assertEqual(len(root[0]), num_initial_root_children + 1)
+        self.assertEqual(root[0][-1].get("id"), "wId-border")
+        self.assertEqual(root[0][-1].get("width"), "40.0")
+
+        BorderPainter(Border([[(0, 0), (400, 300)]], 0)).paint(generator)
+
+        self.assertEqual(len(root[0]), num_initial_root_children)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper compressed g-code files tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from polyshaper.compression import compression_extension, compressing_write_func, open_gcode # pylint: disable=import-error,no-name-in-module
+from polyshaper.compression import lzma # pylint: disable=import-error,no-name-in-module
+from polyshaper.errors import UnsupportedCompression # pylint: disable=import-error,no-name-in-module
+
+# The g-code used in tests
+GCODE = "M3\nG01 F500.000\nG01 X1.000 Y2.000\nM5\n"
+
+class CompressionTest(unittest.TestCase):
+    """ Tests for compressed g-code files
+    """
+
+    def setUp(self):
+        """ Setup for tests
+        """
+
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """ Cleanup after tests
+        """
+
+        shutil.rmtree(self.directory)
+
+    def write(self, name, compression):
+        """ Writes the test g-code with the given compression and returns the filename
+        """
+
+        filename = os.path.join(self.directory, name)
+        write_func = compressing_write_func(lambda f: f.write(GCODE), compression)
+        with open(filename, "w" if compression == "none" else "wb") as outfile:
+            write_func(outfile)
+
+        return filename
+
+    def test_extensions(self):
+        """ Tests the extensions of compressed files
+        """
+
+        self.assertEqual(compression_extension("none"), "")
+        self.assertEqual(compression_extension("gzip"), ".gz")
+        self.assertEqual(compression_extension("xz"), ".xz")
+
+    def test_unknown_compression(self):
+        """ Tests that an exception is thrown for unknown compressions
+        """
+
+        self.assertRaises(UnsupportedCompression, compression_extension, "zip")
+        self.assertRaises(UnsupportedCompression, compressing_write_func, None, "zip")
+
+    def test_no_compression(self):
+        """ Tests writing and reading uncompressed files
+        """
+
+        filename = self.write("a.gcode", "none")
+
+        with open_gcode(filename) as gcode_file:
+            self.assertEqual(gcode_file.read(), GCODE)
+
+    def test_gzip_compression(self):
+        """ Tests writing and reading gzip files
+        """
+
+        filename = self.write("a.gcode.gz", "gzip")
+
+        with gzip.open(filename, "rb") as gcode_file:
+            self.assertEqual(gcode_file.read(), GCODE.encode("ascii"))
+        with open_gcode(filename) as gcode_file:
+            self.assertEqual(list(gcode_file), GCODE.splitlines(True))
+
+    def test_gzip_header_has_no_name_and_time(self): # pylint: disable=invalid-name
+        """ Tests that the gzip header stores neither the name of the file nor the time
+        """
+
+        filename = self.write(".a.gcode.gz.tmp", "gzip")
+        other_filename = self.write("b.gcode.gz", "gzip")
+
+        with open(filename, "rb") as gzip_file:
+            data = gzip_file.read()
+        # The FNAME flag is not set and the modification time is 0
+        self.assertEqual(ord(data[3:4]) & 0x08, 0)
+        self.assertEqual(data[4:8], b"\x00\x00\x00\x00")
+        self.assertNotIn(b".a.gcode", data)
+        with open(other_filename, "rb") as gzip_file:
+            self.assertEqual(gzip_file.read(), data)
+
+    @unittest.skipIf(lzma is None, "lzma not available")
+    def test_xz_compression(self):
+        """ Tests writing and reading xz files
+        """
+
+        filename = self.write("a.gcode.xz", "xz")
+
+        with open_gcode(filename) as gcode_file:
+            self.assertEqual(gcode_file.read(), GCODE)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Containment tree of closed paths tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import unittest
+from polyshaper.containment import ContainmentTree # pylint: disable=import-error,no-name-in-module
+
+def square(min_x, min_y, size):
+    """ Returns a closed square path
+    """
+
+    return [(min_x, min_y), (min_x + size, min_y), (min_x + size, min_y + size),
+            (min_x, min_y + size), (min_x, min_y)]
+
+class ContainmentTreeTest(unittest.TestCase):
+    """ Tests for the containment tree of closed paths
+    """
+
+    def test_empty_tree(self):
+        """ Tests the tree of no paths
+        """
+
+        tree = ContainmentTree([])
+
+        self.assertEqual(tree.roots(), [])
+        self.assertEqual(tree.holes_first_order(), [])
+
+    def test_separate_paths_are_roots(self):
+        """ Tests that paths not containing each other are all roots
+        """
+
+        tree = ContainmentTree([square(0.0, 0.0, 1.0), square(2.0, 0.0, 1.0),
+                                square(0.0, 2.0, 1.0)])
+
+        self.assertEqual(tree.roots(), [0, 1, 2])
+        for index in range(3):
+            self.assertEqual(tree.parent(index), None)
+            self.assertEqual(tree.children(index), [])
+            self.assertEqual(tree.depth(index), 0)
+
+    def test_nested_paths(self):
+        """ Tests that the parent of a path is the smallest path containing it
+        """
+
+        # An island (3) inside a hole (1) of an outline (2), a separate shape (0) and a point (4)
+        # inside the hole
+        paths = [square(20.0, 0.0, 5.0), square(1.0, 1.0, 8.0), square(0.0, 0.0, 10.0),
+                 square(2.0, 2.0, 2.0), [(7.0, 7.0)]]
+        tree = ContainmentTree(paths)
+
+        self.assertEqual(tree.roots(), [0, 2])
+        self.assertEqual(tree.parent(1), 2)
+        self.assertEqual(tree.parent(3), 1)
+        self.assertEqual(tree.parent(4), 1)
+        self.assertEqual(tree.children(2), [1])
+        self.assertEqual(tree.children(1), [3, 4])
+        self.assertEqual([tree.depth(i) for i in range(5)], [0, 1, 0, 2, 2])
+
+    def test_box_containment_is_not_enough(self): # pylint: disable=invalid-name
+        """ Tests that a path inside the box of a concave path but outside it is not a child
+        """
+
+        # An L-shaped path and a square in its concavity
+        l_shape = [(0.0, 0.0), (10.0, 0.0), (10.0, 2.0), (2.0, 2.0), (2.0, 10.0), (0.0, 10.0),
+                   (0.0, 0.0)]
+        tree = ContainmentTree([l_shape, square(5.0, 5.0, 2.0)])
+
+        self.assertEqual(tree.roots(), [0, 1])
+
+    def test_equal_paths(self):
+        """ Tests that two equal paths are not the parent of each other
+        """
+
+        tree = ContainmentTree([square(0.0, 0.0, 1.0), square(0.0, 0.0, 1.0)])
+
+        self.assertEqual(len(tree.roots()), 1)
+
+    def test_holes_first_order(self):
+        """ Tests that contained paths come before the paths containing them
+        """
+
+        paths = [square(0.0, 0.0, 10.0), square(1.0, 1.0, 8.0), square(2.0, 2.0, 2.0),
+                 square(20.0, 0.0, 5.0), square(21.0, 1.0, 1.0)]
+        tree = ContainmentTree(paths)
+        order = tree.holes_first_order()
+
+        self.assertEqual(sorted(order), range(5))
+        for index in range(5):
+            if tree.parent(index) is not None:
+                self.assertLess(order.index(index), order.index(tree.parent(index)))
+        self.assertEqual(tree.top_down_order(), order[::-1])
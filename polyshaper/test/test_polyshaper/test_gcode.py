@@ -10,6 +10,7 @@ through testAll.py, there is no need to add directories (they are inserted by
 that script)
 """
 
+from StringIO import StringIO # pylint: disable=import-error
 import unittest
 import math
 from polyshaper.gcode import EngravingGCodeGenerator, CuttingGCodeGenerator # pylint: disable=import-error,no-name-in-module
@@ -139,6 +140,22 @@ class EngravingGCodeGeneratorTest(unittest.TestCase):
 
         self.assertEqual(generator.gcode(), expected_gcode)
 
+    def test_gcode_written_to_file(self):
+        """ Tests that the g-code can be written directly to a file
+        """
+
+        paths = [[(100, 200, 300, 0.3), (1000, 2000, 3200, 1.5)]]
+        generator = EngravingGCodeGenerator(paths, MM_PER_DEGREE, 33, 2, math.radians(30))
+        generator.generate()
+        expected_gcode = generator.gcode()
+
+        outfile = StringIO()
+        generator = EngravingGCodeGenerator(paths, MM_PER_DEGREE, 33, 2, math.radians(30))
+        generator.generate(outfile)
+
+        self.assertEqual(outfile.getvalue(), expected_gcode)
+        self.assertIsNone(generator.gcode())
+
     def test_path_with_near_points_and_angle(self): # pylint: disable=invalid-name
         """ Tests gcode generation for points at a low distance and low angular displacement
         """
@@ -220,3 +237,20 @@ class CuttingGCodeGeneratorTest(unittest.TestCase):
                           "M5\n")
 
         self.assertEqual(generator.gcode(), expected_gcode)
+
+    def test_gcode_written_to_file(self):
+        """ Tests that the g-code can be written directly to a file
+        """
+
+        outfile = StringIO()
+        generator = CuttingGCodeGenerator([(1, 2), (3, 4)], SPEED)
+        generator.generate(outfile)
+
+        expected_gcode = ("M3\n" +
+                          "G01 F313.000\n" +
+                          "G01 X1.000 Y2.000\n" +
+                          "G01 X3.000 Y4.000\n" +
+                          "M5\n")
+
+        self.assertEqual(outfile.getvalue(), expected_gcode)
+        self.assertIsNone(generator.gcode())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper g-code analysis tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import unittest
+from polyshaper.gcode import CuttingGCodeGenerator # pylint: disable=import-error,no-name-in-module
+from polyshaper.gcodeanalysis import GCodeAnalyzer, strip_comment # pylint: disable=import-error,no-name-in-module
+from polyshaper.timeestimation import ConstantSpeedTimeEstimator # pylint: disable=import-error,no-name-in-module
+
+class GCodeAnalyzerTest(unittest.TestCase):
+    """ Tests for the class analyzing g-code
+    """
+
+    def test_strip_comment(self):
+        """ Tests that comments are removed
+        """
+
+        self.assertEqual(strip_comment("G01 X1 ; a comment").strip(), "G01 X1")
+        self.assertEqual(strip_comment("G01 (comment) X1").split(), ["G01", "X1"])
+        self.assertEqual(strip_comment("G01 X1 (unterminated").strip(), "G01 X1")
+
+    def test_empty_gcode(self):
+        """ Tests statistics of an empty g-code
+        """
+
+        analyzer = GCodeAnalyzer()
+        analyzer.analyze_file([])
+
+        stats = analyzer.statistics()
+        self.assertEqual(stats["moves"], 0)
+        self.assertEqual(stats["pathLength"], 0.0)
+        self.assertEqual(stats["duration"], 0.0)
+
+    def test_cutting_gcode(self):
+        """ Tests statistics of the g-code generated for cutting
+        """
+
+        path = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+        generator = CuttingGCodeGenerator(path, 120.0)
+        generator.generate()
+
+        analyzer = GCodeAnalyzer(ConstantSpeedTimeEstimator())
+        analyzer.analyze_file(generator.gcode().splitlines())
+
+        stats = analyzer.statistics()
+        self.assertEqual(stats["moves"], 4)
+        self.assertAlmostEqual(stats["pathLength"], 40.0)
+        self.assertAlmostEqual(stats["feedLength"], 40.0)
+        self.assertAlmostEqual(stats["rapidLength"], 0.0)
+        self.assertAlmostEqual(stats["duration"], 20.0)
+        self.assertEqual(stats["boundingBox"], {"xMin": 0.0, "xMax": 10.0, "yMin": 0.0,
+                                                "yMax": 10.0, "zMin": 0.0, "zMax": 0.0})
+
+    def test_rapid_and_feed_movements(self):
+        """ Tests that rapid and feed movements are computed separately
+        """
+
+        gcode = [
+            "G00 Z10",
+            "G00 X3 Y4",
+            "G01 F60 Z0",
+            "X6 Y8",
+            "G00 Z10"
+        ]
+
+        analyzer = GCodeAnalyzer(ConstantSpeedTimeEstimator(), 600.0)
+        analyzer.analyze_file(gcode)
+
+        self.assertAlmostEqual(analyzer.rapid_length, 25.0)
+        self.assertAlmostEqual(analyzer.feed_length, 15.0)
+        self.assertAlmostEqual(analyzer.estimated_time(), 2.5 + 15.0)
+
+    def test_rotation_only_movements(self):
+        """ Tests that movements along the E axis only have the length of the rotation
+        """
+
+        analyzer = GCodeAnalyzer(ConstantSpeedTimeEstimator())
+        analyzer.analyze_file(["G01 F60 X1", "G01 E3", "G01 X2 E5"])
+
+        self.assertAlmostEqual(analyzer.feed_length, 5.0)
+        self.assertAlmostEqual(analyzer.estimated_time(), 5.0)
+
+    def test_relative_movements(self):
+        """ Tests that G91 switches to relative positioning
+        """
+
+        analyzer = GCodeAnalyzer()
+        analyzer.analyze_file(["G91", "G01 F60 X1", "X1", "G90", "X0"])
+
+        self.assertAlmostEqual(analyzer.feed_length, 4.0)
+        self.assertEqual(analyzer.bounding_box[:2], [0.0, 2.0])
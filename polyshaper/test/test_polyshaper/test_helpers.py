@@ -12,18 +12,177 @@ that script)
 
 import unittest
 import os
+import shutil
+import tempfile
+from StringIO import StringIO
+from xml.etree import ElementTree
+from polyshaper.helpers import base_filename, write_file, OutputFiles # pylint: disable=import-error,no-name-in-module
 from polyshaper.helpers import squared_length, length, squared_distance, distance # pylint: disable=import-error,no-name-in-module
 from polyshaper.helpers import verify_path_closed, point_path_squared_distance, rotate_closed_path # pylint: disable=import-error,no-name-in-module
-from polyshaper.helpers import invert_transform, generate_path_svg # pylint: disable=import-error,no-name-in-module
-from polyshaper.errors import InvalidCuttingPath # pylint: disable=import-error,no-name-in-module
+from polyshaper.helpers import invert_transform, write_path_svg, upsert_child, remove_child # pylint: disable=import-error,no-name-in-module
+from polyshaper.helpers import signed_area, point_in_polygon, segments_intersection, winding_number # pylint: disable=import-error,no-name-in-module
+from polyshaper.helpers import point_segment_squared_distance, point_segment_projection # pylint: disable=import-error,no-name-in-module
+from polyshaper.errors import InvalidCuttingPath, PolyshaperIOError # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathgeometry import PathGeometry # pylint: disable=import-error,no-name-in-module
 
 
 class HelpersTest(unittest.TestCase):
     """ Tests for the helper functions and classes
     """
 
-    # base_filename is not tested
-    # write_file is not tested
+    def test_write_file(self):
+        """ Tests that write_file creates the file without leaving temporary files
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "out.gcode")
+
+            write_file(filename, lambda f: f.write("G01 X1\n"), fsync=True)
+
+            with open(filename, "r") as infile:
+                self.assertEqual(infile.read(), "G01 X1\n")
+            self.assertEqual(os.listdir(directory), ["out.gcode"])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_output_files_are_created_on_commit(self): # pylint: disable=invalid-name
+        """ Tests that files of an OutputFiles group are only created on commit
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            output_files = OutputFiles(buffer_size=16)
+            output_files.add(os.path.join(directory, "a.gcode"), lambda f: f.write("a" * 100))
+            output_files.add(os.path.join(directory, "a.pstp"), lambda f: f.write(b"b"), True)
+
+            self.assertFalse(os.path.exists(os.path.join(directory, "a.gcode")))
+            self.assertFalse(os.path.exists(os.path.join(directory, "a.pstp")))
+
+            output_files.commit()
+
+            self.assertEqual(sorted(os.listdir(directory)), ["a.gcode", "a.pstp"])
+            with open(os.path.join(directory, "a.gcode"), "r") as infile:
+                self.assertEqual(infile.read(), "a" * 100)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_output_files_discarded_on_error(self): # pylint: disable=invalid-name
+        """ Tests that no file of an OutputFiles group is created if writing one of them fails
+        """
+
+        def failing_write(outfile):
+            """ Writes something and then fails
+            """
+            outfile.write("partial")
+            raise IOError("disk full")
+
+        directory = tempfile.mkdtemp()
+        try:
+            output_files = OutputFiles()
+            output_files.add(os.path.join(directory, "a.svg"), lambda f: f.write("svg"))
+
+            with self.assertRaises(PolyshaperIOError):
+                output_files.add(os.path.join(directory, "a.gcode"), failing_write)
+            output_files.commit()
+
+            self.assertEqual(os.listdir(directory), [])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_output_files_discarded_on_any_exception(self): # pylint: disable=invalid-name
+        """ Tests that temporary files are removed whatever the exception raised while writing
+        """
+
+        def failing_write(outfile):
+            """ Writes something and then fails
+            """
+            outfile.write("partial")
+            raise ValueError("generator error")
+
+        directory = tempfile.mkdtemp()
+        try:
+            output_files = OutputFiles()
+            output_files.add(os.path.join(directory, "a.svg"), lambda f: f.write("svg"))
+
+            with self.assertRaises(ValueError):
+                output_files.add(os.path.join(directory, "a.gcode"), failing_write)
+
+            self.assertEqual(os.listdir(directory), [])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_output_files_commit_is_rolled_back(self): # pylint: disable=invalid-name
+        """ Tests that if renaming a file fails, the files already renamed are removed or restored
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(directory, "a.svg"), "w") as outfile:
+                outfile.write("old")
+            output_files = OutputFiles()
+            output_files.add(os.path.join(directory, "a.psj"), lambda f: f.write("psj"))
+            output_files.add(os.path.join(directory, "a.svg"), lambda f: f.write("new"))
+            output_files.add(os.path.join(directory, "a.gcode"), lambda f: f.write("gcode"))
+            # Renaming the last file fails because its temporary file is missing
+            os.remove(output_files.files[-1][0])
+
+            with self.assertRaises(PolyshaperIOError):
+                output_files.commit()
+
+            self.assertEqual(os.listdir(directory), ["a.svg"])
+            with open(os.path.join(directory, "a.svg"), "r") as infile:
+                self.assertEqual(infile.read(), "old")
+
+            output_files.add(os.path.join(directory, "a.svg"), lambda f: f.write("new"))
+            output_files.commit()
+
+            self.assertEqual(os.listdir(directory), ["a.svg"])
+            with open(os.path.join(directory, "a.svg"), "r") as infile:
+                self.assertEqual(infile.read(), "new")
+        finally:
+            shutil.rmtree(directory)
+
+    def test_base_filename_sequence(self):
+        """ Tests that base_filename returns increasing sequence numbers and keeps an index
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            self.assertEqual(base_filename("shape", directory), "shape-000")
+            self.assertEqual(base_filename("shape", directory), "shape-001")
+            self.assertEqual(base_filename("other", directory), "other-000")
+            self.assertTrue(os.path.exists(os.path.join(directory, ".shape.seq")))
+            self.assertFalse(os.path.exists(os.path.join(directory, ".shape.seq.lock")))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_base_filename_with_stale_index(self): # pylint: disable=invalid-name
+        """ Tests that the directory is scanned if the index refers to existing files
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            self.assertEqual(base_filename("shape", directory), "shape-000")
+            open(os.path.join(directory, "shape-001.gcode"), "w").close()
+            open(os.path.join(directory, "shape-007.psj"), "w").close()
+
+            self.assertEqual(base_filename("shape", directory), "shape-008")
+        finally:
+            shutil.rmtree(directory)
+
+    def test_base_filename_without_index(self): # pylint: disable=invalid-name
+        """ Tests that the directory is scanned if the index is missing
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            open(os.path.join(directory, "shape-003.svg"), "w").close()
+
+            self.assertEqual(base_filename("shape", directory), "shape-004")
+            self.assertEqual(base_filename("shape", directory), "shape-005")
+        finally:
+            shutil.rmtree(directory)
 
     def test_squared_length(self):
         """ Tests the squared_length function for 2D vectors
@@ -70,6 +229,16 @@ class HelpersTest(unittest.TestCase):
         # If an exception is thrown the test will fail
         verify_path_closed([path], 0.1)
 
+    def test_verify_path_closed_with_geometry(self): # pylint: disable=invalid-name
+        """ Tests that the verify_closed_path uses the precomputed geometric properties of paths
+        """
+
+        path = [(1.0, 2.0), (3.0, 4.0), (5.0, 6.0)]
+
+        with self.assertRaises(InvalidCuttingPath):
+            verify_path_closed(path, 0.1, PathGeometry(path))
+        verify_path_closed(path, 10.0, PathGeometry(path))
+
     def test_point_path_squared_distance_for_path_with_single_point(self): # pylint: disable=invalid-name
         """ Tests that point_path_squared_distance works with a path made up of a single point
         """
@@ -124,6 +293,70 @@ class HelpersTest(unittest.TestCase):
 
         self.assertEqual(rotate_closed_path(path, new_start), expected_path)
 
+    def test_signed_area(self):
+        """ Tests the signed area of counterclockwise, clockwise and degenerate paths
+        """
+
+        square = [(0.0, 0.0), (2.0, 0.0), (2.0, 2.0), (0.0, 2.0), (0.0, 0.0)]
+
+        self.assertAlmostEqual(signed_area(square), 4.0)
+        self.assertAlmostEqual(signed_area(list(reversed(square))), -4.0)
+        # The closing point is optional
+        self.assertAlmostEqual(signed_area(square[:-1]), 4.0)
+        self.assertEqual(signed_area([(0.0, 0.0), (1.0, 1.0)]), 0.0)
+
+    def test_point_in_polygon(self):
+        """ Tests the point in polygon test with a concave polygon
+        """
+
+        shape = [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (5.0, 2.0), (0.0, 10.0), (0.0, 0.0)]
+
+        self.assertTrue(point_in_polygon((1.0, 1.0), shape))
+        self.assertTrue(point_in_polygon((9.0, 8.0), shape))
+        self.assertFalse(point_in_polygon((5.0, 5.0), shape))
+        self.assertFalse(point_in_polygon((-1.0, 1.0), shape))
+        self.assertFalse(point_in_polygon((1.0, 11.0), shape))
+
+    def test_winding_number(self):
+        """ Tests the winding number of paths with different orientations around points
+        """
+
+        square = [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0), (0.0, 0.0)]
+        # A path going twice around the center of the square
+        twice = square[:-1] + square
+
+        self.assertEqual(winding_number((5.0, 5.0), square), 1)
+        self.assertEqual(winding_number((5.0, 5.0), list(reversed(square))), -1)
+        self.assertEqual(winding_number((5.0, 5.0), twice), 2)
+        self.assertEqual(winding_number((15.0, 5.0), square), 0)
+        self.assertEqual(winding_number((5.0, -5.0), square), 0)
+
+    def test_point_segment_projection(self):
+        """ Tests the nearest point of a segment to a point
+        """
+
+        self.assertEqual(point_segment_projection((1.0, 2.0), (0.0, 0.0), (4.0, 0.0)), (4.0, 0.25))
+        self.assertEqual(point_segment_projection((-3.0, 4.0), (0.0, 0.0), (4.0, 0.0)), (25.0, 0.0))
+        self.assertEqual(point_segment_projection((5.0, 0.0), (0.0, 0.0), (4.0, 0.0)), (1.0, 1.0))
+        self.assertEqual(point_segment_projection((1.0, 1.0), (0.0, 0.0), (0.0, 0.0)), (2.0, 0.0))
+        self.assertEqual(point_segment_squared_distance((1.0, 2.0), (0.0, 0.0), (4.0, 0.0)), 4.0)
+
+    def test_segments_intersection(self):
+        """ Tests the intersection of segments
+        """
+
+        params = segments_intersection((0.0, 0.0), (4.0, 0.0), (1.0, -1.0), (1.0, 3.0))
+
+        self.assertAlmostEqual(params[0], 0.25)
+        self.assertAlmostEqual(params[1], 0.25)
+
+    def test_segments_intersection_no_intersection(self): # pylint: disable=invalid-name
+        """ Tests that None is returned for disjoint or parallel segments
+        """
+
+        self.assertIsNone(segments_intersection((0.0, 0.0), (4.0, 0.0), (5.0, -1.0), (5.0, 3.0)))
+        self.assertIsNone(segments_intersection((0.0, 0.0), (4.0, 0.0), (0.0, 1.0), (4.0, 1.0)))
+
     def test_invert_transform(self):
         """ Tests the invert_transform function
 
@@ -141,34 +374,77 @@ class HelpersTest(unittest.TestCase):
 
         self.assertEqual(invert_transform(mat), expected_inv)
 
-    def test_generate_path_svg(self):
-        """ Tests the generate_path_svg function
+    def test_write_path_svg(self):
+        """ Tests the write_path_svg function
+        """
+
+        class DummyPainter(object):
+            """ A painter with fixed path data
+            """
+
+            def __init__(self, path):
+                self.path = path
+                self.factors = []
+
+            def path_data(self, factor):
+                """ Returns fixed path data
+                """
+                self.factors.append(factor)
+                return "M 0.0,0.0 L 1.0,2.0"
+
+            @staticmethod
+            def style(color):
+                """ Returns the style
+                """
+                return "stroke:rgb(" + color + ")"
+
+        painter = DummyPainter([(1.0, 2.0)])
+        output = StringIO()
+
+        write_path_svg(painter, output)
+
+        self.assertEqual(painter.factors, [1.0])
+        self.assertIn('<svg version="1.1" xmlns="http://www.w3.org/2000/svg">\n'
+                      '<path d="M 0.0,0.0 L 1.0,2.0" style="stroke:rgb(0,0,0)"/>\n</svg>\n',
+                      output.getvalue())
+        self.assertTrue(output.getvalue().startswith('<?xml version="1.0" standalone="no"?>'))
+
+        empty_output = StringIO()
+        write_path_svg(DummyPainter([]), empty_output)
+        self.assertNotIn("<path", empty_output.getvalue())
+
+    def test_upsert_child(self):
+        """ Tests that children with an id are updated instead of added again
         """
+        parent = ElementTree.Element("root")
+        ElementTree.SubElement(parent, "rect")
 
-        class DummyPainter:
-            def __init__(self):
-                self.num_calls = 0
-                self.parent_element = None
-                self.factor = None
-                self.color = None
+        added = upsert_child(parent, "path", {'d': "M 0,0", 'style': "fill:none"}, "p")
+        updated = upsert_child(parent, "path", {'d': "M 1,1", 'style': "fill:none"}, "p")
 
-            def paint(self, parent_element, factor, color):
-                self.num_calls += 1
-                self.parent_element = parent_element
-                self.factor = factor
-                self.color = color
+        self.assertIs(updated, added)
+        self.assertEqual(len(parent), 2)
+        self.assertEqual(parent[1].get("id"), "p")
+        self.assertEqual(parent[1].get("d"), "M 1,1")
+        self.assertEqual(parent[1].get("style"), "fill:none")
 
-        painter = DummyPainter()
+        replaced = upsert_child(parent, "rect", {'x': "1"}, "p")
+        self.assertEqual(len(parent), 2)
+        self.assertEqual(replaced.tag, "rect")
+        self.assertIsNone(replaced.get("d"))
 
-        doc = generate_path_svg(painter)
+        upsert_child(parent, "rect", {'x': "1"})
+        self.assertEqual(len(parent), 3)
+
+    def test_remove_child(self):
+        """ Tests that the child with the given id is removed, if present
+        """
+        parent = ElementTree.Element("root")
+        ElementTree.SubElement(parent, "rect", {'id': "r"})
+        ElementTree.SubElement(parent, "path", {'id': "p"})
 
-        self.assertEqual(painter.num_calls, 1)
-        self.assertEqual(painter.parent_element, doc.getroot())
-        self.assertEqual(painter.factor, 1.0)
-        self.assertEqual(painter.color, "0,0,0")
+        remove_child(parent, "r")
+        remove_child(parent, "missing")
 
-        self.assertEqual(doc.docinfo.xml_version, "1.0")
-        self.assertEqual(doc.docinfo.standalone, False)
-        self.assertEqual(doc.docinfo.doctype, '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">')
-        self.assertEqual(doc.getroot().tag, "{http://www.w3.org/2000/svg}svg")
-        self.assertEqual(doc.getroot().get("version"), "1.1")
+        self.assertEqual(len(parent), 1)
+        self.assertEqual(parent[0].get("id"), "p")
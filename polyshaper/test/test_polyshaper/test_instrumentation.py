@@ -0,0 +1,114 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Pipeline instrumentation tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import os
+import unittest
+from polyshaper.instrumentation import Instrumentation, instrumentation_enabled # pylint: disable=import-error,no-name-in-module
+from polyshaper.instrumentation import INSTRUMENT_ENVIRONMENT_VARIABLE # pylint: disable=import-error,no-name-in-module
+
+class InstrumentationTest(unittest.TestCase):
+    """ Tests for the pipeline instrumentation
+    """
+
+    def setUp(self):
+        """ Removes the environment variable enabling instrumentation
+        """
+
+        self.saved_variable = os.environ.pop(INSTRUMENT_ENVIRONMENT_VARIABLE, None)
+
+    def tearDown(self):
+        """ Restores the environment variable enabling instrumentation
+        """
+
+        os.environ.pop(INSTRUMENT_ENVIRONMENT_VARIABLE, None)
+        if self.saved_variable is not None:
+            os.environ[INSTRUMENT_ENVIRONMENT_VARIABLE] = self.saved_variable
+
+    def test_instrumentation_enabled_by_option(self): # pylint: disable=invalid-name
+        """ Tests that instrumentation is enabled by the option
+        """
+
+        self.assertFalse(instrumentation_enabled(False))
+        self.assertTrue(instrumentation_enabled(True))
+
+    def test_instrumentation_enabled_by_environment(self): # pylint: disable=invalid-name
+        """ Tests that instrumentation is enabled by the environment variable unless it is 0
+        """
+
+        os.environ[INSTRUMENT_ENVIRONMENT_VARIABLE] = "0"
+        self.assertFalse(instrumentation_enabled(False))
+
+        os.environ[INSTRUMENT_ENVIRONMENT_VARIABLE] = "1"
+        self.assertTrue(instrumentation_enabled(False))
+
+    def test_disabled_instrumentation_records_nothing(self): # pylint: disable=invalid-name
+        """ Tests that nothing is recorded when instrumentation is disabled
+        """
+
+        instrumentation = Instrumentation(False)
+
+        with instrumentation.stage("extract") as counts:
+            counts["points"] = 10
+
+        self.assertEqual(instrumentation.stages(), [])
+
+    def test_record_stages(self):
+        """ Tests that stages are recorded in order with their counts
+        """
+
+        instrumentation = Instrumentation(True)
+
+        with instrumentation.stage("extract") as counts:
+            counts["points"] = 10
+        with instrumentation.stage("unite"):
+            sum(range(10000))
+
+        stages = instrumentation.stages()
+        self.assertEqual([s["name"] for s in stages], ["extract", "unite"])
+        self.assertEqual(stages[0]["counts"], {"points": 10})
+        self.assertEqual(stages[1]["counts"], {})
+        for stage in stages:
+            self.assertGreaterEqual(stage["wallTime"], 0.0)
+            self.assertGreaterEqual(stage["cpuTime"], 0.0)
+            if stage["peakRssDelta"] is not None:
+                self.assertGreaterEqual(stage["peakRssDelta"], 0)
+
+    def test_record_stage_raising_exception(self): # pylint: disable=invalid-name
+        """ Tests that a stage is recorded even if it raises an exception
+        """
+
+        instrumentation = Instrumentation(True)
+
+        with self.assertRaises(ValueError):
+            with instrumentation.stage("extract"):
+                raise ValueError()
+
+        self.assertEqual([s["name"] for s in instrumentation.stages()], ["extract"])
+
+    def test_report(self):
+        """ Tests that the report contains stages and totals
+        """
+
+        instrumentation = Instrumentation(True)
+        with instrumentation.stage("extract"):
+            pass
+        with instrumentation.stage("unite"):
+            pass
+
+        report = instrumentation.report()
+
+        self.assertEqual(report["stages"], instrumentation.stages())
+        self.assertAlmostEqual(report["wallTime"],
+                               sum(s["wallTime"] for s in instrumentation.stages()))
+        self.assertAlmostEqual(report["cpuTime"],
+                               sum(s["cpuTime"] for s in instrumentation.stages()))
+        self.assertIn("peakRss", report)
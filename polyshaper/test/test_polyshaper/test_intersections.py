@@ -0,0 +1,140 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Self-intersections of closed paths tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import math
+import unittest
+from polyshaper.helpers import signed_area # pylint: disable=import-error,no-name-in-module
+from polyshaper.intersections import overlapping_segments, path_self_intersections # pylint: disable=import-error,no-name-in-module
+from polyshaper.intersections import split_at_self_intersections # pylint: disable=import-error,no-name-in-module
+from polyshaper.intersections import SegmentIndex, MAX_BLOCKERS # pylint: disable=import-error,no-name-in-module
+
+class IntersectionsTest(unittest.TestCase):
+    """ Tests for self-intersections of closed paths
+    """
+
+    def test_no_intersections_in_simple_path(self): # pylint: disable=invalid-name
+        """ Tests that a simple path has no self-intersections
+        """
+
+        square = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0), (0.0, 0.0)]
+
+        self.assertEqual(path_self_intersections(square), [])
+        self.assertEqual(split_at_self_intersections(square), [square])
+
+    def test_figure_eight(self):
+        """ Tests a path crossing itself once
+        """
+
+        path = [(0.0, 0.0), (2.0, 2.0), (2.0, 0.0), (0.0, 2.0), (0.0, 0.0)]
+
+        intersections = path_self_intersections(path)
+
+        self.assertEqual(len(intersections), 1)
+        (first, param1, second, param2, point) = intersections[0]
+        self.assertEqual((first, second), (0, 2))
+        self.assertAlmostEqual(param1, 0.5)
+        self.assertAlmostEqual(param2, 0.5)
+        self.assertAlmostEqual(point[0], 1.0)
+        self.assertAlmostEqual(point[1], 1.0)
+
+        loops = split_at_self_intersections(path, intersections)
+
+        self.assertEqual(len(loops), 2)
+        for loop in loops:
+            self.assertEqual(loop[0], loop[-1])
+            self.assertAlmostEqual(abs(signed_area(loop)), 1.0)
+        # The two lobes have opposite orientation
+        self.assertLess(signed_area(loops[0]) * signed_area(loops[1]), 0.0)
+
+    def test_many_intersections(self):
+        """ Tests a star polygon where each segment crosses other segments
+        """
+
+        # A star with 7 points, each vertex is connected to the third next one
+        vertices = [(math.cos(2 * math.pi * i / 7), math.sin(2 * math.pi * i / 7))
+                    for i in range(7)]
+        path = [vertices[(3 * i) % 7] for i in range(8)]
+
+        intersections = path_self_intersections(path)
+        loops = split_at_self_intersections(path, intersections)
+
+        # Each of the 7 segments crosses 4 other segments
+        self.assertEqual(len(intersections), 14)
+        self.assertEqual(sum(len(loop) - 1 for loop in loops), 7 + 2 * 14)
+
+    def test_overlapping_segments(self):
+        """ Tests that the couples of segments with overlapping bounding boxes are found
+        """
+
+        segments = [((0.0, 0.0), (2.0, 2.0)),
+                    ((1.5, 0.0), (3.0, 1.0)),
+                    ((2.5, 5.0), (4.0, 5.0)),
+                    ((0.0, 2.0), (0.0, 3.0))]
+
+        self.assertEqual(sorted(overlapping_segments(segments)), [(0, 1), (0, 3)])
+        self.assertEqual(list(overlapping_segments([])), [])
+
+
+class SegmentIndexTest(unittest.TestCase):
+    """ Tests for the index of segments used to check bridges
+    """
+
+    def test_crosses(self):
+        """ Tests that segments crossing or touching indexed segments are detected
+        """
+
+        square = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0), (0.0, 0.0)]
+        index = SegmentIndex([square])
+
+        self.assertEqual(len(index), 4)
+        self.assertTrue(index.crosses((-1.0, 0.5), (2.0, 0.5)))
+        self.assertTrue(index.crosses((0.5, 0.5), (0.5, 3.0)))
+        # Passing through a vertex
+        self.assertTrue(index.crosses((-1.0, 2.0), (2.0, -1.0)))
+        self.assertFalse(index.crosses((2.0, 0.0), (3.0, 5.0)))
+
+    def test_touching_at_ends_is_not_crossing(self): # pylint: disable=invalid-name
+        """ Tests that segments starting or ending on indexed segments do not cross them
+        """
+
+        square = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0), (0.0, 0.0)]
+        index = SegmentIndex([square])
+
+        self.assertFalse(index.crosses((1.0, 1.0), (3.0, 4.0)))
+        self.assertFalse(index.crosses((3.0, 0.5), (1.0, 0.5)))
+
+    def test_added_segments(self):
+        """ Tests that segments added after construction are checked
+        """
+
+        index = SegmentIndex([])
+        index.add_segment((0.0, 0.0), (0.0, 10.0))
+
+        self.assertTrue(index.crosses((-1.0, 5.0), (1.0, 5.0)))
+        self.assertFalse(index.crosses((-1.0, 11.0), (1.0, 11.0)))
+
+    def test_blockers(self):
+        """ Tests that the segment found crossing is stored at the beginning of blockers
+        """
+
+        index = SegmentIndex([[(float(i), 0.0), (float(i), 1.0)] for i in range(2 * MAX_BLOCKERS)])
+        blockers = []
+
+        self.assertFalse(index.crosses((0.5, 0.5), (0.6, 0.5), blockers))
+        self.assertEqual(blockers, [])
+        self.assertTrue(index.crosses((2.5, 0.5), (3.5, 0.5), blockers))
+        self.assertEqual(blockers, [3])
+        for i in range(2 * MAX_BLOCKERS - 1):
+            self.assertTrue(index.crosses((i + 0.5, 0.5), (i + 1.5, 0.5), blockers))
+        self.assertEqual(len(blockers), MAX_BLOCKERS)
+        self.assertEqual(blockers[0], 2 * MAX_BLOCKERS - 1)
+        self.assertTrue(index.crosses((-0.5, 0.2), (2.5, 0.2), blockers))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper cache of generated jobs tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from polyshaper.jobcache import ENTRY_FILENAME, JobCache, file_copier, job_key # pylint: disable=import-error,no-name-in-module
+
+class JobCacheTest(unittest.TestCase):
+    """ Tests for the cache of generated jobs
+    """
+
+    def setUp(self):
+        """ Setup for tests
+        """
+
+        self.directory = tempfile.mkdtemp()
+        self.cache_directory = os.path.join(self.directory, "cache")
+
+    def tearDown(self):
+        """ Cleanup after tests
+        """
+
+        shutil.rmtree(self.directory)
+
+    def set_last_use(self, key, last_use):
+        """ Sets the time of last use of an entry
+        """
+
+        os.utime(os.path.join(self.cache_directory, key, ENTRY_FILENAME), (last_use, last_use))
+
+    def test_job_key(self):
+        """ Tests that the key changes with the geometry and the parameters
+        """
+
+        paths = [[(0.0, 0.0), (10.0, 0.0), (10.0, 10.0)], [(1.0, 1.0)]]
+        key = job_key(paths, {"speed": 500.0, "square": False})
+
+        self.assertEqual(job_key([list(p) for p in paths], {"square": False, "speed": 500.0}), key)
+        self.assertNotEqual(job_key(paths, {"speed": 500.0, "square": True}), key)
+        self.assertNotEqual(job_key(paths, {"speed": 500.0}), key)
+        self.assertNotEqual(job_key([paths[0] + paths[1]], {"speed": 500.0, "square": False}), key)
+        moved_paths = [[(0.0, 0.0), (10.0, 0.0), (10.0, 10.000001)], [(1.0, 1.0)]]
+        self.assertNotEqual(job_key(moved_paths, {"speed": 500.0, "square": False}), key)
+
+    def test_store_and_lookup(self):
+        """ Tests that stored files and data are returned by lookup
+        """
+
+        source = os.path.join(self.directory, "source.gcode")
+        with open(source, "w") as source_file:
+            source_file.write("G01 X1.000 Y2.000\n")
+        cache = JobCache(self.cache_directory, 1024 * 1024)
+
+        self.assertIsNone(cache.lookup("k"))
+        self.assertTrue(cache.store("k", {"bridgesLength": 1.5}, {
+            "gcode": file_copier(source),
+            "other": lambda f: f.write(b"\x00\x01")
+        }))
+
+        entry = cache.lookup("k")
+        self.assertEqual(entry.data, {"bridgesLength": 1.5})
+        with open(entry.filename("other"), "rb") as other_file:
+            self.assertEqual(other_file.read(), b"\x00\x01")
+        copy = os.path.join(self.directory, "copy.gcode")
+        with open(copy, "wb") as copy_file:
+            entry.copier("gcode")(copy_file)
+        with open(copy) as copy_file:
+            self.assertEqual(copy_file.read(), "G01 X1.000 Y2.000\n")
+
+    def test_incomplete_entries_are_not_used(self): # pylint: disable=invalid-name
+        """ Tests that entries with missing files are not returned
+        """
+
+        cache = JobCache(self.cache_directory, 1024 * 1024)
+        cache.store("k", {}, {"gcode": lambda f: f.write(b"G01")})
+
+        os.remove(os.path.join(self.cache_directory, "k", "gcode"))
+        self.assertIsNone(cache.lookup("k"))
+
+        cache.store("k", {}, {"gcode": lambda f: f.write(b"G01")})
+        os.remove(os.path.join(self.cache_directory, "k", ENTRY_FILENAME))
+        self.assertIsNone(cache.lookup("k"))
+
+    def test_discard(self):
+        """ Tests that discarded entries are removed
+        """
+
+        cache = JobCache(self.cache_directory, 1024 * 1024)
+        cache.store("a", {}, {"gcode": lambda f: f.write(b"G01")})
+        cache.store("b", {}, {"gcode": lambda f: f.write(b"G01")})
+
+        cache.discard("a")
+        cache.discard("missing")
+
+        self.assertIsNone(cache.lookup("a"))
+        self.assertFalse(os.path.exists(os.path.join(self.cache_directory, "a")))
+        self.assertIsNotNone(cache.lookup("b"))
+
+    def test_least_recently_used_entries_are_evicted(self): # pylint: disable=invalid-name
+        """ Tests that the least recently used entries are removed when the cache is too big
+        """
+
+        data = lambda f: f.write(b"x" * 1000)
+        cache = JobCache(self.cache_directory, 2500)
+        cache.store("a", {}, {"data": data})
+        cache.store("b", {}, {"data": data})
+        self.set_last_use("a", 1000)
+        self.set_last_use("b", 2000)
+
+        # Using "a" makes "b" the least recently used entry
+        self.assertIsNotNone(cache.lookup("a"))
+        cache.store("c", {}, {"data": data})
+
+        self.assertEqual(sorted(e[0] for e in cache.entries()), ["a", "c"])
+        self.assertIsNone(cache.lookup("b"))
+
+    def test_stored_entry_is_never_evicted(self): # pylint: disable=invalid-name
+        """ Tests that an entry bigger than the cache is kept until the next one is stored
+        """
+
+        cache = JobCache(self.cache_directory, 100)
+        cache.store("a", {}, {"data": lambda f: f.write(b"x" * 1000)})
+
+        self.assertIsNotNone(cache.lookup("a"))
+
+        cache.store("b", {}, {"data": lambda f: f.write(b"x" * 1000)})
+
+        self.assertIsNone(cache.lookup("a"))
+        self.assertIsNotNone(cache.lookup("b"))
@@ -96,3 +96,14 @@ class MachineTest(unittest.TestCase):
         self.assertEqual(machine.name(), "PolyShaper Oranje")
         self.assertEqual(machine.working_area_width(), 500)
         self.assertEqual(machine.working_area_height(), 500)
+
+    def test_dynamics_of_all_machines(self): #pylint: disable=invalid-name
+        """ Tests that all machines define valid acceleration and junction deviation
+        """
+
+        for name in ["P400", "PolyShaperAzul", "PolyShaperAzul+", "PolyShaperGrænt",
+                     "PolyShaperOranje", "MakerWelt"]:
+            machine = machine_factory(name)
+
+            self.assertGreater(machine.acceleration(), 0)
+            self.assertGreater(machine.junction_deviation(), 0)
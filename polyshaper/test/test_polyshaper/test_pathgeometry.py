@@ -0,0 +1,77 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Geometric properties of paths tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import unittest
+from polyshaper.helpers import signed_area # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathgeometry import PathGeometry, PathGeometries # pylint: disable=import-error,no-name-in-module
+
+class PathGeometryTest(unittest.TestCase):
+    """ Tests for the geometric properties of paths
+    """
+
+    def test_closed_path(self):
+        """ Tests the properties of a closed clockwise path
+        """
+
+        path = [(1.0, 1.0), (1.0, 4.0), (5.0, 4.0), (5.0, 1.0), (1.0, 1.0)]
+        geometry = PathGeometry(path)
+
+        self.assertEqual(geometry.box, (1.0, 1.0, 5.0, 4.0))
+        self.assertAlmostEqual(geometry.length, 14.0)
+        self.assertEqual(geometry.area, signed_area(path))
+        self.assertAlmostEqual(geometry.area, -12.0)
+        self.assertEqual(geometry.orientation(), -1)
+        self.assertEqual(geometry.closing_distance, 0.0)
+        self.assertTrue(geometry.is_closed(0.1))
+        self.assertEqual(geometry.num_points, 5)
+
+    def test_open_path(self):
+        """ Tests the properties of an open counterclockwise path
+        """
+
+        geometry = PathGeometry([(0.0, 0.0), (3.0, 0.0), (3.0, 4.0)])
+
+        self.assertEqual(geometry.box, (0.0, 0.0, 3.0, 4.0))
+        self.assertAlmostEqual(geometry.length, 7.0)
+        self.assertAlmostEqual(geometry.area, 6.0)
+        self.assertEqual(geometry.orientation(), 1)
+        self.assertAlmostEqual(geometry.closing_distance, 5.0)
+        self.assertFalse(geometry.is_closed(4.9))
+        self.assertTrue(geometry.is_closed(5.1))
+
+    def test_degenerate_paths(self):
+        """ Tests the properties of empty paths and paths with less than three points
+        """
+
+        empty = PathGeometry([])
+        segment = PathGeometry([(1.0, 2.0), (4.0, 6.0)])
+
+        self.assertEqual(empty.box, None)
+        self.assertEqual(empty.length, 0.0)
+        self.assertEqual(empty.orientation(), 0)
+        self.assertEqual(empty.num_points, 0)
+        self.assertEqual(segment.box, (1.0, 2.0, 4.0, 6.0))
+        self.assertAlmostEqual(segment.length, 5.0)
+        self.assertEqual(segment.area, 0.0)
+
+    def test_geometries_are_computed_once(self):
+        """ Tests that properties are stored for each path object
+        """
+
+        path1 = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 0.0)]
+        path2 = list(path1)
+        geometries = PathGeometries([path1])
+
+        self.assertEqual(len(geometries), 1)
+        self.assertIs(geometries.get(path1), geometries.get(path1))
+        self.assertIsNot(geometries.get(path2), geometries.get(path1))
+        self.assertEqual(len(geometries), 2)
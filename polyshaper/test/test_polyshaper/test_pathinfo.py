@@ -22,10 +22,13 @@ class DummyOptions():
     """ A dummy class to store options
     """
 
+    compression = "none"
+
     def __init__(self):
         self.dim_x = 50
         self.dim_y = 50
         self.speed = MM_PER_MIN
+        self.machine_type = None
 
 class PathInfoTest(unittest.TestCase):
     """ Tests the class computing path statistics
@@ -186,6 +189,16 @@ class PathInfoTest(unittest.TestCase):
 
         self.assertEqual(stats.gcode_filename(), "baseF.gcode")
 
+    def test_generate_compressed_gcode_filename(self): # pylint: disable=invalid-name
+        """ Tests that the extension of the compression is added to the gcode filename
+        """
+
+        ops = DummyOptions()
+        ops.compression = "gzip"
+        stats = PathInfo([], ops, "baseF")
+
+        self.assertEqual(stats.gcode_filename(), "baseF.gcode.gz")
+
     def test_generate_svg_filename(self):
         """ Tests that the generated svg filename is correct
         """
@@ -194,6 +207,14 @@ class PathInfoTest(unittest.TestCase):
 
         self.assertEqual(stats.svg_filename(), "baseF.svg")
 
+    def test_generate_toolpath_filename(self):
+        """ Tests that the generated binary tool path filename is correct
+        """
+
+        stats = PathInfo([], DummyOptions, "baseF")
+
+        self.assertEqual(stats.toolpath_filename(), "baseF.pstp")
+
     def test_generate_metainfo_filename(self):
         """ Tests that the generated metainfo filename is correct
         """
@@ -231,7 +252,9 @@ class PathInfoTest(unittest.TestCase):
         self.assertEqual(metainfo["generatedBy"], "2DPlugin")
         self.assertEqual(metainfo["gcodeFilename"], "baseF.gcode")
         self.assertEqual(metainfo["svgFilename"], "baseF.svg")
-        self.assertEqual(metainfo["duration"], 120)
+        self.assertEqual(metainfo["toolpathFilename"], "baseF.pstp")
+        # 120 seconds at constant speed, plus the time to accelerate and decelerate
+        self.assertEqual(metainfo["duration"], 121)
         self.assertLess(abs((datetime.strptime(metainfo["creationTime"], "%Y-%m-%dT%H:%M:%S.%f") -
                              datetime.now()).total_seconds()), 1)
         self.assertEqual(metainfo["pointsInsideWorkpiece"], True)
@@ -240,5 +263,52 @@ class PathInfoTest(unittest.TestCase):
         self.assertEqual(metainfo["square"], False)
         self.assertEqual(metainfo["margin"], 2.5)
         self.assertEqual(metainfo["machineType"], "P400")
+        self.assertEqual(metainfo["compression"], "none")
         self.assertEqual(metainfo["drawToolpath"], False)
         self.assertEqual(metainfo["autoClosePath"], True)
+        self.assertAlmostEqual(metainfo["pathLength"], 30.0)
+        self.assertEqual(metainfo["boundingBox"], {"xMin": 0, "xMax": 10, "yMin": 0, "yMax": 10})
+        self.assertEqual(metainfo["pointsOutsideWorkpiece"], 0)
+        self.assertIsNone(metainfo["firstPointOutsideWorkpiece"])
+        self.assertAlmostEqual(metainfo["minSegmentLength"], 10.0)
+        self.assertAlmostEqual(metainfo["maxSegmentLength"], 10.0)
+        self.assertEqual(metainfo["numPoints"], 4)
+
+    def test_path_statistics(self):
+        """ Tests that path statistics are correctly computed
+        """
+
+        path = [
+            (0, 0),
+            (10, 0),
+            (10, 60),
+            (-2, 60),
+            (0, 0)
+        ]
+        ops = DummyOptions()
+        stats = PathInfo(path, ops, "baseF")
+
+        statistics = stats.path_statistics()
+        self.assertAlmostEqual(statistics["pathLength"], 82.0 + math.sqrt(3604))
+        self.assertEqual(statistics["boundingBox"], {"xMin": -2, "xMax": 10, "yMin": 0,
+                                                     "yMax": 60})
+        self.assertEqual(statistics["pointsOutsideWorkpiece"], 2)
+        self.assertEqual(statistics["firstPointOutsideWorkpiece"], 2)
+        self.assertAlmostEqual(statistics["minSegmentLength"], 10.0)
+        self.assertAlmostEqual(statistics["maxSegmentLength"], math.sqrt(3604))
+        self.assertEqual(statistics["numPoints"], 5)
+        self.assertFalse(stats.is_path_inside_workpiece())
+
+    def test_path_statistics_for_empty_path(self): # pylint: disable=invalid-name
+        """ Tests path statistics for empty paths
+        """
+
+        statistics = PathInfo([], DummyOptions(), "baseF").path_statistics()
+
+        self.assertEqual(statistics["pathLength"], 0.0)
+        self.assertIsNone(statistics["boundingBox"])
+        self.assertEqual(statistics["pointsOutsideWorkpiece"], 0)
+        self.assertIsNone(statistics["firstPointOutsideWorkpiece"])
+        self.assertIsNone(statistics["minSegmentLength"])
+        self.assertIsNone(statistics["maxSegmentLength"])
+        self.assertEqual(statistics["numPoints"], 0)
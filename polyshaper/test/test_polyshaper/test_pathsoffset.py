@@ -0,0 +1,152 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Offset of closed paths tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import math
+import unittest
+from polyshaper.helpers import point_in_polygon, signed_area # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathsoffset import offset_closed_path, segments_squared_distance, PathsOffsetter # pylint: disable=import-error,no-name-in-module
+
+def square(x_min, y_min, side):
+    """ Returns a closed counterclockwise square path
+    """
+
+    return [(x_min, y_min), (x_min + side, y_min), (x_min + side, y_min + side),
+            (x_min, y_min + side), (x_min, y_min)]
+
+class PathsOffsetterTest(unittest.TestCase):
+    """ Tests for the offset of closed paths
+    """
+
+    def assert_paths_almost_equal(self, path1, path2):
+        """ Checks that two paths have the same points
+        """
+
+        self.assertEqual(len(path1), len(path2))
+        for (point1, point2) in zip(path1, path2):
+            self.assertAlmostEqual(point1[0], point2[0])
+            self.assertAlmostEqual(point1[1], point2[1])
+
+    def test_enlarge_square(self):
+        """ Tests enlarging a square
+        """
+
+        self.assert_paths_almost_equal(offset_closed_path(square(0.0, 0.0, 10.0), 1.0)[0],
+                                       square(-1.0, -1.0, 12.0))
+
+    def test_shrink_square(self):
+        """ Tests shrinking a square
+        """
+
+        self.assert_paths_almost_equal(offset_closed_path(square(0.0, 0.0, 10.0), -1.0)[0],
+                                       square(1.0, 1.0, 8.0))
+
+    def test_direction_is_preserved(self):
+        """ Tests that a clockwise path is enlarged and stays clockwise
+        """
+
+        result = offset_closed_path(list(reversed(square(0.0, 0.0, 10.0))), 1.0)
+
+        self.assertEqual(len(result), 1)
+        self.assertAlmostEqual(signed_area(result[0]), -144.0)
+
+    def test_path_disappears(self):
+        """ Tests that a path smaller than twice the offset disappears when shrunk
+        """
+
+        self.assertEqual(offset_closed_path(square(0.0, 0.0, 10.0), -6.0), [])
+
+    def test_concave_corner_loops_removed(self): # pylint: disable=invalid-name
+        """ Tests that the loops generated at a concave corner when shrinking are removed
+        """
+
+        l_shape = [(0.0, 0.0), (10.0, 0.0), (10.0, 2.0), (2.0, 2.0), (2.0, 10.0), (0.0, 10.0),
+                   (0.0, 0.0)]
+
+        result = offset_closed_path(l_shape, -0.5)
+
+        self.assertEqual(len(result), 1)
+        self.assert_paths_almost_equal(result[0], [(0.5, 0.5), (9.5, 0.5), (9.5, 1.5), (1.5, 1.5),
+                                                   (1.5, 9.5), (0.5, 9.5), (0.5, 0.5)])
+
+    def test_thin_part_splits_path(self):
+        """ Tests that shrinking a path with a thin part generates two paths
+        """
+
+        u_shape = [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (6.0, 10.0), (6.0, 1.0), (4.0, 1.0),
+                   (4.0, 10.0), (0.0, 10.0), (0.0, 0.0)]
+
+        result = offset_closed_path(u_shape, -0.6)
+
+        self.assertEqual(len(result), 2)
+        for path in result:
+            self.assertAlmostEqual(signed_area(path), 2.8 * 8.8)
+
+    def test_high_curvature_concave_parts(self): # pylint: disable=invalid-name
+        """ Tests that enlarging a path with concave parts of high curvature gives a single path
+        """
+
+        num_points = 2000
+        radius = lambda angle: 50.0 + 20.0 * math.sin(7.0 * angle)
+        path = [(radius(a) * math.cos(a), radius(a) * math.sin(a))
+                for a in [2.0 * math.pi * i / num_points for i in range(num_points)]]
+        path.append(path[0])
+
+        result = offset_closed_path(path, 3.0)
+
+        self.assertEqual(len(result), 1)
+        self.assertGreater(signed_area(result[0]), signed_area(path))
+
+    def test_spiky_concave_path(self):
+        """ Tests that no part of the offset of a star with sharp spikes is nearer than the offset
+        """
+
+        num_spikes = 12
+        path = [((10.0 if i % 2 == 0 else 2.0) * math.cos(math.pi * i / num_spikes),
+                 (10.0 if i % 2 == 0 else 2.0) * math.sin(math.pi * i / num_spikes))
+                for i in range(2 * num_spikes)]
+        path.append(path[0])
+
+        for offset in [1.0, 1.5, -1.0]:
+            result = offset_closed_path(path, offset)
+
+            self.assertEqual(len(result), 1)
+            loop = result[0]
+            for i in range(1, len(loop)):
+                for j in range(1, len(path)):
+                    self.assertGreaterEqual(math.sqrt(segments_squared_distance(
+                        loop[i - 1], loop[i], path[j - 1], path[j])), abs(offset) - 1e-6)
+            if offset > 0.0:
+                self.assertTrue(all(point_in_polygon(p, loop) for p in path))
+            else:
+                self.assertTrue(point_in_polygon((0.0, 0.0), loop))
+
+    def test_holes_are_shrunk(self):
+        """ Tests that outer contours are enlarged and holes are shrunk
+        """
+
+        offsetter = PathsOffsetter([square(0.0, 0.0, 10.0), square(4.0, 4.0, 2.0)], 0.5, 0.1)
+        offsetter.offset_paths()
+        paths = offsetter.paths()
+
+        self.assertEqual(len(paths), 2)
+        self.assert_paths_almost_equal(paths[0], square(-0.5, -0.5, 11.0))
+        self.assert_paths_almost_equal(paths[1], square(4.5, 4.5, 1.0))
+
+    def test_open_paths_unchanged(self):
+        """ Tests that paths that are not closed are not modified
+        """
+
+        open_path = [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0)]
+        offsetter = PathsOffsetter([open_path], 0.5, 0.1)
+        offsetter.offset_paths()
+
+        self.assertEqual(offsetter.paths(), [open_path])
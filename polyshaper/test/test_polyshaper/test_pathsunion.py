@@ -10,11 +10,16 @@ through testAll.py, there is no need to add directories (they are inserted by
 that script)
 """
 
+import math
 import unittest
-from polyshaper.pathsunion import PathsJoiner # pylint: disable=import-error,no-name-in-module
-from polyshaper.errors import InvalidCuttingPath # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathsunion import PathsJoiner, ParallelPathsJoiner, MIN_CLUSTER_SIZE # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathsunion import splice_paths, compute_paths_segment_distance # pylint: disable=import-error,no-name-in-module
+from polyshaper.pathsunion import insert_bridge_points # pylint: disable=import-error,no-name-in-module
+from polyshaper.spanningbridges import minimum_spanning_bridges # pylint: disable=import-error,no-name-in-module
+from polyshaper.intersections import path_self_intersections # pylint: disable=import-error,no-name-in-module
+from polyshaper.errors import InvalidCuttingPath, UnsupportedJoinStrategy # pylint: disable=import-error,no-name-in-module
 
-class PathsJoinerTest(unittest.TestCase):
+class PathsJoinerTest(unittest.TestCase): # pylint: disable=too-many-public-methods
     """ Tests for the class joining closed paths
     """
 
@@ -104,3 +109,389 @@ class PathsJoinerTest(unittest.TestCase):
         joiner.unite()
 
         self.assertEqual(joiner.union_path(), expected_union)
+
+    def test_nested_union_joins_holes_to_enclosing_outline(self): # pylint: disable=invalid-name
+        """ Tests that with nested joining a hole is joined to its outline even if another path is
+        nearer
+        """
+
+        outline = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+        hole = [(8, 4), (8, 6), (9, 6), (9, 4), (8, 4)]
+        other_shape = [(11, 5), (12, 5), (12, 6), (11, 5)]
+
+        joiner = PathsJoiner([outline, other_shape, hole], 0.1, True)
+        joiner.unite()
+        union = joiner.union_path()
+
+        # The hole is inserted in the outline at the nearest vertex, the other shape is joined to
+        # the outline and not to the hole
+        self.assertEqual(len(union), len(outline) + len(hole) + len(other_shape) + 2)
+        hole_start = union.index((9, 4))
+        self.assertEqual(union[hole_start - 1], (10, 0))
+        other_start = union.index((12, 6))
+        self.assertEqual(union[other_start - 1], (10, 10))
+
+    def test_nested_union_of_separate_paths(self): # pylint: disable=invalid-name
+        """ Tests that paths not containing each other are joined as without nesting
+        """
+
+        path1 = [(-1, -1), (0, 0), (-1, 0), (-1, -1)]
+        path2 = [(0, 2), (-1, 3), (-1, 2), (0, 2)]
+        path3 = [(2, 2), (1, 1), (1, 2), (2, 2)]
+
+        joiner = PathsJoiner([path1, path2, path3], 0.1)
+        joiner.unite()
+        nested_joiner = PathsJoiner([path1, path2, path3], 0.1, True)
+        nested_joiner.unite()
+
+        self.assertEqual(nested_joiner.union_path(), joiner.union_path())
+
+    def test_exception_thrown_for_unknown_strategy(self): # pylint: disable=invalid-name
+        """ Tests that an exception is thrown if the strategy to join paths is not known
+        """
+
+        with self.assertRaises(UnsupportedJoinStrategy) as context_manager:
+            PathsJoiner([], 0.1, strategy="pippo")
+
+        self.assertEqual(context_manager.exception.strategy, "pippo")
+
+    def test_mst_union_of_three_paths(self):
+        """ Tests that three paths are correctly joined using the minimum spanning tree
+        """
+
+        path1 = [(-1, -1), (0, 0), (-1, 0), (-1, -1)]
+        path2 = [(0, 2), (-1, 3), (-1, 2), (0, 2)]
+        path3 = [(2, 2), (1, 1), (1, 2), (2, 2)]
+        expected_union = [(-1, -1), (0, 0), (1, 1), (1, 2), (0, 2), (-1, 3), (-1, 2), (0, 2),
+                          (1, 2), (2, 2), (1, 1), (0, 0), (-1, 0), (-1, -1)]
+
+        joiner = PathsJoiner([path1, path2, path3], 0.1, strategy="mst")
+        joiner.unite()
+
+        self.assertEqual(joiner.union_path(), expected_union)
+        self.assertAlmostEqual(joiner.bridges_length(), 2.0 ** 0.5 + 1.0)
+
+    def test_mst_union_of_single_points_and_single_path(self): # pylint: disable=invalid-name
+        """ Tests the minimum spanning tree strategy with degenerate inputs
+        """
+
+        joiner = PathsJoiner([[(1, 2)], [(3, 4)]], 0.1, strategy="mst")
+        joiner.unite()
+        self.assertEqual(joiner.union_path(), [(1, 2), (3, 4), (1, 2)])
+
+        path = [(1, 2), (3, 4), (5, 6), (1, 2)]
+        joiner = PathsJoiner([path], 0.1, strategy="mst")
+        joiner.unite()
+        self.assertEqual(joiner.union_path(), path)
+        self.assertEqual(joiner.bridges_length(), 0.0)
+
+        joiner = PathsJoiner([], 0.1, strategy="mst")
+        joiner.unite()
+        self.assertEqual(joiner.union_path(), [])
+
+    def test_bridges_length_of_strategies(self):
+        """ Tests that both strategies report the length of bridges and that the minimum spanning
+        tree is never longer
+        """
+
+        # A row of squares, the first one in the middle
+        paths = [[(x, 0), (x + 1, 0), (x + 1, 1), (x, 1), (x, 0)] for x in [6, 0, 3, 9, 12]]
+
+        greedy_joiner = PathsJoiner(paths, 0.1)
+        greedy_joiner.unite()
+        mst_joiner = PathsJoiner(paths, 0.1, strategy="mst")
+        mst_joiner.unite()
+
+        self.assertAlmostEqual(mst_joiner.bridges_length(), 8.0)
+        self.assertLessEqual(mst_joiner.bridges_length(), greedy_joiner.bridges_length() + 1e-9)
+        self.assertEqual(len(mst_joiner.union_path()), len(greedy_joiner.union_path()))
+        self.assertEqual(set(mst_joiner.union_path()), set(p for path in paths for p in path))
+
+    def test_nested_mst_union(self):
+        """ Tests that with nested joining and the minimum spanning tree a hole is joined to its
+        outline
+        """
+
+        outline = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+        hole = [(8, 4), (8, 6), (9, 6), (9, 4), (8, 4)]
+        other_shape = [(11, 5), (12, 5), (12, 6), (11, 5)]
+
+        joiner = PathsJoiner([outline, other_shape, hole], 0.1, True, "mst")
+        joiner.unite()
+        union = joiner.union_path()
+
+        self.assertEqual(len(union), len(outline) + len(hole) + len(other_shape) + 2)
+        self.assertEqual(union[union.index((12, 6)) - 1], (10, 10))
+        self.assertAlmostEqual(joiner.bridges_length(), 17 ** 0.5 + 20 ** 0.5)
+
+    def test_minimum_spanning_bridges(self):
+        """ Tests that bridges connect the nearest vertices of paths
+        """
+
+        paths = [[(0, 0), (1, 0), (1, 1), (0, 0)], [(5, 5)], [(1, 3), (2, 3), (2, 4), (1, 3)]]
+
+        bridges = minimum_spanning_bridges(paths)
+
+        # Bridges can be in any direction
+        self.assertEqual(sorted(sorted([(b[0], b[1]), (b[2], b[3])]) for b in bridges),
+                         [[(0, (2, 0.0)), (2, (0, 0.0))], [(1, (0, 0.0)), (2, (2, 0.0))]])
+
+    def test_minimum_spanning_bridges_with_candidates(self): # pylint: disable=invalid-name
+        """ Tests that only candidate vertices are used as bridge endpoints
+        """
+
+        paths = [[(0, 0), (1, 0), (1, 1), (0, 0)], [(1, 3), (2, 3), (2, 4), (1, 3)]]
+
+        bridges = minimum_spanning_bridges(paths, [[0, 1], [1, 2]])
+
+        self.assertEqual(bridges, [(0, (1, 0.0), 1, (1, 0.0))])
+
+    def test_splice_paths(self):
+        """ Tests that paths connected by bridges are inserted where bridges start
+        """
+
+        paths = [[(0, 0), (1, 0), (1, 1), (0, 0)], [(5, 5)], [(1, 3), (2, 3), (2, 4), (1, 3)]]
+        bridges = [(0, 2, 2, 0), (2, 2, 1, 0)]
+
+        self.assertEqual(splice_paths(paths, bridges), [(0, 0), (1, 0), (1, 1), (1, 3), (2, 3),
+                                                        (2, 4), (5, 5), (2, 4), (1, 3), (1, 1),
+                                                        (0, 0)])
+        self.assertEqual(splice_paths(paths, bridges, 1), [(5, 5), (2, 4), (1, 3), (1, 1), (0, 0),
+                                                           (1, 0), (1, 1), (1, 3), (2, 3), (2, 4),
+                                                           (5, 5)])
+
+    def test_compute_paths_segment_distance(self): # pylint: disable=invalid-name
+        """ Tests that the nearest points of two paths can be inside segments
+        """
+
+        path1 = [(0.0, 0.0), (10.0, 0.0), (10.0, 1.0), (0.0, 1.0), (0.0, 0.0)]
+        path2 = [(2.0, 3.0), (8.0, 3.0), (5.0, 2.0), (2.0, 3.0)]
+
+        (squared_dist, endpoint1, endpoint2) = compute_paths_segment_distance(path1, path2)
+        self.assertAlmostEqual(squared_dist, 1.0)
+        self.assertEqual(endpoint1[0], 2)
+        self.assertAlmostEqual(endpoint1[1], 0.5)
+        self.assertEqual(endpoint2, (2, 0.0))
+
+        (squared_dist, endpoint1, endpoint2) = compute_paths_segment_distance(path2, path1)
+        self.assertAlmostEqual(squared_dist, 1.0)
+        self.assertEqual(endpoint1, (2, 0.0))
+        self.assertEqual(endpoint2[0], 2)
+
+        self.assertEqual(compute_paths_segment_distance([(0.0, 0.0)], [(3.0, 4.0)]),
+                         (25.0, (0, 0.0), (0, 0.0)))
+
+    def test_insert_bridge_points(self):
+        """ Tests that endpoints of bridges inside segments are added to paths
+        """
+
+        paths = [[(0.0, 0.0), (4.0, 0.0), (4.0, 4.0), (0.0, 0.0)], [(2.0, -2.0)]]
+        owners = [[0, 0, 0, 0], [1]]
+        bridges = [(0, (0, 0.5), 1, (0, 0.0)), (0, (1, 0.25), 1, (0, 0.0)),
+                   (0, (2, 1.0), 1, (0, 0.0))]
+
+        (new_paths, new_owners, vertex_bridges) = insert_bridge_points(paths, bridges, owners)
+
+        self.assertEqual(new_paths[0], [(0.0, 0.0), (2.0, 0.0), (4.0, 0.0), (4.0, 1.0), (4.0, 4.0),
+                                        (0.0, 0.0)])
+        self.assertEqual(new_paths[1], paths[1])
+        self.assertEqual(new_owners, [[0] * 6, [1]])
+        self.assertEqual(vertex_bridges, [(0, 1, 1, 0), (0, 3, 1, 0), (0, 5, 1, 0)])
+
+    def test_union_with_segment_endpoints(self): # pylint: disable=invalid-name
+        """ Tests that shapes with parallel sides are joined across the gap between sides
+        """
+
+        path1 = [(0.0, 0.0), (10.0, 0.0), (10.0, 1.0), (0.0, 1.0), (0.0, 0.0)]
+        path2 = [(3.0, 3.0), (4.0, 2.0), (6.0, 2.0), (7.0, 3.0), (3.0, 3.0)]
+
+        for strategy in ["greedy", "mst"]:
+            joiner = PathsJoiner([path1, path2], 0.1, strategy=strategy, segment_endpoints=True)
+            joiner.unite()
+            union = joiner.union_path()
+
+            self.assertAlmostEqual(joiner.bridges_length(), 1.0)
+            # The bridge goes from (4, 1), added to the first path, to (4, 2)
+            self.assertEqual(union, [(0.0, 0.0), (10.0, 0.0), (10.0, 1.0), (4.0, 1.0), (4.0, 2.0),
+                                     (6.0, 2.0), (7.0, 3.0), (3.0, 3.0), (4.0, 2.0), (4.0, 1.0),
+                                     (0.0, 1.0), (0.0, 0.0)])
+
+            joiner = PathsJoiner([path1, path2], 0.1, strategy=strategy)
+            joiner.unite()
+            # Without segment endpoints the bridge connects the nearest corners
+            self.assertAlmostEqual(joiner.bridges_length(), 13 ** 0.5)
+
+    def test_nested_union_with_segment_endpoints(self): # pylint: disable=invalid-name
+        """ Tests that bridges to holes can end inside segments
+        """
+
+        outline = [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0), (0.0, 0.0)]
+        hole = [(4.0, 1.0), (6.0, 1.0), (5.0, 5.0), (4.0, 1.0)]
+
+        for strategy in ["greedy", "mst"]:
+            joiner = PathsJoiner([outline, hole], 0.1, True, strategy, True)
+            joiner.unite()
+
+            self.assertAlmostEqual(joiner.bridges_length(), 1.0)
+            self.assertIn((4.0, 0.0), joiner.union_path())
+
+    def test_bridges_avoid_crossing_paths(self): # pylint: disable=invalid-name
+        """ Tests that bridges crossing other paths are replaced by the nearest ones not crossing
+        """
+
+        # The nearest points of the two squares are connected through the blocker
+        square1 = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0), (0.0, 0.0)]
+        square2 = [(4.0, 0.0), (5.0, 0.0), (5.0, 1.0), (4.0, 1.0), (4.0, 0.0)]
+        blocker = [(2.0, -5.0), (3.0, -5.0), (3.0, 6.0), (2.0, 6.0), (2.0, -5.0)]
+
+        for strategy in ["greedy", "mst"]:
+            joiner = PathsJoiner([square1, square2, blocker], 0.1, strategy=strategy)
+            joiner.unite()
+
+            self.assertNotEqual(path_self_intersections(joiner.union_path()), [])
+            self.assertAlmostEqual(joiner.bridges_length(), 3.0 + math.sqrt(26.0))
+
+            joiner = PathsJoiner([square1, square2, blocker], 0.1, strategy=strategy,
+                                 avoid_crossings=True)
+            joiner.unite()
+
+            self.assertEqual(path_self_intersections(joiner.union_path()), [])
+            self.assertAlmostEqual(joiner.bridges_length(), 2.0 * math.sqrt(26.0))
+
+    def test_unavoidable_crossing_bridges(self): # pylint: disable=invalid-name
+        """ Tests that a crossing bridge is used if all other bridges are much longer
+        """
+
+        square1 = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0), (0.0, 0.0)]
+        square2 = [(4.0, 0.0), (5.0, 0.0), (5.0, 1.0), (4.0, 1.0), (4.0, 0.0)]
+        blocker = [(2.0, -500.0), (3.0, -500.0), (3.0, 501.0), (2.0, 501.0), (2.0, -500.0)]
+
+        for strategy in ["greedy", "mst"]:
+            joiner = PathsJoiner([square1, square2, blocker], 0.1, strategy=strategy)
+            joiner.unite()
+            avoiding_joiner = PathsJoiner([square1, square2, blocker], 0.1, strategy=strategy,
+                                          avoid_crossings=True)
+            avoiding_joiner.unite()
+
+            self.assertEqual(avoiding_joiner.union_path(), joiner.union_path())
+            self.assertNotEqual(path_self_intersections(avoiding_joiner.union_path()), [])
+
+    def test_bridges_avoid_crossing_in_large_groups(self): # pylint: disable=invalid-name
+        """ Tests that groups of paths separated by bars are connected without crossing bars
+        """
+
+        paths = []
+        for column in range(4):
+            x_0 = column * 4.0
+            paths.append([(x_0 + 2.0, -10.0), (x_0 + 2.5, -10.0), (x_0 + 2.5, 30.0),
+                          (x_0 + 2.0, 30.0), (x_0 + 2.0, -10.0)])
+            for row in range(10):
+                y_0 = row * 2.0
+                paths.append([(x_0, y_0), (x_0 + 1.0, y_0), (x_0 + 1.0, y_0 + 1.0),
+                              (x_0, y_0 + 1.0), (x_0, y_0)])
+
+        for segment_endpoints in [False, True]:
+            joiner = PathsJoiner(paths, 0.1, strategy="mst", segment_endpoints=segment_endpoints,
+                                 avoid_crossings=True)
+            joiner.unite()
+            union = joiner.union_path()
+
+            self.assertEqual(union[0], union[-1])
+            self.assertTrue(set(p for path in paths for p in path).issubset(union))
+            self.assertEqual(path_self_intersections(union), [])
+
+
+def grid_of_squares(num_x, num_y, holes=False):
+    """ Returns closed square paths on a grid, optionally with a hole inside each square
+    """
+
+    paths = []
+    for x_index in range(num_x):
+        for y_index in range(num_y):
+            (x_0, y_0) = (x_index * 3.0, y_index * 3.0)
+            paths.append([(x_0, y_0), (x_0 + 2.0, y_0), (x_0 + 2.0, y_0 + 2.0), (x_0, y_0 + 2.0),
+                          (x_0, y_0)])
+            if holes:
+                paths.append([(x_0 + 0.5, y_0 + 0.5), (x_0 + 1.5, y_0 + 0.5),
+                              (x_0 + 1.5, y_0 + 1.5), (x_0 + 0.5, y_0 + 0.5)])
+    return paths
+
+class ParallelPathsJoinerTest(unittest.TestCase):
+    """ Tests for the class joining closed paths in clusters
+    """
+
+    def test_single_cluster_is_the_same_as_paths_joiner(self): # pylint: disable=invalid-name
+        """ Tests that with one worker the result is the same as PathsJoiner
+        """
+
+        paths = grid_of_squares(10, 10)
+
+        joiner = PathsJoiner(paths, 0.1, strategy="mst")
+        joiner.unite()
+        parallel_joiner = ParallelPathsJoiner(paths, 0.1, strategy="mst", workers=1)
+        parallel_joiner.unite()
+
+        self.assertEqual(parallel_joiner.number_of_clusters(), 1)
+        self.assertEqual(parallel_joiner.union_path(), joiner.union_path())
+        self.assertEqual(parallel_joiner.bridges_length(), joiner.bridges_length())
+        self.assertEqual(parallel_joiner.cluster_bridges_length(), 0.0)
+
+    def test_few_paths_are_not_split(self):
+        """ Tests that paths are not split in clusters smaller than MIN_CLUSTER_SIZE
+        """
+
+        joiner = ParallelPathsJoiner(grid_of_squares(MIN_CLUSTER_SIZE, 1), 0.1, workers=4)
+
+        self.assertEqual(len(joiner.clusters()), 1)
+
+    def test_clusters(self):
+        """ Tests that all paths are in a cluster and that the first cluster has the first path
+        """
+
+        paths = grid_of_squares(20, 20)
+        joiner = ParallelPathsJoiner(paths, 0.1, workers=2)
+        clusters = joiner.clusters()
+
+        self.assertEqual(len(clusters), 8)
+        self.assertEqual(sorted(i for cluster in clusters for i in cluster), range(len(paths)))
+        self.assertEqual(clusters[0][0], 0)
+
+    def test_nested_paths_are_in_the_same_cluster(self): # pylint: disable=invalid-name
+        """ Tests that paths are in the same cluster of the outermost path containing them
+        """
+
+        paths = grid_of_squares(20, 10, True)
+        joiner = ParallelPathsJoiner(paths, 0.1, nested=True, workers=2)
+
+        for cluster in joiner.clusters():
+            # Each square is followed by its hole
+            self.assertEqual(len(cluster) % 2, 0)
+            for (square, hole) in zip(cluster[::2], cluster[1::2]):
+                self.assertEqual((square % 2, hole), (0, square + 1))
+
+    def test_union_in_parallel(self):
+        """ Tests that paths joined in parallel generate a single closed path with all points
+        """
+
+        paths = grid_of_squares(10, 6, True)
+        points = set(p for path in paths for p in path)
+
+        for strategy in ["greedy", "mst"]:
+            for nested in [False, True]:
+                joiner = ParallelPathsJoiner(paths, 0.1, nested, strategy, True, 2)
+                joiner.unite()
+                union = joiner.union_path()
+
+                self.assertGreater(joiner.number_of_clusters(), 1)
+                self.assertEqual(union[0], union[-1])
+                # Bridges can end inside segments, adding points
+                self.assertTrue(points.issubset(union))
+                self.assertGreater(joiner.cluster_bridges_length(), 0.0)
+                self.assertGreater(joiner.bridges_length(), joiner.cluster_bridges_length())
+
+    def test_exception_thrown_for_non_closed_paths(self): # pylint: disable=invalid-name
+        """ Tests that an exception is thrown for non-closed paths before starting workers
+        """
+
+        with self.assertRaises(InvalidCuttingPath):
+            ParallelPathsJoiner([[(1, 2), (3, 4), (5, 6)]], 0.1, workers=2)
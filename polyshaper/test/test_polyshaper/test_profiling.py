@@ -0,0 +1,90 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Profiling support tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+from polyshaper.profiling import run_profiled # pylint: disable=import-error,no-name-in-module
+
+def busy_leaf():
+    """ A function spending some time
+    """
+
+    return sum(i * i for i in range(20000))
+
+def busy_root():
+    """ A function calling busy_leaf
+    """
+
+    return busy_leaf() + busy_leaf()
+
+class ProfilingTest(unittest.TestCase):
+    """ Tests for the profiling support
+    """
+
+    def setUp(self):
+        """ Creates a temporary directory
+        """
+
+        self.directory = tempfile.mkdtemp()
+        self.basename = os.path.join(self.directory, "shape-000")
+
+    def tearDown(self):
+        """ Removes the temporary directory
+        """
+
+        shutil.rmtree(self.directory)
+
+    def test_run_profiled_returns_value_and_writes_pstats(self): # pylint: disable=invalid-name
+        """ Tests that the value of the function is returned and the profile is saved
+        """
+
+        result = run_profiled(busy_root, lambda: self.basename)
+
+        self.assertEqual(result, 2 * busy_leaf())
+        stats = pstats.Stats(self.basename + ".pstats")
+        self.assertIn("busy_leaf", [function[2] for function in stats.stats])
+        self.assertFalse(os.path.exists(self.basename + ".collapsed"))
+
+    def test_profile_saved_on_exception(self):
+        """ Tests that the profile is saved even if the function raises an exception
+        """
+
+        def failing():
+            """ A function raising an exception
+            """
+
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            run_profiled(failing, lambda: self.basename)
+
+        self.assertTrue(os.path.exists(self.basename + ".pstats"))
+
+    def test_collapsed_stacks(self):
+        """ Tests that collapsed stacks have the caller before the callee and a positive time
+        """
+
+        run_profiled(busy_root, lambda: self.basename, True)
+
+        with open(self.basename + ".collapsed") as infile:
+            lines = infile.read().splitlines()
+
+        self.assertTrue(lines)
+        leaf_lines = [l for l in lines if "(busy_leaf)" in l.split(" ")[0].split(";")[-1]]
+        self.assertTrue(leaf_lines)
+        for line in leaf_lines:
+            (stack, microseconds) = line.rsplit(" ", 1)
+            self.assertLess(stack.index("(busy_root)"), stack.index("(busy_leaf)"))
+            self.assertGreater(int(microseconds), 0)
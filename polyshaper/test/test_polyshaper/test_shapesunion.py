@@ -0,0 +1,184 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Union of overlapping closed paths tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import math
+import unittest
+from polyshaper.helpers import signed_area # pylint: disable=import-error,no-name-in-module
+from polyshaper.intersections import path_self_intersections # pylint: disable=import-error,no-name-in-module
+from polyshaper.shapesunion import ShapesUnion # pylint: disable=import-error,no-name-in-module
+
+def square(x_min, y_min, side):
+    """ Returns a closed counterclockwise square path
+    """
+
+    return [(x_min, y_min), (x_min + side, y_min), (x_min + side, y_min + side),
+            (x_min, y_min + side), (x_min, y_min)]
+
+def unite(paths):
+    """ Returns the union of paths
+    """
+
+    shapes_union = ShapesUnion(paths, 0.1)
+    shapes_union.unite_shapes()
+
+    return shapes_union
+
+class ShapesUnionTest(unittest.TestCase):
+    """ Tests for the union of overlapping closed paths
+    """
+
+    def test_separate_shapes_are_unchanged(self):
+        """ Tests that shapes not touching each other and open paths are returned unchanged
+        """
+
+        paths = [square(0.0, 0.0, 2.0), [(5.0, 5.0), (6.0, 6.0)], square(10.0, 0.0, 2.0),
+                 square(0.5, 0.5, 1.0)]
+
+        shapes_union = unite(paths)
+
+        self.assertEqual(len(shapes_union.paths()), 4)
+        self.assertTrue(all(p is q for (p, q) in zip(shapes_union.paths(), paths)))
+        self.assertEqual(shapes_union.united_paths(), 0)
+
+    def test_overlapping_squares(self):
+        """ Tests that two overlapping squares are replaced by the outline of their union
+        """
+
+        shapes_union = unite([square(0.0, 0.0, 2.0), square(1.0, 1.0, 2.0)])
+
+        self.assertEqual(len(shapes_union.paths()), 1)
+        union = shapes_union.paths()[0]
+        self.assertEqual(union[0], union[-1])
+        self.assertEqual(len(union), 9)
+        self.assertAlmostEqual(signed_area(union), 7.0)
+        self.assertIn((2.0, 1.0), union)
+        self.assertIn((1.0, 2.0), union)
+        self.assertEqual(shapes_union.united_paths(), 2)
+
+    def test_orientation_does_not_matter(self):
+        """ Tests that clockwise and counterclockwise shapes are united in the same way
+        """
+
+        shapes_union = unite([square(0.0, 0.0, 2.0), list(reversed(square(1.0, 1.0, 2.0)))])
+
+        self.assertEqual(len(shapes_union.paths()), 1)
+        self.assertAlmostEqual(signed_area(shapes_union.paths()[0]), 7.0)
+
+    def test_touching_shapes(self):
+        """ Tests shapes sharing a side and shapes sharing a vertex
+        """
+
+        sharing_side = unite([square(0.0, 0.0, 2.0), square(2.0, 0.5, 1.0)])
+        sharing_vertex = unite([square(0.0, 0.0, 2.0), square(2.0, 2.0, 2.0)])
+
+        self.assertEqual(len(sharing_side.paths()), 1)
+        self.assertAlmostEqual(signed_area(sharing_side.paths()[0]), 5.0)
+        # Loops go around a single region
+        self.assertEqual([signed_area(p) for p in sharing_vertex.paths()], [4.0, 4.0])
+
+    def test_covered_shapes_are_removed(self):
+        """ Tests that a shape inside another one and touching it is removed
+        """
+
+        shapes_union = unite([square(0.0, 0.0, 4.0), square(0.0, 1.0, 1.0)])
+
+        self.assertEqual(len(shapes_union.paths()), 1)
+        self.assertAlmostEqual(signed_area(shapes_union.paths()[0]), 16.0)
+
+    def test_equal_shapes(self):
+        """ Tests that equal shapes are united in one
+        """
+
+        shapes_union = unite([square(0.0, 0.0, 2.0), square(0.0, 0.0, 2.0)])
+
+        self.assertEqual(shapes_union.paths(), [square(0.0, 0.0, 2.0)])
+
+    def test_shape_overlapping_hole(self):
+        """ Tests that a shape inside an outline and crossing a hole is united with the hole, while
+        an island inside the hole is kept
+        """
+
+        outer = square(0.0, 0.0, 10.0)
+        hole = square(2.0, 2.0, 4.0)
+        island = square(3.0, 3.0, 1.0)
+        # Nested in the outline, so it is a hole too
+        shape = list(reversed(square(1.0, 5.0, 2.0)))
+
+        shapes_union = unite([outer, hole, island, shape])
+
+        self.assertEqual(len(shapes_union.paths()), 3)
+        self.assertIs(shapes_union.paths()[0], outer)
+        self.assertAlmostEqual(signed_area(shapes_union.paths()[1]), -19.0)
+        self.assertIs(shapes_union.paths()[2], island)
+
+    def test_overlapping_shapes_with_rounding_errors(self): # pylint: disable=invalid-name
+        """ Tests that shapes crossing at points computed with rounding errors are not lost
+        """
+
+        rectangle = [(9.0, 2.0), (9.0, 11.0), (19.0, 11.0), (19.0, 2.0), (9.0, 2.0)]
+        diamond = [(20.042073741842223, 7.0), (16.0, 11.000106205530152),
+                   (12.193288813015021, 7.000000000000001),
+                   (15.999999999999998, -1.6828024015166214), (20.042073741842223, 7.0)]
+
+        shapes_union = unite([rectangle, diamond])
+
+        self.assertEqual(len(shapes_union.paths()), 1)
+        self.assertGreater(abs(signed_area(shapes_union.paths()[0])), 90.0)
+        self.assertEqual(shapes_union.unclosed_paths(), 0)
+
+    def test_unclosed_boundary_keeps_shapes(self): # pylint: disable=invalid-name
+        """ Tests that shapes whose union boundary cannot be closed are returned unchanged
+        """
+
+        class BrokenBoundaryUnion(ShapesUnion): # pylint: disable=too-few-public-methods
+            """ Loses a segment of the boundary, as numerical errors could do
+            """
+
+            def trace_loops(self):
+                """ Removes a segment of the boundary, then joins the others
+                """
+
+                del self.edges[sorted(self.edges)[0]]
+                return ShapesUnion.trace_loops(self)
+
+        first = square(0.0, 0.0, 4.0)
+        second = square(2.0, 2.0, 4.0)
+        separate = square(10.0, 10.0, 1.0)
+        shapes_union = BrokenBoundaryUnion([first, second, separate], 0.1)
+        shapes_union.unite_shapes()
+
+        self.assertEqual(shapes_union.paths(), [first, second, separate])
+        self.assertEqual(shapes_union.unclosed_paths(), 2)
+        self.assertEqual(shapes_union.united_paths(), 0)
+
+    def test_many_shapes(self):
+        """ Tests the union of a grid of overlapping circles
+        """
+
+        circles = []
+        for i in range(10):
+            for j in range(10):
+                center = (i * 1.5, j * 1.5)
+                circle = [(center[0] + math.cos(2 * math.pi * k / 16),
+                           center[1] + math.sin(2 * math.pi * k / 16)) for k in range(16)]
+                circles.append(circle + [circle[0]])
+
+        shapes_union = unite(circles)
+
+        # The outer contour and one hole between each four circles
+        areas = sorted(signed_area(p) for p in shapes_union.paths())
+        self.assertEqual(len(areas), 1 + 9 * 9)
+        self.assertTrue(all(area < 0 for area in areas[:-1]))
+        self.assertTrue(areas[-1] > 100 * signed_area(circles[0]) - 9 * 10 * 2 * 0.5)
+        for path in shapes_union.paths():
+            self.assertEqual(path[0], path[-1])
+            self.assertEqual(path_self_intersections(path), [])
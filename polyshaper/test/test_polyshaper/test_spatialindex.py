@@ -0,0 +1,181 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Spatial index tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import unittest
+from polyshaper.spatialindex import GridIndex, bounding_box, box_contains, boxes_overlap, grid_cell_size, kd_partition # pylint: disable=import-error,no-name-in-module
+
+class GridIndexTest(unittest.TestCase):
+    """ Tests for the grid spatial index and the bounding box functions
+    """
+
+    def test_bounding_box(self):
+        """ Tests the bounding box of a set of points
+        """
+
+        self.assertEqual(bounding_box([(1.0, 5.0), (-2.0, 3.0), (4.0, -1.0)]),
+                         (-2.0, -1.0, 4.0, 5.0))
+
+    def test_box_contains(self):
+        """ Tests the containment test between boxes
+        """
+
+        self.assertTrue(box_contains((0.0, 0.0, 10.0, 10.0), (1.0, 1.0, 2.0, 2.0)))
+        self.assertTrue(box_contains((0.0, 0.0, 10.0, 10.0), (0.0, 0.0, 10.0, 10.0)))
+        self.assertFalse(box_contains((1.0, 1.0, 2.0, 2.0), (0.0, 0.0, 10.0, 10.0)))
+        self.assertFalse(box_contains((0.0, 0.0, 10.0, 10.0), (5.0, 5.0, 11.0, 6.0)))
+
+    def test_boxes_overlap(self):
+        """ Tests the overlap test between boxes
+        """
+
+        self.assertTrue(boxes_overlap((0.0, 0.0, 2.0, 2.0), (1.0, 1.0, 3.0, 3.0)))
+        self.assertTrue(boxes_overlap((0.0, 0.0, 2.0, 2.0), (2.0, 0.0, 3.0, 1.0)))
+        self.assertFalse(boxes_overlap((0.0, 0.0, 2.0, 2.0), (2.5, 0.0, 3.0, 1.0)))
+        self.assertFalse(boxes_overlap((0.0, 0.0, 2.0, 2.0), (0.0, 3.0, 2.0, 4.0)))
+
+    def test_grid_cell_size(self):
+        """ Tests that the cell size depends on the region covered by boxes and their size
+        """
+
+        # 100 boxes of size 1 in a 100x100 region: 10x10 cells
+        boxes = [(i * 11.0, j * 11.0, i * 11.0 + 1.0, j * 11.0 + 1.0)
+                 for i in range(10) for j in range(10)]
+        self.assertAlmostEqual(grid_cell_size(boxes), 10.0)
+        # Cells are never smaller than the average box
+        self.assertAlmostEqual(grid_cell_size([(0.0, 0.0, 10.0, 10.0)] * 4), 10.0)
+        # Default size for degenerate boxes
+        self.assertEqual(grid_cell_size([(1.0, 1.0, 1.0, 1.0)]), 1.0)
+        self.assertEqual(grid_cell_size([]), 1.0)
+
+    def test_query_returns_items_in_overlapped_cells(self): # pylint: disable=invalid-name
+        """ Tests that queries return items whose box is in the cells overlapped by the query
+        """
+
+        index = GridIndex(1.0)
+        index.insert("a", (0.1, 0.1, 0.5, 0.5))
+        index.insert("b", (0.2, 0.2, 3.5, 0.4))
+        index.insert("c", (5.5, 5.5, 5.6, 5.6))
+        index.insert_point("d", (-0.5, -0.5))
+
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.query((0.0, 0.0, 0.9, 0.9)), set(["a", "b"]))
+        self.assertEqual(index.query((3.0, 0.0, 3.1, 0.1)), set(["b"]))
+        self.assertEqual(index.query((-1.0, -1.0, 10.0, 10.0)), set(["a", "b", "c", "d"]))
+        self.assertEqual(index.query_point((-0.9, -0.1)), set(["d"]))
+        self.assertEqual(index.query_point((7.0, 7.0)), set())
+
+    def test_remove(self):
+        """ Tests that removed items are not returned anymore
+        """
+
+        index = GridIndex(1.0)
+        index.insert("a", (0.1, 0.1, 2.5, 0.5))
+        index.insert("b", (0.2, 0.2, 0.4, 0.4))
+
+        self.assertEqual(index.get_box("a"), (0.1, 0.1, 2.5, 0.5))
+        index.remove("a")
+        index.remove("z")
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.query((0.0, 0.0, 3.0, 1.0)), set(["b"]))
+
+    def test_nearest(self):
+        """ Tests the search of the item nearest to a point
+        """
+
+        index = GridIndex(1.0)
+        index.insert_point("a", (0.5, 0.5))
+        index.insert_point("b", (3.5, 0.5))
+        index.insert("c", (10.0, 10.0, 20.0, 20.0))
+
+        self.assertEqual(index.nearest((1.0, 0.5)), (0.25, "a"))
+        self.assertEqual(index.nearest((3.0, 0.5)), (0.25, "b"))
+        self.assertEqual(index.nearest((15.0, 15.0)), (0.0, "c"))
+        self.assertEqual(index.nearest((1.0, 0.5), lambda item: item != "a"), (6.25, "b"))
+        self.assertEqual(index.nearest((1.0, 0.5), lambda item: item != "a", 6.0), None)
+        self.assertEqual(index.nearest((1.0, 0.5), item_squared_distance=lambda p, i: 1.0),
+                         (1.0, "a"))
+        self.assertEqual(GridIndex(1.0).nearest((0.0, 0.0)), None)
+
+    def test_nearest_far_away(self):
+        """ Tests that the nearest item is found also when it is many cells away
+        """
+
+        index = GridIndex(1.0)
+        index.insert_point("a", (100.5, -50.5))
+        index.insert_point("b", (0.5, 0.5))
+
+        self.assertEqual(index.nearest((90.0, -40.0), lambda item: item != "b")[1], "a")
+
+    def test_nearest_verified(self):
+        """ Tests that items rejected by the verify function are skipped and that it is only called
+        for items nearer than the best one
+        """
+
+        index = GridIndex(1.0)
+        index.insert_point("a", (0.5, 0.5))
+        index.insert_point("b", (3.5, 0.5))
+        index.insert_point("c", (8.5, 0.5))
+        verified = []
+
+        def verify(item):
+            """ Rejects a
+            """
+
+            verified.append(item)
+            return item != "a"
+
+        self.assertEqual(index.nearest((1.0, 0.5), verify=verify), (6.25, "b"))
+        self.assertEqual(sorted(verified), ["a", "b"])
+
+    def test_segment_cells(self):
+        """ Tests the cells overlapped by a segment, in order from its start
+        """
+
+        index = GridIndex(1.0)
+
+        self.assertEqual(list(index.segment_cells((0.5, 0.5), (0.7, 0.2))), [(0, 0)])
+        self.assertEqual(list(index.segment_cells((0.5, 0.5), (2.5, 0.5))),
+                         [(0, 0), (1, 0), (2, 0)])
+        self.assertEqual(list(index.segment_cells((0.5, 2.5), (0.5, 0.5))),
+                         [(0, 2), (0, 1), (0, 0)])
+        self.assertEqual(list(index.segment_cells((2.5, 0.2), (0.5, 1.2))),
+                         [(2, 0), (1, 0), (0, 0), (0, 1)])
+        # Passing through the corner of cells
+        self.assertEqual(list(index.segment_cells((0.5, 0.5), (1.5, 1.5))),
+                         [(0, 0), (0, 1), (1, 1)])
+
+    def test_query_segment(self):
+        """ Tests that the items near a segment are returned once, from the start of the segment
+        """
+
+        index = GridIndex(1.0)
+        index.insert("a", (2.0, 0.0, 3.5, 0.5))
+        index.insert("b", (0.2, 0.2, 0.3, 0.3))
+        index.insert("c", (0.2, 5.2, 0.3, 5.3))
+
+        self.assertEqual(list(index.query_segment((0.5, 0.5), (3.5, 0.5))), ["b", "a"])
+        self.assertEqual(list(index.query_segment((3.5, 0.5), (0.5, 0.5))), ["a", "b"])
+
+    def test_kd_partition(self):
+        """ Tests that points are split in compact groups of the given maximum size
+        """
+
+        # Two rows of points far apart
+        points = [(float(i), 0.0) for i in range(4)] + [(float(i), 100.0) for i in range(4)]
+
+        self.assertEqual(kd_partition(points, 8), [range(8)])
+        self.assertEqual(sorted(kd_partition(points, 4)), [[0, 1, 2, 3], [4, 5, 6, 7]])
+        groups = kd_partition(points, 3)
+        self.assertEqual(sorted(i for group in groups for i in group), range(8))
+        self.assertTrue(all(len(group) <= 3 for group in groups))
+        self.assertEqual(kd_partition([], 3), [])
@@ -0,0 +1,110 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper working time estimation tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+import unittest
+from polyshaper.machine import machine_factory # pylint: disable=import-error,no-name-in-module
+from polyshaper.timeestimation import ConstantSpeedTimeEstimator, TrapezoidalTimeEstimator # pylint: disable=import-error,no-name-in-module
+from polyshaper.timeestimation import time_estimator_for_machine, trapezoid_time # pylint: disable=import-error,no-name-in-module
+
+class TimeEstimationTest(unittest.TestCase):
+    """ Tests for the working time estimators
+    """
+
+    def test_estimator_for_unknown_machine(self):
+        """ Tests that the constant speed estimator is used when the machine is not known
+        """
+
+        self.assertIsInstance(time_estimator_for_machine(None), ConstantSpeedTimeEstimator)
+
+    def test_estimator_for_machine(self):
+        """ Tests that the trapezoidal estimator uses the parameters of the machine
+        """
+
+        machine = machine_factory("P400")
+        estimator = time_estimator_for_machine(machine)
+
+        self.assertIsInstance(estimator, TrapezoidalTimeEstimator)
+        self.assertEqual(estimator.acceleration, machine.acceleration())
+        self.assertEqual(estimator.junction_deviation, machine.junction_deviation())
+
+    def test_constant_speed_estimate(self):
+        """ Tests the estimate at constant speed
+        """
+
+        path = [(0, 0), (10, 0), (10, 10), (0, 10)]
+
+        self.assertAlmostEqual(ConstantSpeedTimeEstimator().estimate(path, 2.0), 15.0)
+
+    def test_trapezoid_time_with_cruise(self):
+        """ Tests the time of a movement that reaches the nominal speed
+        """
+
+        # 1s to accelerate (5mm), 1s to decelerate (5mm), 10mm at 10mm/s
+        self.assertAlmostEqual(trapezoid_time(20.0, 0.0, 10.0, 0.0, 10.0), 3.0)
+
+    def test_trapezoid_time_triangular(self):
+        """ Tests the time of a movement too short to reach the nominal speed
+        """
+
+        # Accelerates for 5mm (1s) and decelerates for 5mm (1s), reaching 10mm/s
+        self.assertAlmostEqual(trapezoid_time(10.0, 0.0, 100.0, 0.0, 10.0), 2.0)
+
+    def test_trapezoidal_estimate_of_empty_path(self): # pylint: disable=invalid-name
+        """ Tests that the estimate is 0 for empty paths or paths with a single point
+        """
+
+        self.assertEqual(TrapezoidalTimeEstimator(10.0, 0.01).estimate([], 10.0), 0.0)
+        self.assertEqual(TrapezoidalTimeEstimator(10.0, 0.01).estimate([(1, 1)], 10.0), 0.0)
+
+    def test_trapezoidal_estimate_of_straight_path(self): # pylint: disable=invalid-name
+        """ Tests that the tool does not slow down on collinear segments
+        """
+
+        path = [(float(x), 0.0) for x in range(21)]
+
+        estimate = TrapezoidalTimeEstimator(10.0, 0.01).estimate(path, 10.0)
+
+        self.assertAlmostEqual(estimate, 3.0)
+
+    def test_trapezoidal_estimate_stops_on_inversion(self): # pylint: disable=invalid-name
+        """ Tests that the tool stops when the direction of movement is inverted
+        """
+
+        path = [(0.0, 0.0), (10.0, 0.0), (0.0, 0.0)]
+
+        estimate = TrapezoidalTimeEstimator(10.0, 0.01).estimate(path, 100.0)
+
+        self.assertAlmostEqual(estimate, 4.0)
+
+    def test_trapezoidal_estimate_slows_down_at_corners(self): # pylint: disable=invalid-name
+        """ Tests that corners take more time than straight lines with the same length
+        """
+
+        straight = [(0.0, 0.0), (10.0, 0.0), (20.0, 0.0)]
+        corner = [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0)]
+
+        straight_time = TrapezoidalTimeEstimator(100.0, 0.01).estimate(straight, 50.0)
+        corner_time = TrapezoidalTimeEstimator(100.0, 0.01).estimate(corner, 50.0)
+
+        self.assertGreater(corner_time, straight_time)
+        self.assertGreater(straight_time, 20.0 / 50.0)
+
+    def test_trapezoidal_estimate_not_less_than_constant_speed(self): # pylint: disable=invalid-name
+        """ Tests that the trapezoidal estimate is never less than the constant speed one
+        """
+
+        path = [(0.0, 0.0), (3.0, 1.0), (7.0, -2.0), (7.5, 0.0), (1.0, 8.0), (0.0, 0.0)]
+
+        trapezoidal = TrapezoidalTimeEstimator(200.0, 0.02, 2).estimate(path, 25.0)
+        constant = ConstantSpeedTimeEstimator().estimate(path, 25.0)
+
+        self.assertGreaterEqual(trapezoidal, constant)
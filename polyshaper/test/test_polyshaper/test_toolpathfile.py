@@ -0,0 +1,130 @@
+#!/usr/bin/env python2
+# -*- encoding:utf-8 -*-
+
+"""
+Polyshaper binary tool path files tests
+
+NOTE: to run this test standalone you must add ../plugin to the PYTHONPATH shell
+variable tro to sys.path as well as the global inkscape plugin directory. If run
+through testAll.py, there is no need to add directories (they are inserted by
+that script)
+"""
+
+try:
+    import __builtin__ as builtins # pylint: disable=import-error
+except ImportError:
+    import builtins # pylint: disable=import-error
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from polyshaper.errors import PolyshaperIOError # pylint: disable=import-error,no-name-in-module
+from polyshaper.toolpathfile import HEADER, ToolPathFile, write_tool_path # pylint: disable=import-error,no-name-in-module
+
+class ToolPathFileTest(unittest.TestCase):
+    """ Tests for writing and reading binary tool path files
+    """
+
+    def setUp(self):
+        """ Setup for tests
+        """
+
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "path.pstp")
+
+    def tearDown(self):
+        """ Cleanup after tests
+        """
+
+        shutil.rmtree(self.directory)
+
+    def write(self, path, double_precision=False):
+        """ Writes the given path to the test file
+        """
+
+        with open(self.filename, "wb") as outfile:
+            write_tool_path(outfile, path, double_precision)
+
+    def test_file_layout(self):
+        """ Tests the header and the coordinates of the written file
+        """
+
+        self.write([(1.0, 2.0), (3.5, -4.0)])
+
+        with open(self.filename, "rb") as infile:
+            data = infile.read()
+
+        self.assertEqual(len(data), HEADER.size + 4 * 4)
+        self.assertEqual(HEADER.unpack_from(data, 0), (b"PSTP", 1, 4, 2, 2))
+        self.assertEqual(struct.unpack_from("<4f", data, HEADER.size), (1.0, 2.0, 3.5, -4.0))
+
+    def test_read_single_precision(self):
+        """ Tests reading a float32 file
+        """
+
+        path = [(0.0, 0.0), (10.5, 3.25), (0.0, 0.0)]
+        self.write(path)
+
+        with ToolPathFile(self.filename) as toolpath:
+            self.assertEqual(toolpath.num_points(), 3)
+            self.assertEqual(toolpath.dimensions(), 2)
+            self.assertEqual(toolpath.point(1), (10.5, 3.25))
+            self.assertEqual(toolpath.path(), path)
+
+    def test_read_double_precision(self):
+        """ Tests that float64 files keep the exact coordinates
+        """
+
+        path = [(0.1, 0.2), (1.0 / 3.0, 2.0 / 3.0)]
+        self.write(path, True)
+
+        with ToolPathFile(self.filename) as toolpath:
+            self.assertEqual(list(toolpath.coordinates()), [0.1, 0.2, 1.0 / 3.0, 2.0 / 3.0])
+            self.assertEqual(toolpath.path(), path)
+
+    def test_empty_path(self):
+        """ Tests writing and reading an empty path
+        """
+
+        self.write([])
+
+        with ToolPathFile(self.filename) as toolpath:
+            self.assertEqual(toolpath.num_points(), 0)
+            self.assertEqual(toolpath.path(), [])
+
+    def test_point_out_of_range(self):
+        """ Tests that accessing a point out of range raises an exception
+        """
+
+        self.write([(1.0, 2.0)])
+
+        with ToolPathFile(self.filename) as toolpath:
+            self.assertRaises(IndexError, toolpath.point, 1)
+
+    def test_invalid_files_without_translation_function(self): # pylint: disable=invalid-name
+        """ Tests that invalid files raise PolyshaperIOError also outside of inkscape
+
+        Outside of inkscape the translation function "_" installed by inkex.localize() is missing
+        """
+
+        self.write([(1.0, 2.0), (3.0, 4.0)])
+        with open(self.filename, "rb") as infile:
+            data = infile.read()
+        truncated_filename = os.path.join(self.directory, "truncated.pstp")
+        with open(truncated_filename, "wb") as outfile:
+            outfile.write(data[:-1])
+        invalid_filename = os.path.join(self.directory, "invalid.pstp")
+        with open(invalid_filename, "wb") as outfile:
+            outfile.write(b"XXXX" + data[4:])
+        missing_filename = os.path.join(self.directory, "missing.pstp")
+
+        translation_function = builtins.__dict__.pop("_", None)
+        try:
+            for filename in [truncated_filename, invalid_filename, missing_filename]:
+                with self.assertRaises(PolyshaperIOError) as context:
+                    ToolPathFile(filename)
+                self.assertIn(filename, context.exception.to_string())
+        finally:
+            if translation_function is not None:
+                builtins._ = translation_function
@@ -10,9 +10,11 @@ through testAll.py, there is no need to add directories (they are inserted by
 that script)
 """
 
+import math
 import unittest
 from inkex import etree # pylint: disable=import-error
-from polyshaper.toolpathpainter import ToolPathPainter # pylint: disable=import-error,no-name-in-module
+from polyshaper.helpers import point_segment_squared_distance # pylint: disable=import-error,no-name-in-module
+from polyshaper.toolpathpainter import ToolPathPainter, decimate_path # pylint: disable=import-error,no-name-in-module
 
 class ToolPathPainterTest(unittest.TestCase):
     """ Tests for the class drawing the tool path
@@ -66,3 +68,65 @@ class ToolPathPainterTest(unittest.TestCase):
 
         self.assertEqual(root_element[0].get("d"),
                          "M 0.0,0.0 L 50.0,25.0 100.0,0.0 0.0,50.0")
+
+    def test_decimated_path_coordinates(self): # pylint: disable=invalid-name
+        """ Tests that points not changing the drawing are not drawn when a tolerance is given
+        """
+        path = [(0, 0), (100, 0.002), (200, 0), (0, 0.004), (0, 100)]
+        painter = ToolPathPainter(path)
+        root_element = etree.Element("root")
+        factor = 0.5
+
+        painter.paint(root_element, factor, "255,0,0", 0.01)
+
+        # The path going back on itself is kept
+        self.assertEqual(root_element[0].get("d"),
+                         "M 0.0,0.0 L 0.0,0.0 100.0,0.0 0.0,0.002 0.0,50.0")
+        self.assertEqual(painter.painted_points(), 4)
+
+    def test_decimate_path(self):
+        """ Tests that decimated points are nearer than the tolerance to the decimated path
+        """
+        circle = [(100.0 * math.cos(2 * math.pi * i / 1000),
+                   100.0 * math.sin(2 * math.pi * i / 1000)) for i in range(1001)]
+
+        decimated = decimate_path(circle, 0.1)
+
+        self.assertEqual(decimate_path(circle, 0.0), circle)
+        self.assertEqual(decimated[0], circle[0])
+        self.assertEqual(decimated[-1], circle[-1])
+        self.assertTrue(len(decimated) < 100)
+        for point in circle:
+            self.assertTrue(min(point_segment_squared_distance(point, decimated[i - 1],
+                                                               decimated[i])
+                                for i in range(1, len(decimated))) <= 0.1 ** 2)
+
+    def test_path_data_is_cached(self):
+        """ Tests that the path data is generated once for each factor and tolerance
+        """
+        path = [(0, 0), (100, 0.002), (200, 0)]
+        painter = ToolPathPainter(path)
+
+        data = painter.path_data(0.5)
+
+        self.assertIs(painter.path_data(0.5), data)
+        self.assertEqual(painter.painted_points(), 3)
+        self.assertEqual(painter.path_data(0.5, 0.01), "M 0.0,0.0 L 0.0,0.0 100.0,0.0")
+        self.assertEqual(painter.painted_points(), 2)
+        self.assertEqual(painter.path_data(1.0), "M 0.0,0.0 L 0.0,0.0 100.0,0.002 200.0,0.0")
+
+    def test_path_element_is_updated(self):
+        """ Tests that the path with the given id is updated instead of added again
+        """
+        root_element = etree.Element("root")
+        ToolPathPainter([(1, 2), (3, 4)]).paint(root_element, 1.0, "255,0,0", element_id="tp")
+
+        ToolPathPainter([(5, 6)]).paint(root_element, 1.0, "255,0,0", element_id="tp")
+
+        self.assertEqual(len(root_element), 1)
+        self.assertEqual(root_element[0].get("id"), "tp")
+        self.assertEqual(root_element[0].get("d"), "M 0.0,0.0 L 5.0,6.0")
+
+        ToolPathPainter([]).paint(root_element, 1.0, "255,0,0", element_id="tp")
+
+        self.assertEqual(len(root_element), 0)
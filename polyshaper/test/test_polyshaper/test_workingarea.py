@@ -51,6 +51,46 @@ class WorkingAreaGeneratorTest(unittest.TestCase):
         self.assertEqual(root[0].tag, "svg")
         self.assertEqual(root[0].get("id"), "wId")
 
+    def test_upsert_keeps_unchanged_working_area(self): # pylint: disable=invalid-name
+        """ Tests that an identical working area is kept, together with the elements inside it
+        """
+        root = etree.Element("root")
+        first_generator = WorkingAreaGenerator(self.to_uu, "wId")
+        first_generator.set_size(400, 300)
+        first_generator.upsert(root)
+        old_area = root[0]
+        etree.SubElement(old_area, "path", {'id': first_generator.child_id("toolpath")})
+        etree.SubElement(old_area, "path")
+
+        generator = WorkingAreaGenerator(self.to_uu, "wId")
+        generator.set_size(400, 300)
+        generator.upsert(root)
+
+        self.assertEqual(len(root), 1)
+        self.assertIs(root[0], old_area)
+        self.assertIs(generator.get_element(), old_area)
+        self.assertEqual(len(old_area), 4)
+        self.assertEqual(old_area[3].get("id"), "wId-toolpath")
+
+    def test_upsert_replaces_changed_working_area(self): # pylint: disable=invalid-name
+        """ Tests that a working area with different dimensions is replaced in place
+        """
+        root = etree.Element("root")
+        etree.SubElement(root, "g")
+        first_generator = WorkingAreaGenerator(self.to_uu, "wId")
+        first_generator.set_size(400, 300)
+        first_generator.upsert(root)
+        etree.SubElement(root, "g")
+
+        generator = WorkingAreaGenerator(self.to_uu, "wId")
+        generator.set_size(400, 200)
+        generator.upsert(root)
+
+        self.assertEqual(len(root), 3)
+        self.assertIs(root[1], generator.get_element())
+        self.assertEqual(root[1].get("height"), "400.0")
+        self.assertEqual(len(root[1]), 3)
+
     def test_add_working_area_style(self):
         """ Test that the added working area has the correct style
         """
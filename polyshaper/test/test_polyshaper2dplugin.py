@@ -33,7 +33,8 @@ class Polyshaper2DTest(unittest.TestCase):
             "-m", "4",
             "-t", "pippo",
             "-p", "True",
-            "-a", "True"
+            "-a", "True",
+            "-k", "0.5"
             ])[0]
 
         self.assertEqual(options.shapename, "pippo")
@@ -46,6 +47,7 @@ class Polyshaper2DTest(unittest.TestCase):
         self.assertEqual(options.machine_type, "pippo")
         self.assertEqual(options.draw_toolpath, True)
         self.assertEqual(options.auto_close_path, True)
+        self.assertEqual(options.kerf, 0.5)
 
     def test_long_form_commandline(self):
         """ Tests that all expected long commandline parameters are accepted
@@ -63,7 +65,19 @@ class Polyshaper2DTest(unittest.TestCase):
             "--margin", "4",
             "--type", "pippo",
             "--draw-toolpath", "True",
+            "--preview-tolerance", "0.5",
             "--auto-close-path", "True",
+            "--union-shapes", "False",
+            "--kerf", "0.5",
+            "--holes-first", "False",
+            "--join-strategy", "greedy",
+            "--segment-bridges", "False",
+            "--avoid-crossings", "False",
+            "--join-workers", "4",
+            "--job-cache-size", "10",
+            "--instrument", "True",
+            "--profile", "True",
+            "--profile-collapsed", "True",
             "--active-tab", "pluto"
             ])[0]
 
@@ -76,5 +90,17 @@ class Polyshaper2DTest(unittest.TestCase):
         self.assertEqual(options.margin, 4)
         self.assertEqual(options.machine_type, "pippo")
         self.assertEqual(options.draw_toolpath, True)
+        self.assertEqual(options.preview_tolerance, 0.5)
         self.assertEqual(options.auto_close_path, True)
+        self.assertEqual(options.union_shapes, False)
+        self.assertEqual(options.kerf, 0.5)
+        self.assertEqual(options.holes_first, False)
+        self.assertEqual(options.join_strategy, "greedy")
+        self.assertEqual(options.segment_bridges, False)
+        self.assertEqual(options.avoid_crossings, False)
+        self.assertEqual(options.join_workers, 4)
+        self.assertEqual(options.job_cache_size, 10)
+        self.assertEqual(options.instrument, True)
+        self.assertEqual(options.profile, True)
+        self.assertEqual(options.profile_collapsed, True)
         self.assertEqual(options.active_tab, "pluto")
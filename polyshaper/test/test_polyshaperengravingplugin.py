@@ -12,8 +12,14 @@ that script)
 
 # NOTE: Find a way to tell pylint that function names in tests can be arbitrarily long
 
+import os
+import shutil
+import tempfile
 import unittest
-from polyshaperengravingplugin import PolyshaperEngraving # pylint: disable=no-name-in-module
+from inkex import etree # pylint: disable=import-error
+from polyshaper.jobcache import JobCache # pylint: disable=import-error,no-name-in-module
+from polyshaper.toolpathfile import ToolPathFile # pylint: disable=import-error,no-name-in-module
+from polyshaperengravingplugin import PolyshaperEngraving, generate_engraving_gcode # pylint: disable=no-name-in-module
 
 class PolyshaperEngravingTest(unittest.TestCase):
     """ Tests for the main class of the PolyshaperEngraving inkscape plugin
@@ -48,7 +54,11 @@ class PolyshaperEngravingTest(unittest.TestCase):
             "--dim-x", "13",
             "--dim-y", "17",
             "--depth-z", "42",
-            "--active-tab", "pluto"
+            "--active-tab", "pluto",
+            "--instrument", "True",
+            "--job-cache-size", "10",
+            "--profile", "True",
+            "--profile-collapsed", "True"
             ])[0]
 
         self.assertEqual(options.filename, "pippo")
@@ -56,3 +66,94 @@ class PolyshaperEngravingTest(unittest.TestCase):
         self.assertEqual(options.dim_y, 17)
         self.assertEqual(options.depth_z, 42)
         self.assertEqual(options.active_tab, "pluto")
+        self.assertEqual(options.instrument, True)
+        self.assertEqual(options.job_cache_size, 10)
+        self.assertEqual(options.profile, True)
+        self.assertEqual(options.profile_collapsed, True)
+
+    def test_generate_engraving_gcode_with_custom_parameters(self): #pylint: disable=invalid-name
+        """ Tests that the engraving pipeline can be run with parameters different from defaults
+        """
+
+        root = etree.Element("root")
+        element = etree.SubElement(root, "{http://www.w3.org/2000/svg}path",
+                                   {"d": "M 0,0 L 10,0 L 10,10"})
+        directory = tempfile.mkdtemp()
+        try:
+            (filename, tool_paths) = generate_engraving_gcode([element], lambda x: x,
+                                                              os.path.join(directory, "pippo"),
+                                                              3.0, discretization_step=5.0,
+                                                              safe_z=20.0)
+
+            self.assertEqual(filename, os.path.join(directory, "pippo.gcode"))
+            self.assertTrue(os.path.isfile(filename))
+            self.assertEqual(len(tool_paths), 1)
+            # The two segments are divided in two parts each
+            self.assertEqual(len(tool_paths[0]), 5)
+            with open(filename) as gcode_file:
+                self.assertIn("Z20.000", gcode_file.read())
+        finally:
+            shutil.rmtree(directory)
+
+    def test_generate_engraving_gcode_with_job_cache(self): #pylint: disable=invalid-name
+        """ Tests that the same job is copied from the job cache
+        """
+
+        root = etree.Element("root")
+        element = etree.SubElement(root, "{http://www.w3.org/2000/svg}path",
+                                   {"d": "M 0,0 L 10,0 L 10,10 M 20,20 L 30,20"})
+        directory = tempfile.mkdtemp()
+        try:
+            job_cache = JobCache(os.path.join(directory, "cache"), 1024 * 1024)
+            (filename, tool_paths) = generate_engraving_gcode([element], lambda x: x,
+                                                              os.path.join(directory, "first"),
+                                                              3.0, job_cache=job_cache)
+            self.assertEqual(len(job_cache.entries()), 1)
+
+            (cached_filename, cached_tool_paths) = \
+                generate_engraving_gcode([element], lambda x: x, os.path.join(directory, "second"),
+                                         3.0, job_cache=job_cache)
+
+            self.assertEqual(cached_filename, os.path.join(directory, "second.gcode"))
+            self.assertEqual(cached_tool_paths, tool_paths)
+            with open(filename) as gcode_file:
+                with open(cached_filename) as cached_gcode_file:
+                    self.assertEqual(cached_gcode_file.read(), gcode_file.read())
+
+            generate_engraving_gcode([element], lambda x: x, os.path.join(directory, "third"), 4.0,
+                                     job_cache=job_cache)
+            self.assertEqual(len(job_cache.entries()), 2)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_corrupted_job_cache_entry_is_regenerated(self): #pylint: disable=invalid-name
+        """ Tests that a job whose cached files are truncated is generated again
+        """
+
+        root = etree.Element("root")
+        element = etree.SubElement(root, "{http://www.w3.org/2000/svg}path",
+                                   {"d": "M 0,0 L 10,0 L 10,10 M 20,20 L 30,20"})
+        directory = tempfile.mkdtemp()
+        try:
+            job_cache = JobCache(os.path.join(directory, "cache"), 1024 * 1024)
+            (filename, tool_paths) = generate_engraving_gcode([element], lambda x: x,
+                                                              os.path.join(directory, "first"),
+                                                              3.0, job_cache=job_cache)
+            key = job_cache.entries()[0][0]
+            toolpaths_filename = job_cache.lookup(key).filename("toolpaths")
+            with open(toolpaths_filename, "r+b") as toolpaths_file:
+                toolpaths_file.truncate(os.path.getsize(toolpaths_filename) - 8)
+
+            (regenerated_filename, regenerated_tool_paths) = \
+                generate_engraving_gcode([element], lambda x: x, os.path.join(directory, "second"),
+                                         3.0, job_cache=job_cache)
+
+            self.assertEqual(regenerated_tool_paths, tool_paths)
+            with open(filename) as gcode_file:
+                with open(regenerated_filename) as regenerated_gcode_file:
+                    self.assertEqual(regenerated_gcode_file.read(), gcode_file.read())
+            # The corrupted entry is replaced by a valid one
+            with ToolPathFile(job_cache.lookup(key).filename("toolpaths")) as path_file:
+                self.assertEqual(path_file.num_points(), sum(len(p) for p in tool_paths))
+        finally:
+            shutil.rmtree(directory)
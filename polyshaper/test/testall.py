@@ -29,6 +29,7 @@ from test_polyshaper.test_workingarea import WorkingAreaGeneratorTest # pylint:
 from test_polyshaper.test_pathsextraction import FlattenBezierTest # pylint: disable=wrong-import-position
 from test_polyshaper.test_pathsextraction import PathsExtractorTest # pylint: disable=wrong-import-position
 from test_polyshaper.test_pathsunion import PathsJoinerTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_pathsunion import ParallelPathsJoinerTest # pylint: disable=wrong-import-position
 from test_polyshaper.test_toolpaths import EngravingToolPathsGeneratorTest # pylint: disable=wrong-import-position
 from test_polyshaper.test_toolpaths import CuttingToolPathsGeneratorTest # pylint: disable=wrong-import-position
 from test_polyshaper.test_gcode import EngravingGCodeGeneratorTest # pylint: disable=wrong-import-position
@@ -39,6 +40,21 @@ from test_polyshaper.test_pathinfo import PathInfoTest # pylint: disable=wrong-i
 from test_polyshaper.test_toolpathpainter import ToolPathPainterTest # pylint: disable=wrong-import-position
 from test_polyshaper.test_border import BorderTest # pylint: disable=wrong-import-position
 from test_polyshaper.test_border import BorderPainterTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_timeestimation import TimeEstimationTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_gcodeanalysis import GCodeAnalyzerTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_toolpathfile import ToolPathFileTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_compression import CompressionTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_batch import BatchTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_instrumentation import InstrumentationTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_profiling import ProfilingTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_intersections import IntersectionsTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_intersections import SegmentIndexTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_pathsoffset import PathsOffsetterTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_shapesunion import ShapesUnionTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_spatialindex import GridIndexTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_containment import ContainmentTreeTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_pathgeometry import PathGeometryTest # pylint: disable=wrong-import-position
+from test_polyshaper.test_jobcache import JobCacheTest # pylint: disable=wrong-import-position
 
 ### ... and add test suites here
 TEST_SUITES = [
@@ -48,6 +64,7 @@ TEST_SUITES = [
     FlattenBezierTest,
     PathsExtractorTest,
     PathsJoinerTest,
+    ParallelPathsJoinerTest,
     EngravingToolPathsGeneratorTest,
     CuttingToolPathsGeneratorTest,
     EngravingGCodeGeneratorTest,
@@ -57,7 +74,22 @@ TEST_SUITES = [
     PathInfoTest,
     ToolPathPainterTest,
     BorderTest,
-    BorderPainterTest
+    BorderPainterTest,
+    TimeEstimationTest,
+    GCodeAnalyzerTest,
+    ToolPathFileTest,
+    CompressionTest,
+    BatchTest,
+    InstrumentationTest,
+    ProfilingTest,
+    IntersectionsTest,
+    SegmentIndexTest,
+    PathsOffsetterTest,
+    ShapesUnionTest,
+    GridIndexTest,
+    ContainmentTreeTest,
+    PathGeometryTest,
+    JobCacheTest
 ]
 ################################################################################
 